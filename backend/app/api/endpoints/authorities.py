@@ -1,24 +1,49 @@
 """Authorities API endpoints for MeshPay."""
 
-from typing import Dict, List, Any
+from typing import Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Query
+from ...core.responses import ORJSONResponse
 from ...services.mesh_client import mesh_client
+from ...services.spatial_index import parse_bbox
 
 router = APIRouter()
 
 @router.get("/")
-async def list_authorities(refresh: bool = Query(False)) -> List[Dict[str, Any]]:
-    """Get list of authorities."""
-    return await mesh_client.discover(force=refresh)
+async def list_authorities(
+    refresh: bool = Query(False),
+    bbox: Optional[str] = Query(None, description="Viewport as min_x,min_y,max_x,max_y"),
+    zoom: Optional[int] = Query(None, ge=0, le=30, description="Map zoom level; low zooms are clustered"),
+) -> ORJSONResponse:
+    """Get list of authorities, optionally limited to a map viewport."""
+    if bbox is None:
+        return ORJSONResponse(await mesh_client.discover(force=refresh))
+    try:
+        box = parse_bbox(bbox)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    if refresh:
+        await mesh_client.discover(force=True)
+    view = await mesh_client.discover_in_view(box, zoom)
+    return ORJSONResponse({"bbox": list(box), "zoom": zoom, **view})
+
+@router.get("/onchain")
+async def list_onchain_authorities() -> Dict[str, Any]:
+    """Authorities registered on the MeshPay contract (in-memory, event-synced)."""
+    chain = mesh_client.chain_authorities
+    return {
+        "synced_block": chain.synced_block,
+        "version": chain.version,
+        "authorities": chain.as_dicts(),
+        "committee": mesh_client.committee(),
+    }
 
 @router.get("/{name}")
 async def get_authority(name: str) -> Dict[str, Any]:
     """Get specific authority information."""
-    authorities = await mesh_client.discover()
-    for auth in authorities:
-        if auth["name"] == name:
-            return auth
-    raise HTTPException(status_code=404, detail="Authority not found")
+    authority = await mesh_client.get_authority(name)
+    if authority is None:
+        raise HTTPException(status_code=404, detail="Authority not found")
+    return authority
 
 @router.post("/{name}/ping")
 async def ping_authority(name: str) -> Dict[str, Any]:
@@ -32,6 +57,7 @@ async def authorities_root() -> Dict[str, Any]:
         "endpoints": {
             "list": "/api/authorities/",
             "get": "/api/authorities/{name}",
+            "onchain": "/api/authorities/onchain",
             "ping": "/api/authorities/{name}/ping"
         }
     } 
\ No newline at end of file
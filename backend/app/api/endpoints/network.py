@@ -0,0 +1,73 @@
+"""Network topology and metrics API endpoints for MeshPay."""
+
+from typing import Any, Dict
+from fastapi import APIRouter, Query
+from ...services.account_state import account_indexer, account_state
+from ...services.blockchain_client import blockchain_client
+from ...services.chain_follower import chain_follower
+from ...services.mesh_client import MeshClientError, mesh_client
+from ...services.topology import network_topology
+
+router = APIRouter()
+
+async def _discovered() -> None:
+    """Seed the graph on a fresh process; later calls are answered from the discovery cache."""
+    try:
+        await mesh_client.discover()
+    except MeshClientError:
+        pass  # logged by the client; serve the last known graph
+
+@router.get("/topology")
+async def get_topology() -> Dict[str, Any]:
+    """Get the current network topology with its version."""
+    await _discovered()
+    return network_topology.topology()
+
+@router.get("/topology/changes")
+async def get_topology_changes(since: int = Query(..., ge=0, description="Last version held by the client")) -> Dict[str, Any]:
+    """Get topology changes after the given version.
+
+    Falls back to the full topology (``full: true``) when the version is no
+    longer covered by the retained change log.
+    """
+    await _discovered()
+    return network_topology.changes_since(since)
+
+@router.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """Get aggregated network metrics."""
+    await _discovered()
+    return network_topology.metrics()
+
+@router.get("/gateways")
+async def get_gateways() -> Dict[str, Any]:
+    """List the gateway bridges with their health and the shards they serve."""
+    return {
+        "primary": mesh_client.gateway_url,
+        "transport": mesh_client.transport,
+        "gateways": mesh_client.gateways.stats(),
+        "links": mesh_client.link_stats(),
+    }
+
+@router.get("/chain")
+async def get_chain() -> Dict[str, Any]:
+    """Chain head as followed by the backend: finalized block, reorgs seen, indexer progress, RPC nodes."""
+    return {
+        "follower": chain_follower.stats(),
+        "rpc": blockchain_client.pool.stats(),
+        "indexed_block": account_indexer.synced_block,
+        "account_state": account_state.stats(),
+    }
+
+@router.get("/root")
+async def network_root() -> Dict[str, Any]:
+    """Root network endpoint with available operations."""
+    return {
+        "endpoints": {
+            "topology": "/api/network/topology",
+            "changes": "/api/network/topology/changes?since={version}",
+            "metrics": "/api/network/metrics",
+            "gateways": "/api/network/gateways",
+            "chain": "/api/network/chain"
+        }
+    }
@@ -0,0 +1,74 @@
+"""Settlement API endpoints for redeeming mesh certificates on chain."""
+
+from typing import Any, Dict, List
+from fastapi import APIRouter, HTTPException
+from ...core.config import settings
+from ...core.executor import cpu_executor
+from ...models.base import SettlementCertificate
+from ...services.settlement import certificate_hashes, settlement_pipeline
+from ...services.signature_verifier import signature_verifier
+
+router = APIRouter()
+
+
+async def _hashes(certificates: List[SettlementCertificate]) -> List[str]:
+    """Certificate hashes, computed on the CPU executor for large batches."""
+    try:
+        return await cpu_executor.map(certificate_hashes, [c.model_dump() for c in certificates])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid certificate: {str(e)}")
+
+async def _validate(certificates: List[SettlementCertificate], hashes: List[str]) -> List[Dict[str, Any]]:
+    """Check authority signatures of all certificates in one batch."""
+    try:
+        return await signature_verifier.validate_certificates(
+            [(h, c.authority_signatures) for h, c in zip(hashes, certificates)]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Signature verification unavailable: {str(e)}")
+
+@router.post("/certificates", status_code=202)
+async def submit_certificates(certificates: List[SettlementCertificate]) -> Dict[str, Any]:
+    """Queue quorum certificates for batched on-chain redemption.
+
+    With ``SETTLEMENT_REQUIRE_QUORUM`` enabled, certificates whose signatures
+    do not reach a quorum of active authorities are rejected and not queued.
+    """
+    if not settlement_pipeline.enabled:
+        raise HTTPException(status_code=503, detail="Settlement signer not configured")
+
+    rejected: List[Dict[str, Any]] = []
+    hashes = await _hashes(certificates)
+    accepted = list(zip(certificates, hashes))
+    if settings.settlement_require_quorum:
+        results = await _validate(certificates, hashes)
+        accepted = [a for a, r in zip(accepted, results) if r["valid"]]
+        rejected = [r for r in results if not r["valid"]]
+        if not accepted:
+            raise HTTPException(status_code=422, detail={"message": "No certificate reached quorum", "rejected": rejected})
+
+    hashes = [settlement_pipeline.submit(c.model_dump(), h) for c, h in accepted]
+    return {"certificate_hashes": hashes, "status": "queued", "rejected": rejected}
+
+@router.post("/verify")
+async def verify_certificates(certificates: List[SettlementCertificate]) -> List[Dict[str, Any]]:
+    """Validate authority signatures without queueing the certificates."""
+    return await _validate(certificates, await _hashes(certificates))
+
+@router.get("/certificates/{certificate_hash}")
+async def get_certificate_status(certificate_hash: str) -> Dict[str, Any]:
+    """Get the settlement status of a certificate."""
+    status = settlement_pipeline.status(certificate_hash)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Certificate not tracked")
+    return {"certificate_hash": certificate_hash, **status}
+
+@router.get("/stats")
+async def get_settlement_stats() -> Dict[str, Any]:
+    """Get settlement queue and signature verification statistics."""
+    return {
+        "enabled": settlement_pipeline.enabled,
+        **settlement_pipeline.stats(),
+        "signatures": signature_verifier.stats(),
+        "cpu_executor": cpu_executor.stats(),
+    }
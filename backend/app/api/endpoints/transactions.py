@@ -1,10 +1,87 @@
 """Transactions API endpoints for MeshPay."""
 
-from typing import Dict, List, Any
-from fastapi import APIRouter
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from ...services.mesh_client import MeshClient, MeshClientError
+from ...services.transfer_journal import transfer_journal
+from ...services.tx_export import FORMATS, MEDIA_TYPES, ExportUnavailable, export_events
 
 router = APIRouter()
 
+@router.post("/transfer", status_code=202)
+async def submit_transfer(body: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    """Accept a transfer order for delivery to the mesh.
+
+    The order is validated and durably journaled, then acknowledged; delivery
+    to the gateway bridge happens in the background and survives outages.
+    """
+    try:
+        MeshClient.validate_transfer(body)
+    except MeshClientError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    journal_id = await transfer_journal.append(body)
+    return {"journal_id": journal_id, "status": "pending"}
+
+@router.get("/transfer/{journal_id}")
+async def get_transfer_status(journal_id: int) -> Dict[str, Any]:
+    """Get the delivery status of a journaled transfer."""
+    status = transfer_journal.status(journal_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Transfer not found")
+    return status
+
+def _timestamp(value: Optional[str], name: str) -> Optional[int]:
+    """Unix seconds or an ISO-8601 date / datetime (UTC unless it has an offset)."""
+    if value is None or value == "":
+        return None
+    if value.isdigit():
+        return int(value)
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid '{name}': expected unix seconds or ISO-8601") from exc
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+@router.get("/export")
+async def export_transactions(
+    since: Optional[str] = Query(None, alias="from", description="Start (inclusive): unix seconds or ISO-8601"),
+    until: Optional[str] = Query(None, alias="to", description="End (exclusive): unix seconds or ISO-8601"),
+    format: str = Query("csv", description="csv or parquet"),  # pylint: disable=redefined-builtin
+) -> StreamingResponse:
+    """Stream every indexed transfer, redemption and funding event in a time range.
+
+    The body is produced chunk by chunk from the indexed event store, so
+    memory use does not depend on the range. Only finalized blocks are
+    included; ``X-Export-Block`` names the last block covered.
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format; expected one of {', '.join(FORMATS)}")
+    start, end = _timestamp(since, "from"), _timestamp(until, "to")
+    if start is not None and end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    try:
+        last_block, body = await export_events(format, start, end)
+    except ExportUnavailable as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+    except (LookupError, OSError) as exc:  # block timestamps for the range could not be read
+        raise HTTPException(status_code=503, detail="Block range for the export not available") from exc
+    if last_block is None:
+        raise HTTPException(status_code=503, detail="Transaction index not available yet")
+    filename = f"meshpay-transactions-{since or 'start'}-{until or last_block}.{format}".replace(":", "")
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            "X-Export-Block": str(last_block),
+        },
+    )
+
 @router.get("/")
 async def get_transaction_history() -> List[Dict[str, Any]]:
     """Get transaction history - placeholder implementation."""
@@ -28,6 +105,9 @@ async def transactions_root() -> Dict[str, Any]:
     return {
         "endpoints": {
             "history": "/api/transactions/",
-            "get": "/api/transactions/{transaction_id}"
+            "get": "/api/transactions/{transaction_id}",
+            "transfer": "/api/transactions/transfer",
+            "export": "/api/transactions/export?from={start}&to={end}&format=csv|parquet",
+            "transfer_status": "/api/transactions/transfer/{journal_id}"
         }
     } 
\ No newline at end of file
@@ -2,36 +2,95 @@
 Wallet management endpoints for MeshPay backend.
 Handles account registration, balance queries, and transaction history.
 """
-from typing import Dict, List, Optional
-from fastapi import APIRouter, HTTPException, Depends, Query
-from pydantic import BaseModel, Field
-from ...services.blockchain_client import blockchain_client, AccountInfo, TokenBalance, ContractStats
-from ...models.base import AccountInfo, TokenBalance
+from fastapi import APIRouter, HTTPException, Query
+from web3 import Web3
+from ...core.responses import ORJSONResponse
+from ...services.account_state import account_state
+from ...services.aggregates import address_aggregates
+from ...services.blockchain_client import blockchain_client
+from ...models.base import AccountInfo
 router = APIRouter()
-
+@router.get("/{address}", response_class=ORJSONResponse, responses={200: {"model": AccountInfo}})
 
 @router.get("/{address}", response_model=AccountInfo)
-async def get_wallet_account(address: str) -> AccountInfo:
+async def get_wallet_account(address: str) -> ORJSONResponse:
     """
     Get account information from MeshPay smart contract.
-    
+
     Args:
         address: Ethereum address to query
-        
+
     Returns:
         Account information including registration status
     """
     try:
         account_info = await blockchain_client.get_wallet_account(address)
-        if not account_info:
-            raise HTTPException(status_code=404, detail="Account not found or contract unavailable")
-        
-        return AccountInfo(
-            address=account_info.address,
-            is_registered=account_info.is_registered,
-            registration_time=account_info.registration_time,
-            last_redeemed_sequence=account_info.last_redeemed_sequence,
-            balances=account_info.balances
-        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get account info: {str(e)}")
+    if not account_info:
+        raise HTTPException(status_code=404, detail="Account not found or contract unavailable")
+
+    # Built from trusted contract data – serialise as-is, no response revalidation
+    return ORJSONResponse(account_info.model_dump())
+
+
+@router.get("/{address}/changes")
+async def get_wallet_changes(
+    address: str,
+    since: int = Query(0, ge=0, description="Version from the previous response (0 for a full snapshot)"),
+) -> ORJSONResponse:
+    """
+    Account changes since a previous version, for incremental wallet refresh.
+
+    Returns only the balances and fields (``is_registered``,
+    ``registration_time``, ``last_redeemed_sequence``, ``sequence_number``)
+    that changed after ``since``, plus the current ``version`` to send next
+    time. ``full`` is true when the response is a complete snapshot – on the
+    first call, or when ``since`` is older than what the backend tracks.
+
+    Args:
+        address: Ethereum address to query
+        since: Version returned by the previous call
+
+    Returns:
+        Delta (or full snapshot) of the account state
+    """
+    if not Web3.is_address(address):
+        raise HTTPException(status_code=400, detail="Invalid address")
+    try:
+        delta = await account_state.changes(address, since)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get account changes: {str(e)}")
+    if delta is None:
+        raise HTTPException(status_code=404, detail="Account not found or contract unavailable")
+    return ORJSONResponse(delta)
+
+
+@router.get("/{address}/aggregates")
+async def get_wallet_aggregates(
+    address: str,
+    counterparties: int = Query(10, ge=0, le=100, description="Most recent counterparties to include"),
+) -> ORJSONResponse:
+    """
+    Precomputed activity aggregates for an address.
+
+    Per-token volume and counts (sent, received, redeemed, funded, in raw
+    token units), transaction count, first / last active block, the most
+    recent counterparties and the next expected ``sequence_number`` with any
+    gaps – maintained incrementally from indexed contract events, so the
+    cost does not depend on the address's history. ``indexed_block`` is the
+    last block included.
+
+    Args:
+        address: Ethereum address to query
+        counterparties: Number of recent counterparties to return
+
+    Returns:
+        Aggregates of the address
+    """
+    if not Web3.is_address(address):
+        raise HTTPException(status_code=400, detail="Invalid address")
+    try:
+        return ORJSONResponse(await address_aggregates.summary(address, counterparties))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get aggregates: {str(e)}")
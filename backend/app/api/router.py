@@ -1,7 +1,7 @@
 """Main API router for all endpoints."""
 
 from fastapi import APIRouter
-from app.api.endpoints import authorities, transactions, wallet
+from app.api.endpoints import authorities, network, settlement, transactions, wallet
 
 # Create the main API router
 api_router = APIRouter()
@@ -10,6 +10,8 @@ api_router = APIRouter()
 api_router.include_router(authorities.router, prefix="/authorities", tags=["Authorities"])
 api_router.include_router(transactions.router, prefix="/transactions", tags=["Transactions"]) 
 api_router.include_router(wallet.router, prefix="/wallet", tags=["Wallet"])
+api_router.include_router(network.router, prefix="/network", tags=["Network"])
+api_router.include_router(settlement.router, prefix="/settlement", tags=["Settlement"])
 
 # Health check endpoint at the API level
 @api_router.get("/health")
@@ -22,5 +24,7 @@ async def health():
             "authorities": "/api/authorities",
             "transactions": "/api/transactions", 
             "wallet": "/api/wallet",
+            "network": "/api/network",
+            "settlement": "/api/settlement",
         }
     } 
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""ABI decoding and hashing, kept free of app imports for process-pool workers.
+
+The event indexers and :meth:`BlockchainClient.get_recent_events` decode
+logs in bulk, and settlement hashes certificates in bulk; both run on
+:data:`app.core.executor.cpu_executor`. Worker processes import only this
+module, so they never open RPC or gateway connections. Decoding matches
+``contract.events.X().process_log`` (checksummed addresses, same arg names).
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from eth_abi import encode
+from eth_abi.codec import ABICodec
+from web3 import Web3
+from web3._utils.abi import build_strict_registry
+from web3._utils.events import get_event_data
+
+CERTIFICATE_TYPE = "(address,address,address,uint256,uint256)"
+
+Decoded = Optional[Tuple[str, Dict[str, Any]]]
+
+
+@lru_cache(maxsize=1)
+def _codec() -> ABICodec:
+    return ABICodec(build_strict_registry())
+
+
+def event_signature(abi: Mapping[str, Any]) -> str:
+    return f"{abi['name']}({','.join(i['type'] for i in abi['inputs'])})"
+
+
+def event_topic(abi: Mapping[str, Any]) -> str:
+    """``topic0`` of an event ABI as a ``0x`` hex string."""
+    return Web3.to_hex(Web3.keccak(text=event_signature(abi)))
+
+
+def _topic0(log: Mapping[str, Any]) -> Optional[str]:
+    topics = log.get("topics") or ()
+    if not topics:
+        return None
+    topic = topics[0]
+    return Web3.to_hex(topic) if isinstance(topic, (bytes, bytearray)) else str(topic).lower()
+
+
+def decode_logs(logs: Sequence[Mapping[str, Any]], abis: Mapping[str, Mapping[str, Any]]) -> List[Decoded]:
+    """``(event name, args)`` per log, keyed by topic0 in ``abis``; ``None`` for unknown logs."""
+    codec = _codec()
+    decoded: List[Decoded] = []
+    for log in logs:
+        abi = abis.get(_topic0(log) or "")
+        if abi is None:
+            decoded.append(None)
+            continue
+        decoded.append((abi["name"], dict(get_event_data(codec, abi, log)["args"])))
+    return decoded
+
+
+def certificate_hash(cert: Mapping[str, Any]) -> str:
+    """``keccak256(abi.encode(TransferCertificate))`` as computed by the contract."""
+    return Web3.to_hex(Web3.keccak(encode([CERTIFICATE_TYPE], [certificate_tuple(cert)])))
+
+
+def certificate_hashes(certs: Sequence[Mapping[str, Any]]) -> List[str]:
+    return [certificate_hash(cert) for cert in certs]
+
+
+def certificate_tuple(cert: Mapping[str, Any]) -> Tuple[str, str, str, int, int]:
+    return (
+        Web3.to_checksum_address(cert["sender"]),
+        Web3.to_checksum_address(cert["recipient"]),
+        Web3.to_checksum_address(cert["token"]),
+        int(cert["amount"]),
+        int(cert["sequence_number"]),
+    )
+
+
+__all__ = [
+    "CERTIFICATE_TYPE", "certificate_hash", "certificate_hashes", "certificate_tuple",
+    "decode_logs", "event_signature", "event_topic",
+]
@@ -37,6 +37,64 @@ class Settings(BaseSettings):
     chain_id: int = os.getenv("CHAIN_ID", 128123)
     chain_name: str = os.getenv("CHAIN_NAME", "Etherlink Testnet")
     backend_private_key: Optional[str] = os.getenv("BACKEND_PRIVATE_KEY", None)
+    rpc_max_concurrency: int = os.getenv("RPC_MAX_CONCURRENCY", 8)
+    # Several RPC nodes; the first is the primary that writes go to. Falls back to RPC_URL when empty
+    rpc_urls: List[str] = os.getenv("RPC_URLS", [])
+    # Reads skip nodes more than this many blocks behind the highest head seen
+    rpc_max_lag: int = os.getenv("RPC_MAX_LAG", 3)
+    rpc_probe_interval: float = os.getenv("RPC_PROBE_INTERVAL", 5.0)
+    rpc_timeout: float = os.getenv("RPC_TIMEOUT", 10.0)
+    
+    # On-chain Settlement
+    settlement_batch_size: int = os.getenv("SETTLEMENT_BATCH_SIZE", 50)
+    settlement_interval: float = os.getenv("SETTLEMENT_INTERVAL", 2.0)
+    settlement_gas_multiplier: float = os.getenv("SETTLEMENT_GAS_MULTIPLIER", 1.2)
+    settlement_gas_cache_ttl: float = os.getenv("SETTLEMENT_GAS_CACHE_TTL", 300.0)
+    settlement_require_quorum: bool = os.getenv("SETTLEMENT_REQUIRE_QUORUM", True)
+    
+    # Shared CPU executor: "process", "thread" or "inline"
+    cpu_executor: str = os.getenv("CPU_EXECUTOR", "process")
+    cpu_executor_workers: int = os.getenv("CPU_EXECUTOR_WORKERS", 2)
+    cpu_executor_max_queue: int = os.getenv("CPU_EXECUTOR_MAX_QUEUE", 64)
+    
+    # Authority Signature Verification
+    signature_verify_batch: int = os.getenv("SIGNATURE_VERIFY_BATCH", 64)
+    signature_cache_size: int = os.getenv("SIGNATURE_CACHE_SIZE", 50_000)
+    
+    # On-chain Authority Set
+    authority_sync_interval: float = os.getenv("AUTHORITY_SYNC_INTERVAL", 15.0)
+    authority_log_chunk: int = os.getenv("AUTHORITY_LOG_CHUNK", 5000)
+    
+    # Transaction export: rows fetched and encoded per chunk
+    export_chunk_rows: int = os.getenv("EXPORT_CHUNK_ROWS", 5000)
+    
+    # Chain Follower (reorg detection for event-derived state)
+    chain_confirmations: int = os.getenv("CHAIN_CONFIRMATIONS", 2)
+    chain_reorg_window: int = os.getenv("CHAIN_REORG_WINDOW", 64)
+    chain_poll_interval: float = os.getenv("CHAIN_POLL_INTERVAL", 2.0)
+    
+    # Account State (delta sync)
+    account_state_max_accounts: int = os.getenv("ACCOUNT_STATE_MAX_ACCOUNTS", 10_000)
+    account_state_max_age: float = os.getenv("ACCOUNT_STATE_MAX_AGE", 300.0)
+    account_state_sync_interval: float = os.getenv("ACCOUNT_STATE_SYNC_INTERVAL", 5.0)
+    account_state_log_chunk: int = os.getenv("ACCOUNT_STATE_LOG_CHUNK", 5000)
+    
+    # Per-address Aggregates (fed by the account event indexer)
+    aggregates_path: str = os.getenv("AGGREGATES_PATH", "./data/aggregates.db")
+    aggregates_start_block: Optional[int] = os.getenv("AGGREGATES_START_BLOCK", None)
+    
+    # Graceful shutdown and warm restart (cache snapshots / indexer checkpoints)
+    shutdown_drain_timeout: float = os.getenv("SHUTDOWN_DRAIN_TIMEOUT", 10.0)
+    snapshot_enabled: bool = os.getenv("SNAPSHOT_ENABLED", True)
+    snapshot_dir: str = os.getenv("SNAPSHOT_DIR", "./data/snapshots")
+    snapshot_interval: float = os.getenv("SNAPSHOT_INTERVAL", 60.0)
+    snapshot_max_age: float = os.getenv("SNAPSHOT_MAX_AGE", 900.0)
+    
+    # Backend Signer Transaction Pipeline
+    tx_gas_price_ttl: float = os.getenv("TX_GAS_PRICE_TTL", 15.0)
+    tx_receipt_poll_interval: float = os.getenv("TX_RECEIPT_POLL_INTERVAL", 1.0)
+    tx_receipt_poll_max_interval: float = os.getenv("TX_RECEIPT_POLL_MAX_INTERVAL", 16.0)
+    tx_stuck_after: float = os.getenv("TX_STUCK_AFTER", 30.0)
     
     # Mesh Network Configuration
     mesh_gateway_url: str = os.getenv("MESH_GATEWAY_URL", "http://10.0.0.254:8080")
@@ -61,6 +119,11 @@ class Settings(BaseSettings):
     default_map_center: List[float] = os.getenv("DEFAULT_MAP_CENTER", [37.7749, -122.4194])
     default_map_zoom: int = os.getenv("DEFAULT_MAP_ZOOM", 12)
     map_update_interval: int = os.getenv("MAP_UPDATE_INTERVAL", 5)
+    map_index_cell_size: Optional[float] = os.getenv("MAP_INDEX_CELL_SIZE", None)  # None: from the extent
+    map_index_grid: int = os.getenv("MAP_INDEX_GRID", 64)
+    map_cluster_extent: Optional[float] = os.getenv("MAP_CLUSTER_EXTENT", None)  # None: the index extent
+    map_cluster_grid: int = os.getenv("MAP_CLUSTER_GRID", 4)
+    map_cluster_max_zoom: int = os.getenv("MAP_CLUSTER_MAX_ZOOM", 14)
     authority_marker_colors: Dict[str, str] = {
         "online": os.getenv("AUTHORITY_MARKER_COLORS_ONLINE", "#22c55e"),
         "offline": os.getenv("AUTHORITY_MARKER_COLORS_OFFLINE", "#ef4444"), 
@@ -69,15 +132,33 @@ class Settings(BaseSettings):
     
     # Cache Configuration
     cache_ttl: int = os.getenv("CACHE_TTL", 300)
+    http_cache_enabled: bool = os.getenv("HTTP_CACHE_ENABLED", True)
+    http_cache_paths: List[str] = ["/api/authorities", "/api/wallet", "/api/transactions", "/api/network"]
+    http_compression_min_size: int = os.getenv("HTTP_COMPRESSION_MIN_SIZE", 500)
     
     # Database Configuration
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./meshpay.db")
     
+    # Offline Transfer Journal
+    transfer_journal_path: str = os.getenv("TRANSFER_JOURNAL_PATH", "./data/transfer_journal.db")
+    journal_replay_interval: float = os.getenv("JOURNAL_REPLAY_INTERVAL", 5.0)
+    journal_replay_batch: int = os.getenv("JOURNAL_REPLAY_BATCH", 100)
+    journal_replay_concurrency: int = os.getenv("JOURNAL_REPLAY_CONCURRENCY", 8)
+    journal_retry_max_delay: float = os.getenv("JOURNAL_RETRY_MAX_DELAY", 300.0)
+    journal_retention: float = os.getenv("JOURNAL_RETENTION", 86400.0)
+    journal_compact_interval: float = os.getenv("JOURNAL_COMPACT_INTERVAL", 3600.0)
+    
     # Logging Configuration
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     log_format: str = os.getenv("LOG_FORMAT", "json")
     log_file_enabled: bool = os.getenv("LOG_FILE_ENABLED", False)
     log_file_path: str = os.getenv("LOG_FILE_PATH", "./logs/meshpay.log")
+    log_file_max_bytes: int = os.getenv("LOG_FILE_MAX_BYTES", 10 * 1024 * 1024)
+    log_file_backups: int = os.getenv("LOG_FILE_BACKUPS", 5)
+    # Repeated events: first LOG_REPEAT_BURST per window pass, then 1 in LOG_REPEAT_SAMPLE (0 = none)
+    log_repeat_window: float = os.getenv("LOG_REPEAT_WINDOW", 60.0)
+    log_repeat_burst: int = os.getenv("LOG_REPEAT_BURST", 5)
+    log_repeat_sample: int = os.getenv("LOG_REPEAT_SAMPLE", 100)
     
     # Security Configuration
     secret_key: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -88,10 +169,26 @@ class Settings(BaseSettings):
     rate_limit_requests_per_minute: int = os.getenv("RATE_LIMIT_REQUESTS_PER_MINUTE", 60)
     rate_limit_requests: int = os.getenv("RATE_LIMIT_REQUESTS", 100)
     rate_limit_window: int = os.getenv("RATE_LIMIT_WINDOW", 60)
+    rate_limit_backend: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    # Reverse proxies (addresses or CIDR ranges) whose X-Forwarded-For names the client
+    trusted_proxies: List[str] = os.getenv("TRUSTED_PROXIES", [])
+    rate_limit_route_limits: Dict[str, int] = {
+        "/api/authorities/{name}/ping": int(os.getenv("RATE_LIMIT_PING_PER_MINUTE", 12)),
+        "/api/transactions/transfer": int(os.getenv("RATE_LIMIT_TRANSFER_PER_MINUTE", 30)),
+    }
+    redis_url: Optional[str] = os.getenv("REDIS_URL", None)
     
     # Monitoring
     metrics_enabled: bool = os.getenv("METRICS_ENABLED", True)
     health_check_enabled: bool = os.getenv("HEALTH_CHECK_ENABLED", True)
+    health_check_interval: float = os.getenv("HEALTH_CHECK_INTERVAL", 15.0)
+    health_check_stale_after: float = os.getenv("HEALTH_CHECK_STALE_AFTER", 60.0)
+    # Tracing: "none", "jsonl" (local file) or "otlp" (OTLP/JSON over HTTP to a collector)
+    tracing_exporter: str = os.getenv("TRACING_EXPORTER", "none")
+    tracing_file: str = os.getenv("TRACING_FILE", "data/traces.jsonl")
+    tracing_otlp_endpoint: str = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    tracing_service_name: str = os.getenv("TRACING_SERVICE_NAME", "meshpay-backend")
+    tracing_sample_rate: float = os.getenv("TRACING_SAMPLE_RATE", 1.0)
     
     # Authority Discovery Configuration
     authority_discovery_port: int = os.getenv("AUTHORITY_DISCOVERY_PORT", 8080)
@@ -100,7 +197,15 @@ class Settings(BaseSettings):
     max_authorities: int = os.getenv("MAX_AUTHORITIES", 10)
     network_scan_range: str = os.getenv("NETWORK_SCAN_RANGE", "192.168.1.0/24")
     mesh_bridge_url: str = os.getenv("MESH_BRIDGE_URL", "http://192.168.1.142:8080")
+    # Several bridges (one per mesh segment); falls back to MESH_BRIDGE_URL when empty
+    mesh_bridge_urls: List[str] = os.getenv("MESH_BRIDGE_URLS", [])
     mesh_timeout: float = os.getenv("MESH_TIMEOUT", 10.0)
+    # "http" (one request per call) or "ws" (persistent multiplexed link per bridge)
+    mesh_transport: str = os.getenv("MESH_TRANSPORT", "http")
+    mesh_ws_path: str = os.getenv("MESH_WS_PATH", "/ws")
+    mesh_max_concurrency: int = os.getenv("MESH_MAX_CONCURRENCY", 32)
+    mesh_max_queue: int = os.getenv("MESH_MAX_QUEUE", 128)
+    mesh_queue_timeout: float = os.getenv("MESH_QUEUE_TIMEOUT", 2.0)
     
     @field_validator('meshpay_contract_address', 'meshpay_authority_contract_address', 
              'usdt_contract_address', 'usdc_contract_address')
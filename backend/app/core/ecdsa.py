@@ -0,0 +1,29 @@
+"""ECDSA signer recovery, kept free of app imports for process-pool workers.
+
+Authorities sign the 32-byte certificate hash as an EIP-191 personal message
+(``toEthSignedMessageHash(certHash)`` in Solidity terms). Worker processes
+import only this module, so they never open RPC or gateway connections.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+
+def recover_signer(digest: bytes, signature: str) -> Optional[str]:
+    """Checksum address that signed ``digest``, or ``None`` if malformed."""
+    try:
+        return Account.recover_message(encode_defunct(primitive=digest), signature=signature)
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def recover_signers(batch: Sequence[Tuple[bytes, str]]) -> List[Optional[str]]:
+    """Recover every ``(digest, signature)`` pair of one batch."""
+    return [recover_signer(digest, signature) for digest, signature in batch]
+
+
+__all__ = ["recover_signer", "recover_signers"]
@@ -0,0 +1,164 @@
+"""CpuExecutor – one shared pool for CPU-bound batch work.
+
+Each uvicorn worker runs a single event loop; ECDSA recovery, ABI decoding
+of event logs and keccak hashing of certificates done inline on that loop
+stall every in-flight request. Services hand such work to the shared
+:data:`cpu_executor` instead:
+
+* ``CPU_EXECUTOR=process`` (default) runs it on a spawned process pool of
+  ``CPU_EXECUTOR_WORKERS`` – real parallelism, but functions and arguments
+  must be picklable and live in modules that import no clients (see
+  :mod:`app.core.ecdsa`, :mod:`app.core.abi_codec`);
+* ``thread`` uses a thread pool – no pickling, still frees the loop;
+* ``inline`` (or ``CPU_EXECUTOR_WORKERS=0``) runs in ``asyncio.to_thread``.
+
+At most ``CPU_EXECUTOR_MAX_QUEUE`` tasks are submitted at a time; further
+callers wait on the loop, so a bulk job cannot pile up an unbounded backlog
+in front of the next request's work. :meth:`CpuExecutor.stats` reports the
+queue depth and how long tasks waited for a worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+MODES = ("process", "thread", "inline")
+# Batches smaller than this cost less on the loop than a round trip to a worker
+SMALL_BATCH = 16
+
+
+def _timed(fn: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[Any, float, float]:
+    """Worker-side wrapper: result, wall-clock start and CPU seconds of one task."""
+    started = time.time()
+    cpu = time.process_time()
+    result = fn(*args)
+    return result, started, time.process_time() - cpu
+
+
+class CpuExecutor:
+    """Thread or process pool shared by the services, with queue-depth metrics."""
+
+    def __init__(self, mode: str = "process", workers: int = 2, max_queue: int = 64) -> None:
+        if mode not in MODES:
+            raise ValueError(f"CPU executor mode must be one of {MODES}, not {mode!r}")
+        self.mode = mode if workers > 0 else "inline"
+        self.workers = workers
+        self.max_queue = max(int(max_queue), 1)
+        self._pool: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0  # submitted to the pool, not finished
+        self.waiting = 0  # waiting for a queue slot on the loop
+        self.max_depth = 0
+        self.wait_ms = 0.0  # submit -> worker start, summed
+        self.cpu_ms = 0.0
+
+    # ------------------------------ lifecycle -----------------------------
+
+    def start(self) -> None:
+        if self._pool is not None or self.mode == "inline":
+            return
+        if self.mode == "process":
+            # spawn: workers import only the task modules, never the web3 / gateway clients
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="cpu")
+        logger.info("cpu_executor_started", mode=self.mode, workers=self.workers)
+
+    def stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ------------------------------ running -------------------------------
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` off the event loop."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_queue)
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.submitted += 1
+        self.running += 1
+        self.max_depth = max(self.max_depth, self.running + self.waiting)
+        submitted = time.time()
+        try:
+            if self._pool is None:
+                result, started, cpu = await asyncio.to_thread(_timed, fn, args)
+            else:
+                result, started, cpu = await asyncio.get_running_loop().run_in_executor(
+                    self._pool, _timed, fn, args
+                )
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self._slots.release()
+        self.completed += 1
+        self.wait_ms += max(started - submitted, 0.0) * 1000.0
+        self.cpu_ms += cpu * 1000.0
+        return result
+
+    async def map(
+        self,
+        fn: Callable[..., List[T]],
+        items: Sequence[Any],
+        *args: Any,
+        chunk_size: int = 256,
+        inline_below: int = SMALL_BATCH,
+    ) -> List[T]:
+        """``fn(chunk, *args)`` over ``items`` in chunks; results concatenated in order.
+
+        Fewer than ``inline_below`` items run directly on the loop.
+        """
+        if not items:
+            return []
+        if len(items) < inline_below:
+            return list(fn(list(items), *args))
+        chunks = [list(items[i:i + chunk_size]) for i in range(0, len(items), chunk_size)]
+        results = await asyncio.gather(*(self.run(fn, chunk, *args) for chunk in chunks))
+        return [item for chunk in results for item in chunk]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "running": self.running,
+            "queued": max(self.running - self.workers, 0) + self.waiting,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.wait_ms / self.completed, 3) if self.completed else None,
+            "avg_cpu_ms": round(self.cpu_ms / self.completed, 3) if self.completed else None,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+cpu_executor = CpuExecutor(
+    settings.cpu_executor, int(settings.cpu_executor_workers), int(settings.cpu_executor_max_queue)
+)
+
+__all__ = ["CpuExecutor", "MODES", "SMALL_BATCH", "cpu_executor"]
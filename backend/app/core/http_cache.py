@@ -0,0 +1,187 @@
+"""Conditional and compressed responses for polled API routes.
+
+The frontend polls authority lists, wallet state and transfer history over
+links that may be slow or metered. :class:`HTTPCacheMiddleware` buffers
+``GET`` responses under the configured path prefixes and
+
+* tags them with a weak ``ETag`` computed from the body, answering
+  ``If-None-Match`` with an empty ``304 Not Modified``;
+* compresses bodies above a size threshold with brotli (when the optional
+  ``brotli`` package is installed) or gzip, per ``Accept-Encoding``.
+
+Streaming responses larger than ``max_buffer`` pass through untouched, as do
+responses marked ``Cache-Control: no-store`` or ``no-transform`` (exports),
+which are forwarded without buffering from the first byte.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None  # type: ignore[assignment]
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def body_etag(body: bytes) -> str:
+    """Weak validator for a response body (stable across content encodings)."""
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """``If-None-Match`` comparison using the weak comparison function."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Parse ``Accept-Encoding`` into ``{coding: q}``."""
+    codings: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip()] = q
+    return codings
+
+
+class HTTPCacheMiddleware:
+    """ASGI middleware adding ETag/304 handling and gzip/brotli compression."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        paths: Sequence[str],
+        min_size: int = 500,
+        max_buffer: int = 8 * 1024 * 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ) -> None:
+        self.app = app
+        self.paths = tuple(paths)
+        self.min_size = min_size
+        self.max_buffer = max_buffer
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _applies(self, scope: Scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and scope["path"].startswith(self.paths)
+        )
+
+    def _encoding(self, accept_encoding: str) -> Optional[str]:
+        codings = accepted_encodings(accept_encoding)
+        if brotli is not None and codings.get("br", 0) > 0:
+            return "br"
+        if codings.get("gzip", 0) > 0:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        size = 0
+        passthrough = False
+
+        async def buffered_send(message: Message) -> None:
+            nonlocal start, size, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                if _uncacheable(message):
+                    passthrough = True
+                    await send(message)
+                    return
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            if message.get("more_body", False):
+                if size > self.max_buffer:
+                    # Too big to buffer (e.g. a streamed export) – forward as-is
+                    passthrough = True
+                    await send(start)
+                    await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                return
+            await self._finish(start, b"".join(chunks), request_headers, send)
+
+        await self.app(scope, receive, buffered_send)
+
+    async def _finish(self, start: Message, body: bytes, request_headers: Dict[str, str], send: Send) -> None:
+        headers: Headers = list(start.get("headers", []))
+        names = {k.lower() for k, _ in headers}
+        status = start["status"]
+        if status != 200 or b"content-encoding" in names:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = next((v.decode("latin-1") for k, v in headers if k.lower() == b"etag"), None)
+        if etag is None:
+            etag = body_etag(body)
+            headers.append((b"etag", etag.encode("latin-1")))
+        headers.append((b"vary", b"Accept-Encoding"))
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            kept = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"content-type")]
+            await send({"type": "http.response.start", "status": 304, "headers": kept})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        encoding = self._encoding(request_headers.get("accept-encoding", "")) if len(body) >= self.min_size else None
+        if encoding is not None:
+            body = self._compress(body, encoding)
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+            headers += [(b"content-encoding", encoding.encode()), (b"content-length", str(len(body)).encode())]
+
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _uncacheable(start: Message) -> bool:
+    for key, value in start.get("headers", []):
+        if key.lower() == b"cache-control":
+            directives = {d.strip() for d in value.decode("latin-1").lower().split(",")}
+            return bool(directives & {"no-store", "no-transform"})
+    return False
+
+
+__all__ = ["HTTPCacheMiddleware", "accepted_encodings", "body_etag", "etag_matches"]
@@ -0,0 +1,258 @@
+"""Process-wide logging: one structlog pipeline for every logger in the backend.
+
+``configure_logging()`` applies ``LOG_LEVEL`` / ``LOG_FORMAT`` to both
+structlog loggers (``structlog.get_logger``) and plain ``logging`` loggers
+(uvicorn, web3, third-party libraries), so everything comes out in one
+format – JSON lines by default, ``LOG_FORMAT=console`` for humans.
+
+The hot path stays cheap:
+
+* Calls below ``LOG_LEVEL`` are no-ops – the bound logger is filtered at
+  construction time, so no event dict is even built.
+* Records are handed to a :class:`logging.handlers.QueueHandler` unformatted;
+  rendering and the stdout / file writes (``LOG_FILE_ENABLED``) happen on a
+  :class:`~logging.handlers.QueueListener` thread, never on the event loop.
+* Repeats of the same event are rate-limited (:class:`RepeatLimiter`): the
+  first ``LOG_REPEAT_BURST`` per ``LOG_REPEAT_WINDOW`` seconds pass, after
+  that one in ``LOG_REPEAT_SAMPLE`` does, carrying a ``suppressed`` count of
+  the events dropped since the previous one. An RPC outage therefore logs a
+  handful of lines per minute instead of one per failed call.
+"""
+
+from __future__ import annotations
+
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+
+from app.core.config import Settings, settings
+
+# Libraries that log every request at INFO; one line per gateway call is noise
+QUIET_LOGGERS = ("httpx", "httpcore", "websockets", "urllib3")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+# ---------------------------------------------------------------------------
+# Repeat limiting
+# ---------------------------------------------------------------------------
+
+class RepeatLimiter:
+    """Per-key burst allowance per window, then 1-in-``sample`` sampling."""
+
+    __slots__ = ("window", "burst", "sample", "max_keys", "_state", "_lock")
+
+    def __init__(self, window: float = 60.0, burst: int = 5, sample: int = 100, max_keys: int = 10_000) -> None:
+        self.window = window
+        self.burst = burst
+        self.sample = sample
+        self.max_keys = max_keys
+        self._state: Dict[Any, List[float]] = {}  # key -> [window start, seen in window, suppressed]
+        self._lock = threading.Lock()
+
+    def check(self, key: Any) -> Tuple[bool, int]:
+        """Whether to emit this occurrence of ``key``, and how many were suppressed before it."""
+        if self.burst <= 0:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                if len(self._state) >= self.max_keys:
+                    self._prune(now)
+                state = self._state[key] = [now, 0, 0]
+            elif now - state[0] >= self.window:
+                state[0], state[1] = now, 0
+            state[1] += 1
+            seen = state[1]
+            if seen <= self.burst or (self.sample > 0 and (seen - self.burst) % self.sample == 0):
+                suppressed = int(state[2])
+                state[2] = 0
+                return True, suppressed
+            state[2] += 1
+            return False, 0
+
+    def _prune(self, now: float) -> None:
+        stale = [k for k, s in self._state.items() if now - s[0] >= self.window]
+        for key in stale or list(self._state)[: self.max_keys // 2]:
+            del self._state[key]
+
+
+class _RepeatProcessor:
+    """structlog processor: drop rate-limited events, annotate the rest."""
+
+    def __init__(self, limiter: RepeatLimiter) -> None:
+        self.limiter = limiter
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        emit, suppressed = self.limiter.check((method_name, event_dict.get("event")))
+        if not emit:
+            raise structlog.DropEvent
+        if suppressed:
+            event_dict["suppressed"] = suppressed
+        return event_dict
+
+
+class _RepeatFilter(logging.Filter):
+    """The same limit for plain ``logging`` records, keyed on the unformatted message."""
+
+    def __init__(self, limiter: RepeatLimiter) -> None:
+        super().__init__()
+        self.limiter = limiter
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.msg, dict):
+            return True  # structlog event, already limited by _RepeatProcessor
+        emit, suppressed = self.limiter.check((record.name, record.levelno, record.msg))
+        if emit and suppressed:
+            record.suppressed = suppressed
+        return emit
+
+
+# ---------------------------------------------------------------------------
+# Processors and handlers
+# ---------------------------------------------------------------------------
+
+def _add_trace_context(_: Any, __: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach the current trace / span id so log lines join up with traces."""
+    from app.core.tracing import tracer
+
+    span = tracer.current_span()
+    if span is not None:
+        event_dict.setdefault("trace_id", span.trace_id)
+        event_dict.setdefault("span_id", span.span_id)
+    return event_dict
+
+
+def _add_record_extras(_: Any, __: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    record = event_dict.get("_record")
+    suppressed = getattr(record, "suppressed", None)
+    if suppressed:
+        event_dict["suppressed"] = suppressed
+    return event_dict
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records without formatting them on the calling thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if not isinstance(record.msg, dict):
+            # Freeze %-args now: they may be mutated before the listener runs
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def _renderer(log_format: str) -> Any:
+    if log_format.lower() == "json":
+        return structlog.processors.JSONRenderer()
+    return structlog.dev.ConsoleRenderer(colors=sys.stderr.isatty() and log_format.lower() == "console")
+
+
+def _build_handlers(config: Settings, formatter: logging.Formatter) -> List[logging.Handler]:
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stderr)]
+    if config.log_file_enabled:
+        directory = os.path.dirname(config.log_file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handlers.append(
+            logging.handlers.RotatingFileHandler(
+                config.log_file_path,
+                maxBytes=config.log_file_max_bytes,
+                backupCount=config.log_file_backups,
+                encoding="utf-8",
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+# ---------------------------------------------------------------------------
+# Entry points
+# ---------------------------------------------------------------------------
+
+def configure_logging(config: Settings = settings) -> None:
+    """Apply the logging settings; safe to call again (the previous listener is replaced)."""
+    global _listener
+    shutdown_logging()
+
+    level = logging.getLevelName(config.log_level.upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+    limiter = RepeatLimiter(config.log_repeat_window, config.log_repeat_burst, config.log_repeat_sample)
+    timestamper = structlog.processors.TimeStamper(fmt="iso", utc=True)
+
+    renderer = _renderer(config.log_format)
+    render_chain: List[Any] = [structlog.stdlib.ProcessorFormatter.remove_processors_meta]
+    if isinstance(renderer, structlog.processors.JSONRenderer):
+        render_chain.append(structlog.processors.format_exc_info)
+    render_chain.append(renderer)
+    formatter = structlog.stdlib.ProcessorFormatter(
+        processors=render_chain,
+        foreign_pre_chain=[
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.add_logger_name,
+            timestamper,
+            _add_record_extras,
+        ],
+    )
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(_RepeatFilter(limiter))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(level, logging.WARNING))
+
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.add_logger_name,
+            _RepeatProcessor(limiter),
+            timestamper,
+            _add_trace_context,
+            # Tracebacks must be captured on the raising thread, not the listener
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(level),
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        cache_logger_on_first_use=True,
+    )
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, *_build_handlers(config, formatter), respect_handler_level=True
+    )
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Drain the queue and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+__all__ = ["QUIET_LOGGERS", "RepeatLimiter", "configure_logging", "shutdown_logging"]
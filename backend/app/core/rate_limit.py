@@ -0,0 +1,334 @@
+"""Rate limiting and admission control.
+
+Two layers protect the low-bandwidth mesh behind the gateway bridge:
+
+* :class:`RateLimitMiddleware` – per-client token buckets, plus tighter
+  per-route buckets for expensive routes (authority pings, transfer
+  submission). Over-limit requests get ``429`` with ``Retry-After``. CORS
+  preflights are not counted, and a request refused by its route bucket is
+  given back to the client bucket.
+* :class:`ConcurrencyLimiter` – caps in-flight gateway calls inside
+  :class:`~app.services.mesh_client.MeshClient` and sheds excess load with
+  :class:`Overloaded` (mapped to ``503`` + ``Retry-After``).
+
+Bucket state lives in process memory by default. When ``REDIS_URL`` is set and
+``RATE_LIMIT_BACKEND=redis`` the buckets are kept in Redis so that every
+uvicorn worker shares them; ``redis`` is an optional dependency. If Redis
+fails or times out the middleware keeps limiting with per-worker in-memory
+buckets for a few seconds before trying it again, so a Redis outage neither
+fails requests nor lifts the limits.
+
+Clients are keyed by their socket address. Behind a reverse proxy listed in
+``TRUSTED_PROXIES`` (addresses or CIDR ranges) the client is taken from
+``X-Forwarded-For`` instead: the right-most address not itself a trusted
+proxy, since everything left of it can be set by the client.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import math
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+import structlog
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is optional
+    aioredis = None  # type: ignore[assignment]
+
+logger = structlog.get_logger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Bucket stores
+# ---------------------------------------------------------------------------
+
+class InMemoryBucketStore:
+    """Token buckets kept in a dict; idle buckets are pruned lazily."""
+
+    def __init__(self, idle_ttl: float = 60.0, prune_every: int = 10_000) -> None:
+        self.idle_ttl = idle_ttl
+        self.prune_every = prune_every
+        self._buckets: Dict[str, List[float]] = {}
+        self._ops = 0
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens; return ``0`` if allowed, else seconds to wait.
+
+        A negative ``cost`` gives tokens back (up to ``capacity``).
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [capacity, now]
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        self._ops += 1
+        if self._ops >= self.prune_every:
+            self._prune(now)
+
+        if tokens >= cost:
+            bucket[0] = min(capacity, tokens - cost)
+            return 0.0
+        bucket[0] = tokens
+        return (cost - tokens) / rate
+
+    def _prune(self, now: float) -> None:
+        self._ops = 0
+        cutoff = now - self.idle_ttl
+        for key in [k for k, b in self._buckets.items() if b[1] < cutoff]:
+            del self._buckets[key]
+
+    async def close(self) -> None:
+        self._buckets.clear()
+
+
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+  tokens = math.min(capacity, tokens - cost)
+else
+  wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Token buckets in Redis, updated atomically by a Lua script."""
+
+    def __init__(self, url: str, idle_ttl: int = 60, prefix: str = "meshpay:rl:", timeout: float = 0.5) -> None:
+        if aioredis is None:
+            raise RuntimeError("redis package is required for RATE_LIMIT_BACKEND=redis")
+        self._redis = aioredis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._script = self._redis.register_script(_TAKE_SCRIPT)
+        self.idle_ttl = max(1, int(idle_ttl))
+        self.prefix = prefix
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        wait = await self._script(
+            keys=[self.prefix + key], args=[capacity, rate, time.time(), cost, self.idle_ttl]
+        )
+        return float(wait)
+
+    async def close(self) -> None:
+        await self._redis.close()
+
+
+BucketStore = Any  # InMemoryBucketStore | RedisBucketStore
+
+
+def create_bucket_store(settings: Any) -> BucketStore:
+    """Build the bucket store selected by settings, falling back to memory."""
+    if settings.rate_limit_backend == "redis" and settings.redis_url:
+        try:
+            return RedisBucketStore(settings.redis_url, idle_ttl=settings.rate_limit_window)
+        except RuntimeError as exc:
+            logger.warning("rate_limit_redis_unavailable", error=str(exc))
+    return InMemoryBucketStore(idle_ttl=settings.rate_limit_window)
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def _route_pattern(template: str) -> Pattern[str]:
+    """Compile a path template such as ``/api/authorities/{name}/ping``."""
+    parts = re.split(r"(\{[^/{}]+\})", template.rstrip("/"))
+    regex = "".join("[^/]+" if p.startswith("{") else re.escape(p) for p in parts)
+    return re.compile(f"^{regex}/?$")
+
+
+def _networks(entries: Iterable[str]) -> List[Any]:
+    return [ipaddress.ip_network(e.strip(), strict=False) for e in entries if e and e.strip()]
+
+
+def _in(address: str, networks: List[Any]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in net for net in networks)
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing per-client and per-route token buckets."""
+
+    #: Seconds to use the in-memory buckets after the shared store failed
+    STORE_RETRY_AFTER = 5.0
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        store: BucketStore,
+        capacity: float,
+        per_minute: float,
+        route_limits: Optional[Dict[str, int]] = None,
+        exempt_paths: Tuple[str, ...] = ("/livez", "/readyz", "/health"),
+        trusted_proxies: Iterable[str] = (),
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.fallback = store if isinstance(store, InMemoryBucketStore) else InMemoryBucketStore(
+            idle_ttl=getattr(store, "idle_ttl", 60.0))
+        self._store_down_until = 0.0
+        self.trusted_proxies = _networks(trusted_proxies)
+        self.capacity = float(capacity)
+        self.rate = float(per_minute) / 60.0
+        self.exempt_paths = exempt_paths
+        self.routes: List[Tuple[str, Pattern[str], float]] = [
+            (template, _route_pattern(template), float(limit))
+            for template, limit in (route_limits or {}).items()
+        ]
+
+    def client_key(self, scope: Scope) -> str:
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if not self.trusted_proxies or not _in(peer, self.trusted_proxies):
+            return peer
+        forwarded = [
+            part.strip()
+            for name, value in scope.get("headers") or ()
+            if name == b"x-forwarded-for"
+            for part in value.decode("latin-1").split(",")
+        ]
+        # Walk back from the nearest hop; the first untrusted address is the client
+        for address in reversed(forwarded):
+            if address and not _in(address, self.trusted_proxies):
+                return address
+        return forwarded[0] if forwarded and forwarded[0] else peer
+
+    async def _take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        """Take from the shared store, or from the in-memory buckets while it is failing."""
+        if self.store is not self.fallback and time.monotonic() >= self._store_down_until:
+            try:
+                return await self.store.take(key, capacity, rate, cost)
+            except Exception as exc:  # pylint: disable=broad-except
+                self._store_down_until = time.monotonic() + self.STORE_RETRY_AFTER
+                logger.warning("rate_limit_store_failed", error=str(exc) or type(exc).__name__,
+                               retry_after=self.STORE_RETRY_AFTER)
+        return await self.fallback.take(key, capacity, rate, cost)
+
+    async def _check(self, scope: Scope) -> float:
+        client = self.client_key(scope)
+        wait = await self._take(f"client:{client}", self.capacity, self.rate)
+        if wait:
+            return wait
+        path = scope["path"]
+        for template, pattern, per_minute in self.routes:
+            if pattern.match(path):
+                # Allow a burst of one tenth of the per-minute budget
+                burst = max(1.0, per_minute / 10.0)
+                wait = await self._take(f"route:{template}:{client}", burst, per_minute / 60.0)
+                if wait:
+                    # Refused by the route: the request must not cost the client budget
+                    await self._take(f"client:{client}", self.capacity, self.rate, -1.0)
+                return wait
+        return 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        wait = await self._check(scope)
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        logger.info("rate_limited", client=self.client_key(scope), path=scope["path"], retry_after=wait)
+        body = b'{"detail":"Too many requests"}'
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# ---------------------------------------------------------------------------
+# Admission control
+# ---------------------------------------------------------------------------
+
+class Overloaded(RuntimeError):
+    """Raised when the concurrency limiter sheds a call."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """Bound in-flight calls; queue a limited number and shed the rest.
+
+    Use as ``async with limiter:`` around the protected call.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = 0
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                raise Overloaded("Gateway admission queue full", self.queue_timeout)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                raise Overloaded("Timed out waiting for gateway capacity", self.queue_timeout) from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "shed": self.shed,
+        }
+
+
+__all__ = [
+    "ConcurrencyLimiter",
+    "InMemoryBucketStore",
+    "Overloaded",
+    "RateLimitMiddleware",
+    "RedisBucketStore",
+    "create_bucket_store",
+]
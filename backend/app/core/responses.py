@@ -0,0 +1,42 @@
+"""Response classes shared by the API.
+
+``orjson`` is an optional dependency: when it is installed responses are
+encoded with it, otherwise the standard library encoder is used.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None  # type: ignore[assignment]
+
+
+def _default(obj: Any) -> Any:
+    """Encode the types orjson does not handle natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (falls back to ``json`` without it).
+
+    Endpoints on hot paths return this directly with already-built content,
+    which skips FastAPI's ``jsonable_encoder`` walk as well.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+__all__ = ["ORJSONResponse"]
@@ -0,0 +1,187 @@
+"""SnapshotStore – cache snapshots and indexer checkpoints for warm restarts.
+
+A restarted worker used to begin with empty caches: every wallet poll read
+the contract again, discovery polled every gateway in full, the on-chain
+authority set was reloaded view by view and the account indexer started at
+the head, missing the events emitted while the process was down. Components
+that hold such state register here under a name and implement::
+
+    snapshot() -> dict        # JSON-serialisable, cheap, taken on the loop
+    restore(data: dict)       # before the component's background task starts
+
+Snapshots are written as ``SNAPSHOT_DIR/<name>.json`` every
+``SNAPSHOT_INTERVAL`` seconds and once more on shutdown, each file replaced
+atomically so a crash never leaves a torn one behind. On startup a snapshot
+is restored only if it is younger than ``SNAPSHOT_MAX_AGE`` and was taken for
+the same chain and MeshPay contract; anything else is ignored and the
+component warms up from the network as before. Restored data is a starting
+point, not a source of truth – each component revalidates it the way it
+revalidates its own cache (ETags, block hashes, ``ACCOUNT_STATE_MAX_AGE``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+FORMAT = 1
+
+
+def _scope() -> str:
+    """Chain and contract a snapshot belongs to."""
+    return f"{settings.chain_id}:{str(settings.meshpay_contract_address or '').lower()}"
+
+
+class SnapshotStore:
+    """Periodic JSON snapshots of registered components."""
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        *,
+        interval: float | None = None,
+        max_age: float | None = None,
+        enabled: bool | None = None,
+    ) -> None:
+        self.directory = Path(directory or settings.snapshot_dir)
+        self.interval = float(interval or settings.snapshot_interval)
+        self.max_age = float(max_age or settings.snapshot_max_age)
+        self.enabled = settings.snapshot_enabled if enabled is None else enabled
+        self.components: Dict[str, Any] = {}
+        self.restored: Dict[str, float] = {}  # name -> age (s) of the snapshot restored
+        self.saved_at: Optional[float] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def register(self, name: str, component: Any) -> None:
+        self.components[name] = component
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{name}.json"
+
+    # ------------------------------ restore -------------------------------
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        path = self._path(name)
+        try:
+            document = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("snapshot_unreadable", snapshot=name, error=str(exc))
+            return None
+        age = time.time() - float(document.get("saved_at") or 0)
+        if document.get("format") != FORMAT or document.get("scope") != _scope():
+            logger.info("snapshot_discarded", snapshot=name, reason="different chain, contract or format")
+            return None
+        if not 0 <= age <= self.max_age:
+            logger.info("snapshot_discarded", snapshot=name, reason="too old", age=round(age, 1))
+            return None
+        self.restored[name] = round(age, 1)
+        return document["data"]
+
+    def restore(self, name: str) -> bool:
+        """Restore one registered component; True if a usable snapshot was applied."""
+        if not self.enabled:
+            return False
+        data = self._read(name)
+        if data is None:
+            return False
+        try:
+            self.components[name].restore(data)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.restored.pop(name, None)
+            logger.warning("snapshot_restore_failed", snapshot=name, error=str(exc))
+            return False
+        logger.info("snapshot_restored", snapshot=name, age=self.restored[name])
+        return True
+
+    def restore_all(self) -> int:
+        return sum(self.restore(name) for name in list(self.components))
+
+    # ------------------------------ save ----------------------------------
+
+    def _write(self, name: str, data: Dict[str, Any], saved_at: float) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(name)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        document = json.dumps({"format": FORMAT, "scope": _scope(), "saved_at": saved_at, "data": data})
+        try:
+            tmp.write_text(document)
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    async def save_all(self) -> int:
+        """Snapshot every component on the loop, write the files off it; returns files written."""
+        if not self.enabled:
+            return 0
+        saved_at = time.time()
+        taken: Dict[str, Dict[str, Any]] = {}
+        for name, component in self.components.items():
+            try:
+                taken[name] = component.snapshot()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("snapshot_failed", snapshot=name, error=str(exc))
+        written = 0
+        for name, data in taken.items():
+            try:
+                await asyncio.to_thread(self._write, name, data, saved_at)
+                written += 1
+            except (OSError, TypeError, ValueError) as exc:
+                logger.warning("snapshot_write_failed", snapshot=name, error=str(exc))
+        self.saved_at = saved_at
+        logger.debug("snapshots_saved", count=written)
+        return written
+
+    # ------------------------------ lifecycle -----------------------------
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="snapshot-store")
+
+    async def stop(self) -> None:
+        """Stop the periodic saves and take a final snapshot."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.save_all()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save_all()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("snapshot_save_failed", error=str(exc))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "components": list(self.components),
+            "restored": dict(self.restored),
+            "saved_at": self.saved_at,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+snapshot_store = SnapshotStore()
+
+__all__ = ["SnapshotStore", "snapshot_store"]
@@ -0,0 +1,458 @@
+"""Request tracing across the API, the gateway hop and the RPC node.
+
+A span is opened for every API request (:class:`TracingMiddleware`), every
+gateway call made by :class:`~app.services.mesh_client.MeshClient` and every
+JSON-RPC request made by :class:`~app.services.blockchain_client.BlockchainClient`.
+Spans nest through a context variable, which ``asyncio`` tasks and
+``asyncio.to_thread`` workers inherit, so a slow payment can be broken down
+per hop without extra instrumentation.
+
+Trace context follows W3C Trace Context: an incoming ``traceparent`` header
+continues the caller's trace, and gateway requests carry ``traceparent`` so
+the bridge can continue it in turn.
+
+Finished spans are batched on a background thread and written either as
+JSON lines to a local file (``TRACING_EXPORTER=jsonl``) or as OTLP/JSON to an
+OpenTelemetry collector (``TRACING_EXPORTER=otlp``). With the default
+``none`` no spans are recorded and the hooks cost a context-variable lookup.
+"""
+
+from __future__ import annotations
+
+import abc
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+import httpx
+import structlog
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+TRACEPARENT = "traceparent"
+KINDS = {"internal": 1, "server": 2, "client": 3}
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+# ---------------------------------------------------------------------------
+# Spans
+# ---------------------------------------------------------------------------
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "kind", "sampled",
+        "start_ns", "end_ns", "attributes", "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        *,
+        kind: str = "internal",
+        sampled: bool = True,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = attributes or {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def as_otlp(self) -> Dict[str, Any]:
+        span: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": KINDS.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """``(trace_id, parent_span_id, sampled)`` from a W3C ``traceparent`` header."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or parts[0] == "ff":
+        return None
+    trace_id, span_id, flags = parts[1].lower(), parts[2].lower(), parts[3]
+    try:
+        int(trace_id, 16), int(span_id, 16)
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, sampled
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+class SpanExporter(abc.ABC):
+    """Receives batches of finished spans on the export thread."""
+
+    @abc.abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        """Deliver one batch; exceptions are logged and the batch dropped."""
+
+    def shutdown(self) -> None:
+        pass
+
+
+class JSONLExporter(SpanExporter):
+    """Appends one JSON object per span to a local file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(s.as_dict(), default=str) + "\n" for s in spans)
+
+
+class OTLPHTTPExporter(SpanExporter):
+    """Posts spans as OTLP/JSON to a collector's ``/v1/traces`` endpoint."""
+
+    def __init__(self, endpoint: str, service_name: str, *, timeout: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.resource = {"attributes": [_otlp_attribute("service.name", service_name)]}
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: List[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": self.resource,
+                "scopeSpans": [{"scope": {"name": "meshpay"}, "spans": [s.as_otlp() for s in spans]}],
+            }]
+        }
+        self._client.post(self.endpoint, json=payload).raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class BatchSpanProcessor:
+    """Queues finished spans and exports them in batches from a daemon thread."""
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        *,
+        batch_size: int = 256,
+        interval: float = 2.0,
+        max_queue: int = 8192,
+    ) -> None:
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+
+    def on_end(self, span: Span) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                    self.exported += len(batch)
+                except Exception as exc:  # pylint: disable=broad-except
+                    self.dropped += len(batch)
+                    logger.warning("span_export_failed", spans=len(batch), error=str(exc))
+
+    def shutdown(self) -> None:
+        """Flush queued spans and stop the export thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=self.interval + 5.0)
+            self._thread = None
+        self.exporter.shutdown()
+
+
+# ---------------------------------------------------------------------------
+# Tracer
+# ---------------------------------------------------------------------------
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Creates spans, tracks the current one and hands finished spans to a processor."""
+
+    def __init__(self, processor: Optional[BatchSpanProcessor] = None, *, sample_rate: float = 1.0) -> None:
+        self.processor = processor
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.processor is not None
+
+    def current_span(self) -> Optional[Span]:
+        return _current.get()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute on the current span, if any (e.g. ``cache.hit``)."""
+        span = _current.get()
+        if span is not None:
+            span.attributes[key] = value
+
+    def start_span(
+        self,
+        name: str,
+        *,
+        kind: str = "internal",
+        traceparent: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Span:
+        parent = _current.get()
+        remote = parse_traceparent(traceparent) if traceparent else None
+        if remote is not None:
+            trace_id, parent_id, sampled = remote
+        elif parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+            sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        return Span(name, trace_id, parent_id, kind=kind, sampled=sampled, attributes=attributes)
+
+    def end_span(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if span.sampled and self.processor is not None:
+            self.processor.on_end(span)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        *,
+        kind: str = "internal",
+        traceparent: Optional[str] = None,
+    ) -> Iterator[Optional[Span]]:
+        """Run the block inside a child span of the current one (``None`` when disabled)."""
+        if not self.enabled:
+            yield None
+            return
+        span = self.start_span(name, kind=kind, traceparent=traceparent, attributes=dict(attributes or {}))
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            _current.reset(token)
+            self.end_span(span)
+
+    def inject(self, headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, str]]:
+        """Add ``traceparent`` for the current span to outgoing ``headers``."""
+        span = _current.get()
+        if span is None:
+            return headers
+        return {**(headers or {}), TRACEPARENT: span.traceparent}
+
+    def shutdown(self) -> None:
+        if self.processor is not None:
+            self.processor.shutdown()
+
+
+def traced(name: str, attributes: Optional[Dict[str, Any]] = None) -> Callable[[F], F]:
+    """Decorator running an async function inside a span."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.span(name, attributes):
+                return await fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def create_tracer() -> Tracer:
+    """Tracer configured from the ``TRACING_*`` settings."""
+    kind = settings.tracing_exporter.lower()
+    if kind == "jsonl":
+        exporter: Optional[SpanExporter] = JSONLExporter(settings.tracing_file)
+    elif kind == "otlp":
+        exporter = OTLPHTTPExporter(settings.tracing_otlp_endpoint, settings.tracing_service_name)
+    else:
+        exporter = None
+    processor = BatchSpanProcessor(exporter) if exporter is not None else None
+    return Tracer(processor, sample_rate=settings.tracing_sample_rate)
+
+
+# ---------------------------------------------------------------------------
+# ASGI middleware
+# ---------------------------------------------------------------------------
+
+class TracingMiddleware:
+    """Opens a server span per HTTP request and returns its trace id."""
+
+    def __init__(self, app: ASGIApp, *, tracer_: Optional[Tracer] = None) -> None:
+        self.app = app
+        self.tracer = tracer_ or tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        incoming = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"traceparent"), None)
+        span = self.tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            kind="server",
+            traceparent=incoming,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        token = _current.set(span)
+
+        async def traced_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                headers = list(message.get("headers", []))
+                headers.append((b"x-trace-id", span.trace_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, traced_send)
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            route = _route_template(scope)
+            if route is not None:
+                span.name = f"{scope['method']} {route}"
+                span.set_attribute("http.route", route)
+            _current.reset(token)
+            self.tracer.end_span(span)
+
+
+def _route_template(scope: Scope) -> Optional[str]:
+    """Templated path (``/api/wallet/{address}``) of the route that served ``scope``.
+
+    Rebuilt from the matched path parameters, which works with both flattened
+    and lazily included FastAPI routers.
+    """
+    if "route" not in scope:
+        return None  # no route matched (404)
+    segments = scope["path"].split("/")
+    values = {str(v): k for k, v in scope.get("path_params", {}).items()}
+    return "/".join(f"{{{values[s]}}}" if s in values else s for s in segments)
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+tracer = create_tracer()
+
+__all__ = [
+    "BatchSpanProcessor",
+    "JSONLExporter",
+    "OTLPHTTPExporter",
+    "Span",
+    "SpanExporter",
+    "TRACEPARENT",
+    "Tracer",
+    "TracingMiddleware",
+    "create_tracer",
+    "parse_traceparent",
+    "traced",
+    "tracer",
+]
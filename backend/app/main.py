@@ -8,16 +8,95 @@ This application provides a clean REST API for interacting with:
 
 from __future__ import annotations
 
+import asyncio
+import math
 import time
-from typing import Any, Dict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.core.config import settings
-from app.api.router import api_router
-from app.services.mesh_client import mesh_client
-from app.services.blockchain_client import blockchain_client
+from app.core.executor import cpu_executor
+from app.core.http_cache import HTTPCacheMiddleware
+from app.core.log_config import configure_logging
+from app.core.rate_limit import RateLimitMiddleware, create_bucket_store
+from app.core.responses import ORJSONResponse
+from app.core.snapshots import snapshot_store
+from app.core.tracing import TracingMiddleware, tracer
+
+# Before the service imports, so their import-time log lines use it too
+configure_logging(settings)
+
+from app.api.router import api_router  # noqa: E402
+from app.services.account_state import account_indexer, account_state  # noqa: E402
+from app.services.aggregates import address_aggregates  # noqa: E402
+from app.services.blockchain_client import blockchain_client  # noqa: E402
+from app.services.chain_follower import chain_follower  # noqa: E402
+from app.services.mesh_client import MeshClientOverloaded, mesh_client  # noqa: E402
+from app.services.health_monitor import health_monitor  # noqa: E402
+from app.services.onchain_authorities import onchain_authorities  # noqa: E402
+from app.services.settlement import settlement_pipeline  # noqa: E402
+from app.services.tx_pipeline import tx_pipeline  # noqa: E402
+from app.services.transfer_journal import journal_replayer, transfer_journal  # noqa: E402
+
+# Warm restart: state restored on startup, saved periodically and on shutdown
+snapshot_store.register("mesh_client", mesh_client)
+snapshot_store.register("onchain_authorities", onchain_authorities)
+snapshot_store.register("chain_follower", chain_follower)
+snapshot_store.register("account_state", account_state)
+snapshot_store.register("account_indexer", account_indexer)
+snapshot_store.register("settlement", settlement_pipeline)
+
+# ---------------------------------------------------------------------------
+# Application lifespan
+# ---------------------------------------------------------------------------
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Start shared clients and background checkers; drain and stop them on shutdown.
+
+    Snapshots are restored before any background task starts (the indexer
+    checkpoint needs the aggregates store open). On shutdown – after the
+    server has stopped accepting requests and finished the ones in flight –
+    the journal replayer and the settlement queue get up to
+    ``SHUTDOWN_DRAIN_TIMEOUT`` seconds to finish, the remaining tasks are
+    stopped, a final snapshot is written and only then are the stores and
+    clients closed.
+    """
+    transfer_journal.open()
+    address_aggregates.open()
+    snapshot_store.restore_all()
+    await mesh_client.start()
+    await blockchain_client.start()
+    await journal_replayer.start()
+    await onchain_authorities.start()
+    await chain_follower.start()
+    await account_indexer.start()
+    cpu_executor.start()
+    await tx_pipeline.start()
+    await settlement_pipeline.start()
+    if settings.health_check_enabled:
+        await health_monitor.start()
+    await snapshot_store.start()
+    try:
+        yield
+    finally:
+        await health_monitor.stop()
+        await asyncio.gather(journal_replayer.stop(), settlement_pipeline.stop())
+        await tx_pipeline.stop()
+        await account_indexer.stop()
+        await chain_follower.stop()
+        await onchain_authorities.stop()
+        await snapshot_store.stop()
+        cpu_executor.stop()
+        address_aggregates.close()
+        transfer_journal.close()
+        await blockchain_client.stop()
+        await mesh_client.close()
+        tracer.shutdown()
 
 # ---------------------------------------------------------------------------
 # FastAPI application setup
@@ -28,9 +107,31 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-# CORS middleware
+# ETag / 304 and gzip/brotli for polled read endpoints
+if settings.http_cache_enabled:
+    app.add_middleware(
+        HTTPCacheMiddleware,
+        paths=settings.http_cache_paths,
+        min_size=settings.http_compression_min_size,
+    )
+
+# Per-client / per-route token buckets, ahead of the cache and the routes
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=create_bucket_store(settings),
+        capacity=settings.rate_limit_requests,
+        per_minute=settings.rate_limit_requests_per_minute,
+        route_limits=settings.rate_limit_route_limits,
+        trusted_proxies=settings.trusted_proxies,
+    )
+
+# CORS wraps the rate limiter so a 429 still carries the CORS headers and
+# preflights are answered before any bucket is touched
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
@@ -39,6 +140,19 @@ app.add_middleware(
     allow_headers=settings.allowed_headers,
 )
 
+# Outermost: one server span per request, parent of the gateway and RPC spans
+if tracer.enabled:
+    app.add_middleware(TracingMiddleware)
+
+@app.exception_handler(MeshClientOverloaded)
+async def mesh_overloaded_handler(_: Request, exc: MeshClientOverloaded) -> JSONResponse:
+    """Shed gateway-bound work with 503 + Retry-After."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
 # Include the main API router with /api prefix
 app.include_router(api_router, prefix="/api")
 # ---------------------------------------------------------------------------
@@ -64,30 +178,49 @@ async def root() -> Dict[str, Any]:
             "wallet": "/api/wallet",
             "shards": "/api/shards",
             "transactions": "/api/transactions",
+            "network": "/api/network",
             "websocket": "/api/ws"
         }
     }
 
+@app.get("/livez")
+async def liveness() -> Dict[str, Any]:
+    """Liveness probe – answers from the process alone, no upstream calls."""
+    return {"status": "ok", "timestamp": time.time()}
+
+@app.get("/readyz")
+async def readiness() -> JSONResponse:
+    """Readiness probe – served from the health monitor snapshot (taken inline when the monitor is off)."""
+    ready = await health_monitor.readiness()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ok" if ready else "unavailable",
+            "timestamp": time.time(),
+            "checked_at": (health_monitor.snapshot or {}).get("checked_at"),
+        },
+    )
+
 @app.get("/health")
-async def health_check() -> Dict[str, Any]:
-    """System health check endpoint."""
+async def health_check(deep: bool = Query(False, description="Run upstream checks inline")) -> Dict[str, Any]:
+    """System health check endpoint.
+
+    Returns the cached snapshot from the health monitor by default; pass
+    ``deep=1`` to run the full gateway and blockchain checks on demand.
+    """
+    snapshot = health_monitor.snapshot
+    if deep or snapshot is None:
+        snapshot = await health_monitor.check_now(deep=deep)
 
-    # Check blockchain client status
-    blockchain_health = await blockchain_client.health_check()
-    
     return {
         "status": "ok",
         "timestamp": time.time(),
+        "checked_at": snapshot["checked_at"],
         "services": {
-            "mesh_client": {
-                "status": mesh_status,
-                "gateway_url": mesh_client.gateway_url,
-            },
-            "blockchain_client": {
-                "status": "ok" if blockchain_health['connected'] else "error",
-                "chain_id": blockchain_health.get('chain_id'),
-                "meshpay_contract": blockchain_health['meshpay_contract'],
-            }
+            "mesh_client": snapshot["mesh_client"],
+            "blockchain_client": snapshot["blockchain_client"],
+            "cpu_executor": cpu_executor.stats(),
+            "snapshots": snapshot_store.stats(),
         },
         "config": {
             "environment": settings.environment,
@@ -112,7 +245,8 @@ async def system_info() -> Dict[str, Any]:
             "authority_port": settings.mesh_authority_port,
         },
         "blockchain": {
-            "rpc_url": settings.rpc_url,
+            "rpc_url": blockchain_client.pool.primary.url,
+            "rpc_endpoints": [e.url for e in blockchain_client.pool.endpoints],
             "chain_id": settings.chain_id,
             "chain_name": settings.chain_name,
             "meshpay_contract": settings.meshpay_contract_address,
@@ -46,7 +46,6 @@ class BaseApiModel(BaseModel):
     class Config:
         """Pydantic configuration."""
         use_enum_values = True
-        validate_assignment = True
         validate_by_name = True
         json_encoders = {
             datetime: lambda v: v.isoformat(),
@@ -183,6 +182,26 @@ class Certificate(BaseApiModel):
     certificate_hash: str = Field(..., description="Certificate hash for verification")
 
 
+class SettlementCertificate(BaseApiModel):
+    """Quorum certificate submitted for on-chain redemption."""
+    sender: str = Field(..., description="Sender address")
+    recipient: str = Field(..., description="Recipient address")
+    token: str = Field(..., description="Token address (zero address for native XTZ)")
+    amount: int = Field(..., ge=1, description="Amount in smallest unit")
+    sequence_number: int = Field(..., ge=1, description="Sender's sequence number")
+    signature: str = Field("0x", description="Committee signature (hex)")
+    authority_signatures: List[str] = Field(
+        default_factory=list, description="Authority signatures over the certificate hash (hex)"
+    )
+
+    @validator('sender', 'recipient', 'token')
+    def validate_address(cls, v: str) -> str:
+        """Validate Ethereum address format."""
+        if not (len(v) == 42 and v.startswith('0x')):
+            raise ValueError("Must be a valid Ethereum address (0x...)")
+        return v
+
+
 class NetworkMetrics(BaseApiModel):
     """Network performance metrics."""
     total_authorities: int = Field(0, description="Total number of authorities")
@@ -197,10 +216,11 @@ class TokenBalance(BaseApiModel):
     """Token balance information."""
     token_symbol: str
     token_address: str
-    wallet_balance: float
-    meshpay_balance: float
+    wallet_balance: Optional[float]
+    meshpay_balance: Optional[float]
     total_balance: float
     decimals: int
+    errors: Optional[Dict[str, str]] = None
 
 class AccountInfo(BaseApiModel):
     """Account information from smart contract."""
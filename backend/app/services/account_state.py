@@ -0,0 +1,516 @@
+"""AccountStateStore – versioned account snapshots for delta sync.
+
+Wallet clients poll their account. Instead of answering every poll with a
+fresh ``AccountInfo`` (two RPC reads per token), the store keeps one snapshot
+per tracked account and stamps every field and every token balance with the
+store version at which it last changed. ``changes(address, since)`` returns
+only what changed after ``since``; a client that is up to date gets an empty
+delta without any RPC call, however many clients poll the same account.
+
+Snapshots are kept current by activity, not by polling:
+
+* :class:`AccountEventIndexer` follows the MeshPayMVP ``BalanceUpdated``,
+  ``FundingCompleted``, ``RedemptionCompleted`` and ``AccountRegistered``
+  logs and marks the affected (account, token) balances stale; only those are
+  re-read on the next request. ``RedemptionCompleted`` also carries the new
+  ``last_redeemed_sequence`` directly.
+* Mesh confirmations (transfers delivered by the journal replayer) advance
+  the sender's mesh ``sequence_number`` without any read.
+
+Balance changes that emit no MeshPay event (plain ERC-20 transfers into the
+wallet) are picked up by a full re-read once a snapshot is older than
+``ACCOUNT_STATE_MAX_AGE`` seconds.
+
+Versions start from the wall clock in microseconds, so they keep increasing
+across restarts. The tracked snapshots and the indexer's checkpoint are saved
+for warm restarts (:mod:`app.core.snapshots`): a restarted process serves the
+restored accounts without a read and replays the events it missed from the
+checkpoint, so deltas stay valid for a ``since`` issued before the restart.
+Without a restored snapshot such a ``since`` yields a full snapshot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import structlog
+from web3 import Web3
+
+from app.core.abi_codec import decode_logs, event_topic
+from app.core.config import SUPPORTED_TOKENS, get_settings
+from app.core.executor import CpuExecutor, cpu_executor
+from app.core.tracing import traced
+from app.services.blockchain_client import BlockchainClient, blockchain_client
+from app.services.chain_follower import ChainFollower, chain_follower
+from app.services.mesh_client import MeshClient, mesh_client
+from app.services.rpc_pool import EndpointBehind
+
+logger = structlog.get_logger(__name__)
+
+settings = get_settings()
+
+FIELDS = ("is_registered", "registration_time", "last_redeemed_sequence", "sequence_number")
+EVENTS = ("BalanceUpdated", "FundingCompleted", "RedemptionCompleted", "AccountRegistered")
+
+
+class AccountState:
+    """Snapshot of one account with a per-field change version."""
+
+    __slots__ = ("address", "fields", "balances", "versions", "base_version", "loaded_at", "stale", "lock")
+
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.fields: Dict[str, Any] = {}
+        self.balances: Dict[str, Dict[str, Any]] = {}  # token address -> TokenBalance dict
+        self.versions: Dict[str, int] = {}  # field name or "balance:<token>" -> version
+        self.base_version = 0  # version of the first full load; older ``since`` means full
+        self.loaded_at = 0.0
+        self.stale: Set[str] = set()  # token symbols to re-read
+        self.lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.base_version > 0
+
+
+class AccountStateStore:
+    """LRU of tracked accounts; serves snapshots and deltas by version."""
+
+    def __init__(
+        self,
+        chain: BlockchainClient,
+        mesh: MeshClient,
+        *,
+        max_accounts: int | None = None,
+        max_age: float | None = None,
+    ) -> None:
+        self.chain = chain
+        self.mesh = mesh
+        self.max_accounts = int(max_accounts or settings.account_state_max_accounts)
+        self.max_age = float(max_age or settings.account_state_max_age)
+        self.version = time.time_ns() // 1000
+        self._accounts: "OrderedDict[str, AccountState]" = OrderedDict()
+        self._symbols = {
+            str(config["address"]).lower(): symbol
+            for symbol, config in SUPPORTED_TOKENS.items() if config["address"]
+        }
+        self.reads = {"full": 0, "tokens": 0}
+
+    def __contains__(self, address: object) -> bool:
+        return isinstance(address, str) and _key(address) in self._accounts
+
+    # ------------------------------ versioning ----------------------------
+
+    def _set(self, state: AccountState, key: str, value: Any, current: Any) -> bool:
+        if key in state.versions and current == value:
+            return False
+        self.version += 1
+        state.versions[key] = self.version
+        return True
+
+    def _set_field(self, state: AccountState, name: str, value: Any) -> None:
+        if self._set(state, name, value, state.fields.get(name)):
+            state.fields[name] = value
+
+    def _set_balance(self, state: AccountState, token: str, balance: Dict[str, Any]) -> None:
+        previous = state.balances.get(token)
+        if balance.get("errors"):
+            # Retry on the next request; keep the last good value meanwhile
+            state.stale.add(balance["token_symbol"])
+            if previous is not None:
+                return
+        if self._set(state, f"balance:{token}", balance, previous):
+            state.balances[token] = balance
+
+    # ------------------------------ reads ---------------------------------
+
+    async def _load(self, state: AccountState) -> bool:
+        """Full read of the account (contract + mesh sequence number)."""
+        info, mesh_account = await asyncio.gather(
+            self.chain.get_wallet_account(state.address),
+            self.mesh.get_account_info(state.address),
+            return_exceptions=True,
+        )
+        if info is None or isinstance(info, BaseException):
+            return False
+        self.reads["full"] += 1
+        data = info.model_dump()
+        for name in FIELDS[:3]:
+            self._set_field(state, name, data[name])
+        if isinstance(mesh_account, dict) and "sequence_number" in mesh_account:
+            self._set_field(state, "sequence_number", mesh_account["sequence_number"])
+        else:
+            state.fields.setdefault("sequence_number", None)
+            state.versions.setdefault("sequence_number", self.version)
+        state.stale.clear()
+        for token, balance in data["balances"].items():
+            self._set_balance(state, token, balance)
+        state.loaded_at = time.monotonic()
+        if not state.loaded:
+            state.base_version = self.version
+        return True
+
+    async def _refresh_stale(self, state: AccountState) -> None:
+        symbols, state.stale = state.stale, set()
+        balances = await self.chain.get_account_balances(state.address, symbols)
+        self.reads["tokens"] += len(symbols)
+        for token, balance in balances.items():
+            self._set_balance(state, token, balance.model_dump())
+
+    @traced("account_state.get")
+    async def get(self, address: str) -> Optional[AccountState]:
+        """Tracked, up-to-date state of ``address``; None if it cannot be read."""
+        key = _key(address)
+        state = self._accounts.get(key)
+        if state is None:
+            state = self._accounts[key] = AccountState(Web3.to_checksum_address(address))
+            while len(self._accounts) > self.max_accounts:
+                self._accounts.popitem(last=False)
+        else:
+            self._accounts.move_to_end(key)
+
+        async with state.lock:
+            if not state.loaded or time.monotonic() - state.loaded_at > self.max_age:
+                if not await self._load(state):
+                    if not state.loaded:
+                        self._accounts.pop(key, None)
+                        return None
+            elif state.stale:
+                await self._refresh_stale(state)
+        return state
+
+    async def changes(self, address: str, since: int = 0) -> Optional[Dict[str, Any]]:
+        """Fields and balances changed after ``since`` (everything if ``since`` is unknown)."""
+        state = await self.get(address)
+        if state is None:
+            return None
+        full = since <= 0 or since < state.base_version or since > self.version
+        delta: Dict[str, Any] = {
+            "address": state.address,
+            "version": self.version,
+            "since": since,
+            "full": full,
+        }
+        for name, value in state.fields.items():
+            if full or state.versions[name] > since:
+                delta[name] = value
+        delta["balances"] = {
+            token: balance for token, balance in state.balances.items()
+            if full or state.versions[f"balance:{token}"] > since
+        }
+        return delta
+
+    # ------------------------------ updates -------------------------------
+
+    def mark_stale(self, address: str, token: Optional[str] = None) -> bool:
+        """Flag a token balance (all balances if ``token`` is None) for re-read."""
+        state = self._accounts.get(_key(address))
+        if state is None:
+            return False
+        if token is None:
+            state.stale.update(SUPPORTED_TOKENS)
+        else:
+            symbol = self._symbols.get(token.lower())
+            if symbol is not None:
+                state.stale.add(symbol)
+        return True
+
+    def invalidate(self, address: str) -> bool:
+        """Force a full re-read on the next request (e.g. after a reorg)."""
+        state = self._accounts.get(_key(address))
+        if state is None:
+            return False
+        state.loaded_at = float("-inf")
+        return True
+
+    def update_field(self, address: str, name: str, value: Any) -> bool:
+        """Apply a known field value (e.g. from an event) without a read."""
+        state = self._accounts.get(_key(address))
+        if state is None or not state.loaded:
+            return False
+        self._set_field(state, name, value)
+        return True
+
+    def record_transfer(self, body: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """A transfer confirmed by the mesh: advance the sender's sequence number."""
+        if not result.get("success", True):
+            return
+        state = self._accounts.get(_key(str(body.get("sender", ""))))
+        if state is None or not state.loaded:
+            return
+        try:
+            sequence = int(body["sequence_number"])
+        except (KeyError, TypeError, ValueError):
+            return
+        current = state.fields.get("sequence_number")
+        if current is None or sequence > int(current):
+            self._set_field(state, "sequence_number", sequence)
+
+    # ------------------------------ snapshots -----------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        offset = time.time() - time.monotonic()  # loaded_at as wall-clock time
+        return {
+            "version": self.version,
+            "accounts": [
+                {
+                    "address": state.address,
+                    "fields": state.fields,
+                    "balances": state.balances,
+                    "versions": state.versions,
+                    "base_version": state.base_version,
+                    "loaded_at": state.loaded_at + offset,
+                    "stale": sorted(state.stale),
+                }
+                for state in self._accounts.values() if state.loaded
+            ],
+        }
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        offset = time.time() - time.monotonic()
+        self.version = max(self.version, int(data["version"]))
+        for item in data["accounts"][-self.max_accounts:]:
+            state = AccountState(item["address"])
+            state.fields = dict(item["fields"])
+            state.balances = dict(item["balances"])
+            state.versions = {k: int(v) for k, v in item["versions"].items()}
+            state.base_version = int(item["base_version"])
+            state.loaded_at = float(item["loaded_at"]) - offset
+            state.stale = set(item["stale"])
+            self._accounts[_key(state.address)] = state
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "accounts": len(self._accounts),
+            "stale": sum(1 for s in self._accounts.values() if s.stale),
+            "reads": dict(self.reads),
+        }
+
+
+class AccountEventIndexer:
+    """Follows MeshPayMVP account events and feeds them to the store.
+
+    Blocks come from :class:`~app.services.chain_follower.ChainFollower`: the
+    indexer reads logs up to the follower's head, drops logs whose block hash
+    the follower does not know (a reorg in flight) and, on a reorg, rewinds
+    to the common block and invalidates the accounts touched by the
+    abandoned blocks.
+
+    Other consumers subscribe with :meth:`subscribe`. A subscriber provides
+    ``resume_block()`` – the last block it has applied, or None – and
+    ``async apply(start, end, events)``, called once per block range (also
+    when the range has no events) with ``(name, args, log)`` tuples in chain
+    order, plus ``async rollback(block)`` returning the block it rewound to
+    and ``async finalize(block)``. On startup the indexer resumes from the
+    earliest subscriber block; a subscriber that raises stops the range from
+    being marked synced, so it is retried on the next round.
+    """
+
+    def __init__(
+        self,
+        store: AccountStateStore,
+        chain: BlockchainClient,
+        follower: ChainFollower,
+        *,
+        interval: float | None = None,
+        log_chunk: int | None = None,
+        executor: CpuExecutor | None = None,
+    ) -> None:
+        self.store = store
+        self.chain = chain
+        self.follower = follower
+        self.executor = executor or cpu_executor
+        self.interval = float(interval or settings.account_state_sync_interval)
+        self.log_chunk = int(log_chunk or settings.account_state_log_chunk)
+        self.synced_block: Optional[int] = None
+        self.subscribers: List[Any] = []
+        self._recent: Dict[int, Set[str]] = {}  # unfinalized block -> accounts touched
+        self._abis: Optional[Dict[str, Dict[str, Any]]] = None  # topic0 -> event ABI
+        self._lock = asyncio.Lock()
+        self._head = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def subscribe(self, subscriber: Any) -> None:
+        self.subscribers.append(subscriber)
+
+    # ------------------------------ lifecycle -----------------------------
+
+    async def start(self) -> None:
+        if self.chain.meshpay_contract is None:
+            logger.info("account_indexer_disabled", reason="no MeshPay contract configured")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="account-event-indexer")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._head.clear()
+            try:
+                await self.sync_once()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("account_indexer_sync_failed", error=str(exc))
+            try:
+                await asyncio.wait_for(self._head.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------------------ chain follower callbacks --------------
+
+    async def on_head(self, _: int) -> None:
+        self._head.set()
+
+    async def on_reorg(self, common: int) -> None:
+        """Rewind to ``common``: invalidate touched accounts and roll subscribers back."""
+        async with self._lock:
+            touched: Set[str] = set()
+            for block in [b for b in self._recent if b > common]:
+                touched |= self._recent.pop(block)
+            for address in touched:
+                self.store.invalidate(address)
+            rewind = [common]
+            for subscriber in self.subscribers:
+                rewind.append(await subscriber.rollback(common))
+            if self.synced_block is not None:
+                self.synced_block = min([self.synced_block, *rewind])
+            logger.warning("account_indexer_rewound", block=self.synced_block, accounts=len(touched))
+
+    async def on_finalized(self, block: int) -> None:
+        for number in [b for b in self._recent if b <= block]:
+            del self._recent[number]
+        for subscriber in self.subscribers:
+            await subscriber.finalize(block)
+
+    # ------------------------------ snapshots -----------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "synced_block": self.synced_block,
+            "recent": {str(block): sorted(accounts) for block, accounts in self._recent.items()},
+        }
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        """Resume from the checkpoint (or an earlier subscriber block) instead of the head."""
+        if data.get("synced_block") is None:
+            return
+        resume = [b for b in (s.resume_block() for s in self.subscribers) if b is not None]
+        self.synced_block = min([int(data["synced_block"]), *resume])
+        self._recent = {int(block): set(accounts) for block, accounts in data.get("recent", {}).items()}
+
+    # ------------------------------ syncing -------------------------------
+
+    async def sync_once(self) -> int:
+        """Apply account events up to the follower's head; returns events applied."""
+        if self.follower.head is None:
+            await self.follower.poll()
+        async with self._lock:
+            latest = self.follower.head
+            if latest is None:
+                return 0
+            if self.synced_block is None:
+                # Snapshots are read fresh on first use – only subscribers need history
+                resume = [b for b in (s.resume_block() for s in self.subscribers) if b is not None]
+                self.synced_block = min(min(resume), latest) if resume else latest
+            applied = 0
+            while self.synced_block < latest:
+                start = self.synced_block + 1
+                end = min(latest, start + self.log_chunk - 1)
+                try:
+                    logs = await self.chain.rpc(self.chain.w3.eth.get_logs, {
+                        "address": self.chain.meshpay_contract.address,
+                        "fromBlock": start,
+                        "toBlock": end,
+                        "topics": [list(self._topics())],
+                    })
+                except EndpointBehind:
+                    # No node has the whole range yet – an empty answer would skip events
+                    logger.debug("account_logs_deferred", from_block=start, to_block=end)
+                    break
+                accepted = []
+                for log in sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"])):
+                    known = self.follower.hash_of(log["blockNumber"])
+                    if known is not None and _hex(log["blockHash"]) != known:
+                        # The node answered from another fork; stop before it
+                        end = log["blockNumber"] - 1
+                        logger.warning("account_log_fork_mismatch", block=log["blockNumber"])
+                        break
+                    accepted.append(log)
+                events = await self._decode(accepted)
+                for name, args, log in events:
+                    self._apply(name, args, log["blockNumber"])
+                if end < start:
+                    break
+                for subscriber in self.subscribers:
+                    await subscriber.apply(start, end, events)
+                applied += len(events)
+                self.synced_block = end
+                if end < min(latest, start + self.log_chunk - 1):
+                    break
+        if applied:
+            logger.debug("account_events_applied", events=applied, block=self.synced_block)
+        return applied
+
+    def _topics(self) -> Dict[str, Dict[str, Any]]:
+        if self._abis is None:
+            events = self.chain.meshpay_contract.events
+            abis = [getattr(events, name)().abi for name in EVENTS]
+            self._abis = {event_topic(abi): abi for abi in abis}
+        return self._abis
+
+    async def _decode(self, logs: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """``(name, args, log)`` of the known events, decoded on the CPU executor."""
+        decoded = await self.executor.map(decode_logs, logs, self._topics())
+        return [(event[0], event[1], log) for event, log in zip(decoded, logs) if event is not None]
+
+    def _apply(self, name: str, args: Dict[str, Any], block: int) -> None:
+        store = self.store
+        touched = self._recent.setdefault(block, set())
+        if name == "AccountRegistered":
+            touched.add(args["account"])
+            store.update_field(args["account"], "is_registered", True)
+            store.update_field(args["account"], "registration_time", args["timestamp"])
+            return
+        touched.add(args["sender"])
+        store.mark_stale(args["sender"], args["token"])
+        if "recipient" in args:
+            touched.add(args["recipient"])
+            store.mark_stale(args["recipient"], args["token"])
+        if name == "RedemptionCompleted":
+            store.update_field(args["sender"], "last_redeemed_sequence", args["sequenceNumber"])
+
+
+def _hex(value: Any) -> str:
+    return Web3.to_hex(value) if isinstance(value, (bytes, bytearray)) else str(value)
+
+
+def _key(address: str) -> str:
+    return address.lower()
+
+
+# ---------------------------------------------------------------------------
+# Singletons
+# ---------------------------------------------------------------------------
+
+account_state = AccountStateStore(blockchain_client, mesh_client)
+account_indexer = AccountEventIndexer(account_state, blockchain_client, chain_follower)
+chain_follower.subscribe(account_indexer)
+
+__all__ = [
+    "AccountEventIndexer",
+    "AccountState",
+    "AccountStateStore",
+    "account_indexer",
+    "account_state",
+]
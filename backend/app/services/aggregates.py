@@ -0,0 +1,537 @@
+"""AddressAggregates – per-address totals maintained from indexed contract events.
+
+Dashboards need per-wallet volume, recent counterparties and sequence-number
+gaps. Deriving them from raw history means scanning every transaction on each
+view, so they are kept as SQLite tables instead, updated incrementally from
+the events :class:`~app.services.account_state.AccountEventIndexer` decodes:
+
+* ``BalanceUpdated`` – ``sent`` / ``received`` volume and counts
+* ``RedemptionCompleted`` – ``redeemed_sent`` / ``redeemed_received``
+* ``FundingCompleted`` – ``funded``
+
+Every one of those events is also kept as a row of ``events`` – the store
+``GET /api/transactions/export`` streams from (:meth:`AddressAggregates.iter_events`).
+
+Each block range the indexer delivers is applied in one transaction together
+with the range's end block, so after a restart indexing resumes exactly where
+it stopped and no event is counted twice. The same transaction stores the
+previous values of every row it changes in ``undo``; on a chain reorg the
+ranges above the common block are reverted from there, newest first. Undo
+rows are dropped once their range is final (``CHAIN_CONFIRMATIONS`` deep), so
+a rollback touches at most the rows changed in unconfirmed blocks.
+
+The sender's ``sequenceNumber`` (from ``BalanceUpdated`` and
+``RedemptionCompleted``) advances ``next_sequence``; numbers skipped on the
+way are kept in ``sequence_gaps`` until they show up.
+
+Amounts are raw token units (``uint256``) and are stored as decimal strings.
+Reads are primary-key lookups plus one bounded index range for the most
+recent counterparties – independent of how much history an address has.
+
+History before the first indexed block is not counted. To aggregate from
+contract deployment, set ``AGGREGATES_START_BLOCK`` to the deployment block
+before the first start.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import structlog
+from web3 import Web3
+
+from app.core.config import SUPPORTED_TOKENS, get_settings
+from app.services.account_state import account_indexer
+from app.services.blockchain_client import BlockchainClient, blockchain_client
+
+logger = structlog.get_logger(__name__)
+
+settings = get_settings()
+
+MAX_SEQUENCE_GAPS = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursor (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    address TEXT PRIMARY KEY,
+    tx_count INTEGER NOT NULL,
+    first_block INTEGER NOT NULL,
+    last_block INTEGER NOT NULL,
+    last_activity INTEGER,
+    next_sequence INTEGER,
+    sequence_gaps TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS token_totals (
+    address TEXT NOT NULL,
+    token TEXT NOT NULL,
+    totals TEXT NOT NULL,
+    PRIMARY KEY (address, token)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counterparties (
+    address TEXT NOT NULL,
+    counterparty TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    last_block INTEGER NOT NULL,
+    last_activity INTEGER,
+    PRIMARY KEY (address, counterparty)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_counterparties_recent ON counterparties (address, last_block DESC);
+CREATE TABLE IF NOT EXISTS events (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    timestamp INTEGER,
+    tx_hash TEXT,
+    event TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    recipient TEXT,
+    token TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    sequence_number INTEGER,
+    order_id TEXT,
+    PRIMARY KEY (block, log_index)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS undo (
+    end_block INTEGER PRIMARY KEY,
+    start_block INTEGER NOT NULL,
+    prior TEXT NOT NULL
+);
+"""
+
+# Per-token volume columns and their counters
+VOLUMES = ("sent", "received", "redeemed_sent", "redeemed_received", "funded")
+
+EVENT_COLUMNS = (
+    "block", "log_index", "timestamp", "tx_hash", "event", "sender", "recipient",
+    "token", "amount", "sequence_number", "order_id",
+)
+
+
+def _empty_totals() -> Dict[str, Any]:
+    totals: Dict[str, Any] = {}
+    for name in VOLUMES:
+        totals[name] = "0"
+        totals[f"{name}_count"] = 0
+    return totals
+
+
+class _Batch:
+    """Rows touched by one block range, loaded on first use and written back together."""
+
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self.db = db
+        self.accounts: Dict[str, Dict[str, Any]] = {}
+        self.totals: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.counterparties: Dict[Tuple[str, str], List[Any]] = {}
+        # Rows as they were before this batch (None: did not exist), for undo
+        self.prior: Dict[str, List[Any]] = {"accounts": [], "token_totals": [], "counterparties": []}
+
+    def account(self, address: str, block: int) -> Dict[str, Any]:
+        row = self.accounts.get(address)
+        if row is None:
+            found = self.db.execute(
+                "SELECT tx_count, first_block, last_block, last_activity, next_sequence, sequence_gaps"
+                " FROM accounts WHERE address = ?", (address,),
+            ).fetchone()
+            self.prior["accounts"].append([[address], list(found) if found else None])
+            if found is None:
+                row = {"tx_count": 0, "first_block": block, "last_block": block, "last_activity": None,
+                       "next_sequence": None, "sequence_gaps": []}
+            else:
+                row = {"tx_count": found[0], "first_block": found[1], "last_block": found[2],
+                       "last_activity": found[3], "next_sequence": found[4],
+                       "sequence_gaps": json.loads(found[5]) if found[5] else []}
+            self.accounts[address] = row
+        return row
+
+    def token(self, address: str, token: str) -> Dict[str, Any]:
+        key = (address, token)
+        totals = self.totals.get(key)
+        if totals is None:
+            found = self.db.execute(
+                "SELECT totals FROM token_totals WHERE address = ? AND token = ?", key
+            ).fetchone()
+            self.prior["token_totals"].append([list(key), list(found) if found else None])
+            totals = json.loads(found[0]) if found else _empty_totals()
+            self.totals[key] = totals
+        return totals
+
+    def counterparty(self, address: str, other: str) -> List[Any]:
+        key = (address, other)
+        row = self.counterparties.get(key)
+        if row is None:
+            found = self.db.execute(
+                "SELECT count, last_block, last_activity FROM counterparties"
+                " WHERE address = ? AND counterparty = ?", key,
+            ).fetchone()
+            self.prior["counterparties"].append([list(key), list(found) if found else None])
+            row = list(found) if found else [0, 0, None]
+            self.counterparties[key] = row
+        return row
+
+    def write(self) -> None:
+        self.db.executemany(
+            "INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (a, r["tx_count"], r["first_block"], r["last_block"], r["last_activity"],
+                 r["next_sequence"], json.dumps(r["sequence_gaps"]) if r["sequence_gaps"] else None)
+                for a, r in self.accounts.items()
+            ],
+        )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO token_totals VALUES (?, ?, ?)",
+            [(a, t, json.dumps(v)) for (a, t), v in self.totals.items()],
+        )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO counterparties VALUES (?, ?, ?, ?, ?)",
+            [(a, o, *row) for (a, o), row in self.counterparties.items()],
+        )
+
+
+class AddressAggregates:
+    """SQLite tables of per-address aggregates; an ``AccountEventIndexer`` subscriber."""
+
+    def __init__(
+        self,
+        chain: BlockchainClient,
+        path: str | Path | None = None,
+        *,
+        start_block: Optional[int] = None,
+    ) -> None:
+        self.chain = chain
+        self.path = Path(path or settings.aggregates_path)
+        self.start_block = start_block if start_block is not None else settings.aggregates_start_block
+        self.block: Optional[int] = None  # last block applied
+        self.finalized: Optional[int] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._timestamps: Dict[int, int] = {}
+
+    # ------------------------------ lifecycle -----------------------------
+
+    def open(self) -> None:
+        if self._db is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+        row = db.execute("SELECT block FROM cursor WHERE id = 0").fetchone()
+        self.block = row[0] if row else None
+        self._db = db
+        logger.info("aggregates_opened", path=str(self.path), block=self.block)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error as exc:
+                    logger.warning("aggregates_checkpoint_failed", error=str(exc))
+                self._db.close()
+                self._db = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            raise RuntimeError("AddressAggregates not opened – call open() first")
+        return self._db
+
+    # ------------------------------ indexing ------------------------------
+
+    def resume_block(self) -> Optional[int]:
+        if self.block is not None:
+            return self.block
+        return self.start_block - 1 if self.start_block is not None else None
+
+    async def apply(self, start: int, end: int, events: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]) -> None:
+        """Apply one indexed block range (idempotent for ranges already applied)."""
+        if self.block is not None:
+            if end <= self.block:
+                return
+            events = [e for e in events if e[2]["blockNumber"] > self.block]
+        timestamps = await self._block_times({e[2]["blockNumber"] for e in events})
+        await asyncio.to_thread(self._apply, end, events, timestamps)
+        self.block = end
+
+    async def _block_times(self, blocks: set) -> Dict[int, int]:
+        """Timestamps of ``blocks``; raises if one cannot be read so the range is retried."""
+        missing = [b for b in blocks if b not in self._timestamps]
+        found = await asyncio.gather(*(self.chain.rpc(self.chain.w3.eth.get_block, b) for b in missing))
+        for number, block in zip(missing, found):
+            if block is None:  # a node that has not reached it yet
+                raise LookupError(f"block {number} not available for its timestamp")
+            self._timestamps[number] = int(block["timestamp"])
+        times = {b: self._timestamps[b] for b in blocks}
+        if len(self._timestamps) > 4096:
+            self._timestamps = times
+        return times
+
+    def _apply(
+        self, end: int, events: List[Tuple[str, Dict[str, Any], Dict[str, Any]]], timestamps: Dict[int, int]
+    ) -> None:
+        with self._lock:
+            db = self._conn()
+            batch = _Batch(db)
+            rows: List[Tuple[Any, ...]] = []
+            for name, args, log in events:
+                if name == "AccountRegistered":
+                    continue
+                block = log["blockNumber"]
+                at = timestamps.get(block, args.get("timestamp"))
+                sender = args["sender"]
+                token = args["token"]
+                amount = int(args["amount"])
+                recipient = args.get("recipient")
+                tx_hash = log.get("transactionHash")
+                sequence = args.get("sequenceNumber")
+                rows.append((
+                    block, log["logIndex"], at, Web3.to_hex(tx_hash) if tx_hash is not None else None, name,
+                    sender, recipient, token, str(amount), int(sequence) if sequence is not None else None,
+                    args.get("orderId"),
+                ))
+                if name == "FundingCompleted":
+                    self._touch(batch.account(sender, block), block, at)
+                    _add(batch.token(sender, token), "funded", amount)
+                    continue
+                out, into = ("sent", "received") if name == "BalanceUpdated" else ("redeemed_sent", "redeemed_received")
+                self._touch(batch.account(sender, block), block, at)
+                _add(batch.token(sender, token), out, amount)
+                _advance_sequence(batch.account(sender, block), int(args["sequenceNumber"]))
+                if recipient is not None:
+                    if recipient != sender:
+                        self._touch(batch.account(recipient, block), block, at)
+                    _add(batch.token(recipient, token), into, amount)
+                    for a, b in ((sender, recipient), (recipient, sender)):
+                        row = batch.counterparty(a, b)
+                        row[0] += 1
+                        row[1] = max(row[1], block)
+                        row[2] = at if at is not None else row[2]
+            db.execute("BEGIN")
+            try:
+                batch.write()
+                db.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                if events and (self.finalized is None or end > self.finalized):
+                    db.execute(
+                        "INSERT OR REPLACE INTO undo VALUES (?, ?, ?)",
+                        (end, min(e[2]["blockNumber"] for e in events), json.dumps(batch.prior)),
+                    )
+                db.execute("INSERT OR REPLACE INTO cursor (id, block) VALUES (0, ?)", (end,))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        if events:
+            logger.debug("aggregates_applied", events=len(events), block=end)
+
+    def _rollback(self, block: int) -> int:
+        with self._lock:
+            db = self._conn()
+            ranges = db.execute(
+                "SELECT end_block, start_block, prior FROM undo WHERE end_block > ? ORDER BY end_block DESC",
+                (block,),
+            ).fetchall()
+            target = min([block, *(start - 1 for _, start, _ in ranges)])
+            if self.block is not None:
+                target = min(target, self.block)
+            db.execute("BEGIN")
+            try:
+                for _, _, prior in ranges:
+                    for table, rows in json.loads(prior).items():
+                        for key, row in rows:
+                            _restore(db, table, key, row)
+                db.execute("DELETE FROM undo WHERE end_block > ?", (block,))
+                db.execute("DELETE FROM events WHERE block > ?", (target,))
+                if self.block is not None:
+                    db.execute("UPDATE cursor SET block = ? WHERE id = 0", (target,))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        if self.finalized is not None and block < self.finalized:
+            logger.error("aggregates_rollback_below_finalized", block=block, finalized=self.finalized)
+        logger.warning("aggregates_rolled_back", block=target, ranges=len(ranges))
+        return target
+
+    async def rollback(self, block: int) -> int:
+        """Revert every range above ``block``; returns the block the aggregates now end at."""
+        target = await asyncio.to_thread(self._rollback, block)
+        if self.block is not None:
+            self.block = target
+        self._timestamps = {b: t for b, t in self._timestamps.items() if b <= target}
+        return target
+
+    def _finalize(self, block: int) -> None:
+        with self._lock:
+            self._conn().execute("DELETE FROM undo WHERE end_block <= ?", (block,))
+
+    async def finalize(self, block: int) -> None:
+        """Blocks up to ``block`` can no longer be reorganised – drop their undo rows."""
+        self.finalized = block
+        await asyncio.to_thread(self._finalize, block)
+
+    @staticmethod
+    def _touch(account: Dict[str, Any], block: int, at: Optional[int]) -> None:
+        account["tx_count"] += 1
+        account["first_block"] = min(account["first_block"], block)
+        account["last_block"] = max(account["last_block"], block)
+        if at is not None:
+            account["last_activity"] = max(account["last_activity"] or 0, at)
+
+    # ------------------------------ reads ---------------------------------
+
+    def _summary(self, address: str, counterparties: int) -> Dict[str, Any]:
+        with self._lock:
+            db = self._conn()
+            account = db.execute(
+                "SELECT tx_count, first_block, last_block, last_activity, next_sequence, sequence_gaps"
+                " FROM accounts WHERE address = ?", (address,),
+            ).fetchone()
+            tokens = db.execute("SELECT token, totals FROM token_totals WHERE address = ?", (address,)).fetchall()
+            recent = db.execute(
+                "SELECT counterparty, count, last_block, last_activity FROM counterparties"
+                " WHERE address = ? ORDER BY last_block DESC LIMIT ?", (address, counterparties),
+            ).fetchall()
+        by_address = {str(c["address"]).lower(): c for c in SUPPORTED_TOKENS.values() if c["address"]}
+        token_data = {}
+        for token, totals in tokens:
+            config = by_address.get(token.lower())
+            token_data[token] = {
+                "token_symbol": config["symbol"] if config else None,
+                "decimals": config["decimals"] if config else None,
+                **json.loads(totals),
+            }
+        return {
+            "address": address,
+            "indexed_block": self.block,
+            "finalized_block": min(self.block, self.finalized) if None not in (self.block, self.finalized) else None,
+            "tx_count": account[0] if account else 0,
+            "first_block": account[1] if account else None,
+            "last_block": account[2] if account else None,
+            "last_activity": account[3] if account else None,
+            "next_sequence": account[4] if account else None,
+            "sequence_gaps": json.loads(account[5]) if account and account[5] else [],
+            "tokens": token_data,
+            "counterparties": [
+                {"address": r[0], "count": r[1], "last_block": r[2], "last_activity": r[3]} for r in recent
+            ],
+        }
+
+    async def summary(self, address: str, counterparties: int = 10) -> Dict[str, Any]:
+        """Aggregates of ``address`` with its ``counterparties`` most recent counterparties."""
+        return await asyncio.to_thread(self._summary, Web3.to_checksum_address(address), counterparties)
+
+    def _reader(self) -> sqlite3.Connection:
+        """Separate read-only connection: a long export never holds the writer's lock."""
+        self._conn()
+        return sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+
+    async def first_block_at(self, timestamp: int, high: int) -> int:
+        """First block whose timestamp is ``timestamp`` or later (``high + 1`` if none up to ``high``).
+
+        Binary search over block headers – block times never decrease, and
+        unlike the stored rows every block has one. Raises :class:`LookupError`
+        when a header cannot be read (no RPC connection, node error).
+        """
+        low, high = self.start_block or 0, high + 1
+        while low < high:
+            mid = (low + high) // 2
+            try:
+                times = await self._block_times({mid})
+            except LookupError:
+                raise
+            except Exception as exc:  # pylint: disable=broad-except
+                raise LookupError(f"block {mid} not readable for its timestamp: {exc}") from exc
+            if times[mid] >= timestamp:
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    async def iter_events(
+        self,
+        min_block: Optional[int] = None,
+        max_block: Optional[int] = None,
+        *,
+        chunk_size: int = 5000,
+    ) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        """Stored events (:data:`EVENT_COLUMNS`) in chain order, ``chunk_size`` rows at a time.
+
+        ``min_block`` / ``max_block`` bound the block number (both inclusive)
+        and use the primary key. The rows come from one SQLite statement
+        stepped chunk by chunk, so memory does not grow with the range and the
+        result is a consistent snapshot.
+        """
+        where, params = [], []
+        if min_block is not None:
+            where.append("block >= ?")
+            params.append(min_block)
+        if max_block is not None:
+            where.append("block <= ?")
+            params.append(max_block)
+        sql = f"SELECT {', '.join(EVENT_COLUMNS)} FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY block, log_index"
+
+        reader = await asyncio.to_thread(self._reader)
+        try:
+            cursor = await asyncio.to_thread(reader.execute, sql, params)
+            while True:
+                rows = await asyncio.to_thread(cursor.fetchmany, chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            await asyncio.to_thread(reader.close)
+
+
+_KEYS = {
+    "accounts": ("address",),
+    "token_totals": ("address", "token"),
+    "counterparties": ("address", "counterparty"),
+}
+
+
+def _restore(db: sqlite3.Connection, table: str, key: List[Any], row: Optional[List[Any]]) -> None:
+    columns = _KEYS[table]
+    if row is None:
+        where = " AND ".join(f"{c} = ?" for c in columns)
+        db.execute(f"DELETE FROM {table} WHERE {where}", key)
+    else:
+        values = ", ".join("?" * (len(key) + len(row)))
+        db.execute(f"INSERT OR REPLACE INTO {table} VALUES ({values})", [*key, *row])
+
+
+def _add(totals: Dict[str, Any], name: str, amount: int) -> None:
+    totals[name] = str(int(totals[name]) + amount)
+    totals[f"{name}_count"] += 1
+
+
+def _advance_sequence(account: Dict[str, Any], sequence: int) -> None:
+    expected = account["next_sequence"]
+    gaps: List[int] = account["sequence_gaps"]
+    if expected is None:
+        account["next_sequence"] = sequence + 1
+    elif sequence >= expected:
+        gaps.extend(range(max(expected, sequence - MAX_SEQUENCE_GAPS), sequence))
+        del gaps[:-MAX_SEQUENCE_GAPS]
+        account["next_sequence"] = sequence + 1
+    elif sequence in gaps:
+        gaps.remove(sequence)
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+address_aggregates = AddressAggregates(blockchain_client)
+account_indexer.subscribe(address_aggregates)
+
+__all__ = ["AddressAggregates", "EVENT_COLUMNS", "address_aggregates"]
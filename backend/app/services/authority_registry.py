@@ -0,0 +1,221 @@
+"""AuthorityRegistry – compact in-memory store of discovered authorities.
+
+Authorities are held as ``__slots__`` records indexed by name and by IP. A
+discovery refresh is applied as a diff against the current records: unchanged
+authorities are left untouched, and every refresh that changes anything bumps
+the registry version and returns a :class:`ChangeSet` naming what was added,
+updated and removed. Downstream views (topology graph, spatial index) consume
+the change set instead of re-scanning the full list. A malformed entry is
+logged and skipped: an authority already known keeps its last good record,
+so one broken entry on one bridge neither freezes discovery nor drops the
+authority.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_KNOWN_FIELDS = frozenset({"name", "ip", "port", "status", "position", "committee_members"})
+
+
+class AuthorityRecord:
+    """One authority as reported by the gateway bridge."""
+
+    __slots__ = ("name", "ip", "port", "status", "position", "committee_members", "extra")
+
+    def __init__(
+        self,
+        name: str,
+        ip: str,
+        port: int,
+        status: str,
+        position: Optional[Tuple[float, float, float]],
+        committee_members: Tuple[str, ...],
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.name = name
+        self.ip = ip
+        self.port = port
+        self.status = status
+        self.position = position
+        self.committee_members = committee_members
+        self.extra = extra
+
+    @classmethod
+    def from_gateway(cls, raw: Dict[str, Any]) -> "AuthorityRecord":
+        name = raw["name"]
+        if not isinstance(name, str) or not name:
+            raise ValueError("name must be a non-empty string")
+        pos = raw.get("position")
+        extra = {k: v for k, v in raw.items() if k not in _KNOWN_FIELDS}
+        return cls(
+            name=name,
+            ip=raw.get("ip", ""),
+            port=int(raw.get("port", 0)),
+            status=raw.get("status", "unknown"),
+            position=(float(pos["x"]), float(pos["y"]), float(pos.get("z", 0.0))) if pos else None,
+            committee_members=tuple(raw.get("committee_members", ())),
+            extra=extra or None,
+        )
+
+    def _key(self) -> Tuple[Any, ...]:
+        return (self.ip, self.port, self.status, self.position, self.committee_members, self.extra)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, AuthorityRecord):
+            return NotImplemented
+        return self.name == other.name and self._key() == other._key()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    @property
+    def xy(self) -> Optional[Tuple[float, float]]:
+        return (self.position[0], self.position[1]) if self.position else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Gateway-shaped dict, as returned by the authorities API."""
+        data: Dict[str, Any] = dict(self.extra) if self.extra else {}
+        data.update(
+            name=self.name,
+            ip=self.ip,
+            port=self.port,
+            status=self.status,
+            position=(
+                {"x": self.position[0], "y": self.position[1], "z": self.position[2]}
+                if self.position else None
+            ),
+            committee_members=list(self.committee_members),
+        )
+        return data
+
+
+class ChangeSet:
+    """Names affected by one registry refresh."""
+
+    __slots__ = ("version", "added", "updated", "removed")
+
+    def __init__(
+        self,
+        version: int,
+        added: Tuple[str, ...] = (),
+        updated: Tuple[str, ...] = (),
+        removed: Tuple[str, ...] = (),
+    ) -> None:
+        self.version = version
+        self.added = added
+        self.updated = updated
+        self.removed = removed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    @property
+    def upserted(self) -> Tuple[str, ...]:
+        return self.added + self.updated
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "added": list(self.added),
+            "updated": list(self.updated),
+            "removed": list(self.removed),
+        }
+
+
+class AuthorityRegistry:
+    """Name- and IP-indexed authority records with versioned diff updates."""
+
+    def __init__(self) -> None:
+        self.version: int = 0
+        self._by_name: Dict[str, AuthorityRecord] = {}
+        self._by_ip: Dict[str, str] = {}
+        self._dicts: Optional[List[Dict[str, Any]]] = None
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._by_name
+
+    # ------------------------------ mutation ------------------------------
+
+    def _index(self, record: AuthorityRecord) -> None:
+        self._by_name[record.name] = record
+        if record.ip:
+            self._by_ip[record.ip] = record.name
+
+    def _unindex(self, record: AuthorityRecord) -> None:
+        del self._by_name[record.name]
+        if record.ip and self._by_ip.get(record.ip) == record.name:
+            del self._by_ip[record.ip]
+
+    def apply(self, authorities: Iterable[Dict[str, Any]]) -> ChangeSet:
+        """Diff a full discovery snapshot into the registry.
+
+        A malformed entry is skipped; if it names a known authority, that
+        authority keeps its current record instead of being removed.
+        """
+        records: Dict[str, AuthorityRecord] = {}
+        for raw in authorities:
+            try:
+                record = AuthorityRecord.from_gateway(raw)
+            except (AttributeError, KeyError, TypeError, ValueError) as exc:
+                name = raw.get("name") if isinstance(raw, dict) else None
+                current = self._by_name.get(name) if isinstance(name, str) else None
+                logger.warning("authority_entry_invalid", authority=name, error=str(exc), kept=current is not None)
+                if current is not None:
+                    records.setdefault(current.name, current)
+                continue
+            records[record.name] = record
+
+        added: List[str] = []
+        updated: List[str] = []
+        for name, record in records.items():
+            current = self._by_name.get(name)
+            if current is None:
+                added.append(name)
+            elif current != record:
+                updated.append(name)
+        removed = [name for name in self._by_name if name not in records]
+
+        for name in updated + removed:
+            self._unindex(self._by_name[name])
+        for name in added + updated:
+            self._index(records[name])
+
+        if not (added or updated or removed):
+            return ChangeSet(self.version)
+        self.version += 1
+        self._dicts = None
+        return ChangeSet(self.version, tuple(added), tuple(updated), tuple(removed))
+
+    # ------------------------------ lookups -------------------------------
+
+    def get(self, name: str) -> Optional[AuthorityRecord]:
+        return self._by_name.get(name)
+
+    def get_by_ip(self, ip: str) -> Optional[AuthorityRecord]:
+        name = self._by_ip.get(ip)
+        return self._by_name.get(name) if name is not None else None
+
+    def names(self) -> List[str]:
+        return list(self._by_name)
+
+    def records(self) -> Iterable[AuthorityRecord]:
+        return self._by_name.values()
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        """All authorities as dicts; built once per version and shared.
+
+        Callers must treat the returned list as read-only.
+        """
+        if self._dicts is None:
+            self._dicts = [r.as_dict() for r in self._by_name.values()]
+        return self._dicts
+
+
+__all__ = ["AuthorityRecord", "AuthorityRegistry", "ChangeSet"]
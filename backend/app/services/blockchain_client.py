@@ -3,12 +3,13 @@ Blockchain client for interacting with FastPay smart contracts on Etherlink.
 """
 import asyncio
 import json
-import logging
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, Iterable, List, Optional, Any, Union
 from decimal import Decimal
 
 
+import structlog
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
 from eth_account import Account
@@ -44,7 +45,26 @@ ERC20ABI: List[Dict[str, Any]] = _load_abi("ERC20.json")
 
 # ---------------------------------------------------------------------------
 
+from ..core.abi_codec import decode_logs, event_topic
 from ..core.config import settings, SUPPORTED_TOKENS
+from ..core.executor import cpu_executor
+from ..core.tracing import traced, tracer
+from .rpc_pool import PooledProvider, RpcPool
+
+logger = structlog.get_logger(__name__)
+
+
+def _tracing_middleware(make_request: Callable[..., Any], w3: Web3) -> Callable[..., Any]:
+    """Web3 middleware giving every JSON-RPC request its own client span."""
+
+    def middleware(method: str, params: Any) -> Any:
+        with tracer.span(f"rpc {method}", {"rpc.system": "ethereum", "rpc.method": method}, kind="client") as span:
+            response = make_request(method, params)
+            if span is not None and isinstance(response, dict) and response.get("error"):
+                span.error = str(response["error"])
+            return response
+
+    return middleware
 
 
 class BlockchainClient:
@@ -55,23 +75,37 @@ class BlockchainClient:
         self.w3: Optional[Web3] = None
         self.meshpay_contract = None
         self.account = None
-        self.logger = logging.getLogger(__name__)
+        self._chain_id: Optional[int] = None
+        self._token_contracts: Dict[str, Any] = {}
+        self._rpc_semaphore = asyncio.Semaphore(settings.rpc_max_concurrency)
+        self.pool = RpcPool(
+            settings.rpc_urls or [settings.rpc_url],
+            max_lag=settings.rpc_max_lag,
+            timeout=settings.rpc_timeout,
+            probe_interval=settings.rpc_probe_interval,
+            pool_size=settings.rpc_max_concurrency,
+        )
+        self.logger = logger
         self._initialize_connection()
 
     def _initialize_connection(self) -> None:
         """Initialize Web3 connection to Etherlink."""
         try:
-            # Connect to Etherlink RPC
-            self.w3 = Web3(Web3.HTTPProvider(settings.rpc_url))
+            # Connect to Etherlink RPC (reads balanced over RPC_URLS, writes on the primary)
+            self.w3 = Web3(PooledProvider(self.pool))
             
             # Add PoA middleware for Etherlink
             self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+            if tracer.enabled:
+                self.w3.middleware_onion.add(_tracing_middleware, "tracing")
             
             # Verify connection
             if not self.w3.is_connected():
-                raise ConnectionError(f"Failed to connect to {settings.rpc_url}")
+                raise ConnectionError(f"Failed to connect to {self.pool.primary.url}")
             
-            self.logger.info(f"Connected to blockchain: {settings.chain_name} (Chain ID: {settings.chain_id})")
+            self.logger.info(
+                "blockchain_connected", chain=settings.chain_name, chain_id=settings.chain_id, endpoints=len(self.pool)
+            )
             
             # Initialize FastPay contract if address is configured
             if settings.meshpay_contract_address:
@@ -79,31 +113,43 @@ class BlockchainClient:
                     address=Web3.to_checksum_address(settings.meshpay_contract_address),
                     abi=MeshPayABI
                 )
-                self.logger.info(f"FastPay contract initialized at {settings.meshpay_contract_address}")
+                self.logger.info("meshpay_contract_initialized", address=settings.meshpay_contract_address)
             
             # Initialize backend account if private key is provided
             if settings.backend_private_key:
                 self.account = Account.from_key(settings.backend_private_key)
-                self.logger.info(f"Backend account initialized: {self.account.address}")
+                self.logger.info("backend_account_initialized", address=self.account.address)
                 
         except Exception as e:
-            self.logger.error(f"Failed to initialize blockchain connection: {e}")
+            self.logger.error("blockchain_connect_failed", rpc_url=self.pool.primary.url, error=str(e))
             self.w3 = None
+
+    async def start(self) -> None:
+        """Start probing the RPC endpoints' latency and head height."""
+        await self.pool.start()
+
+    async def stop(self) -> None:
+        """Stop probing and close the RPC connections."""
+        await self.pool.stop()
+        self.pool.close()
     
+    @traced("chain.wallet_account")
     async def get_wallet_account(self, address: str) -> Optional[AccountInfo]:
         """Get account information from FastPay contract."""
         if not self.meshpay_contract:
-            self.logger.error("FastPay contract not initialized")
+            self.logger.error("meshpay_contract_unavailable")
             return None
         
         try:
             address = Web3.to_checksum_address(address)
             
-            # Get account info from contract
-            account_data = self.meshpay_contract.functions.getAccountInfo(address).call()
-            
-            balances = await self.get_account_balances(address)
-            return AccountInfo(
+            # Account info and balances are independent reads – issue them together
+            account_data, balances = await asyncio.gather(
+                self.rpc(self.meshpay_contract.functions.getAccountInfo(address).call),
+                self.get_account_balances(address),
+            )
+            # Values come straight from the contract – skip revalidation
+            return AccountInfo.model_construct(
                 address=address,
                 is_registered=account_data[0],
                 registration_time=account_data[1],
@@ -112,8 +158,48 @@ class BlockchainClient:
             )
             
         except Exception as e:
-            self.logger.error(f"Failed to get account info for {address}: {e}")
+            self.logger.error("account_info_read_failed", address=address, error=str(e))
             return None
+
+    async def rpc(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking Web3 call in a worker thread, bounded by the RPC semaphore."""
+        queued = time.perf_counter()
+        async with self._rpc_semaphore:
+            tracer.set_attribute("rpc.queue_ms", round((time.perf_counter() - queued) * 1000.0, 3))
+            return await asyncio.to_thread(fn, *args)
+
+    def _read_onchain_balance(self, address: str, token_symbol: str, token_config: Dict[str, Any]) -> float:
+        """Read the wallet balance of one token (blocking); RPC errors propagate."""
+        decimals = token_config['decimals']
+        if token_config['is_native']:
+            wallet_balance_wei = self.w3.eth.get_balance(Web3.to_checksum_address(address))
+            return self._wei_to_human(wallet_balance_wei, decimals)
+
+        token_address = token_config['address']
+        if not token_address:
+            self.logger.warning("token_address_missing", token=token_symbol)
+            return 0.0
+
+        token_address_checksum = Web3.to_checksum_address(token_address)
+        token_contract = self._token_contracts.get(token_address_checksum)
+        if token_contract is None:
+            # Check if contract exists (once – deployed code does not go away)
+            code = self.w3.eth.get_code(token_address_checksum)
+            if not code:
+                self.logger.warning("token_contract_missing", token=token_symbol, address=token_address)
+                return 0.0
+            token_contract = self.w3.eth.contract(address=token_address_checksum, abi=ERC20ABI)
+            self._token_contracts[token_address_checksum] = token_contract
+
+        wallet_balance_wei = token_contract.functions.balanceOf(address).call()
+        return self._wei_to_human(wallet_balance_wei, decimals)
+
+    def _read_meshpay_balance(self, account_address: str, token_address: str, decimals: int) -> float:
+        """Read the MeshPay balance of one token (blocking); RPC errors propagate."""
+        meshpay_balance_wei = self.meshpay_contract.functions.getAccountBalance(
+            Web3.to_checksum_address(account_address), Web3.to_checksum_address(token_address)
+        ).call()
+        return self._wei_to_human(meshpay_balance_wei, decimals)
     
     async def get_onchain_balance(self, address: str, token_symbol: str, token_config: Dict[str, Any]) -> float:
         """Get on-chain wallet balance for a specific token.
@@ -127,51 +213,13 @@ class BlockchainClient:
             Balance in human-readable format
         """
         if not self.w3:
-            self.logger.error("Web3 not initialized")
+            self.logger.error("web3_unavailable")
             return 0.0
         
         try:
-            token_address = token_config['address']
-            decimals = token_config['decimals']
-            
-            if token_config['is_native']:
-                # Native XTZ balance
-                try:
-                    checksum_address = Web3.to_checksum_address(address)
-                    wallet_balance_wei = self.w3.eth.get_balance(checksum_address)
-                    return self._wei_to_human(wallet_balance_wei, decimals)
-                except Exception as e:
-                    self.logger.error(f"Failed to get {token_symbol} wallet balance for {address}: {e}")
-                    return 0.0
-            else:
-                # ERC20 token balance
-                try:
-                    if token_address:
-                        token_address_checksum = Web3.to_checksum_address(token_address)
-                        
-                        # Check if contract exists
-                        code = self.w3.eth.get_code(token_address_checksum)
-                        if code and code != b'':
-                            # Contract exists, try to get balance
-                            token_contract = self.w3.eth.contract(
-                                address=token_address_checksum,
-                                abi=ERC20ABI
-                            )
-                            wallet_balance_wei = token_contract.functions.balanceOf(address).call()
-                            return self._wei_to_human(wallet_balance_wei, decimals)
-                        else:
-                            self.logger.warning(f"{token_symbol} contract not deployed at {token_address}")
-                            return 0.0
-                    else:
-                        self.logger.warning(f"{token_symbol} contract address not configured")
-                        return 0.0
-                        
-                except Exception as e:
-                    self.logger.error(f"Failed to get {token_symbol} wallet balance for {address}: {e}")
-                    return 0.0
-                    
+            return await self.rpc(self._read_onchain_balance, address, token_symbol, token_config)
         except Exception as e:
-            self.logger.error(f"Failed to get onchain balance for {token_symbol}: {e}")
+            self.logger.error("wallet_balance_read_failed", token=token_symbol, address=address, error=str(e))
             return 0.0
 
     async def get_meshpay_balance(self, account_address: str, token_address: str, decimals: int) -> float:
@@ -186,80 +234,100 @@ class BlockchainClient:
             Balance in human-readable format
         """
         if not self.meshpay_contract:
-            self.logger.warning("MeshPay contract not available, using 0 for MeshPay balances")
+            self.logger.warning("meshpay_contract_unavailable", fallback="zero balance")
+            return 0.0
+        if not token_address:
             return 0.0
         
         try:
-            account_address = Web3.to_checksum_address(account_address)
-            token_address = Web3.to_checksum_address(token_address)
-            
-            meshpay_balance_wei = self.meshpay_contract.functions.getAccountBalance(
-                account_address, token_address
-            ).call()
-            
-            return self._wei_to_human(meshpay_balance_wei, decimals)
-            
+            return await self.rpc(self._read_meshpay_balance, account_address, token_address, decimals)
         except Exception as e:
-            self.logger.error(f"Failed to get MeshPay balance for {account_address} token {token_address}: {e}")
+            self.logger.error("meshpay_balance_read_failed", address=account_address, token=token_address, error=str(e))
             return 0.0
 
-    async def get_account_balances(self, address: str) -> Dict[str, TokenBalance]:
+    @traced("chain.account_balances")
+    async def get_account_balances(
+        self, address: str, symbols: Optional[Iterable[str]] = None
+    ) -> Dict[str, TokenBalance]:
         """Get all token balances for an account.
         
+        Wallet and MeshPay reads for every token are issued concurrently
+        (bounded by ``RPC_MAX_CONCURRENCY``), so latency is roughly that of the
+        slowest single read. A failed read leaves that balance as ``None`` and
+        is reported in the token's ``errors`` instead of being turned into 0.
+        
         Args:
             address: The account address
+            symbols: Only read these tokens (default: all supported tokens)
             
         Returns:
             Dictionary mapping token addresses to TokenBalance objects
         """
         if not self.w3:
-            self.logger.error("Web3 not initialized")
+            self.logger.error("web3_unavailable")
             return {}
         
-        balances = {}
         address = Web3.to_checksum_address(address)
+        if symbols is None:
+            tokens = list(SUPPORTED_TOKENS.items())
+        else:
+            tokens = [(s, SUPPORTED_TOKENS[s]) for s in symbols if s in SUPPORTED_TOKENS]
+        # A token without a configured contract has no balance to read on either side
+        tokens = [(s, c) for s, c in tokens if c['is_native'] or c['address']]
+
+        async def meshpay_read(token_config: Dict[str, Any]) -> float:
+            if not self.meshpay_contract:
+                return 0.0
+            return await self.rpc(
+                self._read_meshpay_balance, address, token_config['address'], token_config['decimals']
+            )
+
+        results = await asyncio.gather(
+            *(self.rpc(self._read_onchain_balance, address, symbol, config) for symbol, config in tokens),
+            *(meshpay_read(config) for _, config in tokens),
+            return_exceptions=True,
+        )
         
-        for token_symbol, token_config in SUPPORTED_TOKENS.items():
-            try:
-                token_address = token_config['address']
-                decimals = token_config['decimals']
-                
-                # Get on-chain wallet balance
-                wallet_balance = await self.get_onchain_balance(address, token_symbol, token_config)
-                
-                # Get MeshPay balance
-                meshpay_balance = await self.get_meshpay_balance(address, token_address, decimals)
-                
-                # Calculate total
-                total_balance = float(Decimal(wallet_balance) + Decimal(meshpay_balance))
-                
-                balances[token_address] = TokenBalance(
-                    token_symbol=token_symbol,
-                    token_address=token_address,
-                    wallet_balance=wallet_balance,
-                    meshpay_balance=meshpay_balance,
-                    total_balance=total_balance,
-                    decimals=decimals
-                )
-                
-            except Exception as e:
-                self.logger.error(f"Failed to process {token_symbol} balance for {address}: {e}")
-                # Add zero balance as fallback
-                balances[token_address] = TokenBalance(
-                    token_symbol=token_symbol,
-                    token_address=token_config['address'],
-                    wallet_balance=0.0,
-                    meshpay_balance=0.0,
-                    total_balance=0.0,
-                    decimals=token_config['decimals']
-                )
+        balances = {}
+        failed: Dict[str, Dict[str, str]] = {}
+        for i, (token_symbol, token_config) in enumerate(tokens):
+            token_address = token_config['address']
+            wallet_balance = results[i]
+            meshpay_balance = results[len(tokens) + i]
+            errors: Dict[str, str] = {}
+            
+            if isinstance(wallet_balance, Exception):
+                errors['wallet'] = str(wallet_balance)
+                wallet_balance = None
+            if isinstance(meshpay_balance, Exception):
+                errors['meshpay'] = str(meshpay_balance)
+                meshpay_balance = None
+            if errors:
+                failed[token_symbol] = errors
+            
+            # Calculate total from the parts that could be read
+            total_balance = float(Decimal(wallet_balance or 0) + Decimal(meshpay_balance or 0))
+            
+            balances[token_address] = TokenBalance.model_construct(
+                token_symbol=token_symbol,
+                token_address=token_address,
+                wallet_balance=wallet_balance,
+                meshpay_balance=meshpay_balance,
+                total_balance=total_balance,
+                decimals=token_config['decimals'],
+                errors=errors or None,
+            )
         
+        if failed:
+            # One event per call, not per token – an RPC outage fails them all
+            self.logger.error("balance_reads_failed", address=address, tokens=failed)
         return balances
     
+    @traced("chain.contract_stats")
     async def get_contract_stats(self) -> Optional[ContractStats]:
         """Get overall contract statistics."""
         if not self.meshpay_contract:
-            self.logger.error("FastPay contract not initialized")
+            self.logger.error("meshpay_contract_unavailable")
             return None
         
         try:
@@ -290,9 +358,10 @@ class BlockchainClient:
             )
             
         except Exception as e:
-            self.logger.error(f"Failed to get contract stats: {e}")
+            self.logger.error("contract_stats_read_failed", error=str(e))
             return None
     
+    @traced("chain.is_account_registered")
     async def is_account_registered(self, address: str) -> bool:
         """Check if an account is registered with FastPay."""
         if not self.meshpay_contract:
@@ -302,42 +371,46 @@ class BlockchainClient:
             address = Web3.balanceOf(address)
             return self.meshpay_contract.functions.isAccountRegistered(address).call()
         except Exception as e:
-            self.logger.error(f"Failed to check registration for {address}: {e}")
+            self.logger.error("registration_check_failed", address=address, error=str(e))
             return False
     
+    @traced("chain.recent_events")
     async def get_recent_events(self, event_name: str, from_block: int = None, limit: int = 100) -> List[Dict]:
         """Get recent contract events."""
         if not self.meshpay_contract:
             return []
         
         try:
+            latest_block = await self.rpc(lambda: self.w3.eth.block_number)
             if from_block is None:
                 # Get events from last 1000 blocks
-                latest_block = self.w3.eth.block_number
                 from_block = max(0, latest_block - 1000)
             
-            event_filter = getattr(self.meshpay_contract.events, event_name).create_filter(
-                fromBlock=from_block,
-                toBlock='latest'
-            )
-            
-            events = event_filter.get_all_entries()
+            abi = getattr(self.meshpay_contract.events, event_name)().abi
+            topic = event_topic(abi)
+            logs = await self.rpc(self.w3.eth.get_logs, {
+                'address': self.meshpay_contract.address,
+                'fromBlock': from_block,
+                'toBlock': latest_block,
+                'topics': [topic],
+            })
+            logs = logs[-limit:]  # Get latest events up to limit
             
-            # Convert events to dict format
-            event_list = []
-            for event in events[-limit:]:  # Get latest events up to limit
-                event_data = {
-                    'event': event.event,
-                    'block_number': event.blockNumber,
-                    'transaction_hash': event.transactionHash.hex(),
-                    'args': dict(event.args)
+            # Bulk ABI decoding runs on the CPU executor, off the event loop
+            decoded = await cpu_executor.map(decode_logs, logs, {topic: abi})
+            return [
+                {
+                    'event': event[0],
+                    'block_number': log['blockNumber'],
+                    'transaction_hash': Web3.to_hex(log['transactionHash']),
+                    'args': event[1],
                 }
-                event_list.append(event_data)
-            
-            return event_list
+                for event, log in zip(decoded, logs)
+                if event is not None
+            ]
             
         except Exception as e:
-            self.logger.error(f"Failed to get {event_name} events: {e}")
+            self.logger.error("contract_events_read_failed", event_name=event_name, error=str(e))
             return []
     
     def _wei_to_human(self, wei_amount: int, decimals: int) -> float:
@@ -348,8 +421,14 @@ class BlockchainClient:
         """Convert human-readable amount to wei."""
         return float(Decimal(human_amount) * Decimal(10 ** decimals))
     
-    async def health_check(self) -> Dict[str, Any]:
-        """Check blockchain connection health."""
+    def health_check_sync(self, *, deep: bool = True) -> Dict[str, Any]:
+        """Check blockchain connection health (blocking).
+
+        A shallow check costs a single ``eth_blockNumber`` call once the chain
+        id is known. ``deep`` additionally exercises the MeshPay contract via
+        ``getRegisteredAccounts``, which grows with the number of accounts and
+        should not be used for high-frequency probes.
+        """
         health_status = {
             'connected': False,
             'chain_id': None,
@@ -359,22 +438,31 @@ class BlockchainClient:
         }
         
         try:
-            if self.w3 and self.w3.is_connected():
-                health_status['connected'] = True
-                health_status['chain_id'] = self.w3.eth.chain_id
+            if self.w3:
                 health_status['latest_block'] = self.w3.eth.block_number
+                health_status['connected'] = True
+                if self._chain_id is None:
+                    self._chain_id = self.w3.eth.chain_id
+                health_status['chain_id'] = self._chain_id
                 
                 if self.meshpay_contract:
-                    # Test contract call
-                    total_accounts = len(self.meshpay_contract.functions.getRegisteredAccounts().call())
                     health_status['meshpay_contract'] = True
-                    health_status['total_accounts'] = total_accounts
+                    if deep:
+                        # Test contract call
+                        total_accounts = len(self.meshpay_contract.functions.getRegisteredAccounts().call())
+                        health_status['total_accounts'] = total_accounts
                     
         except Exception as e:
+            health_status['connected'] = False
             health_status['error'] = str(e)
-            self.logger.error(f"Blockchain health check failed: {e}")
+            self.logger.error("blockchain_health_check_failed", error=str(e))
         
         return health_status
 
+    @traced("chain.health_check")
+    async def health_check(self, *, deep: bool = True) -> Dict[str, Any]:
+        """Check blockchain connection health without blocking the event loop."""
+        return await asyncio.to_thread(self.health_check_sync, deep=deep)
+
 # Global blockchain client instance
 blockchain_client = BlockchainClient() 
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""ChainFollower – reorg-aware view of the chain head.
+
+Event-driven state built on :class:`BlockchainClient` (the account indexer,
+the account state cache, the aggregates tables) must not trust a block just
+because the RPC node returned it: Etherlink can reorganise recent blocks and
+load-balanced RPC endpoints can briefly serve a node that lags behind. The
+follower polls the head and keeps number, hash and parent hash of the last
+``CHAIN_REORG_WINDOW`` blocks:
+
+* a new block whose parent hash does not match the stored hash of its
+  predecessor is a reorg – the follower walks back (at most the window) to
+  the last block whose hash still matches and tells subscribers to roll back
+  to it;
+* a head lower than the one already seen is a lagging node if the stored
+  hash of that height still matches, and is ignored;
+* a head a full window or more ahead of the stored one (a stall, a restart)
+  cannot be linked block by block; the stored head is re-read first and a
+  changed hash is handled as a reorg before a fresh window is started;
+* ``finalized`` trails the head by ``CHAIN_CONFIRMATIONS`` blocks. Derived
+  state keeps undo information only for blocks above it.
+
+Subscribers implement any of ``async on_head(head)``,
+``async on_reorg(common_block)`` and ``async on_finalized(block)``.
+
+The window is part of the warm-restart snapshot
+(:mod:`app.core.snapshots`): after a restart the first poll checks the new
+blocks against the stored hashes, so a reorg that happened while the process
+was down is still rolled back.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import structlog
+from web3 import Web3
+
+from app.core.config import get_settings
+from app.services.blockchain_client import BlockchainClient, blockchain_client
+
+logger = structlog.get_logger(__name__)
+
+settings = get_settings()
+
+
+class BlockRef:
+    """Number and hashes of one block."""
+
+    __slots__ = ("number", "hash", "parent_hash")
+
+    def __init__(self, number: int, hash: str, parent_hash: str) -> None:  # pylint: disable=redefined-builtin
+        self.number = number
+        self.hash = hash
+        self.parent_hash = parent_hash
+
+    @classmethod
+    def from_block(cls, block: Any) -> "BlockRef":
+        return cls(int(block["number"]), _hex(block["hash"]), _hex(block["parentHash"]))
+
+
+class ChainFollower:
+    """Polls the chain head, detects reorgs and tracks the finalized block."""
+
+    def __init__(
+        self,
+        chain: BlockchainClient,
+        *,
+        confirmations: int | None = None,
+        window: int | None = None,
+        interval: float | None = None,
+    ) -> None:
+        self.chain = chain
+        self.confirmations = int(confirmations if confirmations is not None else settings.chain_confirmations)
+        self.window = max(int(window or settings.chain_reorg_window), self.confirmations + 1)
+        self.interval = float(interval or settings.chain_poll_interval)
+        self.blocks: "OrderedDict[int, BlockRef]" = OrderedDict()
+        self.finalized: Optional[int] = None
+        self.subscribers: List[Any] = []
+        self.counters: Dict[str, int] = {"reorgs": 0, "lagging": 0, "deepest_reorg": 0}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def subscribe(self, subscriber: Any) -> None:
+        self.subscribers.append(subscriber)
+
+    @property
+    def head(self) -> Optional[int]:
+        return next(reversed(self.blocks)) if self.blocks else None
+
+    def hash_of(self, number: int) -> Optional[str]:
+        ref = self.blocks.get(number)
+        return ref.hash if ref is not None else None
+
+    # ------------------------------ lifecycle -----------------------------
+
+    async def start(self) -> None:
+        if self.chain.w3 is None:
+            logger.info("chain_follower_disabled", reason="no RPC connection")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="chain-follower")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("chain_follow_failed", error=str(exc))
+            await asyncio.sleep(self.interval)
+
+    # ------------------------------ following -----------------------------
+
+    async def _block(self, number: int) -> BlockRef:
+        return BlockRef.from_block(await self.chain.rpc(self.chain.w3.eth.get_block, number))
+
+    async def poll(self) -> Optional[int]:
+        """Advance to the current head; returns the common block if a reorg was handled."""
+        async with self._lock:
+            latest = await self.chain.rpc(lambda: self.chain.w3.eth.block_number)
+            head = self.head
+            common: Optional[int] = None
+
+            if head is not None and latest <= head:
+                stored = self.blocks.get(latest)
+                if stored is None or (await self._block(latest)).hash == stored.hash:
+                    if latest < head:
+                        self.counters["lagging"] += 1
+                        logger.debug("chain_node_lagging", latest=latest, head=head)
+                    return None
+                common = await self._find_common(latest - 1)
+                self._truncate(common)
+
+            head = self.head
+            if common is None and head is not None and latest - head >= self.window:
+                # Too far behind to link the new blocks to the window (a stall or
+                # a restart): check the stored head itself before starting afresh
+                if (await self._block(head)).hash != self.blocks[head].hash:
+                    common = await self._find_common(head - 1)
+                    self._truncate(common)
+
+            refs = await self._fetch(latest)
+            if refs and self.blocks and refs[0].parent_hash != self.blocks[self.head].hash:
+                common = await self._find_common(self.head)
+                self._truncate(common)
+                refs = await self._fetch(latest)
+                if refs and self.blocks and refs[0].parent_hash != self.blocks[self.head].hash:
+                    logger.warning("chain_head_unstable", head=self.head, latest=latest)
+                    refs = []  # the chain moved again – retry on the next poll
+            for ref in refs:
+                self.blocks[ref.number] = ref
+            while len(self.blocks) > self.window:
+                self.blocks.popitem(last=False)
+
+        if common is not None:
+            await self._notify("on_reorg", common)
+        await self._notify("on_head", self.head)
+        finalized = (self.head or 0) - self.confirmations
+        if finalized >= 0 and (self.finalized is None or finalized > self.finalized):
+            self.finalized = finalized
+            await self._notify("on_finalized", finalized)
+        return common
+
+    async def _fetch(self, latest: int) -> List[BlockRef]:
+        """Blocks after the stored head up to ``latest`` (only the last window on a large gap)."""
+        head = self.head
+        start = head + 1 if head is not None else max(latest - self.window + 1, 0)
+        if latest - start >= self.window:
+            # Too far behind to check continuity block by block – start a fresh window
+            self.blocks.clear()
+            start = latest - self.window + 1
+        return list(await asyncio.gather(*(self._block(n) for n in range(start, latest + 1))))
+
+    async def _find_common(self, start: int) -> int:
+        """Highest stored block at or below ``start`` whose hash the node still agrees with."""
+        oldest = next(iter(self.blocks))
+        for number in range(min(start, self.head or start), oldest - 1, -1):
+            stored = self.blocks.get(number)
+            if stored is not None and (await self._block(number)).hash == stored.hash:
+                break
+        else:
+            number = oldest - 1
+            logger.error("chain_reorg_beyond_window", window=self.window, oldest=oldest)
+        depth = (self.head or number) - number
+        self.counters["reorgs"] += 1
+        self.counters["deepest_reorg"] = max(self.counters["deepest_reorg"], depth)
+        if self.finalized is not None and number < self.finalized:
+            logger.error("chain_reorg_below_finalized", common=number, finalized=self.finalized)
+            self.finalized = number
+        logger.warning("chain_reorg", common=number, depth=depth, head=self.head)
+        return number
+
+    def _truncate(self, common: int) -> None:
+        while self.blocks and next(reversed(self.blocks)) > common:
+            self.blocks.popitem(last=True)
+
+    async def _notify(self, method: str, block: Optional[int]) -> None:
+        if block is None:
+            return
+        for subscriber in self.subscribers:
+            handler = getattr(subscriber, method, None)
+            if handler is None:
+                continue
+            try:
+                await handler(block)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("chain_subscriber_failed", subscriber=type(subscriber).__name__,
+                             callback=method, error=str(exc))
+
+    # ------------------------------ snapshots -----------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "blocks": [[b.number, b.hash, b.parent_hash] for b in self.blocks.values()],
+            "finalized": self.finalized,
+        }
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        blocks = sorted((BlockRef(int(n), h, p) for n, h, p in data["blocks"]), key=lambda b: b.number)
+        self.blocks = OrderedDict((b.number, b) for b in blocks[-self.window:])
+        self.finalized = data.get("finalized")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "head": self.head,
+            "finalized": self.finalized,
+            "confirmations": self.confirmations,
+            "window": len(self.blocks),
+            **self.counters,
+        }
+
+
+def _hex(value: Any) -> str:
+    return Web3.to_hex(value) if isinstance(value, (bytes, bytearray)) else str(value)
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+chain_follower = ChainFollower(blockchain_client)
+
+__all__ = ["BlockRef", "ChainFollower", "chain_follower"]
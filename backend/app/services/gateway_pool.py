@@ -0,0 +1,129 @@
+"""GatewayPool – the set of Mininet-WiFi gateway bridges a MeshClient talks to.
+
+Larger deployments run several mesh segments, each behind its own bridge.
+The pool tracks every bridge's health and the shards it serves (from its
+``/shards`` response) and answers two routing questions for
+:class:`~app.services.mesh_client.MeshClient`:
+
+* :meth:`GatewayPool.shard_owner` – which bridge owns an account's shard,
+  as listed in the ``accounts`` of that bridge's shards. An account no
+  bridge lists has no known owner: guessing one would route to a bridge
+  that does not hold its shard.
+* :meth:`GatewayPool.candidates` – the order to try bridges in: the
+  preferred one first, then other healthy bridges by latency, and unhealthy
+  bridges only as a last resort.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class Gateway:
+    """One gateway bridge and what was last fetched from it."""
+
+    __slots__ = (
+        "url", "healthy", "failures", "last_error", "checked_at", "latency_ms",
+        "etags", "authorities", "clients", "shards",
+    )
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+        self.healthy = True  # optimistic until the first failure
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.etags: Dict[str, str] = {}  # path -> last ETag
+        self.authorities: List[Dict[str, Any]] = []
+        self.clients: List[Dict[str, Any]] = []
+        self.shards: List[Dict[str, Any]] = []
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "checked_at": self.checked_at,
+            "latency_ms": self.latency_ms,
+            "authorities": len(self.authorities),
+            "shards": [s.get("shard_id") or s.get("name") for s in self.shards],
+        }
+
+
+class GatewayPool:
+    """Health, failover order and shard ownership across gateway bridges."""
+
+    def __init__(self, urls: Iterable[str], *, unhealthy_after: int = 1) -> None:
+        self.gateways: List[Gateway] = [Gateway(u) for u in dict.fromkeys(u.rstrip("/") for u in urls)]
+        if not self.gateways:
+            raise ValueError("GatewayPool needs at least one gateway URL")
+        self.unhealthy_after = unhealthy_after
+        self._by_url: Dict[str, Gateway] = {g.url: g for g in self.gateways}
+        self._accounts: Dict[str, Gateway] = {}  # explicit account -> owner
+
+    def __len__(self) -> int:
+        return len(self.gateways)
+
+    def get(self, url: Optional[str]) -> Optional[Gateway]:
+        return self._by_url.get(url.rstrip("/")) if url else None
+
+    @property
+    def primary(self) -> Gateway:
+        """First healthy gateway in configuration order (or the first one)."""
+        return next((g for g in self.gateways if g.healthy), self.gateways[0])
+
+    def healthy(self) -> List[Gateway]:
+        return [g for g in self.gateways if g.healthy]
+
+    def candidates(self, preferred: Optional[Gateway] = None) -> List[Gateway]:
+        """Failover order for one call."""
+        rest = sorted(
+            (g for g in self.gateways if g is not preferred),
+            key=lambda g: (not g.healthy, g.latency_ms if g.latency_ms is not None else float("inf")),
+        )
+        if preferred is None:
+            return rest
+        return [preferred] + rest if preferred.healthy else rest + [preferred]
+
+    # ------------------------------ health --------------------------------
+
+    def mark_success(self, gateway: Gateway, latency_ms: Optional[float] = None) -> None:
+        gateway.healthy = True
+        gateway.failures = 0
+        gateway.last_error = None
+        gateway.checked_at = time.time()
+        if latency_ms is not None:
+            gateway.latency_ms = latency_ms
+
+    def mark_failure(self, gateway: Gateway, error: str) -> None:
+        gateway.failures += 1
+        gateway.last_error = error
+        gateway.checked_at = time.time()
+        if gateway.failures >= self.unhealthy_after:
+            gateway.healthy = False
+
+    # ------------------------------ shards --------------------------------
+
+    def update_shards(self, gateway: Gateway, shards: List[Dict[str, Any]]) -> None:
+        gateway.shards = shards
+        accounts: Dict[str, Gateway] = {}
+        for gw in self.gateways:
+            for shard in gw.shards:
+                for account in shard.get("accounts") or ():
+                    accounts.setdefault(str(account).lower(), gw)
+        self._accounts = accounts
+
+    def shard_owner(self, account: Optional[str]) -> Optional[Gateway]:
+        """Gateway whose shards list ``account``, or ``None`` when no bridge lists it."""
+        if not account:
+            return None
+        return self._accounts.get(account.lower())
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [g.as_dict() for g in self.gateways]
+
+
+__all__ = ["Gateway", "GatewayPool"]
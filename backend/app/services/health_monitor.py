@@ -0,0 +1,145 @@
+"""HealthMonitor – background readiness checks for the probe endpoints.
+
+Kubernetes (and any other orchestrator) probes every pod every few seconds.
+Running the upstream checks inline on each probe turns probe traffic into RPC
+and gateway load, so the checks run here on a fixed interval instead:
+
+* ``/livez``  – process is up, never touches an upstream
+* ``/readyz`` – served from the last snapshot taken by this monitor; with
+  ``HEALTH_CHECK_ENABLED=false`` the probe takes a shallow snapshot itself,
+  at most once per ``HEALTH_CHECK_INTERVAL``
+* ``/health?deep=1`` – runs :meth:`HealthMonitor.check_now` inline
+
+Blocking Web3 calls are pushed to a worker thread so the event loop keeps
+serving requests while a slow RPC node answers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+import structlog
+
+from app.core.config import get_settings
+from app.services.blockchain_client import BlockchainClient, blockchain_client
+from app.services.mesh_client import MeshClient, mesh_client
+
+logger = structlog.get_logger(__name__)
+
+settings = get_settings()
+
+
+class HealthMonitor:
+    """Periodically snapshot upstream health so probes can read it for free."""
+
+    def __init__(
+        self,
+        mesh: MeshClient,
+        blockchain: BlockchainClient,
+        *,
+        interval: float | None = None,
+        stale_after: float | None = None,
+    ) -> None:
+        self.mesh = mesh
+        self.blockchain = blockchain
+        self.interval: float = float(interval or settings.health_check_interval)
+        self.stale_after: float = float(stale_after or settings.health_check_stale_after)
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._inline = asyncio.Lock()
+
+    # ------------------------------ lifecycle -----------------------------
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="health-monitor")
+            logger.info("health_monitor_started", interval=self.interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("health_monitor_stopped")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check_now()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("health_monitor_check_failed", error=str(exc))
+            await asyncio.sleep(self.interval)
+
+    # ------------------------------ checks --------------------------------
+
+    async def check_now(self, *, deep: bool = False) -> Dict[str, Any]:
+        """Run the upstream checks and store the result as the latest snapshot."""
+        mesh_health, chain_health = await asyncio.gather(
+            self.mesh.get_health(),
+            asyncio.to_thread(self.blockchain.health_check_sync, deep=deep),
+        )
+        snapshot = {
+            "checked_at": time.time(),
+            "mesh_client": {
+                "status": "ok" if mesh_health.get("status") not in (None, "unhealthy") else "error",
+                "gateway_url": self.mesh.gateway_url,
+                "gateways": mesh_health.get("gateways", []),
+                "error": mesh_health.get("error"),
+            },
+            "blockchain_client": {
+                "status": "ok" if chain_health["connected"] else "error",
+                "chain_id": chain_health.get("chain_id"),
+                "latest_block": chain_health.get("latest_block"),
+                "meshpay_contract": chain_health["meshpay_contract"],
+                "total_accounts": chain_health.get("total_accounts"),
+                "error": chain_health.get("error"),
+            },
+        }
+        self._snapshot = snapshot
+        return snapshot
+
+    # ------------------------------ readers -------------------------------
+
+    @property
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Latest snapshot, or ``None`` before the first check completed."""
+        return self._snapshot
+
+    async def readiness(self) -> bool:
+        """:meth:`is_ready`, checking inline when the background loop is not running."""
+        if self._task is None:
+            async with self._inline:  # concurrent probes share one check
+                snap = self._snapshot
+                if snap is None or time.time() - snap["checked_at"] >= self.interval:
+                    try:
+                        await self.check_now()
+                    except Exception as exc:  # pylint: disable=broad-except
+                        logger.error("health_monitor_check_failed", error=str(exc))
+        return self.is_ready()
+
+    def is_ready(self) -> bool:
+        """Ready once a fresh snapshot exists and the blockchain client is connected.
+
+        The mesh gateway is allowed to be down – MeshPay is built for
+        intermittent mesh connectivity and the API still serves wallet data.
+        """
+        snap = self._snapshot
+        if snap is None:
+            return False
+        if time.time() - snap["checked_at"] > self.stale_after:
+            return False
+        return snap["blockchain_client"]["status"] == "ok"
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+health_monitor = HealthMonitor(mesh_client, blockchain_client)
+
+__all__ = ["HealthMonitor", "health_monitor"]
@@ -1,13 +1,25 @@
 """MeshClient – single source for communicating with MeshPay mesh authorities.  
 
-This small async wrapper around the Mininet-WiFi *gateway bridge* exposes just
-what the web backend needs:
+This small async wrapper around one or more Mininet-WiFi *gateway bridges*
+exposes just what the web backend needs:
 
 * discover()          – list available authorities
 * send_transfer()     – forward a transfer order
 * send_confirmation() – forward a confirmation order
 * ping()/ping_all()   – liveness checks
 
+With several bridges (``MESH_BRIDGE_URLS``) discovery is merged across all of
+them, account traffic is routed to the bridge owning the account's shard and
+every call fails over to the next healthy bridge (see
+:mod:`app.services.gateway_pool`). With ``MESH_TRANSPORT=ws`` calls go over
+one persistent multiplexed link per bridge, which also pushes authority
+changes (see :mod:`app.services.mesh_transport`).
+
+The last discovery and shard lists of every bridge, with their ETags, are
+part of the warm-restart snapshot (:mod:`app.core.snapshots`): a restarted
+worker answers from them at once and its first refresh is a conditional
+request that the bridge can answer with ``304``.
+
 The implementation intentionally avoids dependencies on the old, heavier
 `authority_client.py` and `mesh_authority_client.py`.
 """
@@ -15,26 +27,43 @@ The implementation intentionally avoids dependencies on the old, heavier
 from __future__ import annotations
 
 import asyncio
+import re
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 import structlog
 from app.core.config import get_settings
+from app.core.rate_limit import ConcurrencyLimiter, Overloaded
+from app.core.tracing import traced, tracer
+from app.services.authority_registry import AuthorityRegistry, ChangeSet
+from app.services.gateway_pool import Gateway, GatewayPool
+from app.services.mesh_transport import MeshLink
+from app.services.onchain_authorities import OnchainAuthoritySet, onchain_authorities
+from app.services.spatial_index import BBox, GridIndex
+from app.services.topology import NetworkTopologyGraph, network_topology
 
 logger = structlog.get_logger(__name__)
 
 settings = get_settings()
 MESH_GATEWAY_URL: str = settings.mesh_bridge_url.rstrip("/")
+MESH_GATEWAY_URLS: List[str] = [u.rstrip("/") for u in settings.mesh_bridge_urls] or [MESH_GATEWAY_URL]
 HTTP_TIMEOUT: float = settings.mesh_timeout
 SUPPORTED_TOKENS: List[str] = settings.supported_tokens
+_AUTHORITY_PATH = re.compile(r"^/authorities/([^/]+)/")
+# Transport errors raised before any byte of the request left the process
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout)
 
 # ---------------------------------------------------------------------------
 # Pydantic-free (simple) models – frontend has its own TS typings
 # ---------------------------------------------------------------------------
 
 class AuthorityInfoDict(Dict[str, Any]):
-    """Authority info represented as a plain `dict` (to avoid pydantic heavy-weight)."""
+    """Authority info represented as a plain `dict` (to avoid pydantic heavy-weight).
+
+    Only describes the API shape; authorities are stored as compact records in
+    :class:`~app.services.authority_registry.AuthorityRegistry`.
+    """
 
     name: str  # type: ignore[assignment]
     ip: str  # type: ignore[assignment]
@@ -42,6 +71,9 @@ class AuthorityInfoDict(Dict[str, Any]):
     status: str  # type: ignore[assignment]
     position: Dict[str, float]  # type: ignore[assignment]
     committee_members: List[str]  # type: ignore[assignment]
+    gateway: str  # type: ignore[assignment]  # bridge the authority was discovered through
+    address: Optional[str]  # type: ignore[assignment]  # on-chain address, joined by name
+    onchain_active: bool  # type: ignore[assignment]
 
 
 # ---------------------------------------------------------------------------
@@ -52,29 +84,107 @@ class MeshClientError(RuntimeError):
     """Base exception for mesh client errors."""
 
 
+class MeshClientOutcomeUnknown(MeshClientError):
+    """Raised when a request may have been executed but no answer came back.
+
+    The bridge may already have forwarded it (read timeout, dropped link,
+    5xx), so it must be reconciled before it is sent again.
+    """
+
+
+class MeshClientOverloaded(MeshClientError):
+    """Raised when admission control sheds a gateway call."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 # ---------------------------------------------------------------------------
 # Mesh client implementation
 # ---------------------------------------------------------------------------
 
 class MeshClient:  # pylint: disable=too-few-public-methods
-    """HTTP client that talks to the mesh gateway bridge running in the NAT node."""
-
-    def __init__(self, gateway_url: str | None = None) -> None:
-        self.gateway_url: str = (gateway_url or MESH_GATEWAY_URL).rstrip("/")
+    """HTTP client that talks to the mesh gateway bridges running in the NAT nodes."""
+
+    def __init__(
+        self,
+        gateway_url: str | None = None,
+        topology: NetworkTopologyGraph | None = None,
+        chain_authorities: OnchainAuthoritySet | None = None,
+        gateway_urls: List[str] | None = None,
+        transport: str | None = None,
+        http_transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.gateways: GatewayPool = GatewayPool(
+            gateway_urls or ([gateway_url] if gateway_url else MESH_GATEWAY_URLS)
+        )
+        self.topology: NetworkTopologyGraph = topology or network_topology
+        self.chain_authorities: OnchainAuthoritySet = chain_authorities or onchain_authorities
+        self._joined: List[AuthorityInfoDict] = []
+        self._shards_cache: List[Dict[str, Any]] = []
+        self._joined_key: Optional[tuple[int, int]] = None
         self._http: Optional[httpx.AsyncClient] = None
-        self._cache: Dict[str, AuthorityInfoDict] = {}
+        self.transport: str = (transport or settings.mesh_transport).lower()
+        self._links: Dict[str, MeshLink] = {}
+        self._http_transport = http_transport  # e.g. the mesh simulator's in-process bridge
+        self.registry: AuthorityRegistry = AuthorityRegistry()
+        self.spatial: GridIndex = GridIndex(settings.map_index_cell_size, grid=settings.map_index_grid)
+        self.limiter: ConcurrencyLimiter = ConcurrencyLimiter(
+            settings.mesh_max_concurrency, settings.mesh_max_queue, settings.mesh_queue_timeout
+        )
 
     # ------------------------------ lifecycle -----------------------------
 
     async def start(self) -> None:
-        self._http = httpx.AsyncClient(timeout=HTTP_TIMEOUT)
-        logger.info("mesh_client_started", gateway=self.gateway_url)
+        self._http = httpx.AsyncClient(timeout=HTTP_TIMEOUT, transport=self._http_transport)
+        if self.transport == "ws":
+            # Open the links up front so pushed events arrive before the first call
+            await asyncio.gather(
+                *(self._link(g).connect() for g in self.gateways.gateways), return_exceptions=True
+            )
+        logger.info(
+            "mesh_client_started",
+            gateways=[g.url for g in self.gateways.gateways],
+            transport=self.transport,
+        )
 
     async def close(self) -> None:
+        await asyncio.gather(*(link.close() for link in self._links.values()), return_exceptions=True)
+        self._links.clear()
         if self._http:
             await self._http.aclose()
             logger.info("mesh_client_closed")
 
+    # ------------------------------ snapshots -----------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "gateways": {
+                g.url: {"etags": g.etags, "authorities": g.authorities, "clients": g.clients, "shards": g.shards}
+                for g in self.gateways.gateways
+            }
+        }
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        """Last known gateway lists; gateways no longer configured are skipped."""
+        for url, saved in data["gateways"].items():
+            gateway = self.gateways.get(url)
+            if gateway is None:
+                continue
+            gateway.etags = dict(saved["etags"])
+            gateway.authorities = list(saved["authorities"])
+            gateway.clients = list(saved["clients"])
+            self.gateways.update_shards(gateway, list(saved["shards"]))
+        self._shards_cache = [s for g in self.gateways.gateways for s in g.shards]
+        if any(g.authorities for g in self.gateways.gateways):
+            self._merge_authorities()
+
+    @property
+    def gateway_url(self) -> str:
+        """URL of the current primary (first healthy) gateway."""
+        return self.gateways.primary.url
+
     # ------------------------------ helpers ------------------------------
 
     def _require_client(self) -> httpx.AsyncClient:
@@ -82,109 +192,430 @@ class MeshClient:  # pylint: disable=too-few-public-methods
             raise MeshClientError("MeshClient not started – call start() first")
         return self._http
 
+    def _link(self, gateway: Gateway) -> MeshLink:
+        link = self._links.get(gateway.url)
+        if link is None:
+            link = self._links[gateway.url] = MeshLink(
+                gateway.url,
+                path=settings.mesh_ws_path,
+                timeout=HTTP_TIMEOUT,
+                on_event=lambda event: self._on_gateway_event(gateway, event),
+            )
+        return link
+
+    def link_stats(self) -> List[Dict[str, Any]]:
+        return [link.stats() for link in self._links.values()]
+
+    async def _send(self, gateway: Gateway, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Issue one request to ``gateway`` under the admission limiter."""
+        attributes = {"http.method": method, "mesh.path": path, "mesh.gateway": gateway.url}
+        match = _AUTHORITY_PATH.match(path)
+        if match:
+            attributes["mesh.authority"] = match.group(1)
+        with tracer.span("mesh.gateway", attributes, kind="client") as span:
+            kwargs["headers"] = tracer.inject(kwargs.get("headers"))
+            resp = await self._send_untraced(gateway, method, path, **kwargs)
+            if span is not None:
+                span.set_attribute("http.status_code", resp.status_code)
+            return resp
+
+    async def _send_untraced(self, gateway: Gateway, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        http = self._require_client()
+        link = self._link(gateway) if self.transport == "ws" else None
+        try:
+            async with self.limiter:
+                if link is not None and not link.unsupported:
+                    tracer.set_attribute("mesh.transport", "ws")
+                    try:
+                        return await link.request(method, path, **kwargs)
+                    except httpx.ConnectError:
+                        if not link.unsupported:
+                            raise
+                        # Bridge refused the WebSocket handshake – stay on HTTP for it
+                tracer.set_attribute("mesh.transport", "http")
+                return await http.request(method, f"{gateway.url}{path}", **kwargs)
+        except Overloaded as exc:
+            logger.warning("gateway_call_shed", path=path, **self.limiter.stats())
+            raise MeshClientOverloaded(str(exc), exc.retry_after) from exc
+
+    async def _request(
+        self, method: str, path: str, *, prefer: Optional[Gateway] = None, **kwargs: Any
+    ) -> httpx.Response:
+        """Send to ``prefer`` (or the best gateway) and fail over on transport errors / 5xx.
+
+        Only requests that are safe to repeat move on to the next gateway: a
+        GET always, a POST only when the connection could not be opened and
+        nothing was sent. A POST that may have reached the bridge (read
+        timeout, dropped link, 5xx) is returned or raised to the caller, since
+        a transfer forwarded twice would be executed twice.
+        """
+        retry_sent = method.upper() == "GET"
+        last_exc: Optional[Exception] = None
+        resp: Optional[httpx.Response] = None
+        for gateway in self.gateways.candidates(prefer):
+            started = time.perf_counter()
+            try:
+                resp = await self._send(gateway, method, path, **kwargs)
+            except httpx.TransportError as exc:
+                self.gateways.mark_failure(gateway, str(exc) or type(exc).__name__)
+                if not retry_sent and not isinstance(exc, _NOT_SENT):
+                    raise
+                last_exc = exc
+                continue
+            if resp.status_code >= 500:
+                self.gateways.mark_failure(gateway, f"HTTP {resp.status_code}")
+                if not retry_sent:
+                    return resp
+                continue
+            self.gateways.mark_success(gateway, (time.perf_counter() - started) * 1000.0)
+            return resp
+        if resp is not None:
+            return resp
+        raise last_exc or MeshClientError("No gateway configured")
+
+    async def _get_if_changed(self, gateway: Gateway, path: str) -> Optional[Tuple[Any, Optional[str]]]:
+        """GET ``path`` from ``gateway`` with ``If-None-Match``; ``None`` on 304.
+
+        Returns the body with its ETag. The caller stores the ETag only once
+        the body has been applied – otherwise the next poll would get a 304
+        for a snapshot that never took effect.
+        """
+        etag = gateway.etags.get(path)
+        started = time.perf_counter()
+        try:
+            resp = await self._send(gateway, "GET", path, headers={"If-None-Match": etag} if etag else None)
+            if resp.status_code != 304:
+                resp.raise_for_status()
+        except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+            self.gateways.mark_failure(gateway, str(exc) or type(exc).__name__)
+            raise
+        self.gateways.mark_success(gateway, (time.perf_counter() - started) * 1000.0)
+        if resp.status_code == 304:
+            return None
+        return resp.json(), resp.headers.get("etag")
+
+    def _polled(self) -> List[Gateway]:
+        """Gateways to poll: the healthy ones, or all of them when none is."""
+        return self.gateways.healthy() or list(self.gateways.gateways)
+
+    def _authority_gateway(self, authority: str) -> Optional[Gateway]:
+        record = self.registry.get(authority)
+        return self.gateways.get(record.extra.get("gateway")) if record and record.extra else None
+
     # ------------------------------ shards API ----------------------------
 
+    @traced("mesh.wallet_balances")
     async def get_wallet_balances(self, address: str) -> List[Dict[str, Any]]:
         """Fetch wallet balances from gateway `/wallet/balances/{address}`."""
-        http = self._require_client()
         try:
-            resp = await http.get(f"{self.gateway_url}/wallet/balances/{address}")
+            resp = await self._request(
+                "GET", f"/wallet/balances/{address}", prefer=self.gateways.shard_owner(address)
+            )
             resp.raise_for_status()
             return resp.json()
+        except MeshClientOverloaded:
+            raise
         except Exception as exc:  # pylint: disable=broad-except
             logger.error("wallet_balances_fetch_failed", error=str(exc))
             raise MeshClientError("Gateway unreachable for wallet balances") from exc
 
+    @traced("mesh.account_info")
     async def get_account_info(self, address: str) -> Dict[str, Any]:
         """Fetch account info from gateway `/wallet/account/{address}`."""
-        http = self._require_client()
         try:
-            resp = await http.get(f"{self.gateway_url}/wallet/account/{address}")
+            resp = await self._request(
+                "GET", f"/wallet/account/{address}", prefer=self.gateways.shard_owner(address)
+            )
             resp.raise_for_status()
             return resp.json()
+        except MeshClientOverloaded:
+            raise
         except Exception as exc:  # pylint: disable=broad-except
             logger.error("account_info_fetch_failed", error=str(exc))
             raise MeshClientError("Gateway unreachable for account info") from exc
 
+    @traced("mesh.shards")
     async def get_shards(self, *, force: bool = False) -> List[Dict[str, Any]]:
-        """Fetch shard list from gateway `/shards`."""
-        http = self._require_client()
-        try:
-            resp = await http.get(f"{self.gateway_url}/shards")
-            resp.raise_for_status()
-            data = resp.json()
-            if isinstance(data, dict):
-                self._shards_cache = data.get("shards", [])
-            else:
-                self._shards_cache = []
-        except Exception as exc:  # pylint: disable=broad-except
-            logger.error("shard_fetch_failed", error=str(exc))
-            self._shards_cache = []
+        """Fetch and merge `/shards` from every gateway (conditional on the last ETag).
+
+        Each shard is tagged with the ``gateway`` serving it; the result also
+        drives shard-owner routing of transfers.
+        """
+        polled = self._polled()
+        if force:
+            for gateway in polled:
+                gateway.etags.pop("/shards", None)
+        results = await asyncio.gather(
+            *(self._get_if_changed(g, "/shards") for g in polled), return_exceptions=True
+        )
+        for gateway, data in zip(polled, results):
+            if isinstance(data, MeshClientOverloaded):
+                raise data
+            if isinstance(data, Exception):
+                logger.error("shard_fetch_failed", gateway=gateway.url, error=str(data))
+                gateway.etags.pop("/shards", None)
+                self.gateways.update_shards(gateway, [])
+            elif data is not None:
+                body, etag = data
+                shards = body.get("shards", []) if isinstance(body, dict) else None
+                if not isinstance(shards, list) or not all(isinstance(s, dict) for s in shards):
+                    logger.error("shard_fetch_invalid", gateway=gateway.url)
+                    continue  # keep the last list and ask for a full answer next time
+                self.gateways.update_shards(gateway, [{**s, "gateway": gateway.url} for s in shards])
+                _set_etag(gateway, "/shards", etag)
+        self._shards_cache = [s for g in self.gateways.gateways for s in g.shards]
         return self._shards_cache
 
     # ------------------------------ core API ------------------------------
 
+    @traced("mesh.discover")
     async def discover(self, *, force: bool = False) -> List[AuthorityInfoDict]:
-        """Return list of authorities; refresh from gateway when requested."""
-        if self._cache and not force:
-            return list(self._cache.values())
-
-        http = self._require_client()
-        try:
-            resp = await http.get(f"{self.gateway_url}/authorities")
-            resp.raise_for_status()
-            data: Dict[str, Any] = resp.json()
-        except Exception as exc:  # pylint: disable=broad-except
-            logger.error("authority_discovery_failed", error=str(exc))
-            raise MeshClientError("Gateway unreachable for discovery") from exc
-
-        self._cache = {a["name"]: a for a in data.get("authorities", [])}
-        logger.info("authority_discovery_success", count=len(self._cache))
-        return list(self._cache.values())
-
-    async def send_transfer(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Return list of authorities; refresh from the gateways when requested.
+
+        All gateways are polled in parallel and their lists merged (an
+        authority seen by several bridges is kept from the first one in
+        configuration order). A gateway that fails keeps contributing its
+        last known list. Each refresh also re-polls ``/shards`` (conditional
+        on its ETag too) so shard-owner routing follows the bridges. The returned list is shared between callers until
+        the registry changes – treat it as read-only.
         """
-        Send a transfer request to the mesh network via the gateway bridge.
-        
-        This method sends the transfer request to the gateway bridge's /transfer endpoint,
-        which will forward it to all authorities in the mesh network.
+        if len(self.registry) and not force:
+            tracer.set_attribute("cache.hit", True)
+            return self._joined_dicts()
+
+        polled = self._polled()
+        results, shards = await asyncio.gather(
+            asyncio.gather(*(self._get_if_changed(g, "/authorities") for g in polled), return_exceptions=True),
+            self.get_shards(),
+            return_exceptions=True,
+        )
+        if isinstance(shards, Exception):
+            logger.warning("shard_refresh_failed", error=str(shards))
+        changed = failed = 0
+        etags: Dict[str, Optional[str]] = {}  # gateway URL -> ETag of the list just fetched
+        for gateway, data in zip(polled, results):
+            if isinstance(data, MeshClientOverloaded):
+                raise data
+            if isinstance(data, Exception):
+                logger.error("authority_discovery_failed", gateway=gateway.url, error=str(data))
+                failed += 1
+            elif data is not None:
+                body, etags[gateway.url] = data
+                try:
+                    gateway.authorities = _tagged(
+                        gateway, body.get("authorities", []) if isinstance(body, dict) else None
+                    )
+                except MeshClientError as exc:
+                    logger.error("authority_discovery_invalid", gateway=gateway.url, error=str(exc))
+                    del etags[gateway.url]
+                    failed += 1
+                    continue
+                gateway.clients = body.get("clients") or []
+                changed += 1
+        if failed == len(polled):
+            cause = next((r for r in results if isinstance(r, Exception)), None)
+            raise MeshClientError("Gateway unreachable for discovery") from cause
+        tracer.set_attribute("cache.hit", not changed)
+        if not changed:
+            logger.debug("authority_discovery_not_modified", version=self.registry.version)
+            return self._joined_dicts()
+
+        changes = self._merge_authorities()
+        for gateway in polled:
+            if gateway.url in etags:
+                _set_etag(gateway, "/authorities", etags[gateway.url])
+        logger.info(
+            "authority_discovery_success",
+            count=len(self.registry),
+            version=changes.version,
+            added=len(changes.added),
+            updated=len(changes.updated),
+            removed=len(changes.removed),
+        )
+        return self._joined_dicts()
+
+    def _merge_authorities(self) -> ChangeSet:
+        """Apply the union of all gateways' authority lists to the registry.
+
+        Malformed entries are skipped by the registry, one authority at a time.
         """
-        http = self._require_client()
-        
+        merged: Dict[str, Dict[str, Any]] = {}
+        for gateway in self.gateways.gateways:
+            for authority in gateway.authorities:
+                merged.setdefault(authority.get("name"), authority)
+        changes = self.registry.apply(merged.values())
+        self._apply_changes(changes, [c for g in self.gateways.gateways for c in g.clients] or None)
+        return changes
+
+    def _on_gateway_event(self, gateway: Gateway, event: Dict[str, Any]) -> None:
+        """Apply an authority change pushed by ``gateway`` over its link."""
+        kind, data = event.get("event"), event.get("data") or {}
+        if kind == "authorities":
+            gateway.authorities = _tagged(gateway, data.get("authorities", []))
+        elif kind == "authority_updated" and data.get("name"):
+            others = [a for a in gateway.authorities if a.get("name") != data["name"]]
+            gateway.authorities = others + [{**data, "gateway": gateway.url}]
+        elif kind == "authority_removed" and data.get("name"):
+            gateway.authorities = [a for a in gateway.authorities if a.get("name") != data["name"]]
+        else:
+            logger.debug("gateway_event_ignored", gateway=gateway.url, gateway_event=kind)
+            return
+        changes = self._merge_authorities()
+        logger.info(
+            "gateway_event_applied",
+            gateway=gateway.url,
+            gateway_event=kind,
+            version=changes.version,
+            updated=len(changes.added) + len(changes.updated) + len(changes.removed),
+        )
+
+    # ------------------------------ on-chain join -------------------------
+
+    def _join(self, data: Dict[str, Any]) -> AuthorityInfoDict:
+        """Add the on-chain address and active flag of a discovered authority."""
+        onchain = self.chain_authorities.by_name(data["name"])
+        return {
+            **data,
+            "address": onchain.address if onchain else None,
+            "onchain_active": bool(onchain and onchain.active),
+        }
+
+    def _joined_dicts(self) -> List[AuthorityInfoDict]:
+        """Discovered authorities joined with the on-chain set, rebuilt only when either changes."""
+        key = (self.registry.version, self.chain_authorities.version)
+        if key != self._joined_key:
+            self._joined = [self._join(d) for d in self.registry.as_dicts()]
+            self._joined_key = key
+        return self._joined
+
+    def is_committee_member(self, authority: str) -> bool:
+        """True when ``authority`` (name or address) is active on chain – no RPC call."""
+        if authority.startswith("0x") and len(authority) == 42:
+            return self.chain_authorities.is_authority(authority)
+        onchain = self.chain_authorities.by_name(authority)
+        return bool(onchain and onchain.active)
+
+    def committee(self) -> List[str]:
+        """Names of discovered authorities that are active on chain."""
+        return [name for name in self.registry.names() if self.is_committee_member(name)]
+
+    def _apply_changes(self, changes: ChangeSet, clients: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Propagate a registry change set to the derived views."""
+        upserted = [self.registry.get(name) for name in changes.upserted]
+        self.topology.apply_discovery((r.as_dict() for r in upserted), changes.removed, clients)
+        for record in upserted:
+            xy = record.xy
+            if xy is None:
+                self.spatial.remove(record.name)
+            else:
+                self.spatial.upsert(record.name, *xy)
+        for name in changes.removed:
+            self.spatial.remove(name)
+
+    async def get_authority(self, name: str) -> Optional[AuthorityInfoDict]:
+        """Look up one authority by name (O(1) after the first discovery)."""
+        if not len(self.registry):
+            await self.discover()
+        record = self.registry.get(name)
+        return self._join(record.as_dict()) if record is not None else None
+
+    async def discover_in_view(self, bbox: BBox, zoom: Optional[int] = None) -> Dict[str, Any]:
+        """Return authorities inside ``bbox``; clustered below the cluster zoom.
+
+        Nodes are looked up through the spatial index kept in sync with
+        discovery, so the cost scales with the viewport, not the mesh size.
+        """
+        await self.discover()
+        names = self.spatial.query(bbox)
+        registry = self.registry
+        if zoom is None or zoom >= settings.map_cluster_max_zoom:
+            return {"authorities": [self._join(registry.get(n).as_dict()) for n in names], "clusters": []}
+
+        extent = settings.map_cluster_extent or self.spatial.extent() or 1.0
+        cluster_size = extent / (2 ** zoom) / settings.map_cluster_grid
+        authorities: List[AuthorityInfoDict] = []
+        clusters: List[Dict[str, Any]] = []
+        for cluster in self.spatial.cluster(names, cluster_size):
+            if cluster["count"] == 1:
+                authorities.append(self._join(registry.get(cluster["members"][0]).as_dict()))
+                continue
+            members = cluster.pop("members")
+            cluster["online"] = sum(1 for m in members if registry.get(m).status == "online")
+            clusters.append(cluster)
+        return {"authorities": authorities, "clusters": clusters}
+
+    @staticmethod
+    def validate_transfer(body: Dict[str, Any], *, check_supported: bool = True) -> None:
+        """Validate a transfer body; raises :class:`MeshClientError` when invalid."""
         # Validate required fields
         required_fields = ["sender", "recipient", "token_address", "amount"]
         for field in required_fields:
             if field not in body:
                 raise MeshClientError(f"Missing required field: {field}")
         
+        sender = body.get("sender")
+        if not isinstance(sender, str) or not sender.startswith("0x"):
+            raise MeshClientError("Invalid sender address format")
+        if body.get("sequence_number") is not None:
+            try:
+                int(body["sequence_number"])
+            except (ValueError, TypeError):
+                raise MeshClientError("Sequence number must be a valid integer")
+
         # Validate amount
         try:
             amount = int(body["amount"])
-            if amount <= 0:
-                raise MeshClientError("Amount must be positive")
         except (ValueError, TypeError):
             raise MeshClientError("Amount must be a valid integer")
+        if amount <= 0:
+            raise MeshClientError("Amount must be positive")
         
         # Validate token address
         token_address = body.get("token_address")
-        if not token_address or not token_address.startswith("0x"):
+        if not isinstance(token_address, str) or not token_address.startswith("0x"):
             raise MeshClientError("Invalid token address format")
         
         # Check if token is supported (optional validation)
-        if token_address not in SUPPORTED_TOKENS:
-            logger.warning(f"Token {token_address} not in SUPPORTED_TOKENS list")
+        if check_supported and token_address not in SUPPORTED_TOKENS:
+            logger.warning("token_not_supported", token=token_address)
+
+    @traced("mesh.transfer")
+    async def send_transfer(self, body: Dict[str, Any], *, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send a transfer request to the mesh network via the gateway bridge.
         
-        payload = {**body, "timestamp": time.time()}
+        This method sends the transfer request to the gateway bridge's /transfer endpoint,
+        which will forward it to all authorities in the mesh network. A
+        ``timestamp`` already in ``body`` is kept, so a resent order is
+        byte-identical, and ``idempotency_key`` goes out as ``Idempotency-Key``.
+        Raises :class:`MeshClientOutcomeUnknown` when the bridge may have
+        forwarded the transfer without answering.
+        """
+        self.validate_transfer(body)
+        payload = {"timestamp": time.time(), **body}
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
         
+        started = time.perf_counter()
         try:
             # Call the bridge's /transfer endpoint which triggers do_POST transfer
-            resp = await http.post(f"{self.gateway_url}/transfer", json=payload)
+            resp = await self._request(
+                "POST", "/transfer", json=payload, headers=headers,
+                prefer=self.gateways.shard_owner(body.get("sender")),
+            )
             resp.raise_for_status()
-            return resp.json()
+            result = resp.json()
+        except MeshClientOverloaded:
+            raise
         except Exception as exc:  # pylint: disable=broad-except
+            self.topology.record_transfer(False, time.perf_counter() - started)
             logger.error("transfer_failed", error=str(exc))
+            if _outcome_unknown(exc):
+                raise MeshClientOutcomeUnknown(f"Transfer outcome unknown: {str(exc)}") from exc
             raise MeshClientError(f"Transfer failed: {str(exc)}") from exc
+        self.topology.record_transfer(True, time.perf_counter() - started)
+        return result
 
+    @traced("mesh.transfer_to_authority")
     async def send_transfer_to_authority(self, authority: str, body: Dict[str, Any]) -> Dict[str, Any]:
         """
         Send a transfer request to a specific authority in the mesh network.
@@ -192,78 +623,124 @@ class MeshClient:  # pylint: disable=too-few-public-methods
         This method sends the transfer request to a specific authority through
         the mesh network gateway.
         """
-        http = self._require_client()
-        
-        # Validate required fields
-        required_fields = ["sender", "recipient", "token_address", "amount"]
-        for field in required_fields:
-            if field not in body:
-                raise MeshClientError(f"Missing required field: {field}")
-        
-        # Validate amount
-        try:
-            amount = int(body["amount"])
-            if amount <= 0:
-                raise MeshClientError("Amount must be positive")
-        except (ValueError, TypeError):
-            raise MeshClientError("Amount must be a valid integer")
-        
-        # Validate token address
-        token_address = body.get("token_address")
-        if not token_address or not token_address.startswith("0x"):
-            raise MeshClientError("Invalid token address format")
-        
+        self.validate_transfer(body, check_supported=False)
         payload = {**body, "timestamp": time.time()}
         
         try:
             # Call the bridge's /authorities/{authority}/transfer endpoint
-            resp = await http.post(f"{self.gateway_url}/authorities/{authority}/transfer", json=payload)
+            resp = await self._request(
+                "POST", f"/authorities/{authority}/transfer", json=payload,
+                prefer=self._authority_gateway(authority),
+            )
             resp.raise_for_status()
             return resp.json()
+        except MeshClientOverloaded:
+            raise
         except Exception as exc:  # pylint: disable=broad-except
             logger.error("transfer_to_authority_failed", authority=authority, error=str(exc))
             raise MeshClientError(f"Transfer to authority {authority} failed: {str(exc)}") from exc
 
+    @traced("mesh.health")
     async def get_health(self) -> Dict[str, Any]:
-        """Get health status from the gateway bridge."""
-        http = self._require_client()
+        """Check every gateway bridge in parallel and update their health.
+
+        Healthy as long as one bridge answers; per-bridge results are listed
+        under ``gateways``.
+        """
+        results = await asyncio.gather(
+            *(self._check_gateway(g) for g in self.gateways.gateways), return_exceptions=True
+        )
+        errors = [str(r) for r in results if isinstance(r, Exception)]
+        healthy = len(errors) < len(results)
+        return {
+            "status": "healthy" if healthy else "unhealthy",
+            "gateways": self.gateways.stats(),
+            "error": None if healthy else "; ".join(errors),
+        }
+
+    async def _check_gateway(self, gateway: Gateway) -> Dict[str, Any]:
+        started = time.perf_counter()
         try:
-            resp = await http.get(f"{self.gateway_url}/health")
+            resp = await self._send(gateway, "GET", "/health")
             resp.raise_for_status()
-            return resp.json()
+            result = resp.json()
         except Exception as exc:  # pylint: disable=broad-except
-            logger.error("health_check_failed", error=str(exc))
-            return {"status": "unhealthy", "error": str(exc)}
+            logger.error("health_check_failed", gateway=gateway.url, error=str(exc))
+            self.gateways.mark_failure(gateway, str(exc) or type(exc).__name__)
+            raise
+        self.gateways.mark_success(gateway, (time.perf_counter() - started) * 1000.0)
+        return result
 
+    @traced("mesh.confirmation")
     async def send_confirmation(self, authority: str, body: Dict[str, Any]) -> Dict[str, Any]:
-        http = self._require_client()
         payload = {**body, "timestamp": time.time()}
         try:
-            resp = await http.post(
-                f"{self.gateway_url}/authorities/{authority}/confirmation", json=payload
+            resp = await self._request(
+                "POST", f"/authorities/{authority}/confirmation", json=payload,
+                prefer=self._authority_gateway(authority),
             )
             resp.raise_for_status()
             return resp.json()
+        except MeshClientOverloaded:
+            raise
         except Exception as exc:  # pylint: disable=broad-except
             logger.error("confirmation_failed", authority=authority, error=str(exc))
             raise MeshClientError("Confirmation failed") from exc
 
+    @traced("mesh.ping")
     async def ping(self, authority: str) -> Dict[str, Any]:
-        http = self._require_client()
+        started = time.perf_counter()
         try:
-            resp = await http.post(
-                f"{self.gateway_url}/authorities/{authority}/ping", json={"timestamp": time.time()}
+            resp = await self._request(
+                "POST", f"/authorities/{authority}/ping", json={"timestamp": time.time()},
+                prefer=self._authority_gateway(authority),
             )
             resp.raise_for_status()
-            return resp.json()
+            result = resp.json()
+        except MeshClientOverloaded:
+            raise
         except Exception as exc:  # pylint: disable=broad-except
             logger.error("ping_failed", authority=authority, error=str(exc))
+            self.topology.apply_ping(authority, False)
             return {"success": False, "error": str(exc)}
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        self.topology.apply_ping(authority, bool(result.get("success", True)), latency_ms)
+        return result
 
+    @traced("mesh.ping_all")
     async def ping_all(self) -> Dict[str, Dict[str, Any]]:
         authorities = await self.discover()
-        results = await asyncio.gather(*(self.ping(a["name"]) for a in authorities))
-        return {a["name"]: r for a, r in zip(authorities, results)}
+        results = await asyncio.gather(
+            *(self.ping(a["name"]) for a in authorities), return_exceptions=True
+        )
+        return {
+            a["name"]: (
+                {"success": False, "error": str(r), "shed": True}
+                if isinstance(r, MeshClientOverloaded) else r
+            )
+            for a, r in zip(authorities, results)
+        }
+
+
+def _set_etag(gateway: Gateway, path: str, etag: Optional[str]) -> None:
+    if etag:
+        gateway.etags[path] = etag
+    else:
+        gateway.etags.pop(path, None)
+
+
+def _tagged(gateway: Gateway, authorities: Any) -> List[Dict[str, Any]]:
+    """A gateway's authority list with each entry tagged with the gateway URL."""
+    if not isinstance(authorities, list) or not all(isinstance(a, dict) for a in authorities):
+        raise MeshClientError(f"Malformed authority list from {gateway.url}")
+    return [{**a, "gateway": gateway.url} for a in authorities]
+
+
+def _outcome_unknown(exc: BaseException) -> bool:
+    """True when a POST may have reached the bridge: sent, but no usable answer."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError) and not isinstance(exc, _NOT_SENT)
 
 
 # ---------------------------------------------------------------------------
@@ -280,5 +757,7 @@ __all__ = [
     "mesh_client",
     "get_mesh_client",
     "MeshClientError",
+    "MeshClientOutcomeUnknown",
+    "MeshClientOverloaded",
     "SUPPORTED_TOKENS",
 ] 
\ No newline at end of file
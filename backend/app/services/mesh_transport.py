@@ -0,0 +1,240 @@
+"""MeshLink – one persistent, multiplexed WebSocket link to a gateway bridge.
+
+With ``MESH_TRANSPORT=ws`` :class:`~app.services.mesh_client.MeshClient`
+sends every gateway call over a single long-lived WebSocket per bridge
+instead of a new HTTP request, which removes per-call request/response
+overhead for chatty traffic such as pings and confirmations.
+
+Frames are JSON text messages::
+
+    -> {"id": 17, "method": "POST", "path": "/transfer", "headers": {...}, "body": {...}}
+    <- {"id": 17, "status": 200, "headers": {...}, "body": {...}}
+    <- {"event": "authority_updated", "data": {...}}
+
+Requests carry an ``id`` and the bridge may answer them in any order; frames
+without an ``id`` are server-pushed events and are handed to ``on_event``.
+Responses are returned as :class:`httpx.Response` objects and connection
+failures are raised as :class:`httpx.TransportError`, so callers handle both
+transports the same way: a request that could not be written raises
+:class:`httpx.ConnectError`, one whose frame was sent before the link dropped
+raises :class:`OutcomeUnknown` – the bridge may already have acted on it, so
+it must not be repeated elsewhere. A bridge that refuses the WebSocket handshake is
+marked :attr:`MeshLink.unsupported` and the caller falls back to HTTP.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+import structlog
+
+try:
+    import websockets
+    from websockets.exceptions import ConnectionClosed, InvalidHandshake
+except ImportError:  # pragma: no cover - websockets is optional for the HTTP transport
+    websockets = None  # type: ignore[assignment]
+
+logger = structlog.get_logger(__name__)
+
+EventHandler = Callable[[Dict[str, Any]], Optional[Awaitable[None]]]
+
+
+class OutcomeUnknown(httpx.ReadError):
+    """The request frame was sent but the link dropped before its response arrived."""
+
+
+def ws_url(gateway_url: str, path: str) -> str:
+    """``http(s)://host`` -> ``ws(s)://host/path``."""
+    scheme, sep, rest = gateway_url.partition("://")
+    return f"{'wss' if scheme == 'https' else 'ws'}{sep}{rest}{path}"
+
+
+class MeshLink:
+    """Multiplexed request/response link plus pushed events over one WebSocket."""
+
+    def __init__(
+        self,
+        gateway_url: str,
+        *,
+        path: str = "/ws",
+        timeout: float = 10.0,
+        on_event: Optional[EventHandler] = None,
+        reconnect_max: float = 30.0,
+    ) -> None:
+        if websockets is None:
+            raise RuntimeError("MESH_TRANSPORT=ws requires the 'websockets' package")
+        self.gateway_url = gateway_url.rstrip("/")
+        self.url = ws_url(self.gateway_url, path)
+        self.timeout = timeout
+        self.on_event = on_event
+        self.reconnect_max = reconnect_max
+        self.unsupported = False
+
+        self._ws: Any = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future[Dict[str, Any]]] = {}
+        self._connect_lock = asyncio.Lock()
+        self._reader: Optional[asyncio.Task[None]] = None
+        self._reconnect: Optional[asyncio.Task[None]] = None
+        self._closed = False
+        self.requests = 0
+        self.events = 0
+        self.reconnects = 0
+
+    # ------------------------------ lifecycle -----------------------------
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None
+
+    async def connect(self) -> None:
+        """Open the link unless it is already up (raises ``httpx.ConnectError``)."""
+        if self._ws is not None:
+            return
+        async with self._connect_lock:
+            if self._ws is not None:
+                return
+            if self._closed:
+                raise httpx.ConnectError(f"link to {self.gateway_url} is closed")
+            try:
+                self._ws = await websockets.connect(self.url, open_timeout=self.timeout, max_size=None)
+            except InvalidHandshake as exc:
+                self.unsupported = True
+                logger.warning("mesh_link_unsupported", gateway=self.gateway_url, error=str(exc))
+                raise httpx.ConnectError(f"{self.url}: {exc}") from exc
+            except (OSError, asyncio.TimeoutError) as exc:
+                raise httpx.ConnectError(f"{self.url}: {exc or type(exc).__name__}") from exc
+            self._reader = asyncio.create_task(self._read(self._ws), name=f"mesh-link-{self.gateway_url}")
+            logger.info("mesh_link_connected", gateway=self.gateway_url)
+
+    async def close(self) -> None:
+        self._closed = True
+        for task in (self._reconnect, self._reader):
+            if task is not None:
+                task.cancel()
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            await ws.close()
+        self._drop(OutcomeUnknown(f"link to {self.gateway_url} closed"))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "gateway": self.gateway_url,
+            "connected": self.connected,
+            "unsupported": self.unsupported,
+            "in_flight": len(self._pending),
+            "requests": self.requests,
+            "events": self.events,
+            "reconnects": self.reconnects,
+        }
+
+    # ------------------------------ requests ------------------------------
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: Any = None,  # pylint: disable=redefined-outer-name
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """Send one request frame and wait for its (possibly out-of-order) response."""
+        await self.connect()
+        request_id = next(self._ids)
+        future: asyncio.Future[Dict[str, Any]] = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        frame: Dict[str, Any] = {"id": request_id, "method": method, "path": path}
+        if headers:
+            frame["headers"] = headers
+        if json is not None:
+            frame["body"] = json
+        self.requests += 1
+        try:
+            try:
+                await self._ws.send(_dumps(frame))
+            except ConnectionClosed as exc:
+                raise httpx.ConnectError(f"link to {self.gateway_url} lost: {exc}") from exc
+            except AttributeError as exc:  # dropped between connect() and send()
+                raise httpx.ConnectError(f"link to {self.gateway_url} lost") from exc
+            reply = await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError as exc:
+            raise httpx.ReadTimeout(f"{method} {path} over {self.url} timed out") from exc
+        finally:
+            self._pending.pop(request_id, None)
+        return _response(method, f"{self.gateway_url}{path}", reply)
+
+    # ------------------------------ reader --------------------------------
+
+    async def _read(self, ws: Any) -> None:
+        error: Exception = OutcomeUnknown(f"link to {self.gateway_url} lost")
+        try:
+            async for raw in ws:
+                await self._dispatch(json.loads(raw))
+        except ConnectionClosed as exc:
+            error = OutcomeUnknown(f"link to {self.gateway_url} lost: {exc}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("mesh_link_read_failed", gateway=self.gateway_url, error=str(exc))
+        finally:
+            if self._ws is ws:
+                self._ws = None
+                self._drop(error)
+        if not self._closed:
+            logger.warning("mesh_link_lost", gateway=self.gateway_url)
+            self._reconnect = asyncio.create_task(self._reconnect_loop())
+
+    async def _dispatch(self, message: Dict[str, Any]) -> None:
+        request_id = message.get("id")
+        if request_id is not None:
+            future = self._pending.get(request_id)
+            if future is not None and not future.done():
+                future.set_result(message)
+            return
+        self.events += 1
+        if self.on_event is not None:
+            try:
+                result = self.on_event(message)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("mesh_link_event_failed", event=message.get("event"), error=str(exc))
+
+    def _drop(self, error: Exception) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    async def _reconnect_loop(self) -> None:
+        """Re-open a dropped link in the background so pushed events keep flowing."""
+        delay = 0.5
+        while not self._closed and self._ws is None and not self.unsupported:
+            await asyncio.sleep(delay)
+            try:
+                await self.connect()
+                self.reconnects += 1
+            except httpx.TransportError:
+                delay = min(delay * 2, self.reconnect_max)
+
+
+def _dumps(frame: Dict[str, Any]) -> str:
+    return json.dumps(frame, separators=(",", ":"))
+
+
+def _response(method: str, url: str, reply: Dict[str, Any]) -> httpx.Response:
+    body = reply.get("body")
+    return httpx.Response(
+        int(reply.get("status", 200)),
+        headers=reply.get("headers") or {},
+        content=b"" if body is None else _dumps(body).encode(),
+        request=httpx.Request(method, url),
+    )
+
+
+__all__ = ["MeshLink", "OutcomeUnknown", "ws_url"]
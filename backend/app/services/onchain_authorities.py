@@ -0,0 +1,259 @@
+"""OnchainAuthoritySet – in-memory mirror of the MeshPayMVP authority set.
+
+The set is loaded once through ``getAuthorityAddresses()`` and
+``getAuthorityInfo()`` and then kept current from the contract's
+``AuthorityAdded``, ``AuthorityRemoved`` and ``AuthorityDeactivated`` events:
+each sync fetches the logs of all three events since the last synced block in
+one ``eth_getLogs`` call per block range. Committee membership checks and
+quorum validation read this mirror and never issue a per-request RPC call.
+
+Only blocks ``CHAIN_CONFIRMATIONS`` below the head are read, so the mirror
+never holds an event a routine reorg can take back. The set subscribes to the
+:class:`~app.services.chain_follower.ChainFollower`; a reorg deeper than that
+(back past the synced block) drops the mirror's sync point and the next pass
+reloads it from the views at a confirmed block.
+
+The mirror and its synced block are part of the warm-restart snapshot
+(:mod:`app.core.snapshots`), so a restart resumes from events instead of
+reloading every authority through the views.
+
+The events and view functions live on ``MeshPayMVP``; the bundled
+``MeshPayAuthorities`` ABI describes an older contract revision without them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+import structlog
+from web3 import Web3
+
+from app.core.abi_codec import decode_logs, event_topic
+from app.core.config import get_settings
+from app.core.executor import CpuExecutor, cpu_executor
+from app.services.blockchain_client import BlockchainClient, blockchain_client
+from app.services.chain_follower import chain_follower
+from app.services.rpc_pool import EndpointBehind
+
+logger = structlog.get_logger(__name__)
+
+settings = get_settings()
+
+EVENTS = ("AuthorityAdded", "AuthorityRemoved", "AuthorityDeactivated")
+
+
+class OnchainAuthority:
+    """One authority as registered on chain."""
+
+    __slots__ = ("address", "name", "active", "registered_at")
+
+    def __init__(self, address: str, name: str, active: bool, registered_at: int = 0) -> None:
+        self.address = address
+        self.name = name
+        self.active = active
+        self.registered_at = registered_at
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "address": self.address,
+            "name": self.name,
+            "active": self.active,
+            "registered_at": self.registered_at,
+        }
+
+
+class OnchainAuthoritySet:
+    """Authority set loaded once and advanced from contract events."""
+
+    def __init__(
+        self,
+        chain: BlockchainClient,
+        *,
+        interval: float | None = None,
+        log_chunk: int | None = None,
+        confirmations: int | None = None,
+        executor: CpuExecutor | None = None,
+    ) -> None:
+        self.chain = chain
+        self.confirmations = int(confirmations if confirmations is not None else settings.chain_confirmations)
+        self.executor = executor or cpu_executor
+        self.interval = float(interval or settings.authority_sync_interval)
+        self.log_chunk = int(log_chunk or settings.authority_log_chunk)
+        self.version = 0
+        self.synced_block: Optional[int] = None
+        self._by_address: Dict[str, OnchainAuthority] = {}
+        self._by_name: Dict[str, str] = {}
+        self._active: Dict[str, str] = {}  # address -> name, active authorities only
+        self._abis: Optional[Dict[str, Dict[str, Any]]] = None  # topic0 -> event ABI
+        self._task: Optional[asyncio.Task[None]] = None
+
+    # ------------------------------ lifecycle -----------------------------
+
+    @property
+    def loaded(self) -> bool:
+        return self.synced_block is not None
+
+    async def start(self) -> None:
+        if self.chain.meshpay_contract is None:
+            logger.info("onchain_authorities_disabled", reason="no MeshPay contract configured")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="onchain-authority-sync")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self.loaded:
+                    await self.sync_once()
+                else:
+                    await self.load()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("onchain_authority_sync_failed", error=str(exc))
+            await asyncio.sleep(self.interval)
+
+    # ------------------------------ loading -------------------------------
+
+    async def _confirmed_block(self) -> int:
+        latest = await self.chain.rpc(lambda: self.chain.w3.eth.block_number)
+        return max(latest - self.confirmations, 0)
+
+    async def load(self) -> int:
+        """Full load from the contract views at the confirmed block; returns authorities loaded."""
+        contract = self.chain.meshpay_contract
+        block = await self._confirmed_block()
+        addresses = await self.chain.rpc(
+            partial(contract.functions.getAuthorityAddresses().call, block_identifier=block)
+        )
+        infos = await asyncio.gather(*(
+            self.chain.rpc(partial(contract.functions.getAuthorityInfo(a).call, block_identifier=block))
+            for a in addresses
+        ))
+        self._by_address = {}
+        for address, (name, _, active, registered_at, _) in zip(addresses, infos):
+            self._put(OnchainAuthority(Web3.to_checksum_address(address), name, active, registered_at))
+        self._reindex()
+        self.synced_block = block
+        self.version += 1
+        logger.info("onchain_authorities_loaded", count=len(self._by_address), block=block)
+        return len(self._by_address)
+
+    async def sync_once(self) -> int:
+        """Apply authority events up to the confirmed block; returns events applied."""
+        latest = await self._confirmed_block()
+        applied = 0
+        try:
+            while self.synced_block < latest:
+                start = self.synced_block + 1
+                end = min(latest, start + self.log_chunk - 1)
+                try:
+                    logs = await self.chain.rpc(self.chain.w3.eth.get_logs, {
+                        "address": self.chain.meshpay_contract.address,
+                        "fromBlock": start,
+                        "toBlock": end,
+                        "topics": [list(self._topics())],
+                    })
+                except EndpointBehind:
+                    logger.debug("onchain_authority_logs_deferred", from_block=start, to_block=end)
+                    break
+                logs = sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"]))
+                for event in await self.executor.map(decode_logs, logs, self._topics()):
+                    if event is not None:
+                        applied += self._apply(*event)
+                self.synced_block = end
+        finally:
+            # A later chunk may fail: the lookups must still reflect what was applied
+            if applied:
+                self._reindex()
+                self.version += 1
+                logger.info("onchain_authorities_synced", events=applied, block=self.synced_block,
+                            active=len(self._active))
+        return applied
+
+    async def on_reorg(self, common_block: int) -> None:
+        """Chain follower callback: reload if events past ``common_block`` were applied."""
+        if self.synced_block is None or common_block >= self.synced_block:
+            return
+        # No undo log for confirmed events – the next pass reloads from the views,
+        # lookups keep answering from the current set until then
+        logger.warning("onchain_authorities_reorged", common=common_block, synced_block=self.synced_block)
+        self.synced_block = None
+
+    def _topics(self) -> Dict[str, Dict[str, Any]]:
+        if self._abis is None:
+            events = self.chain.meshpay_contract.events
+            abis = [getattr(events, name)().abi for name in EVENTS]
+            self._abis = {event_topic(abi): abi for abi in abis}
+        return self._abis
+
+    def _apply(self, name: str, args: Dict[str, Any]) -> int:
+        address = Web3.to_checksum_address(args["authority"])
+        if name == "AuthorityAdded":
+            self._put(OnchainAuthority(address, args["name"], True, args["timestamp"]))
+        elif name == "AuthorityRemoved":
+            self._by_address.pop(address, None)
+        elif address in self._by_address:
+            self._by_address[address].active = False
+        return 1
+
+    def _put(self, authority: OnchainAuthority) -> None:
+        self._by_address[authority.address] = authority
+
+    def _reindex(self) -> None:
+        self._by_name = {a.name: a.address for a in self._by_address.values()}
+        self._active = {a.address: a.name for a in self._by_address.values() if a.active}
+
+    # ------------------------------ snapshots -----------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"synced_block": self.synced_block, "authorities": self.as_dicts()}
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        if data.get("synced_block") is None:
+            return
+        self._by_address = {}
+        for item in data["authorities"]:
+            self._put(OnchainAuthority(item["address"], item["name"], item["active"], item["registered_at"]))
+        self._reindex()
+        self.synced_block = int(data["synced_block"])
+        self.version += 1
+
+    # ------------------------------ lookups -------------------------------
+
+    def get(self, address: str) -> Optional[OnchainAuthority]:
+        return self._by_address.get(Web3.to_checksum_address(address))
+
+    def by_name(self, name: str) -> Optional[OnchainAuthority]:
+        address = self._by_name.get(name)
+        return self._by_address.get(address) if address is not None else None
+
+    def is_authority(self, address: str) -> bool:
+        """Equivalent of the contract's ``isAuthority`` without the RPC call."""
+        return Web3.to_checksum_address(address) in self._active
+
+    def active(self) -> Dict[str, str]:
+        """Active authorities as ``{checksum address: name}`` (read-only)."""
+        return self._active
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        return [a.as_dict() for a in self._by_address.values()]
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+onchain_authorities = OnchainAuthoritySet(blockchain_client)
+chain_follower.subscribe(onchain_authorities)
+
+__all__ = ["OnchainAuthority", "OnchainAuthoritySet", "onchain_authorities"]
@@ -0,0 +1,354 @@
+"""RpcPool – several Etherlink JSON-RPC endpoints behind one Web3 provider.
+
+:class:`BlockchainClient` used to talk to a single ``RPC_URL``; a slow or
+stale node slowed down or skewed every wallet query. With ``RPC_URLS`` the
+client's ``Web3`` instance sits on a :class:`PooledProvider` that picks an
+endpoint per JSON-RPC request:
+
+* **Writes are pinned to the primary** (the first URL): raw transactions,
+  nonces, receipts, gas estimates and the stateful filter calls all go to
+  one node, so a transaction is never looked up on a node that has not seen
+  it yet and pending nonces stay consistent.
+* **Reads go to the fastest healthy node within ``RPC_MAX_LAG`` blocks of
+  the highest head seen.** A background probe (:meth:`RpcPool.start`) calls
+  ``eth_blockNumber`` on every endpoint each ``RPC_PROBE_INTERVAL`` seconds,
+  which measures latency like-for-like and brings failed endpoints back.
+* **Log reads only go to a node that has reached their ``toBlock``.** A
+  node behind the range answers ``eth_getLogs`` with whatever it has, which
+  looks the same as "no events" – an in-sync node may still lag by
+  ``RPC_MAX_LAG`` blocks. Nodes whose last known head is below ``toBlock``
+  are re-checked with ``eth_blockNumber`` and skipped if still behind; when
+  no node has reached it the request fails and the caller retries later.
+* **Failover is automatic:** a transport error (connection refused, timeout,
+  HTTP 5xx) marks the endpoint unhealthy and the request is retried on the
+  next candidate. Lagging and unhealthy nodes are still tried, last, so a
+  read only fails when no endpoint answers. JSON-RPC errors (reverts, bad
+  params) are answers, not failures, and are returned as they are.
+
+Each endpoint posts through one ``requests`` session of its own, sized for
+``RPC_MAX_CONCURRENCY`` connections and closed by :meth:`RpcPool.close` on
+shutdown. (Web3's stock provider keeps a session per calling thread in a
+module-level cache that is never closed; RPC calls run on ``to_thread``
+workers, so that meant one idle connection pool per worker thread.)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+import structlog
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider
+from web3.providers.base import JSONBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from app.core.tracing import tracer
+
+logger = structlog.get_logger(__name__)
+
+# Requests that must see the primary's view of pending state
+PRIMARY_METHODS = frozenset({
+    "eth_sendRawTransaction",
+    "eth_sendTransaction",
+    "eth_getTransactionCount",
+    "eth_getTransactionReceipt",
+    "eth_getTransactionByHash",
+    "eth_estimateGas",
+    "eth_newFilter",
+    "eth_newBlockFilter",
+    "eth_getFilterChanges",
+    "eth_getFilterLogs",
+    "eth_uninstallFilter",
+})
+# Dev-chain control calls (anvil / hardhat) go to the primary as well
+PRIMARY_PREFIXES = ("evm_", "anvil_", "hardhat_")
+# A ``null`` block from a node just behind is retried on the next candidate
+RETRY_ON_NULL = frozenset({"eth_getBlockByNumber", "eth_getBlockByHash"})
+
+
+class EndpointBehind(ValueError):
+    """No endpoint has reached the last block a log read asks for."""
+
+LATENCY_ALPHA = 0.3
+
+
+class SessionHTTPProvider(HTTPProvider):
+    """``HTTPProvider`` that posts through one connection pool it owns."""
+
+    def __init__(self, url: str, *, timeout: float, pool_size: int = 10) -> None:
+        super().__init__(url, request_kwargs={"timeout": timeout})
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(int(pool_size), 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        response = self.session.post(
+            self.endpoint_uri, data=self.encode_rpc_request(method, params), **self.get_request_kwargs()
+        )
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class RpcEndpoint:
+    """One JSON-RPC node and what the pool knows about it."""
+
+    __slots__ = (
+        "url", "provider", "healthy", "failures", "last_error", "checked_at",
+        "latency_ms", "block", "requests",
+    )
+
+    def __init__(self, url: str, timeout: float, pool_size: int = 10) -> None:
+        self.url = url.rstrip("/")
+        self.provider = SessionHTTPProvider(self.url, timeout=timeout, pool_size=pool_size)
+        self.healthy = True  # optimistic until the first failure
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None  # EWMA of probe round trips
+        self.block: Optional[int] = None
+        self.requests = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "checked_at": self.checked_at,
+            "latency_ms": round(self.latency_ms, 3) if self.latency_ms is not None else None,
+            "block": self.block,
+            "requests": self.requests,
+        }
+
+
+class RpcPool:
+    """Health, head height and routing order across RPC endpoints."""
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        *,
+        max_lag: int = 3,
+        timeout: float = 10.0,
+        probe_interval: float = 5.0,
+        unhealthy_after: int = 1,
+        pool_size: int = 10,
+    ) -> None:
+        self.endpoints: List[RpcEndpoint] = [
+            RpcEndpoint(u, timeout, pool_size) for u in dict.fromkeys(u.rstrip("/") for u in urls if u)
+        ]
+        if not self.endpoints:
+            raise ValueError("RpcPool needs at least one RPC URL")
+        self.max_lag = max_lag
+        self.probe_interval = probe_interval
+        self.unhealthy_after = unhealthy_after
+        self.failovers = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    @property
+    def primary(self) -> RpcEndpoint:
+        return self.endpoints[0]
+
+    @property
+    def best_block(self) -> Optional[int]:
+        blocks = [e.block for e in self.endpoints if e.healthy and e.block is not None]
+        return max(blocks) if blocks else None
+
+    def in_sync(self, endpoint: RpcEndpoint) -> bool:
+        best = self.best_block
+        return endpoint.block is None or best is None or best - endpoint.block <= self.max_lag
+
+    def candidates(self, method: str, to_block: Optional[int] = None) -> List[RpcEndpoint]:
+        """Endpoints to try for one request, in order.
+
+        With ``to_block`` (a log read) nodes known to have reached it come
+        first, whatever their lag behind the best head.
+        """
+        if method in PRIMARY_METHODS or method.startswith(PRIMARY_PREFIXES):
+            return [self.primary]
+        return sorted(
+            self.endpoints,
+            key=lambda e: (
+                not e.healthy,
+                to_block is not None and (e.block is None or e.block < to_block),
+                not self.in_sync(e),
+                e.latency_ms if e.latency_ms is not None else float("inf"),
+            ),
+        )
+
+    # ------------------------------ health --------------------------------
+
+    def mark_success(self, endpoint: RpcEndpoint, latency_ms: Optional[float] = None,
+                     block: Optional[int] = None) -> None:
+        with self._lock:
+            endpoint.healthy = True
+            endpoint.failures = 0
+            endpoint.last_error = None
+            endpoint.checked_at = time.time()
+            if latency_ms is not None:
+                endpoint.latency_ms = latency_ms if endpoint.latency_ms is None else (
+                    LATENCY_ALPHA * latency_ms + (1 - LATENCY_ALPHA) * endpoint.latency_ms
+                )
+            if block is not None:
+                endpoint.block = block
+
+    def mark_failure(self, endpoint: RpcEndpoint, error: str) -> None:
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.last_error = error
+            endpoint.checked_at = time.time()
+            if endpoint.failures >= self.unhealthy_after and endpoint.healthy:
+                endpoint.healthy = False
+                logger.warning("rpc_endpoint_unhealthy", url=endpoint.url, error=error)
+
+    # ------------------------------ requests ------------------------------
+
+    def request(self, method: str, params: Any) -> RPCResponse:
+        """Send one JSON-RPC request (blocking), failing over between endpoints."""
+        to_block = _log_range_end(method, params)
+        candidates = self.candidates(method, to_block)
+        last_exc: Optional[BaseException] = None
+        response: Optional[RPCResponse] = None
+        for attempt, endpoint in enumerate(candidates):
+            if to_block is not None and not self._reached(endpoint, to_block):
+                last_exc = EndpointBehind(f"no RPC endpoint has reached block {to_block}")
+                continue
+            endpoint.requests += 1
+            try:
+                response = endpoint.provider.make_request(RPCEndpoint(method), params)
+            except (OSError, ValueError) as exc:  # requests' errors are OSErrors
+                self.mark_failure(endpoint, str(exc))
+                last_exc = exc
+                continue
+            if attempt:
+                self.failovers += 1
+            if not endpoint.healthy:
+                self.mark_success(endpoint)
+            if method == "eth_blockNumber" and isinstance(response.get("result"), str):
+                endpoint.block = int(response["result"], 16)
+            tracer.set_attribute("rpc.endpoint", endpoint.url)
+            if (
+                method in RETRY_ON_NULL
+                and response.get("result") is None
+                and "error" not in response
+                and attempt + 1 < len(candidates)
+            ):
+                continue
+            return response
+        if response is not None:
+            return response
+        assert last_exc is not None
+        raise last_exc
+
+    def _reached(self, endpoint: RpcEndpoint, block: int) -> bool:
+        """Whether ``endpoint``'s head is at ``block`` or above, re-reading it if the last one is lower."""
+        if endpoint.block is not None and endpoint.block >= block:
+            return True
+        try:
+            response = endpoint.provider.make_request(RPCEndpoint("eth_blockNumber"), [])
+            endpoint.block = int(response["result"], 16)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            self.mark_failure(endpoint, str(exc))
+            return False
+        if endpoint.block < block:
+            logger.debug("rpc_endpoint_behind_range", url=endpoint.url, block=endpoint.block, to_block=block)
+            return False
+        return True
+
+    # ------------------------------ probing -------------------------------
+
+    def probe(self, endpoint: RpcEndpoint) -> None:
+        """Measure latency and head height of one endpoint (blocking)."""
+        started = time.perf_counter()
+        try:
+            response = endpoint.provider.make_request(RPCEndpoint("eth_blockNumber"), [])
+            if "error" in response:
+                raise ValueError(str(response["error"]))
+            block = int(response["result"], 16)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            self.mark_failure(endpoint, str(exc))
+            return
+        self.mark_success(endpoint, (time.perf_counter() - started) * 1000.0, block)
+
+    async def probe_all(self) -> None:
+        await asyncio.gather(*(asyncio.to_thread(self.probe, e) for e in self.endpoints))
+        best = self.best_block
+        for endpoint in self.endpoints:
+            if endpoint.healthy and endpoint.block is not None and best is not None and best - endpoint.block > self.max_lag:
+                logger.debug("rpc_endpoint_lagging", url=endpoint.url, block=endpoint.block, best=best)
+
+    async def start(self) -> None:
+        if self._task is None and len(self.endpoints) > 1:
+            self._task = asyncio.create_task(self._run(), name="rpc-pool-probe")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def close(self) -> None:
+        """Close every endpoint's HTTP connections."""
+        for endpoint in self.endpoints:
+            endpoint.provider.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("rpc_probe_failed", error=str(exc))
+            await asyncio.sleep(self.probe_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "primary": self.primary.url,
+            "best_block": self.best_block,
+            "max_lag": self.max_lag,
+            "failovers": self.failovers,
+            "endpoints": [e.as_dict() for e in self.endpoints],
+        }
+
+
+def _log_range_end(method: str, params: Any) -> Optional[int]:
+    """Numeric ``toBlock`` of an ``eth_getLogs`` request (``None`` for tags or other methods)."""
+    if method != "eth_getLogs" or not params or not isinstance(params[0], dict):
+        return None
+    to_block = params[0].get("toBlock")
+    if isinstance(to_block, int):
+        return to_block
+    if isinstance(to_block, str) and to_block.startswith("0x"):
+        return int(to_block, 16)
+    return None
+
+
+class PooledProvider(JSONBaseProvider):
+    """Web3 provider that routes every request through an :class:`RpcPool`."""
+
+    def __init__(self, pool: RpcPool) -> None:
+        super().__init__()
+        self.pool = pool
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        return self.pool.request(method, params)
+
+    def __str__(self) -> str:
+        return f"RPC pool {[e.url for e in self.pool.endpoints]}"
+
+
+__all__ = ["EndpointBehind", "PRIMARY_METHODS", "PooledProvider", "RpcEndpoint", "RpcPool", "SessionHTTPProvider"]
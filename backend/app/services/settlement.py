@@ -0,0 +1,272 @@
+"""SettlementPipeline – batched on-chain redemption of mesh certificates.
+
+Quorum certificates produced by the mesh are redeemed on Etherlink through
+``MeshPayMVP.handleRedeemTransaction``. Redeeming them one at a time – send,
+wait for the receipt, send the next – caps throughput at one certificate per
+block. The pipeline instead works in batches:
+
+1. collect certificates (deduplicated by certificate hash)
+2. check ``getLastRedeemedSequence`` per sender and ``isCertificateRedeemed``
+   per certificate concurrently, dropping what is already settled or stale
+3. order the rest by sender and ``sequenceNumber`` (the contract rejects
+   out-of-order sequence numbers)
+4. broadcast them back-to-back through :mod:`app.services.tx_pipeline`
+   (local nonces, asynchronous receipt tracking) with a cached gas estimate
+
+The backend signer is ``BlockchainClient.account``; the pipeline stays idle
+when no ``BACKEND_PRIVATE_KEY`` is configured. The queue lives in memory, so
+:meth:`SettlementPipeline.stop` broadcasts what is still queued (up to
+``SHUTDOWN_DRAIN_TIMEOUT`` seconds) before the process exits. Certificates
+that were not broadcast by then go back to the queue, which is part of the
+pipeline's snapshot (see :mod:`app.core.snapshots`) and is queued again on
+the next start; redemption checks the chain first, so a certificate settled
+in the meantime is not sent twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+from web3 import Web3
+
+from app.core.abi_codec import certificate_hash, certificate_hashes, certificate_tuple
+from app.core.config import get_settings
+from app.core.tracing import traced, tracer
+from app.services.blockchain_client import BlockchainClient, blockchain_client
+from app.services.tx_pipeline import PendingTx, TxPipeline, tx_pipeline
+
+logger = structlog.get_logger(__name__)
+
+settings = get_settings()
+
+QUEUED = "queued"
+SUBMITTED = "submitted"
+SETTLED = "settled"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class SettlementPipeline:
+    """Collects certificates and redeems them on chain in pipelined batches."""
+
+    def __init__(
+        self,
+        chain: BlockchainClient,
+        txs: TxPipeline,
+        *,
+        batch_size: int | None = None,
+        interval: float | None = None,
+        max_tracked: int = 10_000,
+    ) -> None:
+        self.chain = chain
+        self.txs = txs
+        self.batch_size = int(batch_size or settings.settlement_batch_size)
+        self.interval = float(interval or settings.settlement_interval)
+        self.max_tracked = max_tracked
+
+        self._queue: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._status: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, str] = {}  # tx hash -> certificate hash
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task[None]] = None
+
+        self._gas_cache: Dict[bool, Tuple[int, float]] = {}  # is_native -> (gas, expires)
+
+    # ------------------------------ lifecycle -----------------------------
+
+    @property
+    def enabled(self) -> bool:
+        return self.chain.account is not None and self.chain.meshpay_contract is not None
+
+    async def start(self) -> None:
+        if not self.enabled:
+            logger.info("settlement_disabled", reason="no backend signer or contract")
+            return
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._submit_loop(), name="settlement-submit")
+            logger.info("settlement_started", batch_size=self.batch_size)
+
+    async def stop(self, timeout: float | None = None) -> None:
+        """Flush the queue (at most ``timeout`` seconds), then stop."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            timeout = settings.shutdown_drain_timeout if timeout is None else timeout
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+            self._task = None
+            if self._queue:
+                logger.warning("settlement_queue_not_drained", queued=len(self._queue), kept="snapshot")
+
+    # ------------------------------ intake --------------------------------
+
+    def submit(self, cert: Dict[str, Any], cert_hash: Optional[str] = None) -> str:
+        """Queue a certificate for redemption; returns its certificate hash."""
+        cert_hash = cert_hash or certificate_hash(cert)
+        current = self._status.get(cert_hash)
+        if current is None or current["status"] == FAILED:
+            self._queue[cert_hash] = cert
+            self._set_status(cert_hash, QUEUED)
+            if len(self._queue) >= self.batch_size:
+                self._wakeup.set()
+        return cert_hash
+
+    def status(self, cert_hash: str) -> Optional[Dict[str, Any]]:
+        return self._status.get(cert_hash)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": len(self._queue), "in_flight": len(self._inflight), "next_nonce": self.txs.nonces.next}
+
+    # ------------------------------ snapshots -----------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"queue": [[cert_hash, cert] for cert_hash, cert in self._queue.items()]}
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        """Queue again what was still waiting when the last process stopped."""
+        for cert_hash, cert in data["queue"]:
+            self.submit(cert, cert_hash)
+
+    def _set_status(self, cert_hash: str, status: str, **extra: Any) -> None:
+        entry = self._status.pop(cert_hash, {})
+        entry.update(status=status, updated_at=time.time(), **extra)
+        self._status[cert_hash] = entry
+        while len(self._status) > self.max_tracked:
+            self._status.popitem(last=False)
+
+    # ------------------------------ submission ----------------------------
+
+    async def _submit_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._queue:
+                try:
+                    await self.flush()
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.error("settlement_flush_failed", error=str(exc))
+                    break
+            if self._stopping:
+                return
+
+    @traced("settlement.flush")
+    async def flush(self) -> int:
+        """Settle up to one batch of queued certificates; returns txs broadcast."""
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popitem(last=False))
+        if not batch:
+            return 0
+
+        try:
+            ready = await self._filter_unredeemed(batch)
+        except BaseException:
+            self._requeue(batch)
+            raise
+        ready.sort(key=lambda item: (item[1]["sender"].lower(), int(item[1]["sequence_number"])))
+
+        sent = 0
+        for i, (cert_hash, cert) in enumerate(ready):
+            try:
+                tx = await self._send_redemption(cert)
+            except asyncio.CancelledError:
+                self._requeue(ready[i:])  # shutdown timeout: not broadcast, keep them
+                raise
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("settlement_send_failed", certificate=cert_hash, error=str(exc))
+                self._set_status(cert_hash, FAILED, error=str(exc))
+                continue
+            self._inflight[tx.tx_hash] = cert_hash
+            self._set_status(cert_hash, SUBMITTED, tx_hash=tx.tx_hash)
+            tx.receipt.add_done_callback(lambda fut, tx=tx: self._on_receipt(tx, fut))
+            sent += 1
+        logger.info("settlement_batch_sent", batch=len(batch), sent=sent)
+        return sent
+
+    def _requeue(self, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Put popped certificates back at the head of the queue, in their order."""
+        for cert_hash, cert in reversed(items):
+            self._queue[cert_hash] = cert
+            self._queue.move_to_end(cert_hash, last=False)
+
+    async def _filter_unredeemed(self, batch: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Drop certificates that are already redeemed or behind the sender's sequence."""
+        contract = self.chain.meshpay_contract
+        senders = sorted({Web3.to_checksum_address(c["sender"]) for _, c in batch})
+        last_seqs, redeemed = await asyncio.gather(
+            asyncio.gather(*(self.chain.rpc(contract.functions.getLastRedeemedSequence(s).call) for s in senders)),
+            asyncio.gather(*(
+                self.chain.rpc(contract.functions.isCertificateRedeemed(Web3.to_bytes(hexstr=h)).call)
+                for h, _ in batch
+            )),
+        )
+        last_by_sender = dict(zip(senders, last_seqs))
+
+        ready = []
+        for (cert_hash, cert), done in zip(batch, redeemed):
+            last = last_by_sender[Web3.to_checksum_address(cert["sender"])]
+            if done:
+                self._set_status(cert_hash, SETTLED, reason="already redeemed")
+            elif int(cert["sequence_number"]) <= last:
+                self._set_status(cert_hash, SKIPPED, reason=f"sequence not above last redeemed {last}")
+            else:
+                ready.append((cert_hash, cert))
+        return ready
+
+    async def _send_redemption(self, cert: Dict[str, Any]) -> PendingTx:
+        call = self.chain.meshpay_contract.functions.handleRedeemTransaction(
+            (certificate_tuple(cert), Web3.to_bytes(hexstr=cert.get("signature") or "0x"))
+        )
+        return await self.txs.send_call(call, gas=await self._estimate_gas(call, cert))
+
+    async def _estimate_gas(self, call: Any, cert: Dict[str, Any]) -> int:
+        """Gas limit per token kind, estimated once and reused until it expires."""
+        is_native = int(cert["token"], 16) == 0
+        cached = self._gas_cache.get(is_native)
+        tracer.set_attribute("gas_estimate.cache_hit", bool(cached and cached[1] > time.monotonic()))
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        estimate = await self.chain.rpc(call.estimate_gas, {"from": self.chain.account.address})
+        gas = int(estimate * settings.settlement_gas_multiplier)
+        self._gas_cache[is_native] = (gas, time.monotonic() + settings.settlement_gas_cache_ttl)
+        return gas
+
+    # ------------------------------ receipts ------------------------------
+
+    def _on_receipt(self, tx: PendingTx, fut: "asyncio.Future[Dict[str, Any]]") -> None:
+        cert_hash = self._inflight.pop(tx.tx_hash, None)
+        if cert_hash is None or fut.cancelled():
+            return
+        if fut.exception() is not None:  # replaced on chain (TxDropped) – never mined
+            self._set_status(cert_hash, FAILED, tx_hash=tx.tx_hash, error=str(fut.exception()))
+            return
+        receipt = fut.result()
+        if receipt["status"] == 1:
+            self._set_status(cert_hash, SETTLED, tx_hash=tx.tx_hash, block=receipt["blockNumber"])
+        else:
+            self._set_status(cert_hash, FAILED, tx_hash=tx.tx_hash, error="transaction reverted")
+            self._gas_cache.clear()  # estimate may be stale (e.g. out of gas)
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+settlement_pipeline = SettlementPipeline(blockchain_client, tx_pipeline)
+
+__all__ = ["SettlementPipeline", "certificate_hash", "certificate_hashes", "settlement_pipeline"]
@@ -0,0 +1,158 @@
+"""SignatureVerifier – batched authority-signature checks off the event loop.
+
+A quorum certificate counts only once enough *distinct, active* authorities
+have signed its certificate hash. Each ECDSA recovery costs real CPU, so:
+
+* pending recoveries are grouped into batches and run on the shared CPU
+  executor (:mod:`app.core.executor`; :mod:`app.core.ecdsa` holds the worker
+  function);
+* recovered signers are cached per ``(digest, signature)`` pair, so a
+  certificate that is validated again (resubmission, status checks) costs no
+  ECDSA work;
+* recovered addresses are mapped to authority names through the in-memory
+  on-chain authority set (:mod:`app.services.onchain_authorities`), so a
+  deactivated authority stops counting without purging the recovery cache
+  and validation needs no RPC call.
+
+All signatures of a call to :meth:`SignatureVerifier.validate_certificates`
+are recovered together, so many certificates are validated in parallel.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+from web3 import Web3
+
+from app.core.config import get_settings
+from app.core.ecdsa import recover_signers
+from app.core.executor import CpuExecutor, cpu_executor
+from app.core.tracing import tracer
+from app.services.onchain_authorities import OnchainAuthoritySet, onchain_authorities
+
+logger = structlog.get_logger(__name__)
+
+settings = get_settings()
+
+
+def quorum_size(authorities: int) -> int:
+    """Signatures needed for a quorum of ``authorities`` (tolerates f < n/3)."""
+    return authorities - (authorities - 1) // 3 if authorities else 0
+
+
+class SignatureVerifier:
+    """Recovers authority signatures in batches on the CPU executor."""
+
+    def __init__(
+        self,
+        authorities: OnchainAuthoritySet,
+        executor: CpuExecutor,
+        *,
+        batch_size: int | None = None,
+        cache_size: int | None = None,
+    ) -> None:
+        self.authorities = authorities
+        self.executor = executor
+        self.batch_size = int(batch_size or settings.signature_verify_batch)
+        self.cache_size = int(cache_size or settings.signature_cache_size)
+
+        self._recovered: "OrderedDict[Tuple[bytes, str], Optional[str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor.mode,
+            "cached_signatures": len(self._recovered),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "authorities": len(self.authorities.active()),
+        }
+
+    # ------------------------------ recovery ------------------------------
+
+    async def recover_many(self, pairs: Sequence[Tuple[bytes, str]]) -> List[Optional[str]]:
+        """Recovered signer of each ``(digest, signature)``; ``None`` if invalid."""
+        results: List[Optional[str]] = [None] * len(pairs)
+        missing: Dict[Tuple[bytes, str], List[int]] = {}
+        for i, pair in enumerate(pairs):
+            if pair in self._recovered:
+                self._recovered.move_to_end(pair)
+                results[i] = self._recovered[pair]
+                self.hits += 1
+            else:
+                missing.setdefault(pair, []).append(i)
+        tracer.set_attribute("signatures.cache_hits", len(pairs) - sum(len(v) for v in missing.values()))
+        if not missing:
+            return results
+
+        self.misses += len(missing)
+        todo = list(missing)
+        batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+        recovered = await asyncio.gather(*(self._recover_batch(batch) for batch in batches))
+        for batch, signers in zip(batches, recovered):
+            for pair, signer in zip(batch, signers):
+                self._remember(pair, signer)
+                for i in missing[pair]:
+                    results[i] = signer
+        return results
+
+    async def _recover_batch(self, batch: List[Tuple[bytes, str]]) -> List[Optional[str]]:
+        return await self.executor.run(recover_signers, batch)
+
+    def _remember(self, pair: Tuple[bytes, str], signer: Optional[str]) -> None:
+        self._recovered[pair] = signer
+        while len(self._recovered) > self.cache_size:
+            self._recovered.popitem(last=False)
+
+    # ------------------------------ certificates --------------------------
+
+    async def validate_certificates(
+        self, certificates: Sequence[Tuple[str, Sequence[str]]]
+    ) -> List[Dict[str, Any]]:
+        """Validate ``(certificate_hash, signatures)`` pairs in one batch.
+
+        Returns, per certificate, the authorities that signed it, the
+        signatures that did not map to an active authority, and whether the
+        distinct signers reach :func:`quorum_size`.
+        """
+        signers = await self.recover_many([
+            (Web3.to_bytes(hexstr=cert_hash), sig)
+            for cert_hash, signatures in certificates
+            for sig in signatures
+        ])
+        authorities = self.authorities.active()
+        needed = quorum_size(len(authorities))
+
+        results = []
+        offset = 0
+        for cert_hash, signatures in certificates:
+            names: List[str] = []
+            rejected: List[int] = []
+            for i, signer in enumerate(signers[offset:offset + len(signatures)]):
+                name = authorities.get(signer) if signer else None
+                if name is None:
+                    rejected.append(i)
+                elif name not in names:
+                    names.append(name)
+            offset += len(signatures)
+            results.append({
+                "certificate_hash": cert_hash,
+                "valid": bool(needed) and len(names) >= needed,
+                "signers": names,
+                "rejected_signatures": rejected,
+                "quorum": needed,
+            })
+        return results
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+signature_verifier = SignatureVerifier(onchain_authorities, cpu_executor)
+
+__all__ = ["SignatureVerifier", "quorum_size", "signature_verifier"]
@@ -0,0 +1,171 @@
+"""GridIndex – uniform grid spatial index over authority positions.
+
+The map pages only display what is inside the current viewport, so the
+backend keeps authority positions in a bucketed grid and answers bounding-box
+queries by visiting the cells that overlap the box instead of shipping every
+node. At low zoom levels the matches are aggregated into clusters on a coarser
+grid whose cell size follows the map's tile size (``extent / 2**zoom``).
+
+Positions are plain x/y coordinates in whatever unit the mesh reports. Unless
+a fixed ``cell_size`` is configured, the index derives it from the extent of
+the positions (``extent / grid`` per side) and re-buckets when that size is
+off by more than a factor of two, so cells stay meaningful for any coordinate
+range while a growing mesh costs only a logarithmic number of rebuilds.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+BBox = Tuple[float, float, float, float]  # (min_x, min_y, max_x, max_y)
+Cell = Tuple[int, int]
+
+
+def parse_bbox(value: str) -> BBox:
+    """Parse ``"min_x,min_y,max_x,max_y"`` into a normalised bounding box."""
+    parts = [float(p) for p in value.split(",")]
+    if len(parts) != 4 or not all(math.isfinite(p) for p in parts):
+        raise ValueError("bbox must be four finite numbers: min_x,min_y,max_x,max_y")
+    min_x, min_y, max_x, max_y = parts
+    return min(min_x, max_x), min(min_y, max_y), max(min_x, max_x), max(min_y, max_y)
+
+
+class GridIndex:
+    """Point index keyed by name, bucketed into square cells of ``cell_size``.
+
+    With ``cell_size=None`` the cell size follows the extent of the points,
+    ``grid`` cells per side.
+    """
+
+    def __init__(self, cell_size: Optional[float] = None, *, grid: int = 64) -> None:
+        if cell_size is not None and cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        if grid <= 0:
+            raise ValueError("grid must be positive")
+        self.fixed = cell_size is not None
+        self.cell_size = cell_size or 1.0
+        self.grid = grid
+        self._cells: Dict[Cell, Set[str]] = {}
+        self._points: Dict[str, Tuple[float, float]] = {}
+        self._bounds: Optional[BBox] = None  # grows between re-buckets
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def extent(self) -> float:
+        """Larger side of the box holding every position (0 when empty)."""
+        if self._bounds is None:
+            return 0.0
+        min_x, min_y, max_x, max_y = self._bounds
+        return max(max_x - min_x, max_y - min_y)
+
+    def _cell(self, x: float, y: float) -> Cell:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    # ------------------------------ mutation ------------------------------
+
+    def upsert(self, key: str, x: float, y: float) -> bool:
+        """Insert or move ``key``; returns ``False`` when the position is unchanged."""
+        old = self._points.get(key)
+        if old == (x, y):
+            return False
+        if old is not None:
+            self._discard(key, self._cell(*old))
+        self._points[key] = (x, y)
+        self._cells.setdefault(self._cell(x, y), set()).add(key)
+        if not self.fixed:
+            self._grow(x, y)
+        return True
+
+    def remove(self, key: str) -> bool:
+        old = self._points.pop(key, None)
+        if old is None:
+            return False
+        self._discard(key, self._cell(*old))
+        return True
+
+    def _discard(self, key: str, cell: Cell) -> None:
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._cells[cell]
+
+    def _grow(self, x: float, y: float) -> None:
+        if self._bounds is None:
+            self._bounds = (x, y, x, y)
+        else:
+            min_x, min_y, max_x, max_y = self._bounds
+            self._bounds = (min(min_x, x), min(min_y, y), max(max_x, x), max(max_y, y))
+        target = self.extent() / self.grid
+        if target > 0 and not self.cell_size / 2 <= target <= self.cell_size * 2:
+            self._rebucket()
+
+    def _rebucket(self) -> None:
+        """Re-derive the cell size from the current positions and rebuild the cells."""
+        xs = [p[0] for p in self._points.values()]
+        ys = [p[1] for p in self._points.values()]
+        self._bounds = (min(xs), min(ys), max(xs), max(ys))
+        self.cell_size = self.extent() / self.grid or self.cell_size
+        self._cells = {}
+        for key, (x, y) in self._points.items():
+            self._cells.setdefault(self._cell(x, y), set()).add(key)
+
+    # ------------------------------ queries -------------------------------
+
+    def query(self, bbox: BBox) -> List[str]:
+        """Keys whose position lies inside ``bbox`` (inclusive)."""
+        min_x, min_y, max_x, max_y = bbox
+        cx0, cy0 = self._cell(min_x, min_y)
+        cx1, cy1 = self._cell(max_x, max_y)
+
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # Viewport spans more cells than are populated – walk the buckets
+            cells: Iterable[Tuple[Cell, Set[str]]] = (
+                (c, b) for c, b in self._cells.items() if cx0 <= c[0] <= cx1 and cy0 <= c[1] <= cy1
+            )
+        else:
+            cells = (
+                ((cx, cy), self._cells[(cx, cy)])
+                for cx in range(cx0, cx1 + 1)
+                for cy in range(cy0, cy1 + 1)
+                if (cx, cy) in self._cells
+            )
+
+        result: List[str] = []
+        for (cx, cy), bucket in cells:
+            interior = cx0 < cx < cx1 and cy0 < cy < cy1
+            for key in bucket:
+                if interior:
+                    result.append(key)
+                    continue
+                x, y = self._points[key]
+                if min_x <= x <= max_x and min_y <= y <= max_y:
+                    result.append(key)
+        return result
+
+    def cluster(self, keys: Iterable[str], cluster_size: float) -> List[Dict[str, object]]:
+        """Group ``keys`` into clusters on a grid of ``cluster_size`` cells.
+
+        Each cluster reports its member count, centroid and member names.
+        """
+        groups: Dict[Cell, List[str]] = {}
+        for key in keys:
+            x, y = self._points[key]
+            groups.setdefault((math.floor(x / cluster_size), math.floor(y / cluster_size)), []).append(key)
+
+        clusters: List[Dict[str, object]] = []
+        for members in groups.values():
+            xs = [self._points[k][0] for k in members]
+            ys = [self._points[k][1] for k in members]
+            clusters.append({
+                "count": len(members),
+                "x": sum(xs) / len(members),
+                "y": sum(ys) / len(members),
+                "members": sorted(members),
+            })
+        return clusters
+
+
+__all__ = ["BBox", "GridIndex", "parse_bbox"]
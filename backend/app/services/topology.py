@@ -0,0 +1,253 @@
+"""NetworkTopologyGraph – incrementally maintained view of the mesh.
+
+The graph is fed by :class:`~app.services.mesh_client.MeshClient` as gateway
+state arrives (discovery refreshes, ping results, transfer outcomes) instead of
+being recomputed for every ``/network/*`` request:
+
+* apply_discovery() – apply the authorities added/updated/removed by discovery
+* apply_ping()      – update status / latency of one authority
+* record_transfer() – fold a transfer outcome into the running metrics
+
+Every mutation bumps :attr:`NetworkTopologyGraph.version` and is appended to a
+bounded change log so that polling clients can ask for the changes since the
+version they already hold rather than downloading the full topology again.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from pydantic import ValidationError
+
+from app.models.base import (
+    Address,
+    AuthorityInfo,
+    AuthorityStatus,
+    NodeType,
+    Position,
+)
+
+logger = structlog.get_logger(__name__)
+
+# (version, kind, key, value) – ``value`` is ``None`` for removals
+Change = Tuple[int, str, str, Optional[Any]]
+
+AUTHORITY = "authority"
+CLIENT = "client"
+CONNECTION = "connection"
+
+
+def _authority_node(raw: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Convert a gateway authority dict into the serialised ``AuthorityInfo`` shape."""
+    position = raw.get("position")
+    node = AuthorityInfo(
+        name=raw["name"],
+        address=Address(
+            node_id=raw["name"],
+            ip_address=raw.get("ip", ""),
+            port=raw.get("port", 0),
+            node_type=NodeType.AUTHORITY,
+        ),
+        position=Position(**position) if position else None,
+        status=raw.get("status", AuthorityStatus.UNKNOWN),
+        committee_members=set(raw.get("committee_members", [])),
+    ).model_dump(mode="json")
+    node["committee_members"] = sorted(node["committee_members"])
+    if previous is not None:
+        # Ping-derived state survives discovery refreshes
+        node["last_heartbeat"] = previous["last_heartbeat"]
+        node["performance_metrics"] = previous["performance_metrics"]
+    return node
+
+
+class NetworkTopologyGraph:
+    """Versioned graph of authorities, clients and connections."""
+
+    def __init__(self, max_changes: int = 4096) -> None:
+        self.version: int = 0
+        self._authorities: Dict[str, Dict[str, Any]] = {}
+        self._clients: Dict[str, Dict[str, Any]] = {}
+        self._connections: Dict[str, List[str]] = {}
+        self._changes: Deque[Change] = deque(maxlen=max_changes)
+        self._last_updated: datetime = datetime.now(timezone.utc)
+
+        # Running metrics – updated in O(1) per event
+        self._latency: Dict[str, float] = {}
+        self._latency_sum: float = 0.0
+        self._online: int = 0
+        self._total_transactions: int = 0
+        self._successful_transactions: int = 0
+        self._confirmation_time_sum: float = 0.0
+
+    # ------------------------------ mutation ------------------------------
+
+    def _record(self, kind: str, key: str, value: Optional[Any]) -> None:
+        self.version += 1
+        self._changes.append((self.version, kind, key, value))
+        self._last_updated = datetime.now(timezone.utc)
+
+    def _set_status(self, node: Dict[str, Any], status: str) -> None:
+        was_online = node["status"] == AuthorityStatus.ONLINE.value
+        node["status"] = status
+        self._online += int(status == AuthorityStatus.ONLINE.value) - int(was_online)
+
+    def _set_connections(self, name: str, peers: List[str]) -> None:
+        if self._connections.get(name) != peers:
+            self._connections[name] = peers
+            self._record(CONNECTION, name, peers)
+
+    def _drop_latency(self, name: str) -> None:
+        latency = self._latency.pop(name, None)
+        if latency is not None:
+            self._latency_sum -= latency
+
+    def apply_discovery(
+        self,
+        upserted: Iterable[Dict[str, Any]],
+        removed: Iterable[str] = (),
+        clients: Optional[Iterable[Dict[str, Any]]] = None,
+    ) -> int:
+        """Merge a discovery diff; only nodes that really differ produce changes.
+
+        ``upserted`` holds the gateway dicts of added or updated authorities and
+        ``removed`` the names that disappeared. Returns the number of changes
+        recorded.
+        """
+        start = self.version
+        for raw in upserted:
+            name = raw["name"]
+            previous = self._authorities.get(name)
+            try:
+                node = _authority_node(raw, previous)
+            except (ValidationError, TypeError, ValueError) as exc:
+                # One malformed gateway entry must not fail the whole refresh;
+                # the node keeps its last good state (or stays absent)
+                logger.warning("topology_authority_invalid", authority=name, error=str(exc))
+                continue
+            if node != previous:
+                if previous is not None:
+                    self._online -= int(previous["status"] == AuthorityStatus.ONLINE.value)
+                self._online += int(node["status"] == AuthorityStatus.ONLINE.value)
+                self._authorities[name] = node
+                self._record(AUTHORITY, name, node)
+            self._set_connections(name, sorted(raw.get("committee_members", [])))
+
+        for name in removed:
+            node = self._authorities.pop(name, None)
+            if node is None:
+                continue
+            self._online -= int(node["status"] == AuthorityStatus.ONLINE.value)
+            self._drop_latency(name)
+            self._record(AUTHORITY, name, None)
+            if self._connections.pop(name, None) is not None:
+                self._record(CONNECTION, name, None)
+
+        if clients is not None:
+            seen_clients = set()
+            for raw in clients:
+                name = raw["name"]
+                seen_clients.add(name)
+                if self._clients.get(name) != raw:
+                    self._clients[name] = raw
+                    self._record(CLIENT, name, raw)
+            for name in [n for n in self._clients if n not in seen_clients]:
+                del self._clients[name]
+                self._record(CLIENT, name, None)
+
+        changed = self.version - start
+        if changed:
+            logger.debug("topology_discovery_applied", changes=changed, version=self.version)
+        return changed
+
+    def apply_ping(self, name: str, success: bool, latency_ms: Optional[float] = None) -> None:
+        """Fold a ping result into the authority's status and latency."""
+        node = self._authorities.get(name)
+        if node is None:
+            return
+
+        status = AuthorityStatus.ONLINE.value if success else AuthorityStatus.OFFLINE.value
+        self._drop_latency(name)
+        if success and latency_ms is not None:
+            self._latency[name] = latency_ms
+            self._latency_sum += latency_ms
+
+        node = dict(node)
+        self._set_status(node, status)
+        if success:
+            node["last_heartbeat"] = datetime.now(timezone.utc).isoformat()
+        metrics = dict(node["performance_metrics"])
+        if latency_ms is not None and success:
+            metrics["latency_ms"] = round(latency_ms, 3)
+        else:
+            metrics.pop("latency_ms", None)
+        node["performance_metrics"] = metrics
+
+        if node != self._authorities[name]:
+            self._authorities[name] = node
+            self._record(AUTHORITY, name, node)
+
+    def record_transfer(self, success: bool, elapsed: float) -> None:
+        """Account for one transfer submitted through the gateway."""
+        self._total_transactions += 1
+        if success:
+            self._successful_transactions += 1
+            self._confirmation_time_sum += elapsed
+
+    # ------------------------------ readers -------------------------------
+
+    def topology(self) -> Dict[str, Any]:
+        """Full topology in the ``NetworkTopology`` shape plus its version."""
+        return {
+            "authorities": list(self._authorities.values()),
+            "clients": list(self._clients.values()),
+            "connections": dict(self._connections),
+            "last_updated": self._last_updated.isoformat(),
+            "version": self.version,
+        }
+
+    def changes_since(self, since: int) -> Dict[str, Any]:
+        """Changes after ``since``, coalesced to the latest value per node.
+
+        When ``since`` is older than the retained change log the caller gets
+        ``full: true`` and the complete topology to resync from.
+        """
+        oldest = self._changes[0][0] if self._changes else self.version + 1
+        if since > self.version or since < oldest - 1:
+            return {"version": self.version, "full": True, "topology": self.topology()}
+
+        latest: Dict[Tuple[str, str], Change] = {}
+        for change in reversed(self._changes):
+            if change[0] <= since:
+                break
+            latest.setdefault((change[1], change[2]), change)
+
+        changes = [
+            {"version": v, "kind": kind, "key": key, "op": "remove" if value is None else "upsert", "value": value}
+            for v, kind, key, value in sorted(latest.values(), key=lambda c: c[0])
+        ]
+        return {"version": self.version, "full": False, "since": since, "changes": changes}
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current metrics in the ``NetworkMetrics`` shape."""
+        successful = self._successful_transactions
+        return {
+            "total_authorities": len(self._authorities),
+            "online_authorities": self._online,
+            "total_transactions": self._total_transactions,
+            "successful_transactions": successful,
+            "average_confirmation_time": self._confirmation_time_sum / successful if successful else 0.0,
+            "network_latency": self._latency_sum / len(self._latency) if self._latency else 0.0,
+            "last_calculated": datetime.now(timezone.utc).isoformat(),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+network_topology = NetworkTopologyGraph()
+
+__all__ = ["NetworkTopologyGraph", "network_topology"]
@@ -0,0 +1,444 @@
+"""TransferJournal – durable, offline-first queue of accepted transfers.
+
+MeshPay is built for intermittent connectivity, so accepting a payment must
+not depend on the gateway bridge being reachable. Accepted transfer orders are
+appended to a SQLite journal (WAL, ``synchronous=FULL``) and acknowledged once
+the write is on disk; :class:`JournalReplayer` drains the journal to the
+gateway in the background.
+
+``entries`` holds the accepted orders with their delivery state (``pending``,
+``unknown``, ``sent`` or ``rejected``) and ``outcomes`` the gateway's final
+answer for each delivered or refused one. Open entries are read through a
+partial index, so a drain does not slow down as delivered entries pile up.
+
+Only a send that certainly never left (the connection could not be opened,
+the call was shed locally, 429) is retried as is. When the bridge may have
+forwarded the order without answering (read timeout, dropped link, 5xx) the
+entry becomes ``unknown``: before it is sent again the sender's mesh account
+is read, and an order whose ``sequence_number`` the mesh has already reached
+is recorded as sent instead. Every send carries the journal id as its
+``Idempotency-Key`` and the ``timestamp`` taken when the order was accepted,
+so the bridge sees the same order each time. An ``unknown`` entry without a
+sequence number cannot be reconciled and is left for an operator. Entries of one
+sender are replayed strictly in ``sequence_number`` order; a failure stops
+that sender so a later order never overtakes an earlier one, and the sender
+is retried after an exponential backoff (capped at
+``JOURNAL_RETRY_MAX_DELAY``) counted on the entry itself. Each batch takes
+senders round-robin, so one sender with a long or stuck queue cannot hold the
+others back. The replayer compacts away entries that reached their final
+state more than ``JOURNAL_RETENTION`` seconds ago.
+
+Every uvicorn worker opens the journal and accepts orders, but only one
+process replays it: the replayer holds an exclusive ``flock`` on
+``<journal>.replay.lock`` and the others stand by, polling every
+``JOURNAL_REPLAY_INTERVAL`` to take over if that process goes away (the OS
+drops the lock with it). Without ``fcntl`` (Windows) a single process is
+assumed.
+
+On shutdown the replayer finishes the delivery round in progress (up to
+``SHUTDOWN_DRAIN_TIMEOUT`` seconds) so accepted orders are not cut off
+mid-send, and the journal checkpoints its WAL into the database file.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional
+
+import httpx
+import structlog
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows runs a single worker
+    fcntl = None  # type: ignore[assignment]
+
+from app.core.config import get_settings
+from app.services.account_state import account_state
+from app.services.mesh_client import MeshClient, MeshClientError, MeshClientOutcomeUnknown, mesh_client
+
+logger = structlog.get_logger(__name__)
+
+settings = get_settings()
+
+PENDING = "pending"
+UNKNOWN = "unknown"
+SENT = "sent"
+REJECTED = "rejected"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sender TEXT NOT NULL,
+    sequence_number INTEGER,
+    body TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    entry_id INTEGER NOT NULL REFERENCES entries(id),
+    status TEXT NOT NULL,
+    detail TEXT,
+    at REAL NOT NULL
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_entries_open ON entries (sender, sequence_number, id)
+    WHERE state IN ('pending', 'unknown');
+CREATE INDEX IF NOT EXISTS idx_entries_done ON entries (updated_at) WHERE state IN ('sent', 'rejected');
+CREATE INDEX IF NOT EXISTS idx_outcomes_entry ON outcomes (entry_id, status);
+"""
+
+# Round-robin over senders that are not backing off, each in sequence order;
+# an unknown entry without a sequence number cannot be reconciled and is skipped
+_PENDING = """
+WITH due AS (
+    SELECT id, sender, sequence_number, body, created_at, attempts, state,
+           ROW_NUMBER() OVER (PARTITION BY sender ORDER BY COALESCE(sequence_number, 0), id) AS turn
+    FROM entries
+    WHERE (state = 'pending' OR (state = 'unknown' AND sequence_number IS NOT NULL))
+      AND sender NOT IN (
+          SELECT sender FROM entries WHERE state IN ('pending', 'unknown') AND next_attempt_at > ?
+      )
+)
+SELECT id, sender, sequence_number, body, created_at, attempts, state FROM due
+ORDER BY turn, id
+LIMIT ?
+"""
+
+
+class TransferJournal:
+    """SQLite-backed append-only journal of accepted transfer orders."""
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path or settings.transfer_journal_path)
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._replay_lock: Optional[IO[str]] = None
+        self.appended = asyncio.Event()
+
+    # ------------------------------ lifecycle -----------------------------
+
+    def open(self) -> None:
+        if self._db is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=FULL")
+        db.executescript(_SCHEMA)
+        db.executescript(_INDEXES)
+        self._db = db
+        logger.info("transfer_journal_opened", path=str(self.path), pending=self.pending_count())
+
+    def close(self) -> None:
+        """Checkpoint the WAL (other workers may keep it open) and close."""
+        self.release_replay_lock()
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error as exc:
+                    logger.warning("transfer_journal_checkpoint_failed", error=str(exc))
+                self._db.close()
+                self._db = None
+
+    def acquire_replay_lock(self) -> bool:
+        """Become the one process that replays this journal; ``True`` while held."""
+        if self._replay_lock is not None or fcntl is None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fh = open(f"{self.path}.replay.lock", "a", encoding="utf-8")  # pylint: disable=consider-using-with
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        self._replay_lock = fh
+        return True
+
+    def release_replay_lock(self) -> None:
+        if self._replay_lock is not None:
+            self._replay_lock.close()  # closing the file drops the flock
+            self._replay_lock = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            raise RuntimeError("TransferJournal not opened – call open() first")
+        return self._db
+
+    # ------------------------------ writes --------------------------------
+
+    def _append(self, body: Dict[str, Any]) -> int:
+        seq = body.get("sequence_number")
+        now = time.time()
+        body = {"timestamp": now, **body}  # kept for every resend
+        with self._lock:
+            cur = self._conn().execute(
+                "INSERT INTO entries (sender, sequence_number, body, created_at) VALUES (?, ?, ?, ?)",
+                (body["sender"].lower(), int(seq) if seq is not None else None, json.dumps(body), now),
+            )
+            return int(cur.lastrowid)
+
+    async def append(self, body: Dict[str, Any]) -> int:
+        """Durably record an accepted transfer; returns its journal id."""
+        entry_id = await asyncio.to_thread(self._append, body)
+        self.appended.set()
+        return entry_id
+
+    def record(self, entry_id: int, status: str, detail: Any = None) -> None:
+        """Record the final outcome (``sent`` / ``rejected``) of ``entry_id``."""
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN")
+            db.execute(
+                "INSERT INTO outcomes (entry_id, status, detail, at) VALUES (?, ?, ?, ?)",
+                (entry_id, status, json.dumps(detail) if detail is not None else None, now),
+            )
+            db.execute("UPDATE entries SET state = ?, updated_at = ? WHERE id = ?", (status, now, entry_id))
+            db.execute("COMMIT")
+
+    def retry_later(self, entry_id: int, error: str, delay: float, *, unknown: bool = False) -> None:
+        """Count a failed attempt and hold the entry (and its sender) back for ``delay`` seconds.
+
+        With ``unknown`` the entry may have reached the mesh and is marked
+        ``unknown``; otherwise it keeps its state.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn().execute(
+                "UPDATE entries SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?, updated_at = ?,"
+                " state = CASE WHEN ? THEN 'unknown' ELSE state END WHERE id = ?",
+                (error, now + delay, now, unknown, entry_id),
+            )
+
+    def compact(self, older_than: float = 0.0) -> int:
+        """Drop entries that reached a final state ``older_than`` seconds ago; returns rows removed."""
+        cutoff = time.time() - older_than
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN")
+            done = "SELECT id FROM entries WHERE state IN ('sent', 'rejected') AND updated_at <= ?"
+            db.execute(f"DELETE FROM outcomes WHERE entry_id IN ({done})", (cutoff,))
+            removed = db.execute("DELETE FROM entries WHERE state IN ('sent', 'rejected') AND updated_at <= ?",
+                                 (cutoff,)).rowcount
+            db.execute("COMMIT")
+            return removed
+
+    # ------------------------------ reads ---------------------------------
+
+    def pending(self, limit: int) -> List[Dict[str, Any]]:
+        """Due pending entries, senders round-robin and each sender in sequence order."""
+        with self._lock:
+            rows = self._conn().execute(_PENDING, (time.time(), limit)).fetchall()
+        return [
+            {"id": r[0], "sender": r[1], "sequence_number": r[2], "body": json.loads(r[3]), "created_at": r[4],
+             "attempts": r[5], "state": r[6]}
+            for r in rows
+        ]
+
+    def pending_count(self) -> int:
+        """Entries not delivered or refused yet (``pending`` or ``unknown``)."""
+        with self._lock:
+            return self._conn().execute(
+                "SELECT COUNT(*) FROM entries WHERE state IN ('pending', 'unknown')"
+            ).fetchone()[0]
+
+    def status(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """Current state of one entry: pending / unknown / sent / rejected plus attempts."""
+        with self._lock:
+            db = self._conn()
+            entry = db.execute(
+                "SELECT state, created_at, attempts, last_error, updated_at FROM entries WHERE id = ?", (entry_id,)
+            ).fetchone()
+            if entry is None:
+                return None
+            outcome = db.execute(
+                "SELECT detail FROM outcomes WHERE entry_id = ? ORDER BY rowid DESC LIMIT 1", (entry_id,)
+            ).fetchone()
+        state, created_at, attempts, last_error, updated_at = entry
+        if state in (PENDING, UNKNOWN):
+            detail = last_error
+        else:
+            attempts += 1
+            detail = json.loads(outcome[0]) if outcome and outcome[0] else None
+        return {
+            "journal_id": entry_id,
+            "status": state,
+            "accepted_at": created_at,
+            "attempts": attempts,
+            "last_attempt_at": updated_at,
+            "detail": detail,
+        }
+
+
+class JournalReplayer:
+    """Background task delivering pending journal entries to the gateway."""
+
+    def __init__(
+        self,
+        journal: TransferJournal,
+        mesh: MeshClient,
+        *,
+        interval: float | None = None,
+        batch_size: int | None = None,
+        concurrency: int | None = None,
+        retry_max_delay: float | None = None,
+        retention: float | None = None,
+        compact_interval: float | None = None,
+    ) -> None:
+        self.journal = journal
+        self.mesh = mesh
+        self.interval = float(interval or settings.journal_replay_interval)
+        self.batch_size = int(batch_size or settings.journal_replay_batch)
+        self.retry_max_delay = float(retry_max_delay or settings.journal_retry_max_delay)
+        self.retention = float(retention if retention is not None else settings.journal_retention)
+        self.compact_interval = float(compact_interval or settings.journal_compact_interval)
+        self._compacted_at: Optional[float] = None
+        self._senders = asyncio.Semaphore(int(concurrency or settings.journal_replay_concurrency))
+        self._stopping = False
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="journal-replayer")
+            logger.info("journal_replayer_started", interval=self.interval)
+
+    async def stop(self, timeout: float | None = None) -> None:
+        """Let the round in progress finish (at most ``timeout`` seconds), then stop."""
+        if self._task is not None:
+            self._stopping = True
+            self.journal.appended.set()  # wake an idle loop
+            timeout = settings.shutdown_drain_timeout if timeout is None else timeout
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("journal_replayer_drain_timeout", timeout=timeout)
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+            self._task = None
+            self.journal.release_replay_lock()
+            logger.info("journal_replayer_stopped", pending=self.journal.pending_count())
+
+    async def _run(self) -> None:
+        standby = False
+        while not self._stopping:
+            self.journal.appended.clear()
+            if not self.journal.acquire_replay_lock():
+                if not standby:
+                    standby = True
+                    logger.info("journal_replayer_standby", reason="another worker replays the journal")
+                try:
+                    await asyncio.wait_for(self.journal.appended.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if standby:
+                standby = False
+                logger.info("journal_replayer_took_over")
+            try:
+                delivered, blocked = await self.drain_once()
+                await self._compact_if_due()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("journal_replay_failed", error=str(exc))
+                delivered, blocked = 0, True
+            if delivered and not blocked:
+                continue  # more may be waiting – keep draining
+            try:
+                await asyncio.wait_for(self.journal.appended.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain_once(self) -> tuple[int, bool]:
+        """Deliver one batch; returns ``(delivered, any_sender_blocked)``."""
+        entries = await asyncio.to_thread(self.journal.pending, self.batch_size)
+        if not entries:
+            return 0, False
+
+        by_sender: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            by_sender.setdefault(entry["sender"], []).append(entry)
+
+        results = await asyncio.gather(*(self._drain_sender(batch) for batch in by_sender.values()))
+        delivered = sum(r[0] for r in results)
+        blocked = any(r[1] for r in results)
+        logger.info("journal_replay_batch", delivered=delivered, senders=len(by_sender), blocked=blocked)
+        return delivered, blocked
+
+    async def _compact_if_due(self) -> None:
+        now = time.monotonic()
+        if self._compacted_at is not None and now - self._compacted_at < self.compact_interval:
+            return
+        self._compacted_at = now
+        removed = await asyncio.to_thread(self.journal.compact, self.retention)
+        if removed:
+            logger.info("transfer_journal_compacted", removed=removed)
+
+    async def _reconcile(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The outcome of an ``unknown`` entry the mesh already executed, else ``None``."""
+        account = await self.mesh.get_account_info(entry["sender"])
+        executed = account.get("sequence_number") if isinstance(account, dict) else None
+        if isinstance(executed, int) and executed >= entry["sequence_number"]:
+            logger.info("journal_entry_reconciled", entry=entry["id"], sender=entry["sender"],
+                        sequence_number=entry["sequence_number"])
+            return {"success": True, "reconciled": True, "account_sequence_number": executed}
+        return None
+
+    async def _drain_sender(self, entries: List[Dict[str, Any]]) -> tuple[int, bool]:
+        delivered = 0
+        async with self._senders:
+            for entry in entries:
+                delay = min(self.interval * 2 ** min(entry["attempts"], 16), self.retry_max_delay)
+                try:
+                    result = await self._reconcile(entry) if entry["state"] == UNKNOWN else None
+                    if result is None:
+                        result = await self.mesh.send_transfer(entry["body"], idempotency_key=str(entry["id"]))
+                except MeshClientOutcomeUnknown as exc:
+                    logger.warning("journal_entry_outcome_unknown", entry=entry["id"], error=str(exc))
+                    await asyncio.to_thread(self.journal.retry_later, entry["id"], str(exc), delay, unknown=True)
+                    return delivered, True
+                except MeshClientError as exc:
+                    if _is_rejection(exc):
+                        await asyncio.to_thread(self.journal.record, entry["id"], REJECTED, str(exc))
+                        continue
+                    # Nothing was sent this time; an unknown entry stays unknown
+                    await asyncio.to_thread(self.journal.retry_later, entry["id"], str(exc), delay)
+                    return delivered, True  # keep per-sender order: stop here
+                await asyncio.to_thread(self.journal.record, entry["id"], SENT, result)
+                account_state.record_transfer(entry["body"], result)
+                delivered += 1
+        return delivered, False
+
+
+def _is_rejection(exc: MeshClientError) -> bool:
+    """True when the gateway refused the order itself (4xx other than 429)."""
+    cause = exc.__cause__
+    if isinstance(cause, httpx.HTTPStatusError):
+        code = cause.response.status_code
+        return 400 <= code < 500 and code != 429
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Singletons
+# ---------------------------------------------------------------------------
+
+transfer_journal = TransferJournal()
+journal_replayer = JournalReplayer(transfer_journal, mesh_client)
+
+__all__ = ["JournalReplayer", "TransferJournal", "journal_replayer", "transfer_journal"]
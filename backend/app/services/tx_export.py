@@ -0,0 +1,223 @@
+"""Streaming CSV / Parquet export of indexed MeshPay transfers.
+
+``GET /api/transactions/export`` walks the ``events`` table of
+:class:`~app.services.aggregates.AddressAggregates` with one server-side
+cursor and encodes it chunk by chunk, so an export of any size needs the
+memory of a single chunk (``EXPORT_CHUNK_ROWS`` rows):
+
+* CSV – a header, then one block of lines per chunk;
+* Parquet – one row group per chunk, footer at the end. Needs the optional
+  ``pyarrow`` package.
+
+Fetching and encoding run in worker threads; the loop only forwards bytes.
+Only blocks at or below the finalized block are exported, so an export
+never contains events that a reorg could still remove; until the chain
+follower has reported a finalized block (shortly after startup) there is no
+export. A time range is turned into a block range by a binary search over
+block timestamps, and the rows are selected by block number.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+
+from app.core.config import SUPPORTED_TOKENS, get_settings
+from app.services.aggregates import AddressAggregates, address_aggregates
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None  # type: ignore[assignment]
+    pq = None  # type: ignore[assignment]
+
+logger = structlog.get_logger(__name__)
+
+settings = get_settings()
+
+FORMATS = ("csv", "parquet")
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "parquet": "application/vnd.apache.parquet"}
+
+COLUMNS = (
+    "block", "log_index", "timestamp", "tx_hash", "event", "sender", "recipient",
+    "token", "token_symbol", "amount", "amount_decimal", "sequence_number", "order_id",
+)
+
+
+class ExportUnavailable(Exception):
+    """The requested export format cannot be produced in this deployment."""
+
+
+def _token_info() -> Dict[str, Tuple[str, int]]:
+    return {
+        str(c["address"]).lower(): (c["symbol"], c["decimals"]) for c in SUPPORTED_TOKENS.values() if c["address"]
+    }
+
+
+def _records(rows: Sequence[Tuple[Any, ...]], tokens: Dict[str, Tuple[str, int]]) -> List[Tuple[Any, ...]]:
+    """Stored event rows with the token symbol and the amount in whole tokens added."""
+    out = []
+    for block, log_index, at, tx_hash, event, sender, recipient, token, amount, sequence, order_id in rows:
+        symbol, decimals = tokens.get(token.lower(), (None, None))
+        human = format(Decimal(amount).scaleb(-decimals), "f") if decimals is not None else None
+        out.append((block, log_index, at, tx_hash, event, sender, recipient, token, symbol, amount, human,
+                    sequence, order_id))
+    return out
+
+
+class CsvEncoder:
+    """CSV with a header row; timestamps as ISO-8601 UTC."""
+
+    def __init__(self) -> None:
+        self.tokens = _token_info()
+
+    def header(self) -> bytes:
+        return self._lines([COLUMNS])
+
+    def encode(self, rows: Sequence[Tuple[Any, ...]]) -> bytes:
+        records = _records(rows, self.tokens)
+        return self._lines((r[0], r[1], _iso(r[2]), *r[3:]) for r in records)
+
+    def close(self) -> bytes:
+        return b""
+
+    @staticmethod
+    def _lines(rows: Any) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink for ``ParquetWriter`` whose bytes are taken out after each row group."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._written += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._written
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ParquetEncoder:
+    """Parquet with one row group per chunk (``uint256`` amounts as strings)."""
+
+    def __init__(self) -> None:
+        if pa is None:
+            raise ExportUnavailable("Parquet export needs the optional pyarrow package")
+        self.tokens = _token_info()
+        self.schema = pa.schema([
+            ("block", pa.int64()),
+            ("log_index", pa.int32()),
+            ("timestamp", pa.timestamp("s", tz="UTC")),
+            ("tx_hash", pa.string()),
+            ("event", pa.string()),
+            ("sender", pa.string()),
+            ("recipient", pa.string()),
+            ("token", pa.string()),
+            ("token_symbol", pa.string()),
+            ("amount", pa.string()),
+            ("amount_decimal", pa.string()),
+            ("sequence_number", pa.int64()),
+            ("order_id", pa.string()),
+        ])
+        self.sink = _Drain()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def header(self) -> bytes:
+        return self.sink.take()
+
+    def encode(self, rows: Sequence[Tuple[Any, ...]]) -> bytes:
+        columns = list(zip(*_records(rows, self.tokens)))
+        self.writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)], schema=self.schema
+        ))
+        return self.sink.take()
+
+    def close(self) -> bytes:
+        self.writer.close()
+        return self.sink.take()
+
+
+def encoder_for(fmt: str) -> Any:
+    if fmt == "csv":
+        return CsvEncoder()
+    if fmt == "parquet":
+        return ParquetEncoder()
+    raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+
+
+async def export_events(
+    fmt: str,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    *,
+    aggregates: AddressAggregates = address_aggregates,
+    chunk_size: Optional[int] = None,
+) -> Tuple[Optional[int], AsyncIterator[bytes]]:
+    """Last exported block and the encoded body as an async byte stream.
+
+    The last block is ``None`` (and the body empty) while the index or its
+    finalized block is not known yet. The encoder is built before streaming
+    starts, so an unavailable format raises :class:`ExportUnavailable` while
+    a proper error response can still be sent.
+    """
+    encoder = encoder_for(fmt)
+    if aggregates.block is None or aggregates.finalized is None:
+        return None, _empty()
+    last_block = min(aggregates.block, aggregates.finalized)
+    first_block = await aggregates.first_block_at(since, last_block) if since is not None else None
+    max_block = last_block
+    if until is not None:
+        max_block = await aggregates.first_block_at(until, last_block) - 1
+    chunk_size = int(chunk_size or settings.export_chunk_rows)
+
+    async def body() -> AsyncIterator[bytes]:
+        rows_out = 0
+        try:
+            yield await asyncio.to_thread(encoder.header)
+            async for rows in aggregates.iter_events(first_block, max_block, chunk_size=chunk_size):
+                yield await asyncio.to_thread(encoder.encode, rows)
+                rows_out += len(rows)
+            yield await asyncio.to_thread(encoder.close)
+        finally:
+            logger.info("transactions_exported", format=fmt, rows=rows_out, since=since, until=until,
+                        block=last_block)
+
+    return last_block, body()
+
+
+async def _empty() -> AsyncIterator[bytes]:
+    return
+    yield  # pragma: no cover
+
+
+def _iso(timestamp: Optional[int]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+__all__ = ["COLUMNS", "ExportUnavailable", "FORMATS", "MEDIA_TYPES", "export_events"]
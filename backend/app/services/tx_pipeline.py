@@ -0,0 +1,399 @@
+"""TxPipeline – nonce allocation and receipt tracking for the backend signer.
+
+Everything the backend broadcasts with ``BlockchainClient.account`` (certificate
+redemptions, ``updateBalanceFromConfirmation``) goes through one pipeline so
+that many transactions can be in flight per block:
+
+* :class:`NonceManager` hands out nonces locally. It reads
+  ``get_transaction_count(..., "pending")`` once, then counts up; nonces whose
+  broadcast the node refused are released and reused before new ones are
+  issued. When the connection fails during a broadcast the node may still
+  have taken the transaction, so it is tracked as sent and its nonce kept:
+  the poller confirms it or recovery re-broadcasts it.
+* :class:`ReceiptPoller` fetches receipts once per new block for every
+  in-flight transaction at the same time, and backs off exponentially while no
+  new block appears.
+* :meth:`TxPipeline.recover` runs when a transaction has been outstanding for
+  ``TX_STUCK_AFTER`` seconds: released nonces below the high-water mark (gaps
+  that block every later transaction) are filled with a zero-value
+  self-transfer, and transactions the node no longer knows about (dropped from
+  the mempool) are re-broadcast from their signed bytes. A transaction whose
+  nonce the chain has consumed without mining it (replaced by another one)
+  fails with :class:`TxDropped` instead of waiting forever. A re-broadcast
+  the node refuses is logged and tried again on the next recovery.
+
+The pipeline only talks JSON-RPC, so it runs unchanged against a local Hardhat
+node or anvil (see ``benchmarks/bench_tx_pipeline.py``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import time
+from typing import Any, Dict, List, Optional
+
+import structlog
+from web3.exceptions import TransactionNotFound
+
+from app.core.config import get_settings
+from app.core.tracing import tracer
+from app.services.blockchain_client import BlockchainClient, blockchain_client
+
+logger = structlog.get_logger(__name__)
+
+settings = get_settings()
+
+FILLER_GAS = 21_000
+
+
+class TxDropped(Exception):
+    """The transaction's nonce was consumed by another transaction; it will never be mined."""
+
+
+class PendingTx:
+    """A signed, broadcast transaction waiting for its receipt."""
+
+    __slots__ = ("nonce", "tx_hash", "raw", "sent_at", "rebroadcasts", "receipt")
+
+    def __init__(self, nonce: int, tx_hash: str, raw: bytes) -> None:
+        self.nonce = nonce
+        self.tx_hash = tx_hash
+        self.raw = raw
+        self.sent_at = time.monotonic()
+        self.rebroadcasts = 0
+        self.receipt: asyncio.Future[Dict[str, Any]] = asyncio.get_running_loop().create_future()
+
+    async def wait(self, timeout: float | None = None) -> Dict[str, Any]:
+        """Wait for the receipt (also returned for reverted transactions)."""
+        return await asyncio.wait_for(asyncio.shield(self.receipt), timeout)
+
+
+# ---------------------------------------------------------------------------
+# Nonces
+# ---------------------------------------------------------------------------
+
+class NonceManager:
+    """Local nonce allocator for one account."""
+
+    def __init__(self, chain: BlockchainClient) -> None:
+        self.chain = chain
+        self.next: Optional[int] = None
+        self._free: List[int] = []  # heap of released nonces below ``next``
+        self._lock = asyncio.Lock()
+
+    async def sync(self) -> int:
+        """Reset from the node's pending transaction count."""
+        async with self._lock:
+            return await self._sync()
+
+    async def _sync(self) -> int:
+        self.next = await self.chain.rpc(
+            self.chain.w3.eth.get_transaction_count, self.chain.account.address, "pending"
+        )
+        self._free = []
+        logger.info("nonce_synced", next_nonce=self.next)
+        return self.next
+
+    async def allocate(self) -> int:
+        async with self._lock:
+            if self.next is None:
+                await self._sync()
+            if self._free:
+                return heapq.heappop(self._free)
+            nonce = self.next
+            self.next += 1
+            return nonce
+
+    def release(self, nonce: int) -> None:
+        """Return a nonce whose transaction never reached the node."""
+        if self.next is not None and nonce < self.next and nonce not in self._free:
+            heapq.heappush(self._free, nonce)
+
+    def claim(self, nonce: int) -> bool:
+        """Take a specific released nonce (to fill a gap); False if not free."""
+        if nonce not in self._free:
+            return False
+        self._free.remove(nonce)
+        heapq.heapify(self._free)
+        return True
+
+    def discard_below(self, confirmed: int) -> None:
+        """Forget released nonces the chain has already consumed."""
+        if any(n < confirmed for n in self._free):
+            self._free = [n for n in self._free if n >= confirmed]
+            heapq.heapify(self._free)
+        if self.next is not None and self.next < confirmed:
+            self.next = confirmed
+
+    @property
+    def released(self) -> List[int]:
+        return sorted(self._free)
+
+
+# ---------------------------------------------------------------------------
+# Receipts
+# ---------------------------------------------------------------------------
+
+class ReceiptPoller:
+    """Polls receipts of in-flight transactions once per new block."""
+
+    def __init__(
+        self,
+        pipeline: "TxPipeline",
+        *,
+        interval: float | None = None,
+        max_interval: float | None = None,
+    ) -> None:
+        self.pipeline = pipeline
+        self.chain = pipeline.chain
+        self.interval = float(interval or settings.tx_receipt_poll_interval)
+        self.max_interval = float(max_interval or settings.tx_receipt_poll_max_interval)
+        self.last_block: Optional[int] = None
+        self._delay = self.interval
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="tx-receipt-poller")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        """Reset the backoff – a new transaction was just broadcast."""
+        self._delay = self.interval
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self.pipeline.outstanding:
+                self._delay = self.interval
+                await self._wakeup.wait()
+                continue
+            try:
+                await self.poll_once()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("tx_receipt_poll_failed", error=str(exc))
+                self._delay = min(self._delay * 2, self.max_interval)
+
+    async def poll_once(self) -> int:
+        """Fetch receipts if a new block appeared; returns receipts resolved."""
+        block = await self.chain.rpc(lambda: self.chain.w3.eth.block_number)
+        if self.last_block is not None and block <= self.last_block:
+            self._delay = min(self._delay * 2, self.max_interval)
+            await self.pipeline.recover_if_stuck()
+            return 0
+        self.last_block = block
+        self._delay = self.interval
+
+        pending = list(self.pipeline.outstanding.values())
+        receipts = await asyncio.gather(*(self._fetch(p.tx_hash) for p in pending))
+        resolved = 0
+        for tx, receipt in zip(pending, receipts):
+            if receipt is not None:
+                self.pipeline._resolve(tx, receipt)
+                resolved += 1
+        logger.debug("tx_receipts_polled", block=block, checked=len(pending), resolved=resolved)
+        await self.pipeline.recover_if_stuck()
+        return resolved
+
+    async def _fetch(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        try:
+            return dict(await self.chain.rpc(self.chain.w3.eth.get_transaction_receipt, tx_hash))
+        except TransactionNotFound:
+            return None
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+class TxPipeline:
+    """Signs, broadcasts and tracks transactions of the backend account."""
+
+    def __init__(self, chain: BlockchainClient, *, stuck_after: float | None = None) -> None:
+        self.chain = chain
+        self.stuck_after = float(stuck_after or settings.tx_stuck_after)
+        self.nonces = NonceManager(chain)
+        self.poller = ReceiptPoller(self)
+        self.outstanding: Dict[int, PendingTx] = {}  # nonce -> transaction
+        self._gas_price: tuple[int, float] = (0, 0.0)
+        self._recovering = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.chain.w3 is not None and self.chain.account is not None
+
+    async def start(self) -> None:
+        if self.enabled:
+            self.poller.start()
+            logger.info("tx_pipeline_started", account=self.chain.account.address)
+
+    async def stop(self) -> None:
+        await self.poller.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "next_nonce": self.nonces.next,
+            "released_nonces": self.nonces.released,
+            "in_flight": len(self.outstanding),
+            "last_block": self.poller.last_block,
+        }
+
+    # ------------------------------ sending -------------------------------
+
+    async def send(self, tx: Dict[str, Any]) -> PendingTx:
+        """Sign and broadcast ``tx`` (``to``/``data``/``value``/``gas``).
+
+        ``nonce``, ``gasPrice`` and ``chainId`` are filled in by the pipeline.
+        """
+        nonce = await self.nonces.allocate()
+        try:
+            return await self._broadcast(nonce, tx)
+        except Exception as exc:
+            if "nonce too low" in str(exc).lower():
+                await self.nonces.sync()
+            else:
+                self.nonces.release(nonce)
+            raise
+
+    async def send_call(self, call: Any, gas: int, value: int = 0) -> PendingTx:
+        """Broadcast a contract function call with a known gas limit."""
+        tx = call.build_transaction({
+            "from": self.chain.account.address,
+            "gas": gas,
+            "gasPrice": 0,
+            "nonce": 0,
+            "chainId": settings.chain_id,
+            "value": value,
+        })
+        return await self.send({"to": tx["to"], "data": tx["data"], "value": value, "gas": gas})
+
+    async def _broadcast(self, nonce: int, tx: Dict[str, Any]) -> PendingTx:
+        signed = self.chain.account.sign_transaction({
+            **tx,
+            "nonce": nonce,
+            "gasPrice": await self.gas_price(),
+            "chainId": settings.chain_id,
+        })
+        try:
+            await self.chain.rpc(self.chain.w3.eth.send_raw_transaction, signed.rawTransaction)
+        except OSError as exc:  # transport error or timeout: the node may have it
+            logger.warning("tx_broadcast_unconfirmed", nonce=nonce, error=str(exc) or type(exc).__name__)
+        except Exception as exc:
+            if "already known" not in str(exc).lower():
+                raise
+        pending = PendingTx(nonce, signed.hash.hex(), bytes(signed.rawTransaction))
+        self.outstanding[nonce] = pending
+        self.poller.wake()
+        return pending
+
+    async def gas_price(self) -> int:
+        price, expires = self._gas_price
+        tracer.set_attribute("gas_price.cache_hit", expires > time.monotonic())
+        if expires > time.monotonic():
+            return price
+        price = await self.chain.rpc(lambda: self.chain.w3.eth.gas_price)
+        self._gas_price = (price, time.monotonic() + settings.tx_gas_price_ttl)
+        return price
+
+    def _resolve(self, tx: PendingTx, receipt: Dict[str, Any]) -> None:
+        if self.outstanding.get(tx.nonce) is tx:
+            del self.outstanding[tx.nonce]
+        if not tx.receipt.done():
+            tx.receipt.set_result(receipt)
+
+    def _drop(self, tx: PendingTx, error: Exception) -> None:
+        if self.outstanding.get(tx.nonce) is tx:
+            del self.outstanding[tx.nonce]
+        if not tx.receipt.done():
+            tx.receipt.set_exception(error)
+
+    # ------------------------------ recovery ------------------------------
+
+    async def recover_if_stuck(self) -> None:
+        now = time.monotonic()
+        stuck = any(now - tx.sent_at > self.stuck_after for tx in self.outstanding.values())
+        if (stuck or self.nonces.released) and not self._recovering:
+            self._recovering = True
+            try:
+                await self.recover()
+            finally:
+                self._recovering = False
+
+    async def recover(self) -> Dict[str, int]:
+        """Fill nonce gaps, re-broadcast dropped transactions and fail replaced ones."""
+        account = self.chain.account.address
+        confirmed = await self.chain.rpc(self.chain.w3.eth.get_transaction_count, account, "latest")
+        self.nonces.discard_below(confirmed)
+
+        filled = rebroadcast = dropped = 0
+        for nonce in self.nonces.released:
+            if self.outstanding and nonce < max(self.outstanding) and self.nonces.claim(nonce):
+                await self._fill(nonce)
+                filled += 1
+
+        now = time.monotonic()
+        for tx in sorted(self.outstanding.values(), key=lambda t: t.nonce):
+            if now - tx.sent_at <= self.stuck_after:
+                continue  # not overdue yet
+            if tx.nonce < confirmed:
+                # Nonce used up: mined (receipt not polled yet) or taken by another transaction
+                receipt = await self.poller._fetch(tx.tx_hash)
+                if receipt is not None:
+                    self._resolve(tx, receipt)
+                else:
+                    logger.error("tx_dropped", nonce=tx.nonce, tx_hash=tx.tx_hash, confirmed_nonce=confirmed)
+                    self._drop(tx, TxDropped(f"nonce {tx.nonce} of {tx.tx_hash} was used by another transaction"))
+                    dropped += 1
+                continue
+            try:
+                if not await self._known(tx.tx_hash):
+                    await self.chain.rpc(self.chain.w3.eth.send_raw_transaction, tx.raw)
+                    tx.rebroadcasts += 1
+                    rebroadcast += 1
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("tx_rebroadcast_failed", nonce=tx.nonce, tx_hash=tx.tx_hash, error=str(exc))
+            tx.sent_at = now
+
+        if filled or rebroadcast or dropped:
+            logger.warning("tx_pipeline_recovered", confirmed_nonce=confirmed, filled=filled,
+                           rebroadcast=rebroadcast, dropped=dropped)
+        return {"confirmed_nonce": confirmed, "filled": filled, "rebroadcast": rebroadcast, "dropped": dropped}
+
+    async def _fill(self, nonce: int) -> None:
+        """Consume ``nonce`` with a zero-value self-transfer."""
+        try:
+            await self._broadcast(nonce, {"to": self.chain.account.address, "value": 0, "gas": FILLER_GAS})
+        except Exception:
+            self.nonces.release(nonce)
+            raise
+
+    async def _known(self, tx_hash: str) -> bool:
+        try:
+            await self.chain.rpc(self.chain.w3.eth.get_transaction, tx_hash)
+            return True
+        except TransactionNotFound:
+            return False
+
+
+# ---------------------------------------------------------------------------
+# Singleton
+# ---------------------------------------------------------------------------
+
+tx_pipeline = TxPipeline(blockchain_client)
+
+__all__ = ["NonceManager", "PendingTx", "ReceiptPoller", "TxDropped", "TxPipeline", "tx_pipeline"]
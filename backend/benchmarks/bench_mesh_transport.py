@@ -0,0 +1,66 @@
+"""Per-call latency of gateway calls over HTTP vs the multiplexed WebSocket link.
+
+Runs ``--count`` authority pings through :class:`~app.services.mesh_client.MeshClient`
+once per transport, first one at a time (latency) and then ``--concurrency``
+at a time (throughput). Start a stub gateway bridge first; no mesh is needed.
+
+Usage (from ``backend/``)::
+
+    python -m scripts.stub_gateway --port 8080 &
+    python -m benchmarks.bench_mesh_transport --gateway http://127.0.0.1:8080 [--count 500]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from app.services.mesh_client import MeshClient
+
+
+async def run(transport: str, gateway: str, count: int, concurrency: int) -> None:
+    client = MeshClient(gateway_urls=[gateway], transport=transport)
+    await client.start()
+    try:
+        authorities = [a["name"] for a in await client.discover(force=True)]
+        latencies: List[float] = []
+        for i in range(count):
+            start = time.perf_counter()
+            await client.ping(authorities[i % len(authorities)])
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i: int) -> None:
+            async with semaphore:
+                await client.ping(authorities[i % len(authorities)])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(count)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.close()
+
+    latencies.sort()
+    print(
+        f"{transport:>4}: p50 {statistics.median(latencies):6.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:6.2f} ms  "
+        f"concurrent {count / elapsed:8.0f} calls/s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gateway", default="http://127.0.0.1:8080")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    for transport in ("http", "ws"):
+        await run(transport, args.gateway, args.count, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""Serialization cost per ``/api/wallet`` and ``/api/authorities`` response.
+
+Compares the previous response path (validated model construction, a second
+``AccountInfo`` rebuild in the endpoint, ``jsonable_encoder`` + ``json``)
+with the current one (``model_construct`` + ``ORJSONResponse``). No network
+access is needed; payloads are synthetic but shaped like real responses.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.bench_serialization [--authorities 1000] [--number 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.responses import ORJSONResponse
+from app.models.base import AccountInfo, TokenBalance
+
+TOKENS = {
+    "XTZ": ("0x0000000000000000000000000000000000000000", 18),
+    "WTZ": ("0xB1Ea698633d57705e93b0E40c1077d46CD6A51d8", 18),
+    "USDT": ("0xD21B917D2f4a4a8E3D12892160BFFd8f4cd72d4F", 6),
+    "USDC": ("0x4C2AA252BEe766D3399850569713b55178934849", 6),
+}
+
+
+def _balance_fields(symbol: str) -> Dict[str, Any]:
+    address, decimals = TOKENS[symbol]
+    return dict(
+        token_symbol=symbol,
+        token_address=address,
+        wallet_balance=1234.5,
+        meshpay_balance=100.25,
+        total_balance=1334.75,
+        decimals=decimals,
+    )
+
+
+def _account_fields(balances: Dict[str, TokenBalance]) -> Dict[str, Any]:
+    return dict(
+        address="0x8ba1f109551bD432803012645Ac136ddd64DBA72",
+        is_registered=True,
+        registration_time=1_704_067_200,
+        last_redeemed_sequence=42,
+        balances=balances,
+    )
+
+
+def wallet_before() -> bytes:
+    balances = {TOKENS[s][0]: TokenBalance(**_balance_fields(s)) for s in TOKENS}
+    info = AccountInfo(**_account_fields(balances))
+    rebuilt = AccountInfo(
+        address=info.address,
+        is_registered=info.is_registered,
+        registration_time=info.registration_time,
+        last_redeemed_sequence=info.last_redeemed_sequence,
+        balances=info.balances,
+    )
+    # response_model validation + default encoder
+    validated = AccountInfo.model_validate(rebuilt.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def wallet_after() -> bytes:
+    balances = {TOKENS[s][0]: TokenBalance.model_construct(**_balance_fields(s)) for s in TOKENS}
+    info = AccountInfo.model_construct(**_account_fields(balances))
+    return ORJSONResponse(info.model_dump()).body
+
+
+def _authorities(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "name": f"auth{i}",
+            "ip": f"10.0.{i // 250}.{i % 250 + 1}",
+            "port": 8080,
+            "status": "online",
+            "position": {"x": 37.77 + i * 1e-4, "y": -122.42 + i * 1e-4},
+            "committee_members": [f"auth{j}" for j in range(min(count, 5))],
+        }
+        for i in range(count)
+    ]
+
+
+def _report(name: str, fn: Callable[[], bytes], number: int) -> float:
+    per_call = min(timeit.repeat(fn, number=number, repeat=3)) / number
+    print(f"  {name:<8} {per_call * 1e6:10.1f} µs/response  ({len(fn())} bytes)")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--authorities", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    print("/api/wallet/{address}")
+    before = _report("before", wallet_before, args.number)
+    after = _report("after", wallet_after, args.number)
+    print(f"  speedup  {before / after:10.1f}x")
+
+    authorities = _authorities(args.authorities)
+    number = max(1, args.number // 20)
+    print(f"/api/authorities ({args.authorities} authorities)")
+    before = _report("before", lambda: JSONResponse(jsonable_encoder(authorities)).body, number)
+    after = _report("after", lambda: ORJSONResponse(authorities).body, number)
+    print(f"  speedup  {before / after:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
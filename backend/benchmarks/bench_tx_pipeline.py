@@ -0,0 +1,83 @@
+"""Backend signer throughput against a local dev chain.
+
+Sends ``--count`` zero-value self-transfers from the backend account twice:
+once the old way (fetch nonce, send, wait for the receipt, repeat) and once
+through :class:`~app.services.tx_pipeline.TxPipeline` (local nonces, all
+receipts polled per block). Run a Hardhat node or anvil first; no external
+network is used.
+
+Usage (from ``backend/``)::
+
+    anvil --block-time 1 &
+    RPC_URL=http://127.0.0.1:8545 CHAIN_ID=31337 \\
+        python -m benchmarks.bench_tx_pipeline [--count 50]
+
+``BACKEND_PRIVATE_KEY`` defaults to the first well-known dev account of both
+Hardhat and anvil.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+DEV_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+
+os.environ.setdefault("RPC_URL", "http://127.0.0.1:8545")
+os.environ.setdefault("CHAIN_ID", "31337")
+os.environ.setdefault("BACKEND_PRIVATE_KEY", DEV_KEY)
+
+from app.core.config import settings  # noqa: E402
+from app.services.blockchain_client import blockchain_client  # noqa: E402
+from app.services.tx_pipeline import FILLER_GAS, TxPipeline  # noqa: E402
+
+
+async def sequential(count: int) -> float:
+    w3, account = blockchain_client.w3, blockchain_client.account
+    start = time.perf_counter()
+    for _ in range(count):
+        nonce = await asyncio.to_thread(w3.eth.get_transaction_count, account.address, "pending")
+        signed = account.sign_transaction({
+            "to": account.address, "value": 0, "gas": FILLER_GAS, "nonce": nonce,
+            "gasPrice": await asyncio.to_thread(lambda: w3.eth.gas_price), "chainId": settings.chain_id,
+        })
+        tx_hash = await asyncio.to_thread(w3.eth.send_raw_transaction, signed.rawTransaction)
+        await asyncio.to_thread(w3.eth.wait_for_transaction_receipt, tx_hash, 120, 0.1)
+    return time.perf_counter() - start
+
+
+async def pipelined(count: int) -> float:
+    pipeline = TxPipeline(blockchain_client)
+    await pipeline.start()
+    try:
+        start = time.perf_counter()
+        txs = [
+            await pipeline.send({"to": blockchain_client.account.address, "value": 0, "gas": FILLER_GAS})
+            for _ in range(count)
+        ]
+        receipts = await asyncio.gather(*(tx.wait(120) for tx in txs))
+        elapsed = time.perf_counter() - start
+    finally:
+        await pipeline.stop()
+    blocks = {r["blockNumber"] for r in receipts}
+    print(f"pipelined: {len(receipts)} receipts across {len(blocks)} blocks")
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=50)
+    args = parser.parse_args()
+    if blockchain_client.w3 is None:
+        raise SystemExit(f"No dev chain reachable at {settings.rpc_url}")
+
+    seq = await sequential(args.count)
+    pipe = await pipelined(args.count)
+    print(f"sequential: {seq:8.2f}s  ({args.count / seq:7.1f} tx/s)")
+    print(f"pipelined:  {pipe:8.2f}s  ({args.count / pipe:7.1f} tx/s)  x{seq / pipe:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
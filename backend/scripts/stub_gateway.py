@@ -0,0 +1,216 @@
+"""Local stand-in for the Mininet-WiFi gateway bridge.
+
+Serves the endpoints :class:`~app.services.mesh_client.MeshClient` calls, with
+synthetic authorities, so the backend can be run and exercised without a
+mesh. ``/authorities`` and ``/shards`` honour ``If-None-Match`` exactly like a
+caching gateway should: the ETag only changes when the data does.
+
+Run standalone (from ``backend/``)::
+
+    python -m scripts.stub_gateway --authorities 20 --port 8080
+    MESH_BRIDGE_URL=http://127.0.0.1:8080 uvicorn app.main:app
+
+or in-process with ``httpx.ASGITransport(app=create_app())``.
+
+``POST /_stub/authorities/{name}/status`` flips an authority's status, which
+changes the ETag of the next ``/authorities`` response and is pushed as an
+``authority_updated`` event to clients connected to ``/ws``.
+
+``/ws`` speaks the multiplexed frame protocol of
+:mod:`app.services.mesh_transport`: each request frame is served by the
+HTTP routes above in its own task, so responses return out of order when
+``--latency`` adds a random per-call delay.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+
+
+class StubGateway:
+    """In-memory gateway state: authorities, shards and a transfer log."""
+
+    def __init__(self, authorities: int = 5, seed: int = 7, latency: float = 0.0) -> None:
+        rng = random.Random(seed)
+        self.rng = rng
+        self.latency = latency
+        names = [f"auth{i + 1}" for i in range(authorities)]
+        self.authorities: List[Dict[str, Any]] = [
+            {
+                "name": name,
+                "ip": f"10.0.0.{i + 1}",
+                "port": 8080,
+                "status": "online",
+                "position": {"x": round(rng.uniform(0, 100), 3), "y": round(rng.uniform(0, 100), 3), "z": 0.0},
+                "committee_members": [n for n in names if n != name],
+            }
+            for i, name in enumerate(names)
+        ]
+        self.shards: List[Dict[str, Any]] = [
+            {"name": f"shard{i}", "authorities": names[i::2]} for i in range(2)
+        ]
+        self.transfers: List[Dict[str, Any]] = []
+        self.requests = 0
+        self.not_modified = 0
+        self.links: Dict[WebSocket, asyncio.Lock] = {}  # connected /ws clients
+
+    def set_status(self, name: str, status: str) -> Dict[str, Any]:
+        for authority in self.authorities:
+            if authority["name"] == name:
+                authority["status"] = status
+                return authority
+        raise KeyError(name)
+
+    async def push(self, event: str, data: Dict[str, Any]) -> None:
+        """Send an event frame to every connected ``/ws`` client."""
+        frame = json.dumps({"event": event, "data": data})
+        for websocket, lock in list(self.links.items()):
+            try:
+                async with lock:
+                    await websocket.send_text(frame)
+            except Exception:  # pylint: disable=broad-except
+                self.links.pop(websocket, None)
+
+
+def _conditional(request: Request, payload: Dict[str, Any], gateway: StubGateway) -> Response:
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode()
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    gateway.requests += 1
+    if request.headers.get("if-none-match") == etag:
+        gateway.not_modified += 1
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+def create_app(gateway: StubGateway | None = None) -> FastAPI:
+    """FastAPI app exposing the gateway bridge API backed by ``gateway``."""
+    gw = gateway or StubGateway()
+    app = FastAPI(title="MeshPay stub gateway")
+    app.state.gateway = gw
+
+    @app.middleware("http")
+    async def latency(request: Request, call_next):
+        if gw.latency:
+            await asyncio.sleep(gw.rng.uniform(0, gw.latency))
+        return await call_next(request)
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        return {"status": "healthy", "authorities": len(gw.authorities)}
+
+    @app.get("/authorities")
+    async def authorities(request: Request) -> Response:
+        return _conditional(request, {"authorities": gw.authorities, "clients": []}, gw)
+
+    @app.get("/shards")
+    async def shards(request: Request) -> Response:
+        return _conditional(request, {"shards": gw.shards}, gw)
+
+    @app.post("/transfer")
+    async def transfer(body: Dict[str, Any]) -> Dict[str, Any]:
+        gw.transfers.append(body)
+        return {"success": True, "order_id": body.get("order_id"), "confirmations": len(gw.authorities)}
+
+    @app.post("/authorities/{name}/transfer")
+    async def transfer_to(name: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        gw.transfers.append({**body, "authority": name})
+        return {"success": True, "authority": name}
+
+    @app.post("/authorities/{name}/confirmation")
+    async def confirmation(name: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {"success": True, "authority": name}
+
+    @app.post("/authorities/{name}/ping")
+    async def ping(name: str) -> Dict[str, Any]:
+        if not any(a["name"] == name for a in gw.authorities):
+            raise HTTPException(status_code=404, detail="Unknown authority")
+        return {"success": True, "authority": name, "timestamp": time.time()}
+
+    @app.get("/wallet/balances/{address}")
+    async def balances(address: str) -> List[Dict[str, Any]]:
+        return []
+
+    @app.get("/wallet/account/{address}")
+    async def account(address: str) -> Dict[str, Any]:
+        return {"address": address, "sequence_number": 0, "balances": {}}
+
+    @app.post("/_stub/authorities/{name}/status")
+    async def set_status(name: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            authority = gw.set_status(name, body.get("status", "offline"))
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Unknown authority") from None
+        await gw.push("authority_updated", authority)
+        return {"name": name, "status": body.get("status", "offline")}
+
+    @app.get("/_stub/stats")
+    async def stats() -> Dict[str, Any]:
+        return {
+            "requests": gw.requests,
+            "not_modified": gw.not_modified,
+            "transfers": len(gw.transfers),
+            "links": len(gw.links),
+        }
+
+    @app.websocket("/ws")
+    async def link(websocket: WebSocket) -> None:
+        await websocket.accept()
+        lock = gw.links[websocket] = asyncio.Lock()
+        # Frames are answered by the HTTP routes, in-process
+        routes = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://stub")
+        tasks: set[asyncio.Task[None]] = set()
+
+        async def serve(frame: Dict[str, Any]) -> None:
+            resp = await routes.request(
+                frame.get("method", "GET"), frame["path"], json=frame.get("body"), headers=frame.get("headers")
+            )
+            reply = {
+                "id": frame["id"],
+                "status": resp.status_code,
+                "headers": {k: v for k, v in resp.headers.items() if k == "etag"},
+                "body": resp.json() if resp.content else None,
+            }
+            async with lock:
+                await websocket.send_text(json.dumps(reply))
+
+        try:
+            while True:
+                task = asyncio.create_task(serve(json.loads(await websocket.receive_text())))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            gw.links.pop(websocket, None)
+            for task in tasks:
+                task.cancel()
+            await routes.aclose()
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--authorities", type=int, default=5)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="max random delay per call (s)")
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(StubGateway(args.authorities, latency=args.latency)), host=args.host, port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
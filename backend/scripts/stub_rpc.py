@@ -0,0 +1,204 @@
+"""Local stand-in for an Etherlink JSON-RPC node.
+
+Answers the handful of calls the backend needs to boot and read balances,
+on a synthetic chain whose head advances with wall-clock time – every stub
+derives the same blocks from the same clock, so several stubs agree on the
+chain without talking to each other. ``--lag`` makes a node report a head
+that many blocks behind, ``--latency`` delays every answer, which is all
+:class:`~app.services.rpc_pool.RpcPool` needs to be exercised::
+
+    python -m scripts.stub_rpc --nodes 3 --port 8545 --lags 0,10,0 --latencies 0.05,0,0.01
+    RPC_URLS='["http://127.0.0.1:8545","http://127.0.0.1:8546","http://127.0.0.1:8547"]' uvicorn app.main:app
+
+``GET /_stub`` returns a node's request counts per method; ``POST /_stub``
+with ``{"lag": .., "latency": .., "down": true}`` changes it at run time
+(``down`` answers every request with HTTP 503).
+
+Plain ``http.server`` on purpose: one POST route, no ASGI server needed, and
+:class:`StubRpc` can be started in-process on port 0 for quick checks.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class StubRpc:
+    """One stub node: its lag, latency and what it has been asked."""
+
+    def __init__(self, *, lag: int = 0, latency: float = 0.0, chain_id: int = 128123,
+                 block_time: float = 1.0) -> None:
+        self.lag = lag
+        self.latency = latency
+        self.down = False
+        self.chain_id = chain_id
+        self.block_time = block_time
+        self.calls: Counter[str] = Counter()
+        self.sent: List[str] = []  # raw transactions received
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # ------------------------------ chain ---------------------------------
+
+    def head(self) -> int:
+        return max(int(time.time() / self.block_time) - 1_700_000_000 - self.lag, 0)
+
+    @staticmethod
+    def block_hash(number: int) -> str:
+        return "0x" + hashlib.sha256(f"stub-block-{number}".encode()).hexdigest()
+
+    def block(self, number: int) -> Optional[Dict[str, Any]]:
+        if number > self.head():
+            return None
+        return {
+            "number": hex(number),
+            "hash": self.block_hash(number),
+            "parentHash": self.block_hash(number - 1) if number else "0x" + "00" * 32,
+            "timestamp": hex(int((number + 1_700_000_000) * self.block_time)),
+            "transactions": [],
+            "extraData": "0x",
+            "gasLimit": hex(30_000_000),
+            "gasUsed": "0x0",
+            "miner": "0x" + "00" * 20,
+        }
+
+    def handle(self, method: str, params: List[Any]) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """(result, error) for one JSON-RPC call."""
+        self.calls[method] += 1
+        if method == "web3_clientVersion":
+            return "stub-rpc/1.0", None
+        if method in ("eth_chainId", "net_version"):
+            return hex(self.chain_id) if method == "eth_chainId" else str(self.chain_id), None
+        if method == "eth_blockNumber":
+            return hex(self.head()), None
+        if method == "eth_getBlockByNumber":
+            tag = params[0] if params else "latest"
+            number = self.head() if tag in ("latest", "pending", "safe", "finalized") else int(tag, 16)
+            return self.block(number), None
+        if method == "eth_getBalance":
+            digest = hashlib.sha256(str(params[0]).lower().encode()).digest()
+            return hex(int.from_bytes(digest[:6], "big")), None
+        if method == "eth_gasPrice":
+            return hex(1_000_000_000), None
+        if method == "eth_getCode":
+            return "0x", None
+        if method == "eth_getTransactionCount":
+            return hex(len(self.sent)), None
+        if method == "eth_sendRawTransaction":
+            self.sent.append(params[0])
+            return "0x" + hashlib.sha256(str(params[0]).encode()).hexdigest(), None
+        if method == "eth_getLogs":
+            return [], None
+        return None, {"code": -32601, "message": f"method {method} not supported by the stub"}
+
+    def control(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        for key in ("lag", "latency", "down"):
+            if key in body:
+                setattr(self, key, type(getattr(self, key))(body[key]))
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"head": self.head(), "lag": self.lag, "latency": self.latency, "down": self.down,
+                "calls": dict(self.calls), "sent": len(self.sent)}
+
+    # ------------------------------ server --------------------------------
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on a background thread; returns the URL (``port=0`` picks a free port)."""
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name=f"stub-rpc-{port}", daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _handler(node: StubRpc) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *_: Any) -> None:  # keep the console quiet
+            pass
+
+        def _reply(self, status: int, payload: Any) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self) -> Any:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            if self.path.rstrip("/") == "/_stub":
+                self._reply(200, node.stats())
+            else:
+                self._reply(404, {"detail": "not found"})
+
+        def do_POST(self) -> None:  # pylint: disable=invalid-name
+            body = self._body()
+            if self.path.rstrip("/") == "/_stub":
+                self._reply(200, node.control(body))
+                return
+            if node.down:
+                self._reply(503, {"detail": "stub node is down"})
+                return
+            if node.latency:
+                time.sleep(node.latency)
+            requests = body if isinstance(body, list) else [body]
+            replies = []
+            for request in requests:
+                result, error = node.handle(request.get("method", ""), request.get("params") or [])
+                reply: Dict[str, Any] = {"jsonrpc": "2.0", "id": request.get("id")}
+                if error is not None:
+                    reply["error"] = error
+                else:
+                    reply["result"] = result
+                replies.append(reply)
+            self._reply(200, replies if isinstance(body, list) else replies[0])
+
+    return Handler
+
+
+def _floats(value: str, count: int) -> List[float]:
+    items = [float(v) for v in value.split(",") if v.strip()] or [0.0]
+    return (items + [items[-1]] * count)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=1, help="stub nodes on consecutive ports")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--lags", default="0", help="comma-separated head lag (blocks) per node")
+    parser.add_argument("--latencies", default="0", help="comma-separated delay (s) per node")
+    parser.add_argument("--chain-id", type=int, default=128123)
+    args = parser.parse_args()
+
+    lags = _floats(args.lags, args.nodes)
+    latencies = _floats(args.latencies, args.nodes)
+    nodes = []
+    for i in range(args.nodes):
+        node = StubRpc(lag=int(lags[i]), latency=latencies[i], chain_id=args.chain_id)
+        print(f"stub RPC node {i}: {node.serve(args.host, args.port + i)} lag={node.lag} latency={node.latency}")
+        nodes.append(node)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for node in nodes:
+            node.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""In-process simulator of the Mininet-WiFi gateway bridge for scale testing.
+
+Models thousands of authorities with per-authority latency, packet loss,
+churn and Byzantine non-responders behind the bridge HTTP contract, and
+drives the real :class:`~app.services.mesh_client.MeshClient` against them
+from JSON scenario files::
+
+    python -m simulator simulator/scenarios/scale_1000.json
+"""
+
+from simulator.harness import Harness, run_scenario
+from simulator.network import SimAuthority, SimNetwork
+from simulator.scenario import Scenario
+from simulator.transport import SimTransport
+
+__all__ = ["Harness", "Scenario", "SimAuthority", "SimNetwork", "SimTransport", "run_scenario"]
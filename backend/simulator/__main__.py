@@ -0,0 +1,53 @@
+"""Run a simulator scenario: ``python -m simulator <scenario.json> [--output report.json]``."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+import structlog
+
+from simulator.harness import run_scenario
+from simulator.scenario import Scenario
+
+
+def summary(report: dict) -> str:
+    lines = [f"scenario {report['scenario']['name']}: {report['scenario']['authorities']} authorities"]
+    for r in report["rounds"]:
+        d = r["discovery"]
+        line = f"  round {r['round']}: churned {r['churned']:>4}  discovery {d['ms']:8.1f} ms ({d['online']}/{d['authorities']} online)"
+        if "pings" in r:
+            p = r["pings"]
+            line += f"  pings {p['ok']}/{p['sent']} ok, {p['shed']} shed, p99 {p['latency_ms']['p99']} ms"
+        if "transfers" in r:
+            t = r["transfers"]
+            line += f"  transfers {t['quorum_reached']}/{t['sent']} quorum, p99 {t['latency_ms']['p99']} ms"
+        lines.append(line)
+    lines.append(f"  bridge requests {sum(report['bridge_requests'].values())}, 304s {report['not_modified']}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scale-test MeshClient against a simulated mesh")
+    parser.add_argument("scenario", nargs="?", help="scenario JSON file (defaults when omitted)")
+    parser.add_argument("--output", help="write the full JSON report here")
+    parser.add_argument("--verbose", action="store_true", help="keep MeshClient logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Thousands of expected ping failures would drown the summary
+        logging.disable(logging.CRITICAL)
+        structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+    scenario = Scenario.load(args.scenario) if args.scenario else Scenario()
+    report = asyncio.run(run_scenario(scenario))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    print(summary(report), file=sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
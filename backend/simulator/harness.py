@@ -0,0 +1,171 @@
+"""Scenario runner: drives a real MeshClient against a simulated mesh.
+
+Each round applies churn, then measures
+
+* discovery – a forced ``discover()`` (full download, or ``304`` when
+  nothing changed) and the number of authorities known afterwards;
+* pings – one ``ping()`` per discovered authority, all at once, the way
+  ``ping_all()`` issues them;
+* transfers – ``send_transfer()`` from random accounts, counting how many
+  reached their shard's quorum.
+
+Latencies are wall-clock milliseconds as seen by the caller; with
+``time_scale`` below 1 every simulated delay is shortened by that factor.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.rate_limit import ConcurrencyLimiter
+from app.services.mesh_client import MeshClient, MeshClientError, MeshClientOverloaded
+from app.services.topology import NetworkTopologyGraph
+from simulator.network import SimNetwork
+from simulator.scenario import Scenario
+from simulator.transport import SimTransport
+
+BRIDGE_URL = "http://sim-bridge"
+NATIVE_TOKEN = "0x0000000000000000000000000000000000000000"
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": round(ordered[-1], 2)}
+
+
+class Harness:
+    """Runs one scenario and collects per-round measurements."""
+
+    def __init__(self, scenario: Scenario) -> None:
+        self.scenario = scenario
+        self.network = SimNetwork(scenario)
+        self.transport = SimTransport(self.network)
+        self.client = MeshClient(
+            gateway_urls=[BRIDGE_URL],
+            topology=NetworkTopologyGraph(),
+            transport="http",
+            http_transport=self.transport,
+        )
+        limits = scenario.client
+        self.client.limiter = ConcurrencyLimiter(
+            limits["max_concurrency"], limits["max_queue"], limits["queue_timeout"]
+        )
+        self.rng = random.Random(scenario.seed + 1)
+        self.accounts = [f"0x{self.rng.getrandbits(160):040x}" for _ in range(scenario.workload["accounts"])]
+
+    async def run(self) -> Dict[str, Any]:
+        await self.client.start()
+        rounds = []
+        try:
+            for number in range(1, self.scenario.rounds + 1):
+                rounds.append(await self.run_round(number))
+        finally:
+            await self.client.close()
+        return {
+            "scenario": self.scenario.as_dict(),
+            "rounds": rounds,
+            "network": self.network.counters,
+            "bridge_requests": self.transport.requests,
+            "not_modified": self.transport.not_modified,
+        }
+
+    async def run_round(self, number: int) -> Dict[str, Any]:
+        flipped = self.network.churn() if number > 1 else 0
+        result: Dict[str, Any] = {"round": number, "churned": flipped}
+
+        started = time.perf_counter()
+        authorities = await self.client.discover(force=True)  # refreshes /shards too
+        result["discovery"] = {
+            "ms": round((time.perf_counter() - started) * 1000.0, 2),
+            "authorities": len(authorities),
+            "online": sum(1 for a in authorities if a["status"] == "online"),
+            "registry_version": self.client.registry.version,
+        }
+
+        if self.scenario.workload["pings"]:
+            result["pings"] = await self._pings([a["name"] for a in authorities])
+        if self.scenario.workload["transfers"]:
+            result["transfers"] = await self._transfers(number, self.scenario.workload["transfers"])
+        return result
+
+    async def _pings(self, names: List[str]) -> Dict[str, Any]:
+        latencies: List[float] = []
+        failed = shed = 0
+
+        async def one(name: str) -> None:
+            nonlocal failed, shed
+            started = time.perf_counter()
+            try:
+                reply = await self.client.ping(name)
+            except MeshClientOverloaded:
+                shed += 1
+                return
+            if reply.get("success"):
+                latencies.append((time.perf_counter() - started) * 1000.0)
+            else:
+                failed += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(n) for n in names))
+        return {
+            "sent": len(names),
+            "ok": len(latencies),
+            "failed": failed,
+            "shed": shed,
+            "wall_ms": round((time.perf_counter() - started) * 1000.0, 2),
+            "latency_ms": percentiles(latencies),
+        }
+
+    async def _transfers(self, number: int, count: int) -> Dict[str, Any]:
+        latencies: List[float] = []
+        no_quorum = failed = shed = 0
+
+        async def one(i: int) -> None:
+            nonlocal no_quorum, failed, shed
+            body = {
+                "sender": self.rng.choice(self.accounts),
+                "recipient": self.rng.choice(self.accounts),
+                "amount": 1,
+                "token_address": NATIVE_TOKEN,
+                "sequence_number": 1,
+                "order_id": f"sim-{number}-{i}",
+            }
+            started = time.perf_counter()
+            try:
+                reply = await self.client.send_transfer(body)
+            except MeshClientOverloaded:
+                shed += 1
+                return
+            except MeshClientError:
+                failed += 1
+                return
+            if reply.get("success"):
+                latencies.append((time.perf_counter() - started) * 1000.0)
+            else:
+                no_quorum += 1
+
+        await asyncio.gather(*(one(i) for i in range(count)))
+        return {
+            "sent": count,
+            "quorum_reached": len(latencies),
+            "no_quorum": no_quorum,
+            "failed": failed,
+            "shed": shed,
+            "latency_ms": percentiles(latencies),
+        }
+
+
+async def run_scenario(scenario: Scenario) -> Dict[str, Any]:
+    return await Harness(scenario).run()
+
+
+__all__ = ["Harness", "percentiles", "run_scenario"]
@@ -0,0 +1,200 @@
+"""Simulated gateway bridge: authorities, shards and their network behaviour.
+
+:class:`SimNetwork` answers the gateway bridge operations the way a
+Mininet-WiFi mesh would, with every authority call delayed by that
+authority's latency and subject to packet loss, churn and Byzantine
+behaviour. All waiting is ``asyncio.sleep``, so thousands of authorities are
+simulated concurrently in one process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.signature_verifier import quorum_size
+from simulator.scenario import Scenario
+
+Reply = Tuple[int, Any]  # (HTTP status, JSON body)
+
+
+class SimAuthority:
+    """One simulated authority node."""
+
+    __slots__ = ("name", "index", "shard", "position", "latency_ms", "online", "byzantine", "calls")
+
+    def __init__(self, name: str, index: int, shard: int, position: Dict[str, float], latency_ms: float) -> None:
+        self.name = name
+        self.index = index
+        self.shard = shard
+        self.position = position
+        self.latency_ms = latency_ms
+        self.online = True
+        self.byzantine: Optional[str] = None
+        self.calls = 0
+
+    def as_dict(self, committee: List[str]) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "ip": f"10.{self.index // 65536 % 256}.{self.index // 256 % 256}.{self.index % 256}",
+            "port": 8080,
+            # Byzantine nodes still claim to be online
+            "status": "online" if self.online else "offline",
+            "position": self.position,
+            "committee_members": committee,
+            "shard_id": f"shard{self.shard}",
+        }
+
+
+class SimNetwork:
+    """The simulated mesh behind one gateway bridge."""
+
+    def __init__(self, scenario: Scenario) -> None:
+        self.scenario = scenario
+        self.rng = random.Random(scenario.seed)
+        self.version = 0
+        self.authorities: Dict[str, SimAuthority] = {}
+        self.shards: List[List[SimAuthority]] = [[] for _ in range(scenario.shards)]
+        self.sequences: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {"calls": 0, "lost": 0, "timeouts": 0, "offline": 0, "rejected": 0}
+        self._snapshots: Dict[str, Tuple[int, bytes, str]] = {}  # path -> (version, body, etag)
+
+        latency = scenario.latency_ms
+        for i in range(scenario.authorities):
+            authority = SimAuthority(
+                f"auth{i + 1}",
+                i + 1,
+                i % scenario.shards,
+                {
+                    "x": round(self.rng.uniform(0, scenario.area), 3),
+                    "y": round(self.rng.uniform(0, scenario.area), 3),
+                    "z": 0.0,
+                },
+                self.rng.uniform(latency["min"], latency["max"]),
+            )
+            self.authorities[authority.name] = authority
+            self.shards[authority.shard].append(authority)
+
+        byzantine = self.rng.sample(
+            list(self.authorities.values()), int(scenario.authorities * scenario.byzantine["fraction"])
+        )
+        for authority in byzantine:
+            authority.byzantine = scenario.byzantine["mode"]
+
+    # ------------------------------ dynamics ------------------------------
+
+    def churn(self) -> int:
+        """Flip the online state of ``churn.rate`` of the authorities; returns flips."""
+        count = int(len(self.authorities) * self.scenario.churn["rate"])
+        for authority in self.rng.sample(list(self.authorities.values()), count):
+            authority.online = not authority.online
+        if count:
+            self.version += 1
+        return count
+
+    async def _sleep_ms(self, ms: float) -> None:
+        await asyncio.sleep(ms * self.scenario.time_scale / 1000.0)
+
+    async def call(self, authority: SimAuthority) -> Optional[bool]:
+        """One round trip to ``authority``: True (ok), False (rejected) or None (no answer)."""
+        authority.calls += 1
+        self.counters["calls"] += 1
+        timeout = self.scenario.authority_timeout_ms
+        if not authority.online:
+            self.counters["offline"] += 1
+            await self._sleep_ms(timeout)
+            return None
+        if authority.byzantine == "silent" or self.rng.random() < self.scenario.loss:
+            self.counters["lost" if authority.byzantine != "silent" else "timeouts"] += 1
+            await self._sleep_ms(timeout)
+            return None
+        latency = authority.latency_ms * self.rng.lognormvariate(0.0, self.scenario.latency_ms["jitter"])
+        if authority.byzantine == "slow":
+            latency *= 10
+        if latency > timeout:
+            self.counters["timeouts"] += 1
+            await self._sleep_ms(timeout)
+            return None
+        await self._sleep_ms(latency)
+        if authority.byzantine == "reject":
+            self.counters["rejected"] += 1
+            return False
+        return True
+
+    # ------------------------------ bridge ops ----------------------------
+
+    def snapshot(self, path: str) -> Tuple[bytes, str]:
+        """JSON body and ETag of ``/authorities`` or ``/shards`` (rebuilt on change)."""
+        cached = self._snapshots.get(path)
+        if cached is None or cached[0] != self.version:
+            if path == "/authorities":
+                payload: Dict[str, Any] = {
+                    "authorities": [
+                        a.as_dict([m.name for m in self.shards[a.shard] if m is not a])
+                        for a in self.authorities.values()
+                    ],
+                    "clients": [],
+                }
+            else:
+                payload = {
+                    "shards": [
+                        {"shard_id": f"shard{i}", "name": f"shard{i}", "authorities": [a.name for a in members]}
+                        for i, members in enumerate(self.shards)
+                    ]
+                }
+            body = json.dumps(payload, separators=(",", ":")).encode()
+            cached = (self.version, body, f'"{hashlib.sha1(body).hexdigest()}"')
+            self._snapshots[path] = cached
+        return cached[1], cached[2]
+
+    def shard_of(self, account: str) -> List[SimAuthority]:
+        digest = hashlib.sha256(account.lower().encode()).digest()
+        return self.shards[int.from_bytes(digest[:8], "big") % len(self.shards)]
+
+    async def transfer(self, body: Dict[str, Any]) -> Reply:
+        """Fan a transfer out to the sender's shard; answer once a quorum confirmed."""
+        members = self.shard_of(str(body.get("sender", "")))
+        needed = quorum_size(len(members))
+        confirmations = 0
+        for done in asyncio.as_completed([self.call(a) for a in members]):
+            if await done:
+                confirmations += 1
+                if confirmations >= needed:
+                    break
+        if confirmations >= needed:
+            sender = str(body.get("sender", "")).lower()
+            self.sequences[sender] = self.sequences.get(sender, 0) + 1
+        return 200, {
+            "success": confirmations >= needed,
+            "order_id": body.get("order_id"),
+            "confirmations": confirmations,
+            "quorum": needed,
+            "shard": f"shard{members[0].shard}",
+        }
+
+    async def authority_call(self, name: str, op: str) -> Reply:
+        authority = self.authorities.get(name)
+        if authority is None:
+            return 404, {"detail": "Unknown authority"}
+        answered = await self.call(authority)
+        if answered is None:
+            # The bridge itself is fine – it reports the authority's silence in the body
+            return 200, {"success": False, "authority": name, "error": "authority timeout"}
+        body: Dict[str, Any] = {"success": answered, "authority": name}
+        if op == "ping":
+            body["timestamp"] = time.time()
+        return 200, body
+
+    def health(self) -> Reply:
+        online = sum(1 for a in self.authorities.values() if a.online)
+        return 200, {"status": "healthy", "authorities": len(self.authorities), "online": online}
+
+    def account(self, address: str) -> Reply:
+        return 200, {"address": address, "sequence_number": self.sequences.get(address.lower(), 0), "balances": {}}
+
+
+__all__ = ["SimAuthority", "SimNetwork"]
@@ -0,0 +1,90 @@
+"""Scenario files for the mesh simulator.
+
+A scenario is a JSON document describing the simulated mesh and the workload
+the harness drives through :class:`~app.services.mesh_client.MeshClient`.
+Every key is optional; missing keys take the defaults below::
+
+    {
+      "name": "churn-1000",
+      "seed": 1,
+      "authorities": 1000,
+      "shards": 10,
+      "area": 1000.0,
+      "latency_ms": {"min": 5, "max": 80, "jitter": 0.3},
+      "loss": 0.01,
+      "authority_timeout_ms": 500,
+      "byzantine": {"fraction": 0.05, "mode": "silent"},
+      "churn": {"rate": 0.02},
+      "time_scale": 1.0,
+      "rounds": 5,
+      "workload": {"pings": true, "transfers": 200, "accounts": 500},
+      "client": {"max_concurrency": 256, "max_queue": 4096, "queue_timeout": 5.0}
+    }
+
+``byzantine.mode`` is ``silent`` (never answers, but is listed as online),
+``slow`` (answers ten times slower) or ``reject`` (answers ``success: false``).
+``churn.rate`` is the fraction of authorities whose online state flips at
+the start of each round. ``time_scale`` multiplies every simulated delay.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Union
+
+BYZANTINE_MODES = ("silent", "slow", "reject")
+
+DEFAULTS: Dict[str, Any] = {
+    "name": "default",
+    "seed": 1,
+    "authorities": 100,
+    "shards": 4,
+    "area": 1000.0,
+    "latency_ms": {"min": 5.0, "max": 80.0, "jitter": 0.3},
+    "loss": 0.0,
+    "authority_timeout_ms": 500.0,
+    "byzantine": {"fraction": 0.0, "mode": "silent"},
+    "churn": {"rate": 0.0},
+    "time_scale": 1.0,
+    "rounds": 3,
+    "workload": {"pings": True, "transfers": 50, "accounts": 100},
+    "client": {"max_concurrency": 256, "max_queue": 4096, "queue_timeout": 5.0},
+}
+
+
+class Scenario:
+    """Validated scenario settings (see the module docstring for the format)."""
+
+    __slots__ = tuple(DEFAULTS)
+
+    def __init__(self, data: Dict[str, Any] | None = None) -> None:
+        data = data or {}
+        unknown = set(data) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown scenario keys: {', '.join(sorted(unknown))}")
+        for key, default in DEFAULTS.items():
+            value = data.get(key, default)
+            if isinstance(default, dict):
+                value = {**default, **(value or {})}
+            setattr(self, key, value)
+
+        if self.authorities < 1 or self.shards < 1 or self.shards > self.authorities:
+            raise ValueError("Need at least one authority per shard")
+        if not 0.0 <= self.loss <= 1.0:
+            raise ValueError("loss must be within [0, 1]")
+        if self.byzantine["mode"] not in BYZANTINE_MODES:
+            raise ValueError(f"byzantine.mode must be one of {BYZANTINE_MODES}")
+        if not 0.0 <= self.byzantine["fraction"] <= 1.0 or not 0.0 <= self.churn["rate"] <= 1.0:
+            raise ValueError("byzantine.fraction and churn.rate must be within [0, 1]")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Scenario":
+        with open(path, encoding="utf-8") as fh:
+            return cls(json.load(fh))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in DEFAULTS}
+
+
+__all__ = ["BYZANTINE_MODES", "Scenario"]
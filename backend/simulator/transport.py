@@ -0,0 +1,74 @@
+"""httpx transport that serves the gateway bridge contract from a :class:`SimNetwork`.
+
+Plug it into :class:`~app.services.mesh_client.MeshClient` with
+``MeshClient(gateway_urls=["http://sim-bridge"], http_transport=SimTransport(net))``;
+requests never touch a socket or an ASGI app, so per-call overhead stays
+small even with thousands of simulated authorities.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict
+
+import httpx
+
+from simulator.network import Reply, SimNetwork
+
+_AUTHORITY_OP = re.compile(r"^/authorities/([^/]+)/(ping|transfer|confirmation)$")
+_WALLET_OP = re.compile(r"^/wallet/(balances|account)/.*$")
+
+
+class SimTransport(httpx.AsyncBaseTransport):
+    """Routes MeshClient requests to the simulated bridge."""
+
+    def __init__(self, network: SimNetwork) -> None:
+        self.network = network
+        self.requests: Dict[str, int] = {}
+        self.not_modified = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        method = request.method
+        key = f"{method} {_route_key(path)}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+        if method == "GET" and path in ("/authorities", "/shards"):
+            body, etag = self.network.snapshot(path)
+            if request.headers.get("if-none-match") == etag:
+                self.not_modified += 1
+                return httpx.Response(304, headers={"ETag": etag}, request=request)
+            return httpx.Response(
+                200, content=body, headers={"ETag": etag, "Content-Type": "application/json"}, request=request
+            )
+
+        status, payload = await self._route(method, path, request)
+        return httpx.Response(status, json=payload, request=request)
+
+    async def _route(self, method: str, path: str, request: httpx.Request) -> Reply:
+        if method == "GET" and path == "/health":
+            return self.network.health()
+        if method == "POST" and path == "/transfer":
+            return await self.network.transfer(_json(request))
+        match = _AUTHORITY_OP.match(path)
+        if method == "POST" and match:
+            return await self.network.authority_call(match.group(1), match.group(2))
+        if method == "GET" and path.startswith("/wallet/balances/"):
+            return 200, []
+        if method == "GET" and path.startswith("/wallet/account/"):
+            return self.network.account(path.rsplit("/", 1)[-1])
+        return 404, {"detail": "Not Found"}
+
+
+def _route_key(path: str) -> str:
+    """Path with the authority name / address replaced by a placeholder."""
+    path = _AUTHORITY_OP.sub(r"/authorities/{name}/\2", path)
+    return _WALLET_OP.sub(r"/wallet/\1/{address}", path)
+
+
+def _json(request: httpx.Request) -> Dict[str, Any]:
+    return json.loads(request.content or b"{}")
+
+
+__all__ = ["SimTransport"]
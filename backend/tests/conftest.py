@@ -0,0 +1,106 @@
+"""Shared fixtures: an in-memory chain the tests can fork, no network access.
+
+The service modules build their singletons (and connect to ``RPC_URL``) at
+import time, so the environment is pointed at unreachable local ports and a
+scratch data directory before anything from ``app`` is imported.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+_DATA = tempfile.mkdtemp(prefix="meshpay-tests-")
+os.environ.setdefault("RPC_URL", "http://127.0.0.1:1")
+os.environ.setdefault("MESH_BRIDGE_URL", "http://127.0.0.1:2")
+os.environ.setdefault("AGGREGATES_PATH", os.path.join(_DATA, "aggregates.db"))
+os.environ.setdefault("TRANSFER_JOURNAL_PATH", os.path.join(_DATA, "journal.db"))
+os.environ.setdefault("SNAPSHOT_DIR", os.path.join(_DATA, "snapshots"))
+os.environ.setdefault("CPU_EXECUTOR", "inline")
+
+import hashlib  # noqa: E402
+
+import pytest  # noqa: E402
+from eth_abi import encode  # noqa: E402
+from web3 import Web3  # noqa: E402
+
+from app.core.abi_codec import event_topic  # noqa: E402
+from app.services.blockchain_client import MeshPayABI  # noqa: E402
+
+CONTRACT = Web3.to_checksum_address("0x" + "4d" * 20)
+
+
+class _Eth:
+    def __init__(self, chain: "FakeChain") -> None:
+        self._chain = chain
+
+    @property
+    def block_number(self) -> int:
+        return len(self._chain.blocks) - 1
+
+    def get_block(self, number: int) -> Optional[Dict[str, Any]]:
+        blocks = self._chain.blocks
+        return blocks[number] if 0 <= number < len(blocks) else None
+
+    def get_logs(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        start, end = params["fromBlock"], min(params["toBlock"], self.block_number)
+        return [log for n in range(start, end + 1) for log in self._chain.logs.get(n, [])]
+
+
+class FakeChain:
+    """Stand-in for :class:`BlockchainClient`: a list of blocks plus MeshPay logs.
+
+    ``fork(at, length, tag)`` replaces every block above ``at`` with a new
+    branch whose hashes differ from the old one.
+    """
+
+    def __init__(self, length: int = 1) -> None:
+        self.blocks: List[Dict[str, Any]] = []
+        self.logs: Dict[int, List[Dict[str, Any]]] = {}
+        self.w3 = type("W3", (), {})()
+        self.w3.eth = _Eth(self)
+        self.meshpay_contract = Web3().eth.contract(address=CONTRACT, abi=MeshPayABI)
+        self.mine(length)
+
+    async def rpc(self, fn: Any, *args: Any) -> Any:
+        return fn(*args)
+
+    def mine(self, count: int = 1, tag: str = "a") -> None:
+        for _ in range(count):
+            number = len(self.blocks)
+            parent = self.blocks[-1]["hash"] if self.blocks else "0x" + "00" * 32
+            digest = hashlib.sha256(f"{tag}-{number}-{parent}".encode()).hexdigest()
+            self.blocks.append({
+                "number": number, "hash": "0x" + digest, "parentHash": parent, "timestamp": 1_700_000_000 + number,
+            })
+
+    def fork(self, at: int, length: int, tag: str) -> None:
+        del self.blocks[at + 1:]
+        for number in [n for n in self.logs if n > at]:
+            del self.logs[number]
+        self.mine(length, tag)
+
+    def emit(self, block: int, event: str, /, **args: Any) -> None:
+        """Append a MeshPay event log to ``block`` (ABI-encoded like a node returns it)."""
+        abi = next(e for e in MeshPayABI if e.get("type") == "event" and e["name"] == event)
+        indexed = [i for i in abi["inputs"] if i["indexed"]]
+        plain = [i for i in abi["inputs"] if not i["indexed"]]
+        topics = [Web3.to_bytes(hexstr=event_topic(abi))]
+        topics += [encode([i["type"]], [args[i["name"]]]) for i in indexed]
+        logs = self.logs.setdefault(block, [])
+        logs.append({
+            "address": CONTRACT,
+            "topics": topics,
+            "data": encode([i["type"] for i in plain], [args[i["name"]] for i in plain]),
+            "blockNumber": block,
+            "blockHash": Web3.to_bytes(hexstr=self.blocks[block]["hash"]),
+            "logIndex": len(logs),
+            "transactionIndex": 0,
+            "transactionHash": Web3.keccak(text=f"{self.blocks[block]['hash']}-{len(logs)}"),
+        })
+
+
+@pytest.fixture
+def chain() -> FakeChain:
+    return FakeChain()
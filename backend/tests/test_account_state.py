@@ -0,0 +1,128 @@
+"""Account deltas: versioned changes, kept balances on failed reads, warm restarts."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Iterable, Optional, Set
+
+from app.core.config import SUPPORTED_TOKENS
+from app.models.base import AccountInfo, TokenBalance
+from app.services.account_state import AccountStateStore
+
+ACCOUNT = "0x" + "ab" * 20
+XTZ = SUPPORTED_TOKENS["XTZ"]["address"]
+
+
+class _Chain:
+    def __init__(self) -> None:
+        self.balance = 5.0
+        self.failing: Set[str] = set()
+        self.reads = 0
+
+    def _balance(self, symbol: str) -> TokenBalance:
+        failed = symbol in self.failing
+        return TokenBalance(
+            token_symbol=symbol, token_address=SUPPORTED_TOKENS[symbol]["address"],
+            wallet_balance=None if failed else self.balance, meshpay_balance=0.0,
+            total_balance=0.0 if failed else self.balance, decimals=18,
+            errors={"wallet": "timeout"} if failed else None,
+        )
+
+    async def get_wallet_account(self, address: str) -> Optional[AccountInfo]:
+        self.reads += 1
+        return AccountInfo(
+            address=address, balances={XTZ: self._balance("XTZ")},
+            is_registered=True, registration_time=100, last_redeemed_sequence=2,
+        )
+
+    async def get_account_balances(self, address: str, symbols: Iterable[str]) -> Dict[str, TokenBalance]:
+        self.reads += 1
+        return {SUPPORTED_TOKENS[s]["address"]: self._balance(s) for s in symbols if s == "XTZ"}
+
+
+class _Mesh:
+    async def get_account_info(self, address: str) -> Dict[str, Any]:
+        return {"sequence_number": 7}
+
+
+def _store(chain: _Chain) -> AccountStateStore:
+    return AccountStateStore(chain, _Mesh(), max_accounts=10, max_age=3600)
+
+
+def test_an_up_to_date_client_gets_an_empty_delta_without_reads() -> None:
+    async def scenario() -> None:
+        chain = _Chain()
+        store = _store(chain)
+        first = await store.changes(ACCOUNT)
+        assert first["full"] and first["sequence_number"] == 7
+        assert first["balances"][XTZ]["total_balance"] == 5.0
+
+        delta = await store.changes(ACCOUNT, first["version"])
+        assert chain.reads == 1
+        assert delta == {
+            "address": first["address"], "version": first["version"], "since": first["version"],
+            "full": False, "balances": {},
+        }
+
+        store.record_transfer({"sender": ACCOUNT, "sequence_number": 8}, {"success": True})
+        delta = await store.changes(ACCOUNT, first["version"])
+        assert delta["sequence_number"] == 8 and "last_redeemed_sequence" not in delta
+        assert chain.reads == 1
+
+    asyncio.run(scenario())
+
+
+def test_a_failed_balance_read_keeps_the_last_good_value() -> None:
+    async def scenario() -> None:
+        chain = _Chain()
+        store = _store(chain)
+        since = (await store.changes(ACCOUNT))["version"]
+
+        chain.failing.add("XTZ")
+        store.mark_stale(ACCOUNT, XTZ)
+        delta = await store.changes(ACCOUNT, since)
+        assert delta["balances"] == {} and delta["version"] == since
+        state = await store.get(ACCOUNT)
+        assert state.balances[XTZ]["total_balance"] == 5.0
+        assert state.stale == {"XTZ"}  # retried on the next request
+
+        chain.failing.clear()
+        chain.balance = 6.0
+        delta = await store.changes(ACCOUNT, since)
+        assert delta["balances"][XTZ]["total_balance"] == 6.0
+        assert chain.reads == 4
+
+    asyncio.run(scenario())
+
+
+def test_deltas_stay_valid_after_a_restore() -> None:
+    async def before() -> Dict[str, Any]:
+        store = _store(_Chain())
+        await store.changes(ACCOUNT)
+        return store.snapshot()
+
+    data = asyncio.run(before())
+
+    async def after() -> None:
+        chain = _Chain()
+        store = _store(chain)
+        store.restore(data)
+        assert store.version >= data["version"]
+        delta = await store.changes(ACCOUNT, data["version"])
+        assert not delta["full"] and delta["balances"] == {}
+        assert chain.reads == 0  # served from the restored snapshot
+
+    asyncio.run(after())
+
+
+def test_a_since_before_the_first_load_gets_a_full_snapshot() -> None:
+    async def scenario() -> None:
+        store = _store(_Chain())
+        first = await store.changes(ACCOUNT)
+        base = (await store.get(ACCOUNT)).base_version
+        for since in (base - 1, first["version"] + 1):  # before the first load, from the future
+            delta = await store.changes(ACCOUNT, since)
+            assert delta["full"]
+            assert delta["last_redeemed_sequence"] == 2 and XTZ in delta["balances"]
+
+    asyncio.run(scenario())
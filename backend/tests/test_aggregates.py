@@ -0,0 +1,44 @@
+"""Aggregates never store an event without its block timestamp."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+from web3 import Web3
+
+from app.core.executor import CpuExecutor
+from app.services.account_state import AccountEventIndexer, AccountStateStore
+from app.services.aggregates import EVENT_COLUMNS, AddressAggregates
+from app.services.chain_follower import ChainFollower
+
+SENDER = Web3.to_checksum_address("0x" + "11" * 20)
+
+
+def test_failed_timestamp_read_leaves_the_range_to_retry(chain: Any, tmp_path: Any, monkeypatch: Any) -> None:
+    async def run() -> None:
+        follower = ChainFollower(chain, confirmations=2, window=16)
+        indexer = AccountEventIndexer(AccountStateStore(chain, mesh=None), chain, follower,
+                                      executor=CpuExecutor("inline", 0))
+        aggregates = AddressAggregates(chain, tmp_path / "aggregates.db", start_block=0)
+        aggregates.open()
+        indexer.subscribe(aggregates)
+        chain.mine(4)
+        chain.emit(3, "FundingCompleted", sender=SENDER, token=SENDER, amount=7, transactionIndex=0)
+        await follower.poll()
+
+        get_block = chain.w3.eth.get_block
+        monkeypatch.setattr(chain.w3.eth, "get_block", lambda n: None if n == 3 else get_block(n))
+        with pytest.raises(LookupError):
+            await indexer.sync_once()
+        assert aggregates.block is None
+
+        monkeypatch.setattr(chain.w3.eth, "get_block", get_block)
+        await indexer.sync_once()
+        assert aggregates.block == 4
+        rows = [row async for chunk in aggregates.iter_events() for row in chunk]
+        assert [row[EVENT_COLUMNS.index("timestamp")] for row in rows] == [chain.blocks[3]["timestamp"]]
+        aggregates.close()
+
+    asyncio.run(run())
@@ -0,0 +1,67 @@
+"""A malformed discovery entry is skipped; the rest of the refresh still applies."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services.authority_registry import AuthorityRegistry
+from app.services.mesh_client import MeshClient, MeshClientError
+
+
+def _authority(name: str, ip: str, **extra: Any) -> Dict[str, Any]:
+    return {"name": name, "ip": ip, "port": 9000, "status": "online", "position": {"x": 1, "y": 2}, **extra}
+
+
+def test_refresh_is_applied_as_a_diff() -> None:
+    registry = AuthorityRegistry()
+    registry.apply([_authority("a", "10.0.0.1"), _authority("b", "10.0.0.2")])
+    changes = registry.apply([_authority("a", "10.0.0.1", status="offline"), _authority("c", "10.0.0.2")])
+    assert (changes.added, changes.updated, changes.removed) == (("c",), ("a",), ("b",))
+    assert registry.get_by_ip("10.0.0.2").name == "c"  # IP handed over from a removed authority
+
+
+@pytest.mark.parametrize("bad", [
+    {"ip": "10.0.0.9"},
+    {"name": "", "ip": "10.0.0.9"},
+    {"name": "x", "port": "not-a-port"},
+    {"name": "x", "position": {"y": 1}},
+    "not-a-dict",
+])
+def test_malformed_entry_is_skipped(bad: Any) -> None:
+    registry = AuthorityRegistry()
+    registry.apply([_authority("a", "10.0.0.1"), _authority("b", "10.0.0.2")])
+
+    changes = registry.apply([_authority("a", "10.0.0.1", status="offline"), bad])
+
+    assert changes.updated == ("a",)
+    assert changes.removed == ("b",)
+    assert registry.names() == ["a"]
+
+
+def test_malformed_entry_for_a_known_authority_keeps_its_record() -> None:
+    registry = AuthorityRegistry()
+    registry.apply([_authority("a", "10.0.0.1"), _authority("b", "10.0.0.2")])
+    before = registry.get("b")
+
+    changes = registry.apply([_authority("a", "10.0.0.1", status="offline"), {"name": "b", "port": "x"}])
+
+    assert (changes.updated, changes.removed) == (("a",), ())
+    assert registry.get("b") is before
+    assert registry.get_by_ip("10.0.0.2").name == "b"
+
+
+def test_mesh_client_skips_a_malformed_push_and_refuses_a_broken_list() -> None:
+    client = MeshClient(gateway_urls=["http://gw-a"], transport="http")
+    gateway = client.gateways.get("http://gw-a")
+    client._on_gateway_event(gateway, {"event": "authorities", "data": {"authorities": [_authority("a", "10.0.0.1")]}})
+
+    client._on_gateway_event(gateway, {"event": "authority_updated", "data": {"name": "b", "port": "x"}})
+    assert client.registry.names() == ["a"]
+
+    good: List[Dict[str, Any]] = gateway.authorities
+    with pytest.raises(MeshClientError):
+        client._on_gateway_event(gateway, {"event": "authorities", "data": {"authorities": ["a"]}})
+    assert gateway.authorities is good
+    assert client.registry.names() == ["a"]
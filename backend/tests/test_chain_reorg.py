@@ -0,0 +1,83 @@
+"""A reorg seen by the chain follower rolls the indexer and the aggregates back."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Tuple
+
+from web3 import Web3
+
+from app.core.executor import CpuExecutor
+from app.services.account_state import AccountEventIndexer, AccountStateStore
+from app.services.aggregates import AddressAggregates
+from app.services.chain_follower import ChainFollower
+
+SENDER = Web3.to_checksum_address("0x" + "11" * 20)
+RECIPIENT = Web3.to_checksum_address("0x" + "22" * 20)
+TOKEN = Web3.to_checksum_address("0x" + "33" * 20)
+
+
+def _pipeline(chain: Any, tmp_path: Any, window: int) -> Tuple[ChainFollower, AccountEventIndexer, AddressAggregates]:
+    follower = ChainFollower(chain, confirmations=2, window=window)
+    store = AccountStateStore(chain, mesh=None)
+    indexer = AccountEventIndexer(store, chain, follower, executor=CpuExecutor("inline", 0))
+    aggregates = AddressAggregates(chain, tmp_path / "aggregates.db", start_block=0)
+    aggregates.open()
+    indexer.subscribe(aggregates)
+    follower.subscribe(indexer)
+    return follower, indexer, aggregates
+
+
+def _transfer(chain: Any, block: int, sequence: int) -> None:
+    chain.emit(block, "BalanceUpdated", sender=SENDER, recipient=RECIPIENT, token=TOKEN,
+               amount=5, sequenceNumber=sequence, orderId=f"order-{sequence}")
+
+
+async def _follow(follower: ChainFollower, indexer: AccountEventIndexer) -> Any:
+    common = await follower.poll()
+    await indexer.sync_once()
+    return common
+
+
+def test_reorg_within_window_rolls_back_aggregates(chain: Any, tmp_path: Any) -> None:
+    async def run() -> None:
+        follower, indexer, aggregates = _pipeline(chain, tmp_path, window=16)
+        chain.mine(5)
+        await _follow(follower, indexer)
+        chain.mine(3)
+        _transfer(chain, 6, 1)
+        _transfer(chain, 7, 2)
+        await _follow(follower, indexer)
+        assert (await aggregates.summary(SENDER))["tx_count"] == 2
+
+        chain.fork(at=5, length=4, tag="b")  # blocks 6.. replaced, no transfers
+        common = await _follow(follower, indexer)
+
+        assert common == 5
+        assert [follower.hash_of(n) for n in range(6, 10)] == [chain.blocks[n]["hash"] for n in range(6, 10)]
+        assert (await aggregates.summary(SENDER))["tx_count"] == 0
+        assert aggregates.block == indexer.synced_block == 9
+        aggregates.close()
+
+    asyncio.run(run())
+
+
+def test_reorg_behind_a_gap_larger_than_the_window_is_rolled_back(chain: Any, tmp_path: Any) -> None:
+    async def run() -> None:
+        follower, indexer, aggregates = _pipeline(chain, tmp_path, window=8)
+        chain.mine(15)  # head 15
+        _transfer(chain, 14, 1)
+        await _follow(follower, indexer)
+        assert (await aggregates.summary(SENDER))["tx_count"] == 1
+
+        # Blocks 14-15 replaced while the follower was not polling; the head jumps to 39
+        chain.fork(at=13, length=26, tag="b")
+        common = await _follow(follower, indexer)
+
+        assert common == 13
+        assert follower.head == 39
+        assert (await aggregates.summary(SENDER))["tx_count"] == 0
+        assert indexer.synced_block == 39
+        aggregates.close()
+
+    asyncio.run(run())
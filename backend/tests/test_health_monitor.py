@@ -0,0 +1,37 @@
+"""Readiness: answered from the monitor's snapshot, or checked inline when it is off."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict
+
+from app.services.health_monitor import HealthMonitor
+
+
+class _Mesh:
+    gateway_url = "http://gw-a"
+
+    async def get_health(self) -> Dict[str, Any]:
+        return {"status": "unhealthy", "gateways": [], "error": "unreachable"}
+
+
+class _Chain:
+    def __init__(self) -> None:
+        self.checks = 0
+
+    def health_check_sync(self, *, deep: bool = True) -> Dict[str, Any]:
+        self.checks += 1
+        return {"connected": True, "meshpay_contract": False, "deep": deep}
+
+
+def test_disabled_monitor_checks_inline_once_per_interval() -> None:
+    chain = _Chain()
+    monitor = HealthMonitor(_Mesh(), chain, interval=60.0, stale_after=120.0)  # type: ignore[arg-type]
+
+    async def run() -> None:
+        assert not monitor.is_ready()  # never started: no snapshot yet
+        assert await monitor.readiness()  # the mesh may be down, the chain is up
+        assert await monitor.readiness()
+
+    asyncio.run(run())
+    assert chain.checks == 1
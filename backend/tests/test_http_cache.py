@@ -0,0 +1,122 @@
+"""HTTP cache middleware: ETag/304, content-encoding choice and untouched pass-through."""
+
+from __future__ import annotations
+
+import gzip
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import http_cache
+from app.core.http_cache import HTTPCacheMiddleware, accepted_encodings, etag_matches
+
+ITEMS = {"items": [{"id": i, "name": f"authority-{i}"} for i in range(100)]}
+
+
+def _client(max_buffer: int = 1024) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(HTTPCacheMiddleware, paths=["/api/"], min_size=500, max_buffer=max_buffer)
+
+    @app.get("/api/items")
+    async def items() -> Any:
+        return ITEMS
+
+    @app.get("/api/small")
+    async def small() -> Any:
+        return {"ok": True}
+
+    @app.get("/api/missing")
+    async def missing() -> Any:
+        return JSONResponse({"detail": "gone"}, status_code=404)
+
+    @app.get("/api/export")
+    async def export() -> Any:
+        return StreamingResponse(iter([b"a,b\n"] * 400), headers={"Cache-Control": "no-store"})
+
+    @app.get("/api/stream")
+    async def stream() -> Any:
+        return StreamingResponse(iter([b"x" * 600] * 4))
+
+    @app.get("/health")
+    async def health() -> Any:
+        return ITEMS
+
+    return TestClient(app)
+
+
+def _get(client: TestClient, path: str, **headers: str) -> Any:
+    # Raw bodies: httpx would otherwise decode gzip transparently
+    with client.stream("GET", path, headers={"accept-encoding": "identity", **headers}) as response:
+        response.raw = b"".join(response.iter_raw())
+        return response
+
+
+def test_etag_answers_a_matching_if_none_match_with_304() -> None:
+    client = _client()
+    first = _get(client, "/api/items")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+
+    again = _get(client, "/api/items", **{"if-none-match": f'"other", {etag[2:]}'})
+    assert again.status_code == 304 and again.raw == b""
+    assert again.headers["etag"] == etag and "content-type" not in again.headers
+    assert _get(client, "/api/items", **{"if-none-match": '"other"'}).status_code == 200
+
+    # Errors are neither tagged nor compressed
+    assert "etag" not in _get(client, "/api/missing", **{"accept-encoding": "gzip"}).headers
+
+
+def test_gzip_is_used_above_the_size_threshold() -> None:
+    client = _client()
+    response = _get(client, "/api/items", **{"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(response.raw)
+    assert gzip.decompress(response.raw) == _get(client, "/api/items").raw
+    # The ETag does not depend on the encoding
+    assert response.headers["etag"] == _get(client, "/api/items").headers["etag"]
+
+    assert "content-encoding" not in _get(client, "/api/small", **{"accept-encoding": "gzip"}).headers
+    assert "content-encoding" not in _get(client, "/api/items", **{"accept-encoding": "gzip;q=0"}).headers
+
+
+def test_without_brotli_gzip_is_used(monkeypatch: Any) -> None:
+    client = _client()
+    monkeypatch.setattr(http_cache, "brotli", None)
+    assert _get(client, "/api/items", **{"accept-encoding": "br, gzip"}).headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in _get(client, "/api/items", **{"accept-encoding": "br"}).headers
+
+
+def test_brotli_is_preferred_when_installed(monkeypatch: Any) -> None:
+    brotli = pytest.importorskip("brotli")
+    client = _client()
+    monkeypatch.setattr(http_cache, "brotli", brotli)
+    response = _get(client, "/api/items", **{"accept-encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(response.raw) == _get(client, "/api/items").raw
+
+
+def test_no_store_and_oversized_streams_pass_through() -> None:
+    client = _client(max_buffer=1024)
+    export = _get(client, "/api/export", **{"accept-encoding": "gzip"})
+    assert export.raw == b"a,b\n" * 400
+    assert "etag" not in export.headers and "content-encoding" not in export.headers
+
+    stream = _get(client, "/api/stream", **{"accept-encoding": "gzip"})
+    assert stream.raw == b"x" * 2400
+    assert "etag" not in stream.headers and "content-encoding" not in stream.headers
+
+    # Within max_buffer the same stream is buffered, tagged and compressed
+    buffered = _get(_client(max_buffer=4096), "/api/stream", **{"accept-encoding": "gzip"})
+    assert "etag" in buffered.headers and gzip.decompress(buffered.raw) == b"x" * 2400
+
+    assert "etag" not in _get(client, "/health").headers  # outside the configured prefixes
+
+
+def test_header_parsing() -> None:
+    assert accepted_encodings("gzip;q=0.5, br , identity;q=x") == {"gzip": 0.5, "br": 1.0, "identity": 0.0}
+    assert etag_matches("*", 'W/"a"')
+    assert etag_matches('W/"a"', '"a"') and not etag_matches('"b"', 'W/"a"')
@@ -0,0 +1,147 @@
+"""Conditional discovery: a 304 reuses the registry, an ETag is kept only once applied."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pytest
+
+from app.services.mesh_client import MeshClient, MeshClientError
+
+GATEWAY = "http://gw-a"
+
+
+class _Bridge:
+    """``/authorities`` and ``/shards`` answering ``If-None-Match`` like the gateway bridge."""
+
+    def __init__(self) -> None:
+        self.snapshots: Dict[str, Any] = {}
+        self.etags: Dict[str, str] = {}
+        self.seen: List[Optional[str]] = []  # If-None-Match of every request
+
+    def set(self, path: str, body: Any, etag: str) -> None:
+        self.snapshots[path], self.etags[path] = body, etag
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path not in self.snapshots:
+            return httpx.Response(404, request=request)
+        self.seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == self.etags[path]:
+            return httpx.Response(304, request=request)
+        return httpx.Response(200, json=self.snapshots[path], headers={"ETag": self.etags[path]}, request=request)
+
+
+def _authorities(*names: str, port: Any = 9000) -> Dict[str, Any]:
+    return {"authorities": [{"name": n, "ip": f"10.0.0.{i}", "port": port, "status": "online"}
+                            for i, n in enumerate(names, 1)]}
+
+
+def _run(bridge: _Bridge, steps: Any) -> None:
+    async def run() -> None:
+        client = MeshClient(gateway_urls=[GATEWAY], transport="http", http_transport=httpx.MockTransport(bridge))
+        await client.start()
+        try:
+            await steps(client, client.gateways.get(GATEWAY))
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+
+def test_not_modified_keeps_the_registry() -> None:
+    bridge = _Bridge()
+    bridge.set("/authorities", _authorities("a", "b"), '"v1"')
+
+    async def steps(client: MeshClient, gateway: Any) -> None:
+        await client.discover(force=True)
+        version = client.registry.version
+        assert gateway.etags["/authorities"] == '"v1"'
+
+        assert [a["name"] for a in await client.discover(force=True)] == ["a", "b"]
+        assert bridge.seen == [None, '"v1"']
+        assert client.registry.version == version
+
+    _run(bridge, steps)
+
+
+def test_changed_snapshot_is_applied_and_its_etag_kept() -> None:
+    bridge = _Bridge()
+    bridge.set("/authorities", _authorities("a", "b"), '"v1"')
+
+    async def steps(client: MeshClient, gateway: Any) -> None:
+        await client.discover(force=True)
+        bridge.set("/authorities", _authorities("a", "c"), '"v2"')
+        assert [a["name"] for a in await client.discover(force=True)] == ["a", "c"]
+        assert gateway.etags["/authorities"] == '"v2"'
+
+    _run(bridge, steps)
+
+
+def test_malformed_entry_is_skipped_and_the_snapshot_applied() -> None:
+    bridge = _Bridge()
+    bridge.set("/authorities", _authorities("a", "b"), '"v1"')
+
+    async def steps(client: MeshClient, gateway: Any) -> None:
+        await client.discover(force=True)
+        snapshot = _authorities("a", "c")
+        snapshot["authorities"][1]["port"] = "x"
+        bridge.set("/authorities", snapshot, '"v2"')
+        assert [a["name"] for a in await client.discover(force=True)] == ["a"]
+        assert gateway.etags["/authorities"] == '"v2"'
+
+    _run(bridge, steps)
+
+
+def test_snapshot_that_fails_to_apply_keeps_the_old_etag() -> None:
+    bridge = _Bridge()
+    bridge.set("/authorities", _authorities("a", "b"), '"v1"')
+
+    async def steps(client: MeshClient, gateway: Any) -> None:
+        await client.discover(force=True)
+        bridge.set("/authorities", {"authorities": "a,c"}, '"v2"')
+        with pytest.raises(MeshClientError):
+            await client.discover(force=True)
+        assert gateway.etags["/authorities"] == '"v1"'
+        assert client.registry.names() == ["a", "b"]
+
+        # Fixed on the bridge: the next poll asks with the old ETag and gets the full list
+        bridge.set("/authorities", _authorities("a", "c"), '"v3"')
+        assert [a["name"] for a in await client.discover(force=True)] == ["a", "c"]
+        assert bridge.seen[-1] == '"v1"'
+
+    _run(bridge, steps)
+
+
+def test_shards_304_and_invalid_snapshot() -> None:
+    bridge = _Bridge()
+    bridge.set("/shards", {"shards": [{"name": "s1"}]}, '"s1"')
+
+    async def steps(client: MeshClient, gateway: Any) -> None:
+        assert [s["name"] for s in await client.get_shards()] == ["s1"]
+        assert [s["name"] for s in await client.get_shards()] == ["s1"]
+        assert bridge.seen == [None, '"s1"']
+
+        bridge.set("/shards", {"shards": ["s2"]}, '"s2"')
+        assert [s["name"] for s in await client.get_shards()] == ["s1"]
+        assert gateway.etags["/shards"] == '"s1"'
+
+    _run(bridge, steps)
+
+
+def test_discovery_refreshes_shard_owners() -> None:
+    bridge = _Bridge()
+    bridge.set("/authorities", _authorities("a"), '"v1"')
+    bridge.set("/shards", {"shards": [{"name": "s1", "accounts": ["0xAbC"]}]}, '"s1"')
+
+    async def steps(client: MeshClient, gateway: Any) -> None:
+        await client.discover(force=True)
+        assert client.gateways.shard_owner("0xabc") is gateway
+        assert client.gateways.shard_owner("0xdef") is None  # not listed: no guessed owner
+        await client.discover(force=True)
+        assert gateway.etags["/shards"] == '"s1"'
+        assert sorted(bridge.seen[-2:]) == ['"s1"', '"v1"']  # both conditional
+
+    _run(bridge, steps)
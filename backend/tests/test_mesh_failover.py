@@ -0,0 +1,145 @@
+"""Gateway failover: only requests that are safe to repeat reach a second bridge."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, List
+
+import httpx
+import pytest
+
+from app.services.mesh_client import MeshClient, MeshClientError, MeshClientOutcomeUnknown
+from app.services.mesh_transport import OutcomeUnknown
+
+GATEWAYS = ["http://gw-a", "http://gw-b"]
+
+
+def _client(fail: Callable[[httpx.Request], None], calls: List[str]) -> MeshClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(f"{request.method} {request.url.host}")
+        if request.url.host == "gw-a":
+            fail(request)
+            return httpx.Response(503, request=request)
+        return httpx.Response(200, json={"ok": True}, request=request)
+
+    return MeshClient(gateway_urls=GATEWAYS, transport="http", http_transport=httpx.MockTransport(handler))
+
+
+def _run(client: MeshClient, method: str, **kwargs: Any) -> httpx.Response:
+    async def run() -> httpx.Response:
+        await client.start()
+        try:
+            return await client._request(method, "/transfer", prefer=client.gateways.get("http://gw-a"), **kwargs)
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+def _connect_error(request: httpx.Request) -> None:
+    raise httpx.ConnectError("refused", request=request)
+
+
+def _read_timeout(request: httpx.Request) -> None:
+    raise httpx.ReadTimeout("no reply", request=request)
+
+
+def _server_error(request: httpx.Request) -> None:
+    del request
+
+
+@pytest.mark.parametrize("fail", [_connect_error, _read_timeout, _server_error])
+def test_get_fails_over_on_any_gateway_error(fail: Callable[[httpx.Request], None]) -> None:
+    calls: List[str] = []
+    resp = _run(_client(fail, calls), "GET")
+    assert resp.status_code == 200
+    assert calls == ["GET gw-a", "GET gw-b"]
+
+
+def test_post_fails_over_when_nothing_was_sent() -> None:
+    calls: List[str] = []
+    resp = _run(_client(_connect_error, calls), "POST", json={"amount": 1})
+    assert resp.status_code == 200
+    assert calls == ["POST gw-a", "POST gw-b"]
+
+
+def test_post_that_may_have_been_delivered_is_not_repeated() -> None:
+    calls: List[str] = []
+    with pytest.raises(httpx.ReadTimeout):
+        _run(_client(_read_timeout, calls), "POST", json={"amount": 1})
+    assert calls == ["POST gw-a"]
+
+    calls.clear()
+    client = _client(_server_error, calls)
+    assert _run(client, "POST", json={"amount": 1}).status_code == 503
+    assert calls == ["POST gw-a"]
+    assert not client.gateways.get("http://gw-a").healthy
+
+
+@pytest.mark.parametrize("fail, error", [
+    (_read_timeout, MeshClientOutcomeUnknown),
+    (_server_error, MeshClientOutcomeUnknown),
+    (_connect_error, MeshClientError),
+])
+def test_transfer_reports_whether_its_outcome_is_unknown(fail: Callable[[httpx.Request], None], error: type) -> None:
+    seen: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        fail(request)
+        return httpx.Response(503, request=request)
+
+    client = MeshClient(gateway_urls=GATEWAYS[:1], transport="http", http_transport=httpx.MockTransport(handler))
+    body = {"sender": "0x" + "22" * 20, "recipient": "0x" + "33" * 20, "token_address": "0x" + "00" * 20,
+            "amount": 1, "timestamp": 1700000000.0}
+
+    async def run() -> None:
+        await client.start()
+        try:
+            await client.send_transfer(body, idempotency_key="42")
+        finally:
+            await client.close()
+
+    with pytest.raises(error) as raised:
+        asyncio.run(run())
+    assert isinstance(raised.value, MeshClientOutcomeUnknown) == (error is MeshClientOutcomeUnknown)
+    assert seen[0].headers["idempotency-key"] == "42"
+    assert json.loads(seen[0].content)["timestamp"] == 1700000000.0
+
+
+def test_stub_shards_are_listed_by_name() -> None:
+    client = MeshClient(gateway_urls=GATEWAYS, transport="http")
+    gateway = client.gateways.get("http://gw-a")
+    shards: List[Dict[str, Any]] = [{"name": "shard-1"}, {"shard_id": "s2"}]
+    client.gateways.update_shards(gateway, shards)
+    assert gateway.as_dict()["shards"] == ["shard-1", "s2"]
+
+
+def test_post_in_flight_on_a_dropped_link_is_not_repeated() -> None:
+    websockets = pytest.importorskip("websockets")
+    received: List[str] = []
+
+    async def dropping(ws: Any) -> None:
+        async for raw in ws:
+            received.append(f"a {raw}")
+            await ws.close()  # frame read, reply never sent
+
+    async def answering(ws: Any) -> None:
+        async for raw in ws:
+            received.append(f"b {raw}")
+            await ws.send('{"id": %d, "status": 200, "body": {}}' % json.loads(raw)["id"])
+
+    async def run() -> None:
+        async with websockets.serve(dropping, "127.0.0.1", 0) as a, websockets.serve(answering, "127.0.0.1", 0) as b:
+            urls = [f"http://127.0.0.1:{s.sockets[0].getsockname()[1]}" for s in (a, b)]
+            client = MeshClient(gateway_urls=urls, transport="ws")
+            await client.start()
+            try:
+                with pytest.raises(OutcomeUnknown):
+                    await client._request("POST", "/transfer", json={"amount": 1}, prefer=client.gateways.get(urls[0]))
+            finally:
+                await client.close()
+
+    asyncio.run(run())
+    assert len(received) == 1 and received[0].startswith("a ")
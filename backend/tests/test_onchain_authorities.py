@@ -0,0 +1,78 @@
+"""The on-chain authority mirror only applies confirmed blocks and reloads after a deep reorg."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+from web3 import Web3
+
+from app.core.executor import CpuExecutor
+from app.services.chain_follower import ChainFollower
+from app.services.onchain_authorities import OnchainAuthoritySet
+
+AUTHORITY = Web3.to_checksum_address("0x" + "aa" * 20)
+
+
+def _mirror(chain: Any) -> OnchainAuthoritySet:
+    mirror = OnchainAuthoritySet(chain, confirmations=2, executor=CpuExecutor("inline", 0))
+    mirror.restore({"synced_block": 0, "authorities": []})
+    return mirror
+
+
+def test_events_inside_the_confirmation_depth_wait(chain: Any) -> None:
+    chain.mine(5)  # head 5
+    chain.emit(4, "AuthorityAdded", authority=AUTHORITY, name="auth-1", timestamp=1)
+    mirror = _mirror(chain)
+
+    asyncio.run(mirror.sync_once())
+    assert mirror.synced_block == 3
+    assert not mirror.is_authority(AUTHORITY)
+
+    chain.mine(1)
+    asyncio.run(mirror.sync_once())
+    assert mirror.synced_block == 4
+    assert mirror.is_authority(AUTHORITY)
+
+
+def test_reorg_past_the_synced_block_triggers_a_reload(chain: Any) -> None:
+    async def run() -> None:
+        chain.mine(9)  # head 9
+        mirror = _mirror(chain)
+        follower = ChainFollower(chain, confirmations=2, window=16)
+        follower.subscribe(mirror)
+        await follower.poll()
+        await mirror.sync_once()
+        assert mirror.synced_block == 7
+
+        chain.fork(at=8, length=2, tag="b")  # above the synced block: nothing to undo
+        assert await follower.poll() == 8
+        assert mirror.loaded
+
+        chain.fork(at=5, length=6, tag="c")
+        assert await follower.poll() == 5
+        assert not mirror.loaded  # reloaded from the views on the next pass
+
+    asyncio.run(run())
+
+
+def test_chunks_applied_before_a_failing_chunk_are_indexed(chain: Any) -> None:
+    chain.mine(6)  # head 6, confirmed 4
+    chain.emit(2, "AuthorityAdded", authority=AUTHORITY, name="auth-1", timestamp=1)
+    mirror = OnchainAuthoritySet(chain, confirmations=2, log_chunk=2, executor=CpuExecutor("inline", 0))
+    mirror.restore({"synced_block": 0, "authorities": []})
+    get_logs = chain.w3.eth.get_logs
+
+    def flaky(params: Any) -> Any:
+        if params["fromBlock"] > 2:
+            raise ConnectionError("node dropped the request")
+        return get_logs(params)
+
+    chain.w3.eth.get_logs = flaky
+    version = mirror.version
+    with pytest.raises(ConnectionError):
+        asyncio.run(mirror.sync_once())
+    assert mirror.synced_block == 2
+    assert mirror.is_authority(AUTHORITY)
+    assert mirror.version == version + 1
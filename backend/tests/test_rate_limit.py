@@ -0,0 +1,82 @@
+"""Rate limiting: survives a failing shared store and keys clients behind proxies."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, List, Optional, Tuple
+
+from app.core.rate_limit import InMemoryBucketStore, RateLimitMiddleware
+
+
+class _BrokenStore:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        self.calls += 1
+        raise ConnectionError("redis down")
+
+
+async def _app(scope: Any, receive: Any, send: Any) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _scope(peer: str, forwarded: Optional[str] = None, *, path: str = "/api/v1/ping", method: str = "GET") -> dict:
+    headers: List[Tuple[bytes, bytes]] = []
+    if forwarded is not None:
+        headers.append((b"x-forwarded-for", forwarded.encode()))
+    return {"type": "http", "method": method, "path": path, "client": (peer, 40000), "headers": headers}
+
+
+def _status(middleware: RateLimitMiddleware, scope: dict) -> int:
+    sent: List[dict] = []
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    asyncio.run(middleware(scope, None, send))
+    return sent[0]["status"]
+
+
+def test_failing_store_falls_back_to_in_memory_buckets() -> None:
+    store = _BrokenStore()
+    middleware = RateLimitMiddleware(_app, store=store, capacity=2, per_minute=1)
+    statuses = [_status(middleware, _scope("203.0.113.7")) for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    assert store.calls == 1  # not retried until STORE_RETRY_AFTER has passed
+
+
+def test_forwarded_client_is_honoured_only_from_trusted_proxies() -> None:
+    middleware = RateLimitMiddleware(
+        _app, store=_BrokenStore(), capacity=1, per_minute=1, trusted_proxies=["10.0.0.0/8"]
+    )
+    # Spoofed left-most entry is ignored; the right-most untrusted hop is the client
+    assert middleware.client_key(_scope("10.0.0.2", "1.1.1.1, 198.51.100.4, 10.0.0.9")) == "198.51.100.4"
+    # An untrusted peer cannot pick its own key
+    assert middleware.client_key(_scope("198.51.100.4", "1.1.1.1")) == "198.51.100.4"
+    assert middleware.client_key(_scope("10.0.0.2")) == "10.0.0.2"
+
+
+def test_route_refusal_does_not_drain_the_client_budget() -> None:
+    middleware = RateLimitMiddleware(
+        _app, store=InMemoryBucketStore(), capacity=3, per_minute=1,
+        route_limits={"/api/authorities/{name}/ping": 1},
+    )
+    ping = _scope("203.0.113.7", path="/api/authorities/a1/ping")
+    assert [_status(middleware, ping) for _ in range(3)] == [200, 429, 429]
+    # Only the accepted ping cost a client token
+    assert [_status(middleware, _scope("203.0.113.7", path="/api/x")) for _ in range(3)] == [200, 200, 429]
+
+
+def test_preflights_are_not_counted() -> None:
+    middleware = RateLimitMiddleware(_app, store=InMemoryBucketStore(), capacity=1, per_minute=1)
+    assert [_status(middleware, _scope("203.0.113.7", method="OPTIONS")) for _ in range(3)] == [200, 200, 200]
+    assert _status(middleware, _scope("203.0.113.7")) == 200
+
+
+def test_cors_wraps_the_rate_limiter() -> None:
+    from app.main import app  # pylint: disable=import-outside-toplevel
+
+    order = [m.cls.__name__ for m in app.user_middleware]  # outermost first
+    assert order.index("CORSMiddleware") < order.index("RateLimitMiddleware")
@@ -0,0 +1,58 @@
+"""RPC routing: log reads never go to a node that has not reached their range."""
+
+from __future__ import annotations
+
+from typing import Any, List
+
+import pytest
+
+from app.services.rpc_pool import EndpointBehind, RpcPool
+
+
+class _Node:
+    def __init__(self, head: int) -> None:
+        self.head = head
+        self.calls: List[str] = []
+
+    def make_request(self, method: str, params: Any) -> Any:
+        self.calls.append(method)
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(self.head)}
+        return {"jsonrpc": "2.0", "id": 1, "result": []}
+
+    def close(self) -> None:
+        pass
+
+
+def _pool(*heads: int) -> RpcPool:
+    pool = RpcPool([f"http://node-{i}" for i in range(len(heads))], max_lag=3)
+    for latency, (endpoint, head) in enumerate(zip(pool.endpoints, heads)):
+        endpoint.provider = _Node(head)
+        endpoint.block = head
+        endpoint.latency_ms = float(latency)
+    return pool
+
+
+def _get_logs(to_block: int) -> List[Any]:
+    return [{"fromBlock": hex(to_block - 5), "toBlock": hex(to_block)}]
+
+
+def test_log_read_skips_an_in_sync_node_behind_to_block() -> None:
+    pool = _pool(98, 100)  # node-0 is fastest and within max_lag, but behind
+    pool.request("eth_getLogs", _get_logs(100))
+    assert pool.endpoints[0].provider.calls == []
+    assert pool.endpoints[1].provider.calls == ["eth_getLogs"]
+
+
+def test_stale_head_is_rechecked_before_it_is_skipped() -> None:
+    pool = _pool(98, 99)
+    pool.endpoints[0].provider.head = 101  # caught up since the last probe
+    pool.request("eth_getLogs", _get_logs(100))
+    assert pool.endpoints[0].provider.calls == ["eth_blockNumber", "eth_getLogs"]
+
+
+def test_log_read_fails_when_no_node_has_the_range() -> None:
+    pool = _pool(98, 99)
+    with pytest.raises(EndpointBehind):
+        pool.request("eth_getLogs", _get_logs(100))
+    assert all("eth_getLogs" not in e.provider.calls for e in pool.endpoints)
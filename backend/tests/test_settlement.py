@@ -0,0 +1,185 @@
+"""Settlement: batched redemption, cached gas, quorum checks and the shutdown drain."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from app.core.abi_codec import certificate_hash
+from app.services.settlement import FAILED, QUEUED, SETTLED, SKIPPED, SUBMITTED, SettlementPipeline
+from app.services.tx_pipeline import PendingTx
+
+SENDER_A = "0x" + "aa" * 20
+SENDER_B = "0x" + "bb" * 20
+RECIPIENT = "0x" + "cc" * 20
+NATIVE = "0x" + "00" * 20
+TOKEN = "0x" + "dd" * 20
+
+
+def _cert(sender: str, seq: int, token: str = NATIVE) -> Dict[str, Any]:
+    return {"sender": sender, "recipient": RECIPIENT, "token": token, "amount": 10, "sequence_number": seq}
+
+
+class _Call:
+    def __init__(self, contract: "_Contract", name: str, args: tuple) -> None:
+        self.contract, self.name, self.args = contract, name, args
+
+    def call(self) -> Any:
+        return self.contract.views[self.name](*self.args)
+
+    def estimate_gas(self, tx: Dict[str, Any]) -> int:
+        self.contract.estimates += 1
+        return 100_000
+
+
+class _Contract:
+    def __init__(self, last_redeemed: Optional[Dict[str, int]] = None, redeemed: frozenset = frozenset()) -> None:
+        last_redeemed = {k.lower(): v for k, v in (last_redeemed or {}).items()}
+        self.estimates = 0
+        self.views = {
+            "getLastRedeemedSequence": lambda sender: last_redeemed.get(sender.lower(), 0),
+            "isCertificateRedeemed": lambda h: "0x" + h.hex() in redeemed,
+        }
+        self.functions = self
+
+    def __getattr__(self, name: str) -> Any:
+        return lambda *args: _Call(self, name, args)
+
+
+class _Txs:
+    def __init__(self, block: bool = False) -> None:
+        self.sent: List[tuple] = []
+        self.nonces = SimpleNamespace(next=0)
+        self.block = block
+
+    async def send_call(self, call: _Call, gas: int, value: int = 0) -> PendingTx:
+        if self.block:
+            await asyncio.Event().wait()
+        (cert, _), = call.args
+        self.sent.append((cert[0], cert[4], gas))
+        tx = PendingTx(len(self.sent) - 1, f"0x{len(self.sent):064x}", b"")
+        self.nonces.next = len(self.sent)
+        return tx
+
+
+class _Chain:
+    def __init__(self, contract: _Contract) -> None:
+        self.account = SimpleNamespace(address="0x" + "ee" * 20)
+        self.meshpay_contract = contract
+
+    async def rpc(self, fn: Any, *args: Any) -> Any:
+        return fn(*args)
+
+
+def _pipeline(contract: _Contract, txs: _Txs, batch_size: int = 2) -> SettlementPipeline:
+    return SettlementPipeline(_Chain(contract), txs, batch_size=batch_size, interval=60)
+
+
+def test_batches_are_filtered_and_sent_in_sequence_order() -> None:
+    async def scenario() -> None:
+        done = _cert(SENDER_B, 7)
+        pipeline = _pipeline(_Contract({SENDER_A: 1}, redeemed=frozenset({certificate_hash(done)})), _Txs())
+
+        stale = pipeline.submit(_cert(SENDER_A, 1))
+        a3, a2 = pipeline.submit(_cert(SENDER_A, 3)), pipeline.submit(_cert(SENDER_A, 2))
+        settled = pipeline.submit(done)
+
+        assert await pipeline.flush() == 1  # first batch: stale a1, then a3
+        assert await pipeline.flush() == 1  # second batch: a2, then the redeemed certificate
+        assert await pipeline.flush() == 0
+        assert [seq for _, seq, _ in pipeline.txs.sent] == [3, 2]
+        assert pipeline.status(stale)["status"] == SKIPPED
+        assert pipeline.status(settled)["status"] == SETTLED
+        assert pipeline.status(settled)["reason"] == "already redeemed"
+        assert pipeline.status(a2)["status"] == pipeline.status(a3)["status"] == SUBMITTED
+
+        # Within one batch, certificates go out by sender and sequence number
+        pipeline.batch_size = 3
+        for seq in (9, 10, 8):
+            pipeline.submit(_cert(SENDER_A, seq))
+        assert await pipeline.flush() == 3
+        assert [seq for _, seq, _ in pipeline.txs.sent[2:]] == [8, 9, 10]
+
+    asyncio.run(scenario())
+
+
+def test_gas_is_estimated_once_per_token_kind_until_a_revert() -> None:
+    async def scenario() -> None:
+        contract = _Contract()
+        pipeline = _pipeline(contract, _Txs(), batch_size=10)
+        for seq in range(1, 4):
+            pipeline.submit(_cert(SENDER_A, seq))
+            pipeline.submit(_cert(SENDER_B, seq, token=TOKEN))
+        assert await pipeline.flush() == 6
+        assert contract.estimates == 2  # one native, one ERC-20
+        assert {gas for _, _, gas in pipeline.txs.sent} == {120_000}
+
+        (tx_hash, reverted), (ok_tx, ok) = list(pipeline._inflight.items())[:2]
+        pending = {h: PendingTx(0, h, b"") for h in (tx_hash, ok_tx)}
+        pending[tx_hash].receipt.set_result({"status": 0, "blockNumber": 5})
+        pending[ok_tx].receipt.set_result({"status": 1, "blockNumber": 5})
+        for tx in pending.values():
+            pipeline._on_receipt(tx, tx.receipt)
+        assert pipeline.status(reverted)["status"] == FAILED
+        assert pipeline.status(ok)["status"] == SETTLED and pipeline.status(ok)["block"] == 5
+
+        pipeline.submit(_cert(SENDER_A, 4))  # the revert dropped the cached estimates
+        await pipeline.flush()
+        assert contract.estimates == 3
+
+    asyncio.run(scenario())
+
+
+def test_queued_certificates_survive_the_drain_timeout() -> None:
+    async def scenario() -> Dict[str, Any]:
+        pipeline = _pipeline(_Contract(), _Txs(block=True))
+        first, second = pipeline.submit(_cert(SENDER_A, 1)), pipeline.submit(_cert(SENDER_A, 2))
+        await pipeline.start()
+        await pipeline.stop(timeout=0.05)
+        assert list(pipeline._queue) == [first, second]
+        return pipeline.snapshot()
+
+    data = asyncio.run(scenario())
+
+    async def restart() -> None:
+        txs = _Txs()
+        pipeline = _pipeline(_Contract(), txs)
+        pipeline.restore(data)
+        assert [pipeline.status(h)["status"] for h, _ in data["queue"]] == [QUEUED, QUEUED]
+        assert await pipeline.flush() == 2
+        assert [seq for _, seq, _ in txs.sent] == [1, 2]
+
+    asyncio.run(restart())
+
+
+def test_certificates_without_quorum_are_not_queued(monkeypatch: Any) -> None:
+    from fastapi.testclient import TestClient  # pylint: disable=import-outside-toplevel
+
+    from app.api.endpoints import settlement as endpoint  # pylint: disable=import-outside-toplevel
+    from app.main import app  # pylint: disable=import-outside-toplevel
+
+    pipeline = _pipeline(_Contract(), _Txs(), batch_size=10)
+    verdicts: List[bool] = []
+
+    async def validate(items: List[tuple]) -> List[Dict[str, Any]]:
+        return [{"certificate_hash": h, "valid": ok} for (h, _), ok in zip(items, verdicts)]
+
+    monkeypatch.setattr(endpoint, "settlement_pipeline", pipeline)
+    monkeypatch.setattr(endpoint.signature_verifier, "validate_certificates", validate)
+    monkeypatch.setattr(endpoint.settings, "settlement_require_quorum", True)
+    client = TestClient(app)
+    body = [_cert(SENDER_A, 1), _cert(SENDER_A, 2)]
+
+    verdicts[:] = [False, True]
+    response = client.post("/api/settlement/certificates", json=body)
+    assert response.status_code == 202
+    accepted, = response.json()["certificate_hashes"]
+    rejected, = response.json()["rejected"]
+    assert list(pipeline._queue) == [accepted] and rejected["certificate_hash"] != accepted
+
+    verdicts[:] = [False, False]
+    response = client.post("/api/settlement/certificates", json=[_cert(SENDER_B, 1), _cert(SENDER_B, 2)])
+    assert response.status_code == 422
+    assert response.json()["detail"]["message"] == "No certificate reached quorum"
+    assert list(pipeline._queue) == [accepted]
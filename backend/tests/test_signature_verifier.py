@@ -0,0 +1,84 @@
+"""Certificate quorum: distinct, active authorities signing the certificate hash."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, List
+
+import pytest
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from app.core.executor import CpuExecutor
+from app.services.onchain_authorities import OnchainAuthoritySet
+from app.services.signature_verifier import SignatureVerifier, quorum_size
+
+KEYS = [Account.from_key(bytes([i]) * 32) for i in range(1, 6)]
+CERT = "0x" + "12" * 32
+OTHER = "0x" + "34" * 32
+
+
+def _sign(account: Any, cert_hash: str = CERT) -> str:
+    signed = account.sign_message(encode_defunct(primitive=bytes.fromhex(cert_hash[2:])))
+    return "0x" + signed.signature.hex().removeprefix("0x")
+
+
+def _verifier() -> SignatureVerifier:
+    """Authorities 0-3 active (n=4), authority 4 deactivated."""
+    authorities = OnchainAuthoritySet(None, executor=CpuExecutor("inline", 0))
+    authorities.restore({"synced_block": 1, "authorities": [
+        {"address": key.address, "name": f"auth-{i}", "active": i != 4, "registered_at": 0}
+        for i, key in enumerate(KEYS)
+    ]})
+    return SignatureVerifier(authorities, CpuExecutor("inline", 0), batch_size=2, cache_size=100)
+
+
+@pytest.mark.parametrize("n, needed", [(0, 0), (1, 1), (3, 3), (4, 3), (5, 4), (7, 5), (10, 7)])
+def test_quorum_size_tolerates_a_third_faulty(n: int, needed: int) -> None:
+    assert quorum_size(n) == needed
+
+
+def test_four_authorities_need_three_distinct_signers() -> None:
+    verifier = _verifier()
+    two = [_sign(KEYS[0]), _sign(KEYS[1])]
+    three = two + [_sign(KEYS[2])]
+    results = asyncio.run(verifier.validate_certificates([(CERT, two), (CERT, three)]))
+    assert [r["valid"] for r in results] == [False, True]
+    assert results[1]["signers"] == ["auth-0", "auth-1", "auth-2"]
+    assert results[1]["quorum"] == 3
+
+
+def test_repeated_signatures_of_one_authority_count_once() -> None:
+    verifier = _verifier()
+    sigs = [_sign(KEYS[0]), _sign(KEYS[0]), _sign(KEYS[1]), _sign(KEYS[1])]
+    result, = asyncio.run(verifier.validate_certificates([(CERT, sigs)]))
+    assert not result["valid"]
+    assert result["signers"] == ["auth-0", "auth-1"]
+    assert result["rejected_signatures"] == []
+    assert verifier.misses == 2  # the repeated pairs were recovered once
+
+
+def test_deactivated_and_unknown_signers_are_rejected() -> None:
+    verifier = _verifier()
+    outsider = Account.from_key(b"\x09" * 32)
+    sigs = [_sign(KEYS[0]), _sign(KEYS[1]), _sign(KEYS[4]), _sign(outsider), "0xdead"]
+    result, = asyncio.run(verifier.validate_certificates([(CERT, sigs)]))
+    assert not result["valid"]
+    assert result["rejected_signatures"] == [2, 3, 4]
+
+    # A signature over another certificate recovers to some other address
+    result, = asyncio.run(verifier.validate_certificates([(CERT, [_sign(k, OTHER) for k in KEYS[:3]])]))
+    assert not result["valid"] and result["rejected_signatures"] == [0, 1, 2]
+
+
+def test_deactivation_applies_to_cached_recoveries() -> None:
+    verifier = _verifier()
+    sigs: List[str] = [_sign(k) for k in KEYS[:3]]
+    assert asyncio.run(verifier.validate_certificates([(CERT, sigs)]))[0]["valid"]
+
+    verifier.authorities.restore({"synced_block": 2, "authorities": [
+        {**a, "active": a["active"] and a["name"] != "auth-2"} for a in verifier.authorities.as_dicts()
+    ]})
+    result, = asyncio.run(verifier.validate_certificates([(CERT, sigs)]))
+    assert verifier.hits == 3  # no new ECDSA work
+    assert not result["valid"] and result["rejected_signatures"] == [2]
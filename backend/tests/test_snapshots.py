@@ -0,0 +1,168 @@
+"""Snapshots: only matching, fresh files are restored, and restarts resume where they stopped."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, Tuple
+
+import pytest
+from web3 import Web3
+
+from app.core import snapshots
+from app.core.executor import CpuExecutor
+from app.core.snapshots import SnapshotStore
+from app.services.account_state import AccountEventIndexer, AccountStateStore
+from app.services.aggregates import AddressAggregates
+from app.services.chain_follower import ChainFollower
+
+SENDER = Web3.to_checksum_address("0x" + "11" * 20)
+RECIPIENT = Web3.to_checksum_address("0x" + "22" * 20)
+TOKEN = Web3.to_checksum_address("0x" + "33" * 20)
+
+
+class _Component:
+    def __init__(self, data: Any = None) -> None:
+        self.data = data
+        self.restored: Any = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self.data
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        if data.get("broken"):
+            raise KeyError("entries")
+        self.restored = data
+
+
+def _store(tmp_path: Any, component: _Component) -> SnapshotStore:
+    store = SnapshotStore(tmp_path, interval=60, max_age=60, enabled=True)
+    store.register("thing", component)
+    return store
+
+
+def _rewrite(tmp_path: Any, **changes: Any) -> None:
+    path = tmp_path / "thing.json"
+    path.write_text(json.dumps({**json.loads(path.read_text()), **changes}))
+
+
+def test_round_trip(tmp_path: Any) -> None:
+    assert asyncio.run(_store(tmp_path, _Component({"n": 1})).save_all()) == 1
+    target = _Component()
+    store = _store(tmp_path, target)
+    assert store.restore_all() == 1
+    assert target.restored == {"n": 1} and "thing" in store.restored
+
+
+@pytest.mark.parametrize("change", [
+    {"scope": "1:0x" + "99" * 20},     # another chain or contract
+    {"format": snapshots.FORMAT + 1},  # written by an incompatible version
+    {"saved_at": 0},                   # older than SNAPSHOT_MAX_AGE
+    {"saved_at": 2 ** 40},             # from the future
+])
+def test_mismatched_or_stale_snapshots_are_ignored(tmp_path: Any, change: Dict[str, Any]) -> None:
+    asyncio.run(_store(tmp_path, _Component({"n": 1})).save_all())
+    _rewrite(tmp_path, **change)
+    target = _Component()
+    store = _store(tmp_path, target)
+    assert store.restore_all() == 0
+    assert target.restored is None and store.restored == {}
+
+
+def test_unreadable_or_unrestorable_snapshots_are_ignored(tmp_path: Any) -> None:
+    asyncio.run(_store(tmp_path, _Component({"broken": True})).save_all())
+    store = _store(tmp_path, _Component())
+    assert not store.restore("thing") and store.restored == {}
+
+    (tmp_path / "thing.json").write_text('{"format": 1, "sco')
+    assert not store.restore("thing")
+
+
+def test_a_failed_write_keeps_the_previous_file(tmp_path: Any, monkeypatch: Any) -> None:
+    component = _Component({"n": 1})
+    store = _store(tmp_path, component)
+    asyncio.run(store.save_all())
+
+    component.data = {"n": object()}  # not JSON-serialisable
+    assert asyncio.run(store.save_all()) == 0
+
+    def crash(src: Any, dst: Any) -> None:
+        raise OSError("disk full")
+
+    component.data = {"n": 2}
+    monkeypatch.setattr(os, "replace", crash)
+    assert asyncio.run(store.save_all()) == 0
+    assert json.loads((tmp_path / "thing.json").read_text())["data"] == {"n": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["thing.json"]  # no temporary file left
+
+
+# ------------------------------ chain follower and indexer ------------------------------
+
+
+def _pipeline(chain: Any, tmp_path: Any) -> Tuple[SnapshotStore, ChainFollower, AccountEventIndexer, AddressAggregates]:
+    follower = ChainFollower(chain, confirmations=2, window=16)
+    indexer = AccountEventIndexer(AccountStateStore(chain, mesh=None), chain, follower,
+                                  executor=CpuExecutor("inline", 0))
+    aggregates = AddressAggregates(chain, tmp_path / "aggregates.db", start_block=0)
+    aggregates.open()
+    indexer.subscribe(aggregates)
+    follower.subscribe(indexer)
+    store = SnapshotStore(tmp_path / "snapshots", interval=60, max_age=60, enabled=True)
+    store.register("chain_follower", follower)
+    store.register("account_indexer", indexer)
+    return store, follower, indexer, aggregates
+
+
+def _transfer(chain: Any, block: int, sequence: int) -> None:
+    chain.emit(block, "BalanceUpdated", sender=SENDER, recipient=RECIPIENT, token=TOKEN,
+               amount=5, sequenceNumber=sequence, orderId=f"order-{sequence}")
+
+
+def test_a_restarted_indexer_replays_the_events_it_missed(chain: Any, tmp_path: Any) -> None:
+    async def run() -> None:
+        store, follower, indexer, aggregates = _pipeline(chain, tmp_path)
+        chain.mine(5)
+        _transfer(chain, 4, 1)
+        await follower.poll()
+        await indexer.sync_once()
+        await store.stop()
+        aggregates.close()
+
+        chain.mine(3)  # emitted while the process was down
+        _transfer(chain, 7, 2)
+
+        store, follower, indexer, aggregates = _pipeline(chain, tmp_path)
+        assert store.restore_all() == 2
+        assert follower.head == 5 and indexer.synced_block == 5
+        await follower.poll()
+        await indexer.sync_once()
+        assert indexer.synced_block == 8
+        assert (await aggregates.summary(SENDER))["tx_count"] == 2
+        aggregates.close()
+
+    asyncio.run(run())
+
+
+def test_a_reorg_during_the_restart_rolls_back_from_the_restored_window(chain: Any, tmp_path: Any) -> None:
+    async def run() -> None:
+        store, follower, indexer, aggregates = _pipeline(chain, tmp_path)
+        chain.mine(5)
+        _transfer(chain, 5, 1)
+        await follower.poll()
+        await indexer.sync_once()
+        await store.stop()
+        aggregates.close()
+
+        chain.fork(at=3, length=4, tag="b")  # blocks 4.. replaced, the transfer is gone
+
+        store, follower, indexer, aggregates = _pipeline(chain, tmp_path)
+        store.restore_all()
+        assert await follower.poll() == 3
+        await indexer.sync_once()
+        assert follower.hash_of(5) == chain.blocks[5]["hash"]
+        assert indexer.synced_block == 7
+        assert (await aggregates.summary(SENDER))["tx_count"] == 0
+        aggregates.close()
+
+    asyncio.run(run())
@@ -0,0 +1,112 @@
+"""Viewport queries: the grid index answers like a full scan for any coordinate range."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import pytest
+
+from app.services.mesh_client import MeshClient
+from app.services.spatial_index import BBox, GridIndex, parse_bbox
+
+
+def _scan(points: Dict[str, Tuple[float, float]], bbox: BBox) -> List[str]:
+    min_x, min_y, max_x, max_y = bbox
+    return sorted(k for k, (x, y) in points.items() if min_x <= x <= max_x and min_y <= y <= max_y)
+
+
+@pytest.mark.parametrize("area", [1.0, 1000.0, 250_000.0])
+@pytest.mark.parametrize("cell_size", [None, 3.0])
+def test_queries_match_a_full_scan(area: float, cell_size: Any) -> None:
+    rng = random.Random(7)
+    index = GridIndex(cell_size, grid=16)
+    points: Dict[str, Tuple[float, float]] = {}
+    for i in range(300):
+        points[f"n{i}"] = (rng.uniform(0, area), rng.uniform(0, area))
+        index.upsert(f"n{i}", *points[f"n{i}"])
+    for i in range(0, 300, 3):  # moves and removals
+        if i % 2:
+            points[f"n{i}"] = (rng.uniform(-area, 0), rng.uniform(0, area))
+            index.upsert(f"n{i}", *points[f"n{i}"])
+        else:
+            del points[f"n{i}"]
+            index.remove(f"n{i}")
+    assert len(index) == len(points)
+
+    for _ in range(50):
+        x0, x1 = sorted(rng.uniform(-area, area) for _ in range(2))
+        y0, y1 = sorted(rng.uniform(0, area) for _ in range(2))
+        assert sorted(index.query((x0, y0, x1, y1))) == _scan(points, (x0, y0, x1, y1))
+    assert sorted(index.query((-area, 0, area, area))) == sorted(points)
+
+
+def test_cell_size_follows_the_coordinate_extent() -> None:
+    index = GridIndex(grid=10)
+    index.upsert("a", 0, 0)
+    index.upsert("b", 5000, 200)
+    assert index.extent() == 5000
+    assert index.cell_size == 500  # not a fraction of a degree
+    index.upsert("c", 6000, 0)  # within a factor of two: no rebuild
+    assert index.cell_size == 500
+    index.upsert("d", 0, 20_000)
+    assert index.cell_size == 2000
+    assert sorted(index.query((0, 0, 6000, 0))) == ["a", "c"]
+
+    fixed = GridIndex(0.5)
+    fixed.upsert("a", 0, 0)
+    fixed.upsert("b", 5000, 0)
+    assert fixed.cell_size == 0.5
+
+    with pytest.raises(ValueError):
+        GridIndex(0)
+
+
+def test_boundaries_are_inclusive_and_unchanged_moves_are_reported() -> None:
+    index = GridIndex(10.0)
+    assert index.upsert("a", 10, 10)
+    assert not index.upsert("a", 10, 10)
+    assert index.query(parse_bbox("20,20,10,10")) == ["a"]
+    assert index.query((10.0001, 10, 20, 20)) == []
+    assert not index.remove("missing")
+
+
+def test_clusters_report_count_and_centroid() -> None:
+    index = GridIndex()
+    for name, x, y in (("a", 1, 1), ("b", 3, 3), ("c", 90, 90)):
+        index.upsert(name, x, y)
+    clusters = sorted(index.cluster(index.query((0, 0, 100, 100)), 50), key=lambda c: c["count"])
+    assert clusters == [
+        {"count": 1, "x": 90, "y": 90, "members": ["c"]},
+        {"count": 2, "x": 2, "y": 2, "members": ["a", "b"]},
+    ]
+
+
+def test_viewport_discovery_clusters_by_the_mesh_extent() -> None:
+    positions = {"a": (10, 10), "b": (20, 15), "c": (900, 950), "d": (930, 940)}
+    body = {"authorities": [
+        {"name": n, "ip": "10.0.0.1", "port": 9000, "status": "online", "position": {"x": x, "y": y}}
+        for n, (x, y) in positions.items()
+    ] + [{"name": "e", "ip": "10.0.0.1", "port": 9000, "status": "online"}]}  # no position
+
+    def bridge(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/authorities":
+            return httpx.Response(200, json=body, request=request)
+        return httpx.Response(404, request=request)
+
+    async def run() -> None:
+        client = MeshClient(gateway_urls=["http://gw"], transport="http", http_transport=httpx.MockTransport(bridge))
+        await client.start()
+        try:
+            view = await client.discover_in_view((0, 0, 100, 100))
+            assert sorted(a["name"] for a in view["authorities"]) == ["a", "b"] and view["clusters"] == []
+
+            view = await client.discover_in_view((0, 0, 1000, 1000), zoom=0)
+            assert view["authorities"] == []
+            assert sorted(c["count"] for c in view["clusters"]) == [2, 2]  # two corners of the mesh
+        finally:
+            await client.close()
+
+    asyncio.run(run())
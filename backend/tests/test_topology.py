@@ -0,0 +1,46 @@
+"""Topology graph: malformed authorities are skipped, the endpoints seed it from discovery."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from app.services.topology import NetworkTopologyGraph
+
+
+def test_invalid_authority_is_skipped_and_keeps_its_last_good_state() -> None:
+    graph = NetworkTopologyGraph()
+    graph.apply_discovery([{"name": "auth-1", "ip": "10.0.0.1", "port": 8001, "status": "online"}])
+
+    changed = graph.apply_discovery([
+        {"name": "auth-1", "ip": "10.0.0.1", "port": "not-a-port"},
+        {"name": "auth-2", "ip": "10.0.0.2", "port": 8002, "position": {"x": "far"}},
+        {"name": "auth-3", "ip": "10.0.0.3", "port": 8003},
+    ])
+
+    nodes = {n["name"]: n for n in graph.topology()["authorities"]}
+    assert sorted(nodes) == ["auth-1", "auth-3"]
+    assert nodes["auth-1"]["address"]["port"] == 8001
+    assert nodes["auth-1"]["status"] == "online"
+    assert changed == 2  # auth-3 node and its connections
+
+
+def test_topology_endpoints_seed_the_graph_from_discovery(monkeypatch: Any) -> None:
+    from fastapi.testclient import TestClient  # pylint: disable=import-outside-toplevel
+
+    from app.main import app  # pylint: disable=import-outside-toplevel
+    from app.services.mesh_client import mesh_client  # pylint: disable=import-outside-toplevel
+    from app.services.topology import network_topology  # pylint: disable=import-outside-toplevel
+
+    calls: List[bool] = []
+
+    async def discover(*, force: bool = False) -> List[Dict[str, Any]]:
+        calls.append(force)
+        network_topology.apply_discovery([{"name": "auth-9", "ip": "10.0.0.9", "port": 8009}])
+        return []
+
+    monkeypatch.setattr(mesh_client, "discover", discover)
+    client = TestClient(app)
+    names = [a["name"] for a in client.get("/api/network/topology").json()["authorities"]]
+    assert "auth-9" in names
+    assert client.get("/api/network/metrics").json()["total_authorities"] >= 1
+    assert calls == [False, False]  # cached discovery, never forced
@@ -0,0 +1,184 @@
+"""Journal replay: senders take turns, a stuck sender backs off, final entries are compacted."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+from app.services.mesh_client import MeshClient, MeshClientError, MeshClientOutcomeUnknown
+from app.services.transfer_journal import JournalReplayer, TransferJournal
+
+STUCK = "0x" + "11" * 20
+
+
+def _body(sender: str, sequence: int) -> Dict[str, Any]:
+    return {"sender": sender, "recipient": "0x" + "99" * 20, "token_address": "0x" + "00" * 20,
+            "amount": 1, "sequence_number": sequence}
+
+
+class _Mesh:
+    def __init__(self) -> None:
+        self.sent: List[Any] = []
+        self.keys: List[Any] = []
+        self.timestamps: List[float] = []
+        self.lost: List[Any] = []  # (sender, sequence) executed but left unanswered once
+        self.executed: Dict[str, int] = {}
+
+    async def send_transfer(self, body: Dict[str, Any], *, idempotency_key: Any = None) -> Dict[str, Any]:
+        if body["sender"] == STUCK:
+            try:
+                raise httpx.ConnectError("gateway down")
+            except httpx.ConnectError as exc:
+                raise MeshClientError("Transfer failed: gateway down") from exc
+        self.keys.append(idempotency_key)
+        self.timestamps.append(body["timestamp"])
+        self.sent.append((body["sender"], body["sequence_number"]))
+        self.executed[body["sender"]] = body["sequence_number"]
+        if (body["sender"], body["sequence_number"]) in self.lost:
+            self.lost.remove((body["sender"], body["sequence_number"]))
+            try:
+                raise httpx.ReadTimeout("no answer")
+            except httpx.ReadTimeout as exc:
+                raise MeshClientOutcomeUnknown("Transfer outcome unknown: no answer") from exc
+        return {"ok": True}
+
+    async def get_account_info(self, address: str) -> Dict[str, Any]:
+        return {"address": address, "sequence_number": self.executed.get(address, 0)}
+
+
+def _replayer(tmp_path: Any) -> JournalReplayer:
+    journal = TransferJournal(tmp_path / "journal.db")
+    journal.open()
+    return JournalReplayer(journal, _Mesh(), interval=1.0, batch_size=4, concurrency=4,  # type: ignore[arg-type]
+                           retry_max_delay=60.0, retention=0.0, compact_interval=3600.0)
+
+
+def test_stuck_sender_backs_off_without_starving_others(tmp_path: Any) -> None:
+    async def run() -> None:
+        replayer = _replayer(tmp_path)
+        journal, mesh = replayer.journal, replayer.mesh
+        stuck = [await journal.append(_body(STUCK, n)) for n in range(1, 6)]
+        for sender in ("0x" + "22" * 20, "0x" + "33" * 20):
+            for n in (1, 2):
+                await journal.append(_body(sender, n))
+
+        # Senders take turns within the batch limit: one of each first
+        assert [e["sender"] for e in journal.pending(3)] == [STUCK, "0x" + "22" * 20, "0x" + "33" * 20]
+
+        delivered, blocked = await replayer.drain_once()
+        assert (delivered, blocked) == (2, True)  # stuck #1 fails, 22 #1 and 33 #1 go through
+        delivered, blocked = await replayer.drain_once()
+        assert (delivered, blocked) == (2, False)  # the stuck sender is backing off
+        assert sorted(mesh.sent) == [("0x" + "22" * 20, 1), ("0x" + "22" * 20, 2),
+                                     ("0x" + "33" * 20, 1), ("0x" + "33" * 20, 2)]
+
+        status = journal.status(stuck[0])
+        assert status["status"] == "pending" and status["attempts"] == 1
+        assert status["detail"] == "Transfer failed: gateway down"
+        assert journal.status(stuck[1])["attempts"] == 0
+        assert journal.pending(10) == []
+        with sqlite3.connect(journal.path) as db:
+            assert db.execute("SELECT COUNT(*) FROM outcomes").fetchone()[0] == 4  # final outcomes only
+
+        assert journal.compact(0.0) == 4
+        assert journal.pending_count() == 5
+        assert journal.status(stuck[0])["status"] == "pending"
+        journal.close()
+
+    asyncio.run(run())
+
+
+def test_replayer_compacts_from_the_drain_loop(tmp_path: Any) -> None:
+    async def run() -> None:
+        replayer = _replayer(tmp_path)
+        entry = await replayer.journal.append(_body("0x" + "22" * 20, 1))
+        await replayer.start()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if replayer.journal.status(entry) is None:
+                break
+        await replayer.stop()
+        assert replayer.journal.status(entry) is None  # sent, then compacted (retention 0)
+        replayer.journal.close()
+
+    asyncio.run(run())
+
+
+def test_unanswered_send_is_reconciled_instead_of_resent(tmp_path: Any) -> None:
+    async def run() -> None:
+        replayer = _replayer(tmp_path)
+        journal, mesh = replayer.journal, replayer.mesh
+        sender = "0x" + "22" * 20
+        first, second = [await journal.append(_body(sender, n)) for n in (1, 2)]
+        mesh.lost.append((sender, 1))
+
+        assert await replayer.drain_once() == (0, True)  # #1 executed, answer lost: #2 waits
+        assert journal.status(first)["status"] == "unknown"
+        assert journal.pending_count() == 2
+
+        with sqlite3.connect(journal.path) as db:
+            db.execute("UPDATE entries SET next_attempt_at = 0")  # backoff elapsed
+        assert await replayer.drain_once() == (2, False)
+        assert mesh.sent == [(sender, 1), (sender, 2)]  # #1 was not sent again
+        assert journal.status(first)["status"] == "sent"
+        assert journal.status(first)["detail"]["reconciled"] is True
+        assert mesh.keys == [str(first), str(second)]
+        journal.close()
+
+    asyncio.run(run())
+
+
+def test_unknown_send_not_seen_by_the_mesh_is_resent_unchanged(tmp_path: Any) -> None:
+    async def run() -> None:
+        replayer = _replayer(tmp_path)
+        journal, mesh = replayer.journal, replayer.mesh
+        sender = "0x" + "22" * 20
+        entry = await journal.append(_body(sender, 1))
+        mesh.lost.append((sender, 1))
+        await replayer.drain_once()
+        mesh.executed.clear()  # the bridge never forwarded it
+
+        with sqlite3.connect(journal.path) as db:
+            db.execute("UPDATE entries SET next_attempt_at = 0")
+        assert await replayer.drain_once() == (1, False)
+        assert mesh.keys == [str(entry), str(entry)]
+        assert mesh.timestamps[0] == mesh.timestamps[1]  # same order, same timestamp
+        journal.close()
+
+    asyncio.run(run())
+
+
+def test_only_one_worker_replays_a_journal(tmp_path: Any) -> None:
+    async def run() -> None:
+        leader, other = _replayer(tmp_path), _replayer(tmp_path)  # two workers, one journal file
+        entry = await other.journal.append(_body("0x" + "22" * 20, 1))
+        assert leader.journal.acquire_replay_lock()
+        await other.start()
+        await asyncio.sleep(0.05)
+        assert other.mesh.sent == []  # standing by
+        await other.stop()
+
+        leader.journal.release_replay_lock()
+        await other.start()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if other.journal.status(entry) is None:
+                break
+        await other.stop()
+        assert other.mesh.sent == [("0x" + "22" * 20, 1)]  # took over once the lock was free
+        leader.journal.close()
+        other.journal.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("sender", [None, 42, ["0x"], "alice"])
+def test_transfer_with_a_malformed_sender_is_refused(sender: Any) -> None:
+    body = _body("0x" + "22" * 20, 1)
+    body["sender"] = sender
+    with pytest.raises(MeshClientError):
+        MeshClient.validate_transfer(body)
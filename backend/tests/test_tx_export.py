@@ -0,0 +1,67 @@
+"""Exports cover finalized blocks only and select a time range by block number."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, List
+
+import pytest
+from web3 import Web3
+
+from app.core.executor import CpuExecutor
+from app.services.account_state import AccountEventIndexer, AccountStateStore
+from app.services.aggregates import AddressAggregates
+from app.services.chain_follower import ChainFollower
+from app.services.tx_export import export_events
+
+SENDER = Web3.to_checksum_address("0x" + "11" * 20)
+
+
+async def _export(aggregates: AddressAggregates, since: Any = None, until: Any = None) -> Any:
+    last_block, body = await export_events("csv", since, until, aggregates=aggregates)
+    lines = b"".join([chunk async for chunk in body]).decode().splitlines()
+    return last_block, [int(line.split(",")[0]) for line in lines[1:]]
+
+
+def test_export_waits_for_finalized_and_filters_by_block(chain: Any, tmp_path: Any) -> None:
+    async def run() -> None:
+        follower = ChainFollower(chain, confirmations=2, window=16)
+        indexer = AccountEventIndexer(AccountStateStore(chain, mesh=None), chain, follower,
+                                      executor=CpuExecutor("inline", 0))
+        aggregates = AddressAggregates(chain, tmp_path / "aggregates.db", start_block=0)
+        aggregates.open()
+        indexer.subscribe(aggregates)
+        follower.subscribe(indexer)
+        chain.mine(10)  # head 10
+        for block in (2, 4, 6, 9):
+            chain.emit(block, "FundingCompleted", sender=SENDER, token=SENDER, amount=block, transactionIndex=0)
+        await follower.poll()
+        await indexer.sync_once()
+        assert aggregates.block == 10
+
+        aggregates.finalized = None  # as after a restart, before the first finalized block
+        assert (await _export(aggregates)) == (None, [])
+
+        aggregates.finalized = 8
+        assert (await _export(aggregates)) == (8, [2, 4, 6])
+        times: List[int] = [b["timestamp"] for b in chain.blocks]
+        assert (await _export(aggregates, since=times[3], until=times[6])) == (8, [4])
+        assert (await _export(aggregates, since=times[5])) == (8, [6])
+        aggregates.close()
+
+    asyncio.run(run())
+
+
+def test_unreadable_block_times_surface_as_lookup_errors(chain: Any, tmp_path: Any) -> None:
+    aggregates = AddressAggregates(chain, tmp_path / "aggregates.db", start_block=0)
+    chain.mine(10)
+
+    def get_block(number: int) -> Any:
+        raise ValueError({"code": -32000, "message": "header not found"})
+
+    chain.w3.eth.get_block = get_block
+    with pytest.raises(LookupError):
+        asyncio.run(aggregates.first_block_at(1_700_000_005, 10))
+    chain.w3 = None  # RPC client never connected
+    with pytest.raises(LookupError):
+        asyncio.run(aggregates.first_block_at(1_700_000_005, 10))
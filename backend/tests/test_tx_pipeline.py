@@ -0,0 +1,172 @@
+"""TxPipeline recovery against an in-memory dev chain (mempool, nonces, receipts)."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import pytest
+import rlp
+from eth_account import Account
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from app.services.tx_pipeline import FILLER_GAS, TxDropped, TxPipeline
+
+DEV_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+
+
+class _DevEth:
+    """Just the ``eth`` calls the pipeline makes, on a one-account chain."""
+
+    def __init__(self) -> None:
+        self.block_number = 0
+        self.gas_price = 1
+        self.confirmed = 0  # next nonce the chain will accept
+        self.mempool: Dict[str, bytes] = {}
+        self.receipts: Dict[str, Dict[str, Any]] = {}
+        self.refuse: Optional[str] = None  # error for the next raw transactions
+        self.lose_reply = False  # take the next raw transaction but drop the connection
+
+    @staticmethod
+    def _nonce(raw: bytes) -> int:
+        return int.from_bytes(rlp.decode(raw)[0], "big")
+
+    def send_raw_transaction(self, raw: bytes) -> bytes:
+        if self.refuse:
+            raise ValueError(self.refuse)
+        tx_hash = Web3.keccak(raw)
+        self.mempool[tx_hash.hex()] = bytes(raw)
+        if self.lose_reply:
+            self.lose_reply = False
+            raise TimeoutError("read timed out")
+        return tx_hash
+
+    def get_transaction_count(self, address: str, tag: str) -> int:
+        del address
+        if tag == "latest":
+            return self.confirmed
+        nonces = {self._nonce(raw) for raw in self.mempool.values()}
+        nonce = self.confirmed
+        while nonce in nonces:
+            nonce += 1
+        return nonce
+
+    def get_transaction(self, tx_hash: str) -> Dict[str, Any]:
+        if tx_hash in self.mempool or tx_hash in self.receipts:
+            return {"hash": tx_hash}
+        raise TransactionNotFound(tx_hash)
+
+    def get_transaction_receipt(self, tx_hash: str) -> Dict[str, Any]:
+        if tx_hash in self.receipts:
+            return self.receipts[tx_hash]
+        raise TransactionNotFound(tx_hash)
+
+    def mine(self) -> None:
+        self.block_number += 1
+        by_nonce = {self._nonce(raw): h for h, raw in self.mempool.items()}
+        while self.confirmed in by_nonce:
+            tx_hash = by_nonce.pop(self.confirmed)
+            del self.mempool[tx_hash]
+            self.receipts[tx_hash] = {"transactionHash": tx_hash, "status": 1, "blockNumber": self.block_number}
+            self.confirmed += 1
+
+    def replace(self, nonce: int) -> None:
+        """Another transaction from the same account takes ``nonce``."""
+        for tx_hash, raw in list(self.mempool.items()):
+            if self._nonce(raw) == nonce:
+                del self.mempool[tx_hash]
+        self.confirmed = max(self.confirmed, nonce + 1)
+        self.block_number += 1
+
+
+class _DevChain:
+    def __init__(self) -> None:
+        self.w3 = type("W3", (), {})()
+        self.w3.eth = _DevEth()
+        self.account = Account.from_key(DEV_KEY)
+
+    async def rpc(self, fn: Any, *args: Any) -> Any:
+        return fn(*args)
+
+
+def _transfer(chain: _DevChain) -> Dict[str, Any]:
+    return {"to": chain.account.address, "value": 0, "gas": FILLER_GAS}
+
+
+async def _overdue(pipeline: TxPipeline) -> None:
+    await asyncio.sleep(pipeline.stuck_after * 2)
+
+
+def test_replaced_transaction_fails_instead_of_waiting_forever() -> None:
+    async def run() -> None:
+        chain = _DevChain()
+        pipeline = TxPipeline(chain, stuck_after=0.01)  # type: ignore[arg-type]
+        first = [await pipeline.send(_transfer(chain)) for _ in range(2)]
+        chain.w3.eth.mine()
+        assert await pipeline.poller.poll_once() == 2
+        assert [(await tx.wait(1))["status"] for tx in first] == [1, 1]
+
+        replaced = await pipeline.send(_transfer(chain))
+        chain.w3.eth.replace(replaced.nonce)
+        await _overdue(pipeline)
+        assert await pipeline.poller.poll_once() == 0
+
+        with pytest.raises(TxDropped):
+            await replaced.wait(1)
+        assert pipeline.outstanding == {}
+
+    asyncio.run(run())
+
+
+def test_refused_rebroadcast_is_logged_and_retried() -> None:
+    async def run() -> None:
+        chain = _DevChain()
+        pipeline = TxPipeline(chain, stuck_after=0.01)  # type: ignore[arg-type]
+        txs: List[Any] = [await pipeline.send(_transfer(chain)) for _ in range(2)]
+        chain.w3.eth.mempool.clear()  # both dropped by the node
+        chain.w3.eth.refuse = "txpool is full"
+        await _overdue(pipeline)
+
+        result = await pipeline.recover()  # must not raise
+        assert result["rebroadcast"] == 0 and len(pipeline.outstanding) == 2
+
+        chain.w3.eth.refuse = None
+        await _overdue(pipeline)
+        assert (await pipeline.recover())["rebroadcast"] == 2
+        chain.w3.eth.mine()
+        await pipeline.poller.poll_once()
+        assert [(await tx.wait(1))["status"] for tx in txs] == [1, 1]
+        assert all(tx.rebroadcasts == 1 for tx in txs)
+
+    asyncio.run(run())
+
+
+def test_broadcast_with_a_lost_reply_keeps_its_nonce() -> None:
+    async def run() -> None:
+        chain = _DevChain()
+        pipeline = TxPipeline(chain, stuck_after=0.01)  # type: ignore[arg-type]
+        chain.w3.eth.lose_reply = True
+        lost = await pipeline.send(_transfer(chain))  # tracked, not raised
+        following = await pipeline.send(_transfer(chain))
+        assert (lost.nonce, following.nonce) == (0, 1)
+        assert pipeline.nonces.released == []
+
+        chain.w3.eth.mine()
+        assert await pipeline.poller.poll_once() == 2
+        assert [(await tx.wait(1))["status"] for tx in (lost, following)] == [1, 1]
+
+    asyncio.run(run())
+
+
+def test_refused_broadcast_releases_its_nonce() -> None:
+    async def run() -> None:
+        chain = _DevChain()
+        pipeline = TxPipeline(chain, stuck_after=0.01)  # type: ignore[arg-type]
+        chain.w3.eth.refuse = "insufficient funds"
+        with pytest.raises(ValueError):
+            await pipeline.send(_transfer(chain))
+        chain.w3.eth.refuse = None
+        assert (await pipeline.send(_transfer(chain))).nonce == 0
+
+    asyncio.run(run())